@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+app/backtest.py
+离线批量打分：调 keywords.yml 权重时，把归档的历史标题整批重新打分。
+- 匹配仍用快照里编译好的 KeywordMatcher / SymbolMatcher（与实时打分同一套规则），
+  每条标题只得到几个计数：tier1 / tier2 / negative 命中数、是否含 watchlist 代码、是否命中黑名单
+- _calculate_score 换成对计数数组的 NumPy 向量运算；只改权重时用 calculate_scores 重算，不必再扫标题
+- 标题很多时可以按块分给进程池（processes > 0），每个进程只接收一次快照
+结果与 scorer.score_headline_for_test / _calculate_score 逐条一致。
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app import scorer
+from app.scorer import ScorerSnapshot, _normalize_headline, _score_weights
+
+SCORE_DTYPE = np.dtype([
+    ("tier1_hits", np.int32),
+    ("tier2_hits", np.int32),
+    ("negative_hits", np.int32),
+    ("watchlist", np.bool_),    # 含 watchlist 代码（含别名命中）
+    ("blacklisted", np.bool_),  # 命中 keyword_blacklist，实时链路会直接丢弃
+    ("score", np.float64),
+])
+
+_COUNT_FIELDS = ("tier1_hits", "tier2_hits", "negative_hits", "watchlist", "blacklisted")
+
+# 进程池里每个 worker 持有的快照（由 initializer 设置）
+_worker_snap: Optional[ScorerSnapshot] = None
+
+
+def _count_chunk(headlines: List[str], snap: Optional[ScorerSnapshot] = None) -> np.ndarray:
+    """逐条匹配，返回只填了计数字段的结构化数组（score 为 0）。"""
+    snap = snap or _worker_snap
+    match, extract = snap.keyword_matcher.match, snap.symbol_matcher.extract
+    t1, t2, neg, wl, bl = [], [], [], [], []
+    # 先攒 Python 列表再整列写入：逐个给 NumPy 元素赋值比匹配本身还贵
+    for headline in headlines:
+        hits = match(headline)
+        t1.append(len(hits.tier1))
+        t2.append(len(hits.tier2))
+        neg.append(len(hits.negatives))
+        wl.append(bool(extract(headline)))
+        bl.append(bool(hits.blacklist))
+    out = np.zeros(len(headlines), dtype=SCORE_DTYPE)
+    for name, column in zip(_COUNT_FIELDS, (t1, t2, neg, wl, bl)):
+        out[name] = column
+    return out
+
+
+def _init_worker(snap: ScorerSnapshot) -> None:
+    global _worker_snap
+    _worker_snap = snap
+
+
+def calculate_scores(tier1_hits, tier2_hits, negative_hits, watchlist,
+                     snap: Optional[ScorerSnapshot] = None) -> np.ndarray:
+    """
+    _calculate_score 的向量版：对命中计数数组按 snap 的 weights 计算分数（float64）。
+    累加顺序与逐条版相同，所以结果逐位一致。
+    """
+    base, w_tier1, w_tier2, w_negative, watchlist_bonus = _score_weights(snap or scorer._scorer_config.snapshot)
+    score = np.full(len(tier1_hits), base, dtype=np.float64)
+    score += np.asarray(tier1_hits) * w_tier1
+    score += np.asarray(tier2_hits) * w_tier2
+    score += np.asarray(negative_hits) * w_negative
+    score += np.where(np.asarray(watchlist, dtype=bool), watchlist_bonus, 0)
+    return score
+
+
+def _normalize(headlines: Iterable) -> List[str]:
+    # list / tuple / numpy 数组 / pandas Series 都行；缺失值（None、NaN）按空标题处理。
+    # 与实时打分一样先合并空白
+    return [_normalize_headline(h) if isinstance(h, str) else "" for h in headlines]
+
+
+def _chunks(items: List[str], size: int) -> List[Tuple[int, List[str]]]:
+    return [(start, items[start:start + size]) for start in range(0, len(items), size)]
+
+
+def score_headlines(headlines: Iterable, snap: Optional[ScorerSnapshot] = None,
+                    processes: int = 0, chunk_size: int = 5000) -> np.ndarray:
+    """
+    批量打分，返回 SCORE_DTYPE 结构化数组（与输入等长、同顺序）。
+
+    参数:
+        headlines: 标题序列
+        snap: 使用的配置版本（缺省为当前版本）
+        processes: >0 时用这么多个进程分块匹配；0 在当前进程里跑
+        chunk_size: 每块标题数
+
+    用法:
+        res = score_headlines(df["headline"])
+        df["score"] = res["score"]
+        res["score"] = calculate_scores(res["tier1_hits"], res["tier2_hits"],
+                                        res["negative_hits"], res["watchlist"], new_snap)  # 只换权重
+    """
+    if snap is None:
+        scorer._scorer_config.reload_if_needed()
+        snap = scorer._scorer_config.snapshot
+    items = _normalize(headlines)
+    chunk_size = max(1, int(chunk_size))
+    chunks = _chunks(items, chunk_size)
+
+    if processes and processes > 0 and len(chunks) > 1:
+        out = np.zeros(len(items), dtype=SCORE_DTYPE)
+        workers = min(int(processes), len(chunks))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(snap,)) as pool:
+            for (start, _), part in zip(chunks, pool.map(_count_chunk, [c for _, c in chunks])):
+                out[start:start + len(part)] = part
+    else:
+        out = _count_chunk(items, snap)
+
+    out["score"] = calculate_scores(out["tier1_hits"], out["tier2_hits"], out["negative_hits"], out["watchlist"], snap)
+    return out
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+app/cadence.py
+自适应轮询节奏：根据新条目的 ts_published 估计每个源的发布速率，
+在 [min_interval_sec, max_interval_sec] 内调整下一次轮询间隔。
+- 有新条目：按“平均发布间隔的一半”提速（至少减半）
+- 无新条目：指数退避（乘以 backoff），直到 max
+学到的状态（EWMA 发布间隔、最后发布时间）可持久化到 source_state 表。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional
+
+
+class AdaptiveCadence:
+    """单个源的轮询节奏估计器。"""
+
+    __slots__ = (
+        "base_sec", "min_sec", "max_sec", "backoff", "alpha", "enabled",
+        "ewma_gap_ms", "last_pub_ms", "interval_sec", "polls", "new_items",
+    )
+
+    def __init__(
+        self,
+        base_sec: float,
+        min_sec: Optional[float] = None,
+        max_sec: Optional[float] = None,
+        *,
+        backoff: float = 1.5,
+        alpha: float = 0.3,
+        enabled: bool = True,
+        ewma_gap_ms: Optional[float] = None,
+        last_pub_ms: Optional[int] = None,
+    ):
+        self.base_sec = float(base_sec)
+        self.min_sec = float(min_sec if min_sec is not None else max(10.0, self.base_sec / 4))
+        self.max_sec = float(max_sec if max_sec is not None else self.base_sec * 10)
+        if self.min_sec > self.max_sec:
+            self.min_sec, self.max_sec = self.max_sec, self.min_sec
+        self.backoff = max(1.0, float(backoff))
+        self.alpha = min(1.0, max(0.01, float(alpha)))
+        self.enabled = bool(enabled)
+
+        self.ewma_gap_ms = float(ewma_gap_ms) if ewma_gap_ms else None
+        self.last_pub_ms = int(last_pub_ms) if last_pub_ms else None
+        self.polls = 0
+        self.new_items = 0
+
+        # 有历史速率时直接从学到的目标间隔起步，否则从配置的 interval_sec 起步
+        self.interval_sec = self._clamp(self._target_sec() or self.base_sec)
+
+    @classmethod
+    def from_source(cls, src: Dict[str, Any], state: Optional[Dict[str, Any]] = None) -> "AdaptiveCadence":
+        """由 sources.yml 的一条配置 + source_state 里持久化的状态构造。"""
+        state = state or {}
+        return cls(
+            base_sec=float(src.get("interval_sec", 60)),
+            min_sec=src.get("min_interval_sec"),
+            max_sec=src.get("max_interval_sec"),
+            backoff=float(src.get("backoff", 1.5)),
+            enabled=bool(src.get("adaptive", True)),
+            ewma_gap_ms=state.get("ewma_gap_ms"),
+            last_pub_ms=state.get("last_pub_ms"),
+        )
+
+    # ---------- 估计 ----------
+
+    def _clamp(self, sec: float) -> float:
+        return min(self.max_sec, max(self.min_sec, sec))
+
+    def _target_sec(self) -> Optional[float]:
+        """目标间隔：平均发布间隔的一半（每条新闻期望被两次轮询覆盖）。"""
+        if not self.ewma_gap_ms:
+            return None
+        return self.ewma_gap_ms / 1000.0 / 2
+
+    def observe(self, published_ms: Iterable[int]) -> None:
+        """
+        记录一轮轮询的结果：published_ms 为本轮“新条目”的发布时间（空表示无新条目）。
+        只用比 last_pub_ms 更新的时间戳更新 EWMA，避免乱序/回填条目拉低估计。
+        """
+        self.polls += 1
+        fresh = sorted(int(ts) for ts in published_ms if ts)
+        if self.last_pub_ms is not None:
+            fresh = [ts for ts in fresh if ts > self.last_pub_ms]
+
+        if not fresh:
+            if self.enabled:
+                self.interval_sec = self._clamp(self.interval_sec * self.backoff)
+            return
+
+        self.new_items += len(fresh)
+        prev = self.last_pub_ms
+        for ts in fresh:
+            if prev is not None:
+                gap = ts - prev
+                if gap > 0:
+                    if self.ewma_gap_ms is None:
+                        self.ewma_gap_ms = float(gap)
+                    else:
+                        self.ewma_gap_ms = self.alpha * gap + (1 - self.alpha) * self.ewma_gap_ms
+            prev = ts
+        self.last_pub_ms = prev
+
+        if self.enabled:
+            target = self._target_sec()
+            fast = self.interval_sec / 2
+            self.interval_sec = self._clamp(min(target, fast) if target else fast)
+
+    def next_interval(self) -> float:
+        """下一次轮询前应等待的秒数；关闭自适应时恒为配置的 interval_sec。"""
+        return self.interval_sec if self.enabled else self.base_sec
+
+    # ---------- 统计 / 持久化 ----------
+
+    @property
+    def rate_per_hour(self) -> Optional[float]:
+        if not self.ewma_gap_ms:
+            return None
+        return 3600_000.0 / self.ewma_gap_ms
+
+    def state(self) -> Dict[str, Any]:
+        """需要写入 source_state 的字段。"""
+        return {"ewma_gap_ms": self.ewma_gap_ms, "last_pub_ms": self.last_pub_ms}
+
+    def stats(self) -> Dict[str, Any]:
+        rate = self.rate_per_hour
+        return {
+            "adaptive": self.enabled,
+            "interval_sec": round(self.next_interval(), 1),
+            "rate_per_hour": round(rate, 2) if rate is not None else None,
+            "ewma_gap_sec": round(self.ewma_gap_ms / 1000.0, 1) if self.ewma_gap_ms else None,
+            "last_pub_ms": self.last_pub_ms,
+            "polls": self.polls,
+            "new_items": self.new_items,
+        }
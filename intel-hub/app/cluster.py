@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+app/cluster.py
+入库时的近重复报道聚类：同一条新闻被不同源改写（加后缀、换词序、多几个词）也归到同一个 cluster_id。
+- 标题分词成特征集合：英文/数字按词（去掉常见虚词），中文连续段取相邻两字；特征用 crc32 转成整数
+- MinHash 签名（NumPy 一次算完 bands×rows 个哈希），按 band 切开放进 LSH 桶：
+  只有至少一个 band 完全相同的标题才成为候选，查找是常数次哈希表访问，与窗口内报道数无关
+- 候选再用特征集合算真实 Jaccard，>= similarity 才算同一报道；cluster_id 取该簇第一条事件的 id
+- 只保留 window 内的报道（按发现时间先进先出淘汰），另有条数上限；特征完全相同的转载不重复入索引，
+  每个桶只留最近 bucket_cap 条、每次最多核对 max_candidates 个候选，热门报道刷屏时单次查找的开销也有上限
+- 特征不足 min_features 的短标题（"NVDA surges"）只按特征集合完全相同归簇，不进 LSH 桶做相似匹配
+- 事件最终没入库时 discard() 撤回它新建的索引项，之后的转载不会归到库里不存在的 cluster_id 上
+相似度 0.6、16 band × 3 行时，Jaccard 0.6 的改写约 98% 能成为候选，0.3 以下的大多直接被桶过滤掉。
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from collections import deque
+from typing import Any, Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+# 不参与相似度的英文虚词（改写时最常增删的就是这些）
+_STOPWORDS = frozenset(
+    "a an the to of in on for and or by with at from as is are be its it this that after over amid says said "
+    "report reports reportedly new".split()
+)
+_TOKEN = re.compile(r"[a-z0-9]+(?:['.][a-z0-9]+)*|[㐀-鿿]+")
+
+_PRIME = 4294967311  # > 2^32 的素数；a < 2^31、特征 < 2^32，乘积不溢出 uint64
+
+
+def shingles(headline: str) -> FrozenSet[int]:
+    """标题 → 特征哈希集合（英文词 / 中文相邻两字）。"""
+    feats = set()
+    for tok in _TOKEN.findall(headline.lower()):
+        if tok[0] >= "㐀":
+            if len(tok) == 1:
+                feats.add(tok)
+            else:
+                feats.update(tok[i:i + 2] for i in range(len(tok) - 1))
+        elif tok not in _STOPWORDS:
+            feats.add(tok)
+    return frozenset(zlib.crc32(f.encode("utf-8")) for f in feats)
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+class _Story:
+    __slots__ = ("event_id", "cluster_id", "ts", "feats", "keys")
+
+    def __init__(self, event_id: str, cluster_id: str, ts: int, feats: FrozenSet[int], keys: bytes):
+        self.event_id = event_id
+        self.cluster_id = cluster_id
+        self.ts = ts
+        self.feats = feats
+        self.keys = keys  # 各 band 的 64 位桶键（uint64 数组的字节），比存一串 Python int 省内存
+
+
+class StoryIndex:
+    """
+    最近报道的 MinHash-LSH 索引。
+    assign(event_id, headline, ts_ms) 返回该事件的 cluster_id 并把它加入索引；
+    load() 用库里已有的 (id, headline, ts, cluster_id) 预热，重启后簇不断开。
+    桶里只有一条报道时直接存对象，两条以上才用 list（绝大多数桶只有一条）。
+    """
+
+    def __init__(self, window_hours: float = 24, similarity: float = 0.6, bands: int = 16, rows: int = 3,
+                 max_stories: int = 100_000, min_features: int = 3, bucket_cap: int = 32, max_candidates: int = 64,
+                 seed: int = 1):
+        self.window_ms = int(float(window_hours) * 3600 * 1000)
+        self.similarity = float(similarity)
+        self.bands, self.rows = int(bands), int(rows)
+        self.max_stories = int(max_stories)
+        self.min_features = int(min_features)  # 特征太少（如只有一个代码）只认原样转载，不做相似匹配
+        self.bucket_cap = int(bucket_cap)
+        self.max_candidates = int(max_candidates)
+        rng = np.random.default_rng(seed)
+        n = self.bands * self.rows
+        self._a = rng.integers(1, 2**31, size=(n, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 2**32, size=(n, 1), dtype=np.uint64)
+        # band 内 rows 个最小哈希合成一个 64 位桶键（乘奇数后相加，溢出回绕），再按 band 加盐区分
+        self._mix = rng.integers(1, 2**63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self._salt = rng.integers(0, 2**63, size=self.bands, dtype=np.uint64)
+        self._stories: Deque[_Story] = deque()
+        self._buckets: Dict[int, Union[_Story, List[_Story]]] = {}
+        self._exact: Dict[FrozenSet[int], _Story] = {}  # 特征集合 → 报道：原样转载一次字典查找就够
+        self.assigned = 0
+        self.joined = 0      # 归入已有簇的条数
+        self.candidates = 0  # 累计核对过的候选数
+
+    def _keys(self, feats: FrozenSet[int]) -> bytes:
+        x = np.fromiter(feats, dtype=np.uint64, count=len(feats))
+        sig = ((self._a * x + self._b) % _PRIME).min(axis=1).reshape(self.bands, self.rows)
+        return ((sig * self._mix).sum(axis=1, dtype=np.uint64) + self._salt).tobytes()
+
+    @staticmethod
+    def _key_list(keys: bytes) -> List[int]:
+        return np.frombuffer(keys, dtype=np.uint64).tolist()
+
+    def _drop_oldest(self) -> None:
+        old = self._stories.popleft()
+        if self._exact.get(old.feats) is old:
+            del self._exact[old.feats]
+        buckets = self._buckets
+        for key in self._key_list(old.keys):
+            # 桶内按加入顺序排列：最老的这条要么在桶头，要么已被 bucket_cap 挤掉
+            cur = buckets.get(key)
+            if cur is old:
+                del buckets[key]
+            elif type(cur) is list and cur[0] is old:
+                del cur[0]
+                if len(cur) == 1:
+                    buckets[key] = cur[0]
+
+    def _expire(self, now_ms: int) -> None:
+        cutoff = now_ms - self.window_ms
+        while self._stories and self._stories[0].ts < cutoff:
+            self._drop_oldest()
+
+    def _add(self, story: _Story) -> None:
+        self._stories.append(story)
+        self._exact[story.feats] = story
+        buckets, cap = self._buckets, self.bucket_cap
+        for key in self._key_list(story.keys):
+            cur = buckets.get(key)
+            if cur is None:
+                buckets[key] = story
+            elif type(cur) is list:
+                cur.append(story)
+                if len(cur) > cap:
+                    del cur[0]
+            else:
+                buckets[key] = [cur, story]
+        while len(self._stories) > self.max_stories:
+            self._drop_oldest()
+
+    def lookup(self, feats: FrozenSet[int], keys: bytes) -> Optional[_Story]:
+        """
+        窗口内与 feats 相似度达到阈值的报道；没有返回 None。
+        桶内从新到旧核对，第一条达到阈值的即返回（同簇的报道归到哪条都一样）；
+        最多核对 max_candidates 条，模板化标题扎堆时开销也有上限。
+        """
+        seen = set()
+        threshold, n = self.similarity, len(feats)
+        for key in self._key_list(keys):
+            cur = self._buckets.get(key)
+            if cur is None:
+                continue
+            for story in (reversed(cur) if type(cur) is list else (cur,)):
+                if id(story) in seen:
+                    continue
+                seen.add(id(story))
+                inter = len(feats & story.feats)
+                if inter >= threshold * (n + len(story.feats) - inter):
+                    self.candidates += len(seen)
+                    return story
+                if len(seen) >= self.max_candidates:
+                    self.candidates += len(seen)
+                    return None
+        self.candidates += len(seen)
+        return None
+
+    def assign(self, event_id: str, headline: str, ts_ms: int, cluster_id: str = "") -> str:
+        """
+        给事件分配 cluster_id（传入 cluster_id 时直接沿用，用于预热），并把它加入索引。
+        同一 event_id 重复到来（同源同链接）时不重复入索引。
+        """
+        self._expire(ts_ms)
+        self.assigned += 1
+        feats = shingles(headline)
+        if not feats:
+            return cluster_id or event_id
+        same = self._exact.get(feats)
+        if same is not None:
+            # 原样转载（或同一事件再来）：不算签名、不查桶；过了半个窗口才再入一次索引，持续转载的报道不会过期
+            if same.event_id != event_id and not cluster_id:
+                self.joined += 1
+            cluster_id = cluster_id or same.cluster_id
+            if ts_ms - same.ts > self.window_ms // 2:
+                self._add(_Story(event_id, cluster_id, ts_ms, feats, same.keys))
+            return cluster_id
+        # 特征太少（如只有一个代码）只认原样转载，不进 LSH 分桶，避免误并
+        short = len(feats) < self.min_features
+        keys = b"" if short else self._keys(feats)
+        if not cluster_id:
+            match = None if short else self.lookup(feats, keys)
+            if match is not None and match.event_id == event_id:
+                return match.cluster_id
+            if match is not None:
+                self.joined += 1
+            cluster_id = match.cluster_id if match is not None else event_id
+        self._add(_Story(event_id, cluster_id, ts_ms, feats, keys))
+        return cluster_id
+
+    def discard(self, event_id: str, headline: str) -> bool:
+        """
+        撤回 assign 时为 event_id 新建的索引项（事件最终没写进库时用），之后的转载不会再归到它名下。
+        事件只是并入了已有报道、没有新建索引项时什么也不做。
+        """
+        feats = shingles(headline)
+        story = self._exact.get(feats)
+        if story is None or story.event_id != event_id:
+            return False
+        del self._exact[feats]
+        buckets = self._buckets
+        for key in self._key_list(story.keys):
+            cur = buckets.get(key)
+            if cur is story:
+                del buckets[key]
+            elif type(cur) is list and story in cur:
+                cur.remove(story)
+                if len(cur) == 1:
+                    buckets[key] = cur[0]
+        # 队列里的这一项留着按时间过期：_drop_oldest 见它已不在 _exact / 桶里会直接跳过
+        return True
+
+    def load(self, rows: Iterable[Tuple[str, str, int, Optional[str]]]) -> int:
+        """按时间顺序的 (id, headline, ts_ms, cluster_id) 预热；返回加入的条数。"""
+        n = 0
+        for event_id, headline, ts_ms, cluster_id in rows:
+            self.assign(event_id, headline or "", int(ts_ms or 0), cluster_id or "")
+            n += 1
+        self.assigned -= n
+        return n
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "stories": len(self._stories),
+            "buckets": len(self._buckets),
+            "assigned": self.assigned,
+            "joined": self.joined,
+            "candidates": self.candidates,
+        }
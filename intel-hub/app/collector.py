@@ -1,15 +1,24 @@
 
 from __future__ import annotations
 
+import abc
 import asyncio
 import hashlib
 import time
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from urllib.parse import urlparse
 
 import yaml
 import httpx
-import feedparser
+
+from app import workers
+from app.cadence import AdaptiveCadence
+from app.parsers import ParserSpec, get_parser, run_parser
+from app.scheduler import Job, SourceScheduler, lane_of
+from app.seen import SeenIndex
+from app.storage import load_source_states, save_source_state
+from app.utils import import_object, link_uid, normalize_link, normalize_uid
 
 # -------------------- 工具函数 --------------------
 
@@ -18,123 +27,286 @@ def _now_ms() -> int:
 
 _CLIENT: Optional[httpx.AsyncClient] = None
 
-def _ensure_client() -> httpx.AsyncClient:
-    """全局复用一个 httpx AsyncClient，避免频繁建连。"""
+def _ensure_client(max_connections: int = 100) -> httpx.AsyncClient:
+    """全局复用一个 httpx AsyncClient，避免频繁建连；连接池大小跟随调度器的 max_inflight。"""
     global _CLIENT
     if _CLIENT is None:
-        _CLIENT = httpx.AsyncClient(timeout=15.0, headers={"User-Agent": "intel-hub/1.0"})
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        _CLIENT = httpx.AsyncClient(timeout=15.0, headers={"User-Agent": "intel-hub/1.0"}, limits=limits)
     return _CLIENT
 
-def normalize_link(url: Optional[str]) -> Optional[str]:
+# -------------------- 条件请求：ETag / Last-Modified / 正文哈希 --------------------
+
+def _conditional_headers(state: Dict[str, Any]) -> Dict[str, str]:
+    """根据上次保存的校验器构造 If-None-Match / If-Modified-Since。"""
+    headers: Dict[str, str] = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+    return headers
+
+
+def _response_validators(resp: httpx.Response) -> Dict[str, Any]:
+    return {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+
+
+async def _fetch_if_changed(
+    client: httpx.AsyncClient,
+    url: str,
+    state: Dict[str, Any],
+) -> Tuple[Optional[httpx.Response], Dict[str, Any]]:
     """
-    规范化链接：去掉 utm_*、ref/ref_src 等统计参数，去掉 fragment。
-    让“同文不同链”更容易被识别为同一条。
+    条件 GET，返回 (响应, 新校验器)；不改 state：
+    - 304 → (None, {})（完全跳过解析）
+    - 200 但正文哈希与上次相同（服务器不支持校验器）→ (None, 新校验器)，这份正文已处理过
+    - 其它 200 → (响应, 新校验器)
+    调用方解析成功后才 state.update(新校验器)；解析失败时下一轮不带校验器重新拉取，条目不会丢。
+    非 200/304 直接抛出 httpx.HTTPStatusError，由调用方统一退避。
     """
-    if not url:
-        return url
+    resp = await client.get(url, headers=_conditional_headers(state))
+    if resp.status_code == 304:
+        return None, {}
+    if resp.status_code != 200:
+        raise httpx.HTTPStatusError(f"unexpected status {resp.status_code}", request=resp.request, response=resp)
+
+    validators = {**_response_validators(resp), "body_hash": hashlib.sha1(resp.content).hexdigest()}
+    if validators["body_hash"] == state.get("body_hash"):
+        return None, validators
+    return resp, validators
+
+
+async def _save_state_if_changed(db: Any, source_id: str, state: Dict[str, Any], before: Dict[str, Any]) -> None:
+    """state 有变化才落库，避免每轮轮询都写一次 source_state。"""
+    if db is None or state == before:
+        return
     try:
-        from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
-        u = urlparse(url)
-        qs = [
-            (k, v)
-            for (k, v) in parse_qsl(u.query, keep_blank_values=True)
-            if not k.lower().startswith("utm_") and k.lower() not in {"ref", "ref_src"}
-        ]
-        return urlunparse((u.scheme, u.netloc, u.path, u.params, urlencode(qs, doseq=True), ""))
-    except Exception:
-        return url
+        await save_source_state(db, source_id, state)
+    except Exception as e:
+        print(f"[rss] {source_id} 保存源状态失败: {e!r}")
 
-def _published_ts(entry: Any) -> int:
-    """
-    从 feedparser 的 entry 里取发布时间；没有就用 now。
-    """
+# -------------------- 单源统计（自适应节奏） --------------------
+
+_CADENCES: Dict[str, AdaptiveCadence] = {}
+
+
+_SCHEDULER: Optional[SourceScheduler] = None
+_SEEN: Optional[SeenIndex] = None
+# RSS 源缺省解析器（注册名，见 app/parsers）与正文读取上限
+_DEFAULT_RSS_PARSER = "rss_stream"
+_RSS_MAX_BYTES = 2 * 1024 * 1024
+
+
+def _shared_seen() -> SeenIndex:
+    global _SEEN
+    if _SEEN is None:
+        _SEEN = SeenIndex()
+    return _SEEN
+
+
+def source_stats() -> Dict[str, Dict[str, Any]]:
+    """每个源当前的轮询间隔、学到的发布速率（条/小时）、轮询次数与新条目数。"""
+    return {sid: c.stats() for sid, c in _CADENCES.items()}
+
+
+def scheduler_stats() -> Dict[str, Any]:
+    """调度器概况：在途/排队/按 host 挂起的任务数与调度延迟分位数。"""
+    return _SCHEDULER.stats() if _SCHEDULER is not None else {}
+
+
+def seen_stats() -> Dict[str, Any]:
+    """已见条目索引：条目数、命中率与内存估算。"""
+    return _shared_seen().stats()
+
+
+async def _flush_seen_loop(seen: SeenIndex, db: Any, every_sec: float = 5.0) -> None:
+    """定期把新见到的 uid 批量落库、淘汰过期条目；取消时最后 flush 一次。"""
     try:
-        if getattr(entry, "published_parsed", None):
-            ts = time.mktime(entry.published_parsed)
-            return int(ts * 1000)
-        if getattr(entry, "updated_parsed", None):
-            ts = time.mktime(entry.updated_parsed)
-            return int(ts * 1000)
-    except Exception:
-        pass
-    return _now_ms()
+        while True:
+            await asyncio.sleep(every_sec)
+            try:
+                seen.evict_expired()
+                await seen.flush(db)
+            except Exception as e:
+                print(f"[collector] seen flush 失败: {e!r}")
+    except asyncio.CancelledError:
+        try:
+            await seen.flush(db)
+        except Exception:
+            pass
+        raise
 
-# -------------------- 单源：RSS 轮询 --------------------
+# -------------------- 单源：公共部分 --------------------
 
-async def _poll_rss(src: dict, queue: "asyncio.Queue"):
+class _PolledSource(abc.ABC):
     """
-    轮询 RSS 源，把解析出的条目放入 q_raw。
-    你现有的 main 会从 q_raw -> 打分 -> q_scored -> notifier 推送。
+    被 SourceScheduler 周期性调用 poll() 的单源基类：源状态、自适应节奏、已见索引与入队。
+    子类必须实现 poll()（抽象方法，漏写时实例化即报 TypeError）：只做“一轮”拉取，返回下一次轮询前的等待秒数。
+    db 不为空时，条件请求校验器与学到的发布速率会持久化到 source_state 表。
+    轮询间隔由 AdaptiveCadence 在 [min_interval_sec, max_interval_sec] 内自适应（adaptive: false 关闭）。
     """
-    url = src.get("url", "")
-    interval = int(src.get("interval_sec", 60))
-    source_id = src.get("id", "")
 
-    print(f"[collector] RSS 启动 {source_id} 每 {interval}s")
+    __slots__ = ("source_id", "url", "queue", "db", "state", "cadence", "seen")
+    _TAG = "collector"
+    _LOG_EACH = True  # 每条入队打一行日志（压测源关掉）
 
-    client = _ensure_client()
-    seen: set[str] = set()  # 运行期去重（避免一轮内重复）
+    def __init__(
+        self,
+        src: dict,
+        queue: "asyncio.Queue",
+        db: Any = None,
+        state: Optional[Dict[str, Any]] = None,
+        seen: Optional[SeenIndex] = None,
+    ):
+        self.source_id = src.get("id", "")
+        self.url = src.get("url", "")
+        self.queue = queue
+        self.db = db
+        self.state = state if state is not None else {}
+        self.cadence = AdaptiveCadence.from_source(src, self.state)
+        # 已见条目：所有源共享一个有界 + TTL 的索引（可持久化），在入队前跳过已知 uid
+        self.seen = seen if seen is not None else _shared_seen()
+        _CADENCES[self.source_id] = self.cadence
 
-    while True:
-        try:
-            resp = await client.get(url)
-            if resp.status_code != 200:
-                print(f"[rss] {source_id} 响应失败 status={resp.status_code}")
-                await asyncio.sleep(min(interval, 30))
-                continue
+    async def _emit(self, item: Dict[str, Any]) -> Optional[int]:
+        """解析器产出的一条 → 事件入队；已见过返回 None，否则返回其发布时间。"""
+        source_id = self.source_id
+        headline = item["headline"]
+        link = normalize_link(item["link"])
+
+        # 生成稳定的 uid（解析器给了就用，GUID / URL 等非 sha1 形式统一哈希；否则基于规范化后的链接）
+        uid = item.get("uid")
+        uid = normalize_uid(uid) if uid else link_uid(link)
+
+        if self.seen.check_and_add(source_id, uid):
+            return None
 
-            feed = feedparser.parse(resp.text)
+        ts_pub = item["ts_published"]
 
-            # 限制一次处理数量，避免超长列表引发抖动
-            for entry in feed.entries[:20]:
-                # 标题与链接
-                headline = entry.get("title") or entry.get("summary") or ""
-                link_raw = entry.get("link") or entry.get("id") or ""
-                link = normalize_link(link_raw)
+        # 与你项目的 Event 字段对齐（主流程会在 models/scorer/notifier 再加工）
+        ev = {
+            "id": uid,
+            "headline": headline,
+            "link": link,
+            "ts_published": ts_pub,
+            "ts_detected": _now_ms(),  # 如果你的模型用 ts_detected_utc/ms，请在后续转换
+            "source_id": source_id,
+            "raw": item["raw"],
+        }
 
-                # 生成稳定的 uid（优先 link，其次 title+published）
-                base_uid = link or (headline + str(_published_ts(entry)))
-                uid = hashlib.sha1(base_uid.encode("utf-8")).hexdigest()
+        await self.queue.put(ev)
+        if self._LOG_EACH:
+            print(f"[{self._TAG}] {source_id} 捕获 {headline[:60]}")
+        return ts_pub
 
-                if uid in seen:
-                    continue
-                seen.add(uid)
+    async def _finish(self, new_pub_ts: List[int], before: Dict[str, Any]) -> float:
+        """304/正文未变/无新条目 → 退避；有新条目 → 提速；状态有变化才落库。"""
+        self.cadence.observe(new_pub_ts)
+        self.state.update(self.cadence.state())
+        await _save_state_if_changed(self.db, self.source_id, self.state, before)
+        return self.cadence.next_interval()
 
-                ts_pub = _published_ts(entry)
-                now = _now_ms()
+    @abc.abstractmethod
+    async def poll(self) -> float:
+        """拉取一轮，返回下一次轮询前的等待秒数。"""
 
-                # 与你项目的 Event 字段对齐（主流程会在 models/scorer/notifier 再加工）
-                ev = {
-                    "id": uid,
-                    "headline": headline,
-                    "link": link,
-                    "ts_published": ts_pub,
-                    "ts_detected": now,       # 如果你的模型用 ts_detected_utc/ms，请在后续转换
-                    "source_id": source_id,
-                    "raw": entry,
-                }
+# -------------------- 单源：RSS 轮询 --------------------
+
+class _RssSource(_PolledSource):
+    """单个 RSS 源；正文交给 parser: 指定的解析器（缺省 collector.rss_parser）。"""
+
+    __slots__ = ("parser",)
+    _TAG = "rss"
+
+    def __init__(self, src: dict, queue: "asyncio.Queue", db: Any = None,
+                 state: Optional[Dict[str, Any]] = None, seen: Optional[SeenIndex] = None):
+        super().__init__(src, queue, db, state, seen)
+        self.parser: ParserSpec = get_parser(src.get("parser") or _DEFAULT_RSS_PARSER)
 
-                await queue.put(ev)
-                print(f"[rss] {source_id} 捕获 {headline[:60]}")
+    async def poll(self) -> float:
+        source_id = self.source_id
+        cadence = self.cadence
+        state = self.state
+        try:
+            before = dict(state)
+            try:
+                resp, validators = await _fetch_if_changed(_ensure_client(), self.url, state)
+            except httpx.HTTPStatusError as e:
+                print(f"[rss] {source_id} 响应失败 status={e.response.status_code}")
+                return min(cadence.next_interval(), 30)
+
+            new_pub_ts: List[int] = []
+            if resp is not None:
+                # CPU 密集的解析器交给 workers 执行池（inline/thread/process），只回传精简字段；
+                # 限制一次处理数量，避免超长列表引发抖动
+                items = await run_parser(
+                    self.parser, resp.content, source_id,
+                    limit=20, stop_keys=self.seen.keys_of(source_id), max_bytes=_RSS_MAX_BYTES,
+                )
+                for item in items:
+                    ts_pub = await self._emit(item)
+                    if ts_pub is not None:
+                        new_pub_ts.append(ts_pub)
 
-            # 正常完成一轮后休眠
-            await asyncio.sleep(interval)
+            # 正文处理完才记下新校验器
+            state.update(validators)
+            return await self._finish(new_pub_ts, before)
 
         except asyncio.CancelledError:
-            print(f"[rss] {source_id} 任务已取消")
-            return
+            raise
         except Exception as e:
             print(f"[rss] {source_id} 异常: {e!r}")
             # 出错做退避，避免频繁报错刷屏
-            await asyncio.sleep(min(interval, 60))
+            return min(cadence.next_interval(), 60)
+
+# -------------------- 采集器类型注册表 --------------------
+
+# sources.yml 的 type: → "模块:类"；首次用到才导入。
+# 类的约定：__init__(src, queue, db, state, seen)，带 source_id / url / cadence 属性和 async poll() -> 下次间隔秒数
+COLLECTOR_TYPES: Dict[str, str] = {
+    "rss": "app.collector:_RssSource",
+    "api": "app.api_source:ApiSource",
+    "dummy": "app.dummy_source:DummySource",
+    "edgar_submissions": "app.edgar_source:EdgarSource",
+}
+
+
+def register_collector(type_name: str, target: str) -> None:
+    """注册（或覆盖）一个采集器类型；只记录路径，不导入模块。"""
+    COLLECTOR_TYPES[type_name.strip().lower()] = target
+
+
+def _collector_class(type_name: str) -> Optional[type]:
+    """type 可以是注册名，也可以直接写 "模块:类"；都没有返回 None。"""
+    target = COLLECTOR_TYPES.get(type_name) or (type_name if ":" in type_name else None)
+    return import_object(target) if target else None
+
+# -------------------- 总调度：读取 sources.yml 并交给 SourceScheduler --------------------
+
+def _host_of(url: str) -> str:
+    try:
+        return urlparse(url).netloc.lower()
+    except Exception:
+        return ""
 
-# -------------------- 总调度：读取 sources.yml 并启动任务 --------------------
 
-async def run_collectors(queue: "asyncio.Queue") -> List[asyncio.Task]:
+def _initial_delay(source_id: str, interval: float, cap: float = 30.0) -> float:
+    """启动时把首轮请求按源 id 稳定地打散在 [0, min(interval, cap)) 内，避免上万个源同时到期。"""
+    h = int(hashlib.sha1(source_id.encode("utf-8")).hexdigest()[:8], 16)
+    return (h / 0xFFFFFFFF) * min(interval, cap)
+
+
+async def run_collectors(queue: "asyncio.Queue", db: Any = None, cfg: Optional[Dict[str, Any]] = None) -> List[asyncio.Task]:
     """
-    读取 ops/sources.yml，按 type 启动对应采集任务。
-    目前实现了 rss，其它类型保持占位（与你现有结构一致）。
+    读取 ops/sources.yml，按 type 从 COLLECTOR_TYPES 取采集器类，注册到一个 SourceScheduler，返回调度器 Task。
+    目前实现了 rss / api / dummy / edgar_submissions；未注册的类型打印后跳过。
+    传入 db 时会加载/保存各源的条件请求校验器与学到的发布速率。
+    cfg 为 config.yml 的 collector 段：max_inflight / per_host / critical_reserve / startup_spread_sec /
+    seen_max_per_source / seen_ttl_hours / parse_mode / parse_workers / parse_inline_below_bytes /
+    rss_parser / rss_max_bytes。
+    源的 priority: 字段（critical/high/normal/bulk）决定调度通道。
     """
+    cfg = cfg or {}
     tasks: List[asyncio.Task] = []
 
     root = Path(__file__).resolve().parents[1]
@@ -156,22 +328,69 @@ async def run_collectors(queue: "asyncio.Queue") -> List[asyncio.Task]:
     except FileNotFoundError:
         watchlist = {}
 
-    for src in sources:
+    # 源状态：条件请求校验器 + 发布速率（重启后沿用，避免冷启动全量拉取）
+    states: Dict[str, Dict[str, Any]] = {}
+    if db is not None:
+        try:
+            states = await load_source_states(db)
+        except Exception as e:
+            print(f"[collector] 读取 source_state 失败: {e!r}")
+
+    # 已见条目：启动时从 seen_items 恢复，之后定期批量落库
+    global _SEEN
+    seen = _SEEN = SeenIndex(
+        max_per_source=int(cfg.get("seen_max_per_source", 50)),
+        ttl_hours=float(cfg.get("seen_ttl_hours", 48)),
+    )
+    if db is not None:
+        try:
+            n = await seen.load(db)
+            print(f"[collector] 恢复已见条目 {n} 条")
+        except Exception as e:
+            print(f"[collector] 读取 seen_items 失败: {e!r}")
+        tasks.append(asyncio.create_task(_flush_seen_loop(seen, db)))
+
+    # 解析执行池：把 feed 解析挪出事件循环
+    mode = workers.configure(
+        cfg.get("parse_mode", "thread"),
+        cfg.get("parse_workers"),
+        int(cfg.get("parse_inline_below_bytes", 4096)),
+    )
+    global _DEFAULT_RSS_PARSER, _RSS_MAX_BYTES
+    _DEFAULT_RSS_PARSER = str(cfg.get("rss_parser", "rss_stream")).strip()
+    _RSS_MAX_BYTES = int(cfg.get("rss_max_bytes", _RSS_MAX_BYTES))
+    print(f"[collector] 解析模式: {mode}，RSS 缺省解析器: {_DEFAULT_RSS_PARSER}")
+
+    max_inflight = int(cfg.get("max_inflight", 64))
+    scheduler = SourceScheduler(
+        max_inflight=max_inflight,
+        per_host=int(cfg.get("per_host", 4)),
+        critical_reserve=float(cfg.get("critical_reserve", 0.25)),
+    )
+    _ensure_client(max_connections=max_inflight)
+    spread = float(cfg.get("startup_spread_sec", 30))
+
+    for src in sources or []:
         if not src.get("enabled", True):
             continue
-        t = (src.get("type", "") or "").strip().lower()
-
-        if t == "rss":
-            tasks.append(asyncio.create_task(_poll_rss(src, queue)))
-        elif t == "api":
-            # 这里预留位：如果你有 _poll_api，可在此补上
-            print(f"[collector] 未实现的类型: api ({src.get('id')})，跳过")
-        elif t == "dummy":
-            print(f"[collector] 未实现的类型: dummy ({src.get('id')})，跳过")
-        elif t == "edgar_submissions":
-            print(f"[collector] 未实现的类型: edgar_submissions ({src.get('id')})，跳过")
-        else:
-            print(f"[collector] 未知类型: {t} ({src})")
-
-    print(f"[collector] 已启动 {len(tasks)} 个采集任务")
-    return tasks
\ No newline at end of file
+        t = (src.get("type", "") or "").strip()
+        source_id = src.get("id", "")
+
+        try:
+            cls = _collector_class(t if ":" in t else t.lower())
+            if cls is None:
+                print(f"[collector] 未实现的类型: {t} ({source_id})，跳过")
+                continue
+            source = cls(src, queue, db, states.setdefault(source_id, {}), seen)
+        except Exception as e:
+            # 未知解析器 / 导入失败：只跳过这个源
+            print(f"[collector] 源 {source_id} 初始化失败: {e!r}，跳过")
+            continue
+        job = Job(source_id, _host_of(source.url), lane_of(src.get("priority")), source.poll)
+        scheduler.add(job, _initial_delay(source_id, source.cadence.next_interval(), spread))
+
+    global _SCHEDULER
+    _SCHEDULER = scheduler
+    tasks.append(asyncio.create_task(scheduler.run()))
+    print(f"[collector] 已注册 {len(scheduler)} 个采集源（max_inflight={scheduler.max_inflight}, per_host={scheduler.per_host}）")
+    return tasks
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+app/dummy_source.py
+type: dummy 的采集器：按 DummyGenerator 的速率/突发配置持续产生合成事件，用于全链路压测。
+
+    - id: dummy_load
+      type: dummy
+      interval_sec: 1               # 每隔多久产出一批（按这段时间应有的条数）
+      rate_per_sec: 200
+      burst: {every_sec: 60, duration_sec: 5, multiplier: 10}
+      duplicate_ratio: 0.1          # 同文不同链
+      lang_mix: {en: 0.7, zh: 0.3}
+      symbol_hit_rate: 0.3          # 标题里带 watchlist 代码的比例
+      tier_mix: {tier1: 0.05, tier2: 0.25, negative: 0.05, none: 0.65}
+      seed: 42
+
+不走自适应节奏、不落 source_state；每条事件经过已见判断后入队（不逐条打日志）。
+已见判断用源自己的一份 SeenIndex（容量/TTL 同共享索引），不进共享索引，也就不会被 flush 到 seen_items。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Optional
+
+from app.collector import _PolledSource, _now_ms, _shared_seen
+from app.parsers.dummy_gen import DEFAULTS, DummyGenerator
+from app.seen import SeenIndex
+
+
+class DummySource(_PolledSource):
+    __slots__ = ("gen", "tick_sec", "last_ms", "max_per_tick")
+    _TAG = "dummy"
+    _LOG_EACH = False
+
+    def __init__(self, src: dict, queue: "asyncio.Queue", db: Any = None,
+                 state: Optional[Dict[str, Any]] = None, seen: Optional[SeenIndex] = None):
+        shared = seen if seen is not None else _shared_seen()
+        super().__init__(src, queue, None, state, SeenIndex(shared.max_per_source, shared.ttl_ms / 3_600_000))
+        profile = {k: src[k] for k in DEFAULTS if k in src}
+        self.gen = DummyGenerator(self.source_id, profile)
+        self.tick_sec = max(0.01, float(src.get("interval_sec", 1.0)))
+        self.last_ms = _now_ms()
+        # 事件循环被卡住后不一次性补发太多（最多补 5 个 tick 的量）
+        self.max_per_tick = max(1, int(self.gen.rate * self.gen.burst_mult * self.tick_sec * 5))
+
+    async def poll(self) -> float:
+        now = _now_ms()
+        events = self.gen.events_between(self.last_ms, now)
+        self.last_ms = now
+        for item in events[: self.max_per_tick]:
+            await self._emit(item)
+        return self.tick_sec
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.gen.stats(), "queue": self.queue.qsize()}
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+app/edgar_source.py
+type: edgar_submissions 的采集器：轮询 SEC EDGAR submissions 接口（data.sec.gov/submissions/CIK##########.json），
+只把“上次游标之后”的新申报转成事件。
+
+    - id: sec_filings
+      type: edgar_submissions
+      url: https://data.sec.gov/submissions/   # 接口前缀（测试时指向本地回放服务）
+      user_agent: "Your Name you@example.com"  # SEC 要求带联系方式
+      ciks: {NVDA: 1045810, AMD: 2488}         # 缺省取 ops/universe.yml 的 clk_map
+      forms: ["8-K", "8-K/A"]                  # 只要这些表单
+      items: ["1.01", "5.02"]                  # 8-K 只要这些 item（空 = 全要）
+      interval_sec: 60                         # 全部 CIK 轮完一遍的目标周期
+      batch_size: 50                           # 每轮处理的 CIK 数
+      concurrency: 4                           # 一轮内的并发请求数
+      rate_limit_per_sec: 8                    # 同一 host 所有请求共享的速率上限（SEC 为 10/s）
+      backfill_hours: 0                        # 首次见到某 CIK 时补发多久以内的申报（0 = 只建游标）
+
+- 每个 CIK 一条游标（edgar_cursor 表）：最后处理的 accession 号 + ETag/Last-Modified
+- recent 数组按时间倒序，从头扫到游标为止就是增量；条件请求命中 304 时连解码都省了
+- 每轮每个 CIK 最多处理游标之后最早的 50 条，积压时游标逐轮往新的方向推进，不跳过；游标掉出窗口时打日志
+- 解码/筛选（parse_submissions）走 workers 执行池，只回传精简字段
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import hashlib
+import math
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import yaml
+
+from app import workers
+from app.collector import _PolledSource, _conditional_headers, _ensure_client, _host_of, _now_ms
+from app.scheduler import TokenBucket
+from app.seen import SeenIndex
+from app.storage import load_edgar_cursors, save_edgar_cursors
+
+DEFAULT_BASE_URL = "https://data.sec.gov/submissions/"
+ARCHIVE_URL = "https://www.sec.gov/Archives/edgar/data"
+
+# 8-K item → 标题用语（含打分器关键词能命中的英文词）
+ITEM_NAMES: Dict[str, str] = {
+    "1.01": "Entry into a Material Definitive Agreement",
+    "1.02": "Termination of a Material Definitive Agreement",
+    "1.03": "Bankruptcy or Receivership",
+    "1.05": "Material Cybersecurity Incident",
+    "2.01": "Completion of Acquisition or Disposition of Assets",
+    "2.02": "Results of Operations and Financial Condition",
+    "2.03": "Creation of a Direct Financial Obligation",
+    "2.05": "Costs Associated with Exit or Disposal Activities",
+    "2.06": "Material Impairments",
+    "3.01": "Notice of Delisting",
+    "4.01": "Change in Certifying Accountant",
+    "4.02": "Non-Reliance on Previously Issued Financial Statements",
+    "5.01": "Change in Control",
+    "5.02": "Departure or Appointment of Directors or Officers",
+    "5.03": "Amendments to Articles or Bylaws",
+    "5.07": "Submission of Matters to a Vote of Security Holders",
+    "7.01": "Regulation FD Disclosure",
+    "8.01": "Other Events",
+}
+_EXHIBITS_ONLY = "9.01"
+
+# 同一 host 的所有 edgar 源共享一个令牌桶
+_BUCKETS: Dict[str, TokenBucket] = {}
+
+
+def cik10(cik: Any) -> str:
+    return str(int(str(cik).strip())).zfill(10)
+
+
+def _ts_ms(acceptance: str, filing_date: str) -> int:
+    for value in (acceptance, filing_date):
+        if not value:
+            continue
+        try:
+            dt = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            continue
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=datetime.timezone.utc)
+        return int(dt.timestamp() * 1000)
+    return _now_ms()
+
+
+def parse_submissions(
+    body: bytes,
+    cik: str,
+    label: str,
+    last_accession: Optional[str],
+    forms: FrozenSet[str],
+    items: FrozenSet[str],
+    since_ms: Optional[int],
+    source_id: str,
+    max_new: int = 50,
+) -> Tuple[Optional[str], List[Dict], bool]:
+    """
+    解码一份 submissions JSON，返回 (新游标, 游标之后的新申报事件列表, 是否已追平)。
+    last_accession 为 None（首次见到该 CIK）时只补发 since_ms 之后的申报；since_ms 也为 None 则不补发。
+    游标之后超过 max_new 条时只处理紧挨游标的最早 max_new 条，游标推进到其中最新的一条、返回未追平，
+    下一轮接着往新的方向翻，积压不会被丢掉。
+    """
+    import ujson
+
+    doc = ujson.loads(body)
+    recent = (doc.get("filings") or {}).get("recent") or {}
+    accessions: List[str] = recent.get("accessionNumber") or []
+    if not accessions:
+        return last_accession, [], True
+    if last_accession is None and since_ms is None:
+        return accessions[0], [], True
+
+    col = lambda name: recent.get(name) or [""] * len(accessions)  # noqa: E731
+    form_col, items_col, docs, descs = col("form"), col("items"), col("primaryDocument"), col("primaryDocDescription")
+    accepted, filed = col("acceptanceDateTime"), col("filingDate")
+    label = label or ((doc.get("tickers") or [None])[0]) or doc.get("name") or cik
+    cik_int = str(int(cik))
+
+    # recent 按时间倒序：[0, end) 是游标之后（或 backfill 窗口内）的全部新申报
+    if last_accession is None:
+        end = 0
+        while end < len(accessions) and _ts_ms(accepted[end], filed[end]) >= since_ms:
+            end += 1
+    elif last_accession in accessions:
+        end = accessions.index(last_accession)
+    else:
+        end = len(accessions)
+        print(f"[edgar] CIK{cik} 游标 {last_accession} 不在 recent 窗口（{end} 条）内，窗口之前的申报已无法补发")
+    start = max(0, end - max_new)
+    if start:
+        print(f"[edgar] CIK{cik} 积压 {end} 条新申报，本轮处理最早的 {max_new} 条")
+
+    events: List[Dict] = []
+    for i in range(start, end):
+        acc = accessions[i]
+        form = form_col[i] or ""
+        if forms and form not in forms:
+            continue
+        codes = [c.strip() for c in (items_col[i] or "").split(",") if c.strip()]
+        if items and form.startswith("8-K") and not items.intersection(codes):
+            continue
+
+        named = [ITEM_NAMES.get(c, f"Item {c}") for c in codes if c != _EXHIBITS_ONLY]
+        what = "; ".join(named) or descs[i] or form
+        link = f"{ARCHIVE_URL}/{cik_int}/{acc.replace('-', '')}/{docs[i]}" if docs[i] else \
+            f"{ARCHIVE_URL}/{cik_int}/{acc.replace('-', '')}/"
+        events.append({
+            "headline": f"{label} {form}: {what}",
+            "link": link,
+            "ts_published": _ts_ms(accepted[i], filed[i]),
+            "source_id": source_id,
+            "uid": hashlib.sha1(f"edgar:{acc}".encode("utf-8")).hexdigest(),
+            "raw": {"cik": cik, "accession": acc, "form": form, "items": codes,
+                    "filing_date": filed[i], "company": doc.get("name")},
+        })
+    if end == 0:
+        return last_accession or accessions[0], events, True
+    return accessions[start], events, start == 0
+
+
+def _load_ciks(src: Dict[str, Any]) -> Dict[str, str]:
+    """sources.yml 的 ciks:（{标签: cik} 或 cik 列表）→ {cik10: 标签}；缺省取 universe.yml 的 clk_map。"""
+    raw = src.get("ciks")
+    if raw is None:
+        try:
+            path = Path(__file__).resolve().parents[1] / "ops" / "universe.yml"
+            uni = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+            raw = uni.get("clk_map") or uni.get("ck_map") or {}
+        except FileNotFoundError:
+            raw = {}
+    if isinstance(raw, dict):
+        return {cik10(cik): str(label) for label, cik in raw.items() if cik}
+    return {cik10(cik): "" for cik in raw or []}
+
+
+class EdgarSource(_PolledSource):
+    __slots__ = ("ciks", "order", "forms", "items", "user_agent", "batch_size", "concurrency", "bucket",
+                 "since_ms", "cursors", "loaded", "offset", "interval", "requests", "not_modified")
+    _TAG = "edgar"
+
+    def __init__(self, src: dict, queue: "asyncio.Queue", db: Any = None,
+                 state: Optional[Dict[str, Any]] = None, seen: Optional[SeenIndex] = None):
+        super().__init__(src, queue, db, state, seen)
+        self.url = src.get("url") or DEFAULT_BASE_URL
+        if not self.url.endswith("/"):
+            self.url += "/"
+        self.ciks = _load_ciks(src)
+        self.order = sorted(self.ciks)
+        self.forms = frozenset(src.get("forms") or ["8-K", "8-K/A"])
+        self.items = frozenset(str(i) for i in (src.get("items") or []))
+        self.user_agent = src.get("user_agent") or "intel-hub/1.0"
+        self.batch_size = max(1, int(src.get("batch_size", 50)))
+        self.concurrency = max(1, int(src.get("concurrency", 4)))
+        host = _host_of(self.url)
+        if host not in _BUCKETS:
+            _BUCKETS[host] = TokenBucket(float(src.get("rate_limit_per_sec", 8)))
+        self.bucket = _BUCKETS[host]
+        backfill = float(src.get("backfill_hours", 0))
+        self.since_ms = (_now_ms() - int(backfill * 3600 * 1000)) if backfill > 0 else None
+        self.cursors: Dict[str, Dict[str, Any]] = {}
+        self.loaded = False
+        self.offset = 0
+        self.interval = float(src.get("interval_sec", 60))
+        self.requests = 0
+        self.not_modified = 0
+
+    async def poll(self) -> float:
+        if not self.order:
+            return self.interval
+        if not self.loaded:
+            self.loaded = True
+            if self.db is not None:
+                try:
+                    saved = await load_edgar_cursors(self.db)
+                    self.cursors = {cik: c for cik, c in saved.items() if cik in self.ciks}
+                except Exception as e:
+                    print(f"[edgar] 读取 edgar_cursor 失败: {e!r}")
+
+        # 轮转取下一批 CIK
+        n = len(self.order)
+        batch = [self.order[(self.offset + i) % n] for i in range(min(self.batch_size, n))]
+        self.offset = (self.offset + len(batch)) % n
+
+        sem = asyncio.Semaphore(self.concurrency)
+        changed: Dict[str, Dict[str, Any]] = {}
+
+        async def one(cik: str) -> List[Dict]:
+            async with sem:
+                try:
+                    return await self._fetch(cik, changed)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"[edgar] CIK{cik} 异常: {e!r}")
+                    return []
+
+        results = await asyncio.gather(*(one(cik) for cik in batch))
+        for events in results:
+            for item in events:
+                await self._emit(item)
+
+        if changed and self.db is not None:
+            try:
+                await save_edgar_cursors(self.db, changed)
+            except Exception as e:
+                print(f"[edgar] 保存 edgar_cursor 失败: {e!r}")
+
+        # 每批之间的间隔：全部 CIK 大约每 interval_sec 轮完一遍（速率上限另由令牌桶保证）
+        return self.interval / math.ceil(n / self.batch_size)
+
+    async def _fetch(self, cik: str, changed: Dict[str, Dict[str, Any]]) -> List[Dict]:
+        cursor = self.cursors.get(cik) or {}
+        headers = {"User-Agent": self.user_agent, **_conditional_headers(cursor)}
+        await self.bucket.acquire()
+        self.requests += 1
+        resp = await _ensure_client().get(f"{self.url}CIK{cik}.json", headers=headers)
+        if resp.status_code == 304:
+            self.not_modified += 1
+            return []
+        if resp.status_code != 200:
+            print(f"[edgar] CIK{cik} 响应失败 status={resp.status_code}")
+            return []
+
+        body = resp.content
+        last_accession, events, caught_up = await workers.run_cpu(
+            parse_submissions, body, cik, self.ciks.get(cik, ""), cursor.get("last_accession"),
+            self.forms, self.items, self.since_ms, self.source_id, size=len(body),
+        )
+        # 没追平时不记 ETag：下一轮要拿到完整响应接着翻，不能被 304 挡住
+        new_cursor = {
+            "last_accession": last_accession,
+            "etag": resp.headers.get("ETag") if caught_up else None,
+            "last_modified": resp.headers.get("Last-Modified") if caught_up else None,
+        }
+        if new_cursor != cursor:
+            self.cursors[cik] = changed[cik] = new_cursor
+        return events
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ciks": len(self.order), "cursors": len(self.cursors),
+                "requests": self.requests, "not_modified": self.not_modified}
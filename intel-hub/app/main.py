@@ -17,9 +17,12 @@ if str(ROOT) not in sys.path:
 
 # 用**相对导入**对齐包结构
 from .collector import run_collectors              # 你已有
-from .scorer import run_scorer                     # 你已有
+from .scorer import run_scorer, BATCH_SIZE         # 你已有
 from .notifier import Notifier                     # 你已有（类）
-from .storage import init_db, delete_expired       # 你已有
+from .storage import (init_db, connect_db, delete_expired, mark_pushed, incremental_vacuum,  # 你已有
+                      DELETE_EXPIRED_CHUNK, DELETE_PAUSE_MS, VACUUM_PAGES)
+from .writer import StorageWriter
+from . import workers
 
 
 DEFAULT_CFG = {
@@ -36,7 +39,52 @@ DEFAULT_CFG = {
         "notify_channels": ["telegram"],
         # 新增：启动自检
         "debug_startup_push": False,
-    }
+    },
+    # 采集调度：全局在途请求上限 / 单 host 并发上限 / 给 critical+high 通道预留的名额比例
+    "collector": {
+        "max_inflight": 64,
+        "per_host": 4,
+        "critical_reserve": 0.25,
+        # 启动时首轮请求打散的时间窗（秒）；源很多时调大，避免启动风暴
+        "startup_spread_sec": 30,
+        # 已见条目索引：每源保留条数上限 / TTL（小时）
+        "seen_max_per_source": 50,
+        "seen_ttl_hours": 48,
+        # feed 解析执行方式：inline / thread / process；小于阈值（字节）的正文直接就地解析
+        "parse_mode": "thread",
+        "parse_workers": None,
+        "parse_inline_below_bytes": 4096,
+        # RSS 源缺省解析器（app/parsers 注册名：rss_stream / rss_default）；正文读取上限（字节）
+        "rss_parser": "rss_stream",
+        "rss_max_bytes": 2 * 1024 * 1024,
+    },
+    # 打分：每批最多条数 / 不满一批时最多再等的毫秒数（batch_size: 1 即逐条处理）
+    # cache_size：转载标题的打分结果缓存条数（0 关闭）
+    # cluster_*：近重复报道聚类的回看窗口（小时）与相似度下限（标题特征的 Jaccard）
+    # workers：同时在处理的批数；processes：标题匹配的进程池大小（0 = 在事件循环里算）
+    "scorer": {
+        "batch_size": BATCH_SIZE,
+        "batch_wait_ms": 0,
+        "cache_size": 50000,
+        "cluster_window_hours": 24,
+        "cluster_similarity": 0.6,
+        "workers": 1,
+        "processes": 0,
+    },
+    # 事件表单写者：写队列上限 / 每组最多操作数 / 攒组最多等的毫秒数（enabled: false 则各自直接写库）
+    "writer": {
+        "enabled": True,
+        "queue_size": 10000,
+        "group_ops": 256,
+        "group_ms": 5,
+    },
+    # 过期清理：间隔秒数 / 每段删除行数（一段一个事务）/ 段间歇的毫秒数 / 每步归还的空闲页（0 不归还）
+    "housekeeper": {
+        "every_sec": 600,
+        "chunk": DELETE_EXPIRED_CHUNK,
+        "pause_ms": DELETE_PAUSE_MS,
+        "vacuum_pages": VACUUM_PAGES,
+    },
 }
 
 def load_cfg() -> dict:
@@ -47,16 +95,18 @@ def load_cfg() -> dict:
             data = yaml.safe_load(cfg_path.read_text(encoding="utf-8")) or {}
             # 深合并（只做最外层浅合并，避免过度魔法）
             out = {**DEFAULT_CFG, **data}
-            if "notifier" in data:
-                out["notifier"] = {**DEFAULT_CFG["notifier"], **(data.get("notifier") or {})}
+            for section in ("notifier", "collector", "scorer", "writer", "housekeeper"):
+                if section in data:
+                    out[section] = {**DEFAULT_CFG[section], **(data.get(section) or {})}
             return out
         except Exception as e:
             print(f"[main] 读取 ops/config.yml 失败，使用默认。err={e}")
     return DEFAULT_CFG
 
-async def run_notifier_loop(q_scored: "asyncio.Queue", db, notifier_cfg: dict):
+async def run_notifier_loop(q_scored: "asyncio.Queue", db, notifier_cfg: dict, writer: StorageWriter = None):
     """
     把队列里的事件交给 Notifier。notifier_cfg 可以是整个 cfg，也可以是 cfg['notifier']。
+    给了 writer 时 pushed=1 交给单写者组提交（不等提交完成）。
     """
     # 允许传进来“整份 cfg”或“notifier 子配置”
     if "notifier" in notifier_cfg:
@@ -96,9 +146,12 @@ async def run_notifier_loop(q_scored: "asyncio.Queue", db, notifier_cfg: dict):
             try:
                 # 你自己的 notifier 会根据分数、去重、静默时段等决定是否真正推送
                 ok = await notifier.push(ev)
-                if not ok:
-                    # 可选：这里打印一下便于观察
-                    pass
+                if ok:
+                    # 落库 pushed=1：重启时线程索引从这里预热
+                    if writer is not None:
+                        await writer.mark_pushed(ev.id)
+                    else:
+                        await mark_pushed(db, ev.id)
             except Exception as e:
                 print(f"[notifier] push error: {e}")
             finally:
@@ -110,14 +163,49 @@ async def run_notifier_loop(q_scored: "asyncio.Queue", db, notifier_cfg: dict):
         print("[notifier] finished")
     
 
-async def run_housekeeper(db, every_sec: int = 600):
-    """定期清理过期事件，避免库膨胀。"""
-    print("[housekeeper] started")
+async def _in_steps(step, size: int, pause_ms: float) -> int:
+    """反复 await step()（每次至多处理 size 个）直到某次不满 size，步与步之间歇 pause_ms 毫秒；返回总数。"""
+    total = 0
+    while True:
+        n = await step()
+        total += n
+        if n < size:
+            return total
+        await asyncio.sleep(pause_ms / 1000)
+
+
+async def run_housekeeper(db, every_sec: int = 600, writer: StorageWriter = None,
+                          chunk: int = DELETE_EXPIRED_CHUNK, pause_ms: float = DELETE_PAUSE_MS,
+                          vacuum_pages: int = VACUUM_PAGES):
+    """
+    定期清理过期事件，避免库膨胀（给了 writer 时由单写者执行，不与入库抢连接）。
+    按 chunk 行一段删、每段单独提交，段间歇 pause_ms 让入库的组提交插进来，入库最多被挡一段的时间；
+    删完再按每步 vacuum_pages 页归还空闲页（vacuum_pages=0 则留给后续写入复用）。
+    """
+    print(f"[housekeeper] started chunk={chunk} pause_ms={pause_ms} vacuum_pages={vacuum_pages}")
     try:
         while True:
             try:
                 now_ms = int(time.time() * 1000)
-                await delete_expired(db, now_ms)
+                t0 = time.perf_counter()
+                freed = 0
+                if writer is not None:
+                    async def delete_step():
+                        return await (await writer.delete_expired(now_ms, chunk))
+
+                    async def vacuum_step():
+                        return await (await writer.incremental_vacuum(vacuum_pages))
+
+                    deleted = await _in_steps(delete_step, chunk, pause_ms)
+                    if vacuum_pages > 0:
+                        freed = await _in_steps(vacuum_step, vacuum_pages, pause_ms)
+                else:
+                    deleted = await delete_expired(db, now_ms, chunk, pause_ms)
+                    if vacuum_pages > 0:
+                        freed = await _in_steps(lambda: incremental_vacuum(db, vacuum_pages), vacuum_pages, pause_ms)
+                if deleted or freed:
+                    print(f"[housekeeper] 删除过期 {deleted} 条，归还 {freed} 页，"
+                          f"用时 {time.perf_counter() - t0:.1f}s")
             except Exception as e:
                 print(f"[housekeeper] delete_expired error: {e}")
             await asyncio.sleep(every_sec)
@@ -130,7 +218,8 @@ async def run_housekeeper(db, every_sec: int = 600):
 async def main(run_seconds: int = 30):
     cfg = load_cfg()
 
-    db = await init_db(ROOT / "intel.db")
+    db_path = ROOT / "intel.db"
+    db = await init_db(db_path)
 
     q_raw: asyncio.Queue = asyncio.Queue()
     q_scored: asyncio.Queue = asyncio.Queue()
@@ -138,12 +227,37 @@ async def main(run_seconds: int = 30):
     tasks = []
     print("[main] creating tasks…")
 
-    # 1) 采集器 -> q_raw
-    tasks.append(asyncio.create_task(run_collectors(q_raw)))
+    # 0) 事件表单写者：scorer 入库 / notifier 标记已推送 / housekeeper 清理都经它组提交
+    writer_cfg = cfg.get("writer") or {}
+    writer = None
+    if writer_cfg.get("enabled", True):
+        writer = StorageWriter(
+            db,
+            queue_size=writer_cfg.get("queue_size", 10000),
+            group_ops=writer_cfg.get("group_ops", 256),
+            group_ms=writer_cfg.get("group_ms", 5),
+        )
+        writer.start()
+
+    # 1) 采集器 -> q_raw（返回调度器 Task，纳入统一取消）
+    # 采集器的源状态 / 已见条目 / EDGAR 游标各自提交，走独立连接，不和写者的组提交、回滚搅在一起
+    collector_db = await connect_db(db_path)
+    tasks.extend(await run_collectors(q_raw, collector_db, cfg.get("collector")))
     print("[collector] started")
 
     # 2) 打分器 -> q_scored（保持你现有 run_scorer 的签名）
-    tasks.append(asyncio.create_task(run_scorer(q_raw, q_scored, db)))
+    scorer_cfg = cfg.get("scorer") or {}
+    tasks.append(asyncio.create_task(run_scorer(
+        q_raw, q_scored, db,
+        batch_size=scorer_cfg.get("batch_size", BATCH_SIZE),
+        batch_wait_ms=scorer_cfg.get("batch_wait_ms", 0),
+        cache_size=scorer_cfg.get("cache_size", 50000),
+        cluster_window_hours=scorer_cfg.get("cluster_window_hours", 24),
+        cluster_similarity=scorer_cfg.get("cluster_similarity", 0.6),
+        workers=scorer_cfg.get("workers", 1),
+        processes=scorer_cfg.get("processes", 0),
+        writer=writer,
+    )))
     print("[scorer] started")
 
     # 3) 推送器（Notifier 类）消费 q_scored
@@ -151,9 +265,17 @@ async def main(run_seconds: int = 30):
 #     tasks.append(asyncio.create_task(
 #     run_notifier_loop(q_scored, db, {"notifier": cfg.get("notifier", cfg)})
 # ))
-    tasks.append(asyncio.create_task(run_notifier_loop(q_scored, db, cfg)))
+    tasks.append(asyncio.create_task(run_notifier_loop(q_scored, db, cfg, writer)))
     # 4) 清理器
-    tasks.append(asyncio.create_task(run_housekeeper(db, every_sec=600)))
+    hk_cfg = cfg.get("housekeeper") or {}
+    tasks.append(asyncio.create_task(run_housekeeper(
+        db,
+        every_sec=hk_cfg.get("every_sec", 600),
+        writer=writer,
+        chunk=hk_cfg.get("chunk", DELETE_EXPIRED_CHUNK),
+        pause_ms=hk_cfg.get("pause_ms", DELETE_PAUSE_MS),
+        vacuum_pages=hk_cfg.get("vacuum_pages", VACUUM_PAGES),
+    )))
 
     print(f"[main] running for {run_seconds}s …")
     try:
@@ -172,6 +294,10 @@ async def main(run_seconds: int = 30):
         for t in tasks:
             t.cancel()
         await asyncio.gather(*tasks, return_exceptions=True)
+        if writer is not None:
+            await writer.close()  # 已入队的写操作提交完再退出
+        await collector_db.close()
+        workers.shutdown()
         print("[main] finished")
 
 if __name__ == "__main__":
@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+app/matcher.py
+打分器用的编译型多关键词匹配：关键词表在配置加载时编译成 Aho-Corasick 自动机，
+每条标题每个视图只扫一遍，开销与关键词数量基本无关。
+
+KeywordMatcher 与原先逐词匹配的语义一致（见 NaiveKeywordMatcher）：
+- 小写 ASCII 关键词（英文词根）：在小写视图（norm_text_for_match，ray-ban → rayban）上按
+  \\b词根(s|es|ed|ing)?\\b 匹配
+- 其余关键词（中文、含大写的缩写）：在原文视图上子串匹配
+- keyword_blacklist：ASCII 词在小写视图上子串匹配，非 ASCII 词在原文上子串匹配
+- 同一个词在列表里出现几次就计几次；结果按配置里的顺序返回
+
+SymbolMatcher 从标题里提取股票代码，开销与 universe 大小无关：
+- 分词后查哈希集合：$NVDA / $nvda 现金标签；大写的独立词 NVDA（两侧不能紧挨字母数字，中文不算）；
+  带 . / - 的连写（AMD-backed、NVDA-AMD）逐段再查
+- 单字母代码和 cashtag_only 里的代码只认现金标签（避免 A / ON / IT 之类误判）
+- 公司名别名（Nvidia → NVDA、英伟达 → NVDA）放进自动机（即带失败指针的 trie），英文别名不分大小写、按词边界
+
+TopicMatcher 把 topics.yml 所有主题的 tags 编进一个自动机，命中直接映射到 hashtag；英文不分大小写，仍是子串匹配。
+"""
+
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from app.utils import compile_english_stem, norm_text_for_match
+
+_STEM_SUFFIXES = ("s", "es", "ed", "ing", "")
+
+# 槽位类别
+TIER1, TIER2, NEGATIVE, BLACKLIST = 0, 1, 2, 3
+# 匹配方式
+_SUB, _STEM = 0, 1
+
+
+def _is_word(ch: str) -> bool:
+    # 与 re 的 Unicode \w 一致
+    return ch.isalnum() or ch == "_"
+
+
+def _boundary(text: str, pos: int) -> bool:
+    """text 的 pos 处是否为 \\b（两侧一个是词字符、一个不是；越界按非词字符算）。"""
+    left = pos > 0 and _is_word(text[pos - 1])
+    right = pos < len(text) and _is_word(text[pos])
+    return left != right
+
+
+class Automaton:
+    """
+    一组字符串上的 Aho-Corasick 自动机。
+    scan(text) 产出 (字符串下标, 结束位置)，包括重叠的命中。
+    """
+
+    __slots__ = ("patterns", "_goto", "_fail", "_out")
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[int, ...]] = [()]
+        for idx, pat in enumerate(self.patterns):
+            node = 0
+            for ch in pat:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = goto[node][ch] = len(goto)
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] += (idx,)
+
+        # BFS 求失败指针，并把失败链上的输出合并到每个结点
+        fail = [0] * len(goto)
+        todo = deque(goto[0].values())
+        while todo:
+            node = todo.popleft()
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+                todo.append(nxt)
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def scan(self, text: str) -> Iterator[Tuple[int, int]]:
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            nxt = goto[node].get(ch)
+            while nxt is None and node:
+                node = fail[node]
+                nxt = goto[node].get(ch)
+            node = nxt or 0
+            if out[node]:
+                end = i + 1
+                for idx in out[node]:
+                    yield idx, end
+
+
+@dataclass
+class KeywordHits:
+    """一条标题的关键词命中（按配置顺序，重复配置重复计数）。"""
+
+    tier1: List[str] = field(default_factory=list)
+    tier2: List[str] = field(default_factory=list)
+    negatives: List[str] = field(default_factory=list)
+    blacklist: List[str] = field(default_factory=list)
+
+    def as_tuple(self) -> Tuple[List[str], List[str], int, int, int]:
+        """_match_keywords 的旧返回格式。"""
+        return self.tier1, self.tier2, len(self.tier1), len(self.tier2), len(self.negatives)
+
+
+class _View:
+    """一个文本视图（小写 / 原文）上的自动机，及每个字符串对应的 (匹配方式, 槽位) 列表。"""
+
+    __slots__ = ("automaton", "targets")
+
+    def __init__(self, entries: Dict[str, List[Tuple[int, int]]]):
+        self.automaton = Automaton(list(entries))
+        self.targets = [entries[p] for p in self.automaton.patterns]
+
+    def collect(self, text: str, hit: set) -> None:
+        patterns, targets = self.automaton.patterns, self.targets
+        for idx, end in self.automaton.scan(text):
+            for mode, slot in targets[idx]:
+                if slot in hit:
+                    continue
+                if mode == _STEM:
+                    start = end - len(patterns[idx])
+                    if not _boundary(text, start):
+                        continue
+                    if not any(text.startswith(sfx, end) and _boundary(text, end + len(sfx))
+                               for sfx in _STEM_SUFFIXES):
+                        continue
+                hit.add(slot)
+
+
+class KeywordMatcher:
+    """
+    tier1 / tier2 / negatives / keyword_blacklist 编译成两个自动机（小写视图、原文视图），
+    match(headline) 一次返回四类命中。构建后只读，可在线程间共享。
+    """
+
+    __slots__ = ("_slots", "_always", "_lower", "_orig", "size")
+
+    def __init__(
+        self,
+        tier1: Sequence[Any] = (),
+        tier2: Sequence[Any] = (),
+        negatives: Sequence[Any] = (),
+        blacklist: Sequence[Any] = (),
+    ):
+        slots: List[Tuple[int, str]] = []
+        lower: Dict[str, List[Tuple[int, int]]] = {}
+        orig: Dict[str, List[Tuple[int, int]]] = {}
+        always: List[int] = []
+
+        for cat, words in ((TIER1, tier1), (TIER2, tier2), (NEGATIVE, negatives), (BLACKLIST, blacklist)):
+            for word in words or ():
+                if not isinstance(word, str):
+                    continue
+                slot = len(slots)
+                slots.append((cat, word))
+                if cat == BLACKLIST:
+                    view, mode, pat = (lower, _SUB, word.lower()) if word.isascii() else (orig, _SUB, word)
+                elif word.isascii() and word.islower():
+                    view, mode, pat = lower, _STEM, word
+                else:
+                    view, mode, pat = orig, _SUB, word
+                if not pat:
+                    always.append(slot)  # 空串是任何标题的子串
+                    continue
+                view.setdefault(pat, []).append((mode, slot))
+
+        self._slots = slots
+        self._always = always
+        self._lower = _View(lower) if lower else None
+        self._orig = _View(orig) if orig else None
+        self.size = len(slots)
+
+    @classmethod
+    def from_config(cls, keywords: Dict[str, Any]) -> "KeywordMatcher":
+        """从 keywords.yml 的结构构建。"""
+        keywords = keywords or {}
+        tiers = keywords.get("tiers") or {}
+        return cls(tiers.get("tier1") or [], tiers.get("tier2") or [],
+                   keywords.get("negatives") or [], keywords.get("keyword_blacklist") or [])
+
+    def match(self, headline: str) -> KeywordHits:
+        hit = set(self._always)
+        if self._lower is not None or self._orig is not None:
+            lower_text, original_text = norm_text_for_match(headline)
+            if self._lower is not None:
+                self._lower.collect(lower_text, hit)
+            if self._orig is not None:
+                self._orig.collect(original_text, hit)
+
+        hits = KeywordHits()
+        buckets = (hits.tier1, hits.tier2, hits.negatives, hits.blacklist)
+        slots = self._slots
+        for slot in sorted(hit):
+            cat, word = slots[slot]
+            buckets[cat].append(word)
+        return hits
+
+
+# 代码形如 NVDA、BRK.B、BF-B；左侧不能紧挨 ASCII 字母数字（中文可以）
+_TICKER_TOKEN = re.compile(r"(?<![A-Za-z0-9_$])(\$?)([A-Za-z][A-Za-z0-9_]*(?:[.\-][A-Za-z0-9_]+)*)")
+_TICKER_PARTS = re.compile(r"[.\-]")
+
+
+def _ascii_boundary(text: str, pos: int) -> bool:
+    """别名两端的边界：只有 ASCII 字母数字算词字符，所以“英伟达Nvidia”里的 nvidia 也能命中。"""
+    if pos <= 0 or pos >= len(text):
+        return True
+    a, b = text[pos - 1], text[pos]
+    return not ((a.isascii() and (a.isalnum() or a == "_")) and (b.isascii() and (b.isalnum() or b == "_")))
+
+
+class SymbolMatcher:
+    """
+    watchlist（可以是整个美股列表）+ 别名表 → 标题里的股票代码，按 watchlist 顺序去重返回。
+    构建后只读，可在线程间共享。
+    """
+
+    __slots__ = ("_rank", "_bare", "_aliases", "_alias_targets", "size")
+
+    def __init__(
+        self,
+        watchlist: Iterable[Any] = (),
+        aliases: Optional[Mapping[str, Any]] = None,
+        cashtag_only: Iterable[Any] = (),
+    ):
+        rank: Dict[str, int] = {}
+        for sym in watchlist or ():
+            if isinstance(sym, str) and sym.strip():
+                rank.setdefault(sym.strip().upper(), len(rank))
+        strict = {s.strip().upper() for s in cashtag_only or () if isinstance(s, str)}
+        # 不带 $ 也认的代码
+        self._bare = frozenset(sym for sym in rank if len(sym) > 1 and sym not in strict)
+        self._rank = rank
+
+        # 别名：{代码: [名称, ...]}；别名指向的代码不在 watchlist 时追加到末尾
+        targets: Dict[str, List[str]] = {}
+        for sym, names in (aliases or {}).items():
+            if not isinstance(sym, str):
+                continue
+            sym = sym.strip().upper()
+            for name in [names] if isinstance(names, str) else names or ():
+                if isinstance(name, str) and name.strip():
+                    rank.setdefault(sym, len(rank))
+                    targets.setdefault(name.strip().lower(), []).append(sym)
+        self._aliases = Automaton(list(targets)) if targets else None
+        self._alias_targets = [targets[name] for name in self._aliases.patterns] if targets else []
+        self.size = len(rank)
+
+    @classmethod
+    def from_config(cls, universe: Dict[str, Any]) -> "SymbolMatcher":
+        """从 universe.yml 的 watchlist / aliases / cashtag_only 构建。"""
+        universe = universe or {}
+        return cls(universe.get("watchlist") or [], universe.get("aliases") or {}, universe.get("cashtag_only") or [])
+
+    def extract(self, headline: str) -> List[str]:
+        rank, bare = self._rank, self._bare
+        found = set()
+        for m in _TICKER_TOKEN.finditer(headline):
+            cashtag, token = m.groups()
+            if cashtag:
+                token = token.upper()
+                if token in rank:
+                    found.add(token)
+            elif token in bare:  # bare 里都是大写代码，精确查找即等于“大写独立词”
+                found.add(token)
+            elif token.find(".") > 0 or token.find("-") > 0:
+                # NVDA-AMD、AMD.NVDA、AMD-backed 这类连写：逐段再查，大小写也按段判断
+                found.update(part for part in _TICKER_PARTS.split(token) if part in bare)
+
+        if self._aliases is not None:
+            text = headline.lower()
+            patterns, targets = self._aliases.patterns, self._alias_targets
+            for idx, end in self._aliases.scan(text):
+                if _ascii_boundary(text, end - len(patterns[idx])) and _ascii_boundary(text, end):
+                    found.update(targets[idx])
+
+        return sorted(found, key=rank.__getitem__)
+
+
+class TopicMatcher:
+    """
+    topics.yml 的 {主题: {tags: [...], hashtag: "#..."}} → 一个自动机。
+    match(headline) 按主题在配置里的顺序返回去重后的 hashtag；构建后只读，可在线程间共享。
+    """
+
+    __slots__ = ("_hashtags", "_automaton", "_targets", "size")
+
+    def __init__(self, topics: Optional[Mapping[str, Any]] = None):
+        hashtags: List[str] = []  # 按主题顺序，一个主题一项（可能重复）
+        targets: Dict[str, List[int]] = {}
+        for topic_cfg in (topics or {}).values():
+            if not isinstance(topic_cfg, dict) or not topic_cfg.get("hashtag"):
+                continue  # 没有 hashtag 的主题命中了也不产出
+            rank = len(hashtags)
+            hashtags.append(topic_cfg["hashtag"])
+            for tag in topic_cfg.get("tags") or []:
+                if isinstance(tag, str) and tag:
+                    ranks = targets.setdefault(tag.lower(), [])
+                    if rank not in ranks:
+                        ranks.append(rank)
+        self._hashtags = hashtags
+        self._automaton = Automaton(list(targets)) if targets else None
+        self._targets = [targets[t] for t in self._automaton.patterns] if targets else []
+        self.size = len(hashtags)
+
+    @classmethod
+    def from_config(cls, topics_cfg: Dict[str, Any]) -> "TopicMatcher":
+        """从 topics.yml（顶层 topics: 键）构建。"""
+        return cls((topics_cfg or {}).get("topics") or {})
+
+    def match(self, headline: str) -> List[str]:
+        if self._automaton is None:
+            return []
+        targets = self._targets
+        found = set()
+        for idx, _ in self._automaton.scan(headline.lower()):
+            found.update(targets[idx])
+        hashtags = self._hashtags
+        out: List[str] = []
+        for r in sorted(found):
+            if hashtags[r] not in out:
+                out.append(hashtags[r])
+        return out
+
+
+class NaiveKeywordMatcher:
+    """
+    逐词匹配的参考实现（原 scorer._match_keywords + _check_blacklist 的逻辑：每个英文词一个预编译正则，
+    其余逐个子串查找），只给等价性测试和基准用。
+    """
+
+    def __init__(self, keywords: Dict[str, Any]):
+        self.keywords = keywords or {}
+        tiers = self.keywords.get("tiers") or {}
+        self.lists = (tiers.get("tier1") or [], tiers.get("tier2") or [], self.keywords.get("negatives") or [])
+        self.blacklist = self.keywords.get("keyword_blacklist") or []
+        self.english_patterns = {
+            kw: compile_english_stem(kw)
+            for words in self.lists for kw in words
+            if isinstance(kw, str) and kw.isascii() and kw.islower()
+        }
+
+    def match(self, headline: str) -> KeywordHits:
+        lower_text, original_text = norm_text_for_match(headline)
+        hits = KeywordHits()
+
+        for words, bucket in zip(self.lists, (hits.tier1, hits.tier2, hits.negatives)):
+            for keyword in words:
+                if not isinstance(keyword, str):
+                    continue
+                if keyword.isascii() and keyword.islower():
+                    if self.english_patterns[keyword].search(lower_text):
+                        bucket.append(keyword)
+                elif keyword in original_text:
+                    bucket.append(keyword)
+
+        for blackword in self.blacklist:
+            if isinstance(blackword, str):
+                if blackword.isascii():
+                    if blackword.lower() in lower_text:
+                        hits.blacklist.append(blackword)
+                elif blackword in headline:
+                    hits.blacklist.append(blackword)
+        return hits
@@ -44,4 +44,7 @@ class Event:
     expires_at_utc: int
 
     # 线程键：用于节流，如 "NVDA|contract"
-    thread_key: str
\ No newline at end of file
+    thread_key: str
+
+    # 近重复报道簇：同一条新闻的改写/转载共用一个 id（取簇里第一条事件的 id）
+    cluster_id: str = ""
\ No newline at end of file
@@ -4,7 +4,8 @@ app/notifier.py
 推送模块：消费 scorer 输出的高优事件并发送到 Telegram（或回退到 stdout）
 - 读取 ops/config.yml（30s 热加载）
 - 支持 quiet hours（免打扰）
-- 去重/节流：按 thread_key 在窗口内只推分数更高的；可选批量合并
+- 去重/节流：按 thread_key 在窗口内只推分数更高的（与 scorer 共用 app.threads 的线程索引）；可选批量合并
+- 同一报道的改写/转载（scorer 入库时分配的 cluster_id 相同）在窗口内只推一次，除非分数更高
 - 简单英文→中文占位翻译（后续可替换为真实翻译 API）
 """
 
@@ -21,6 +22,7 @@ import httpx
 import yaml
 
 from app.models import Event
+from app.threads import ThreadIndex, shared_thread_index, story_key
 # from app.main import load_cfg
 
 
@@ -251,7 +253,7 @@ class _StdoutAdapter:
 # ------------------------------------------------------------
 
 class Notifier:
-    def __init__(self, cfg: Optional[dict] = None):
+    def __init__(self, cfg: Optional[dict] = None, threads: Optional[ThreadIndex] = None):
         raw = cfg or load_cfg()
 
         # ---- 规范化，确保 self._cfg 就是一份“notifier 子配置” ----
@@ -263,8 +265,8 @@ class Notifier:
         self._cfg_reload_ms = _now_ms()
         self._cfg_last_mtime = None
 
-        # 发送缓存
-        self._sent_cache: Dict[str, Tuple[float, int]] = {}
+        # 发送记录：线程级与同一报道（cluster_id）都记在与 scorer 共用的一份索引里（推送成功时记下）
+        self._threads = threads if threads is not None else shared_thread_index()
         self._batch_state: Dict[str, dict] = {}
 
         # 从环境变量读取 token/chat_id（配置里也允许覆盖）
@@ -326,10 +328,8 @@ class Notifier:
                         self._batch_state.pop(key, None)
                     continue
 
-                # 直接推送
-                ok = await self.push(ev)
-                if ok:
-                    self._mark_sent(ev)
+                # 直接推送（成功时 push 内部记下线程与报道）
+                await self.push(ev)
 
         except asyncio.CancelledError:
             # 退出前 flush 一下批量窗口
@@ -342,35 +342,44 @@ class Notifier:
             return
 
     async def push(self, ev: Event) -> bool:
-        """单条推送（直接通过适配器发送）"""
+        """单条推送（直接通过适配器发送）；同一报道窗口内已推过且分数不更高的跳过"""
+        if self._is_same_story(ev):
+            print(f"[notifier] 同一报道已推送，跳过: {(ev.headline or '')[:50]}...")
+            return False
         text = self._format_text(ev)
-        return await self._adapter.send(text)
+        ok = await self._adapter.send(text)
+        if ok:
+            self._mark_sent(ev)
+        return ok
 
     # --------------- 内部方法 ---------------
 
     def _is_duplicated(self, ev: Event) -> bool:
-        """同 thread_key 在窗口内只推更高分；窗口默认 dedupe_minutes"""
+        """同 thread_key 在窗口内只推更高分；窗口默认 dedupe_minutes；同一报道的改写同样处理"""
+        if self._is_same_story(ev):
+            return True
         key = ev.thread_key or ""
         if not key:
             return False
-        win_min = int(self._cfg.get("dedupe_minutes", 30))
-        now = _now_ms()
-        last = self._sent_cache.get(key)
+        last = self._threads.last(key, int(self._cfg.get("dedupe_minutes", 30)))
         if last is None:
             return False
-        last_score, last_ts = last
-        if now - last_ts > win_min * 60 * 1000:
-            return False
+        last_score, _ = last
         # 分数不超过上次 => 忽略
         if ev.score <= last_score:
             return True
         return False
 
+    def _is_same_story(self, ev: Event) -> bool:
+        """同一 cluster_id 在窗口内已推送过、且这次分数不更高：一次字典查找，不做标题两两比较"""
+        last = self._threads.last(story_key(getattr(ev, "cluster_id", "") or ""),
+                                  int(self._cfg.get("dedupe_minutes", 30)))
+        return last is not None and float(ev.score or 0.0) <= last[0]
+
     def _mark_sent(self, ev: Event) -> None:
-        key = ev.thread_key or ""
-        if not key:
-            return
-        self._sent_cache[key] = (float(ev.score or 0.0), _now_ms())
+        score = float(ev.score or 0.0)
+        self._threads.mark(ev.thread_key or "", score)
+        self._threads.mark(story_key(getattr(ev, "cluster_id", "") or ""), score)
 
     def _format_text(self, ev: Event, muted: bool = False, batch_n: int = 0) -> str:
         """统一的消息格式"""
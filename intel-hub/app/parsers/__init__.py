@@ -1,2 +1,87 @@
-# TODO: 解析器包初始化
-# TODO: 解析器注册机制
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""
+app/parsers —— 解析器注册表
+sources.yml 里每个源用 parser: 字段指定解析器，可以是：
+- 注册名：rss_stream / rss_default / json_default
+- 直接写 "模块:函数"，例如 mypkg.feeds:parse_foo（未注册的自定义解析器按 CPU 密集处理）
+解析器模块在第一次用到时才导入（feedparser 等依赖不拖慢启动）。
+cpu_heavy=True 的解析器经 workers 执行池运行，process 模式下在子进程里按同样的路径懒加载。
+
+解析器约定：fn(payload, source_id, **options) -> List[dict]
+- payload：decode="bytes" 时为响应正文，decode="json" 时为解码后的对象
+- options：采集器传入的 limit / stop_keys / max_bytes 等，不认识的参数应忽略（**_）
+- 返回的每条 dict：headline / link / ts_published / raw，可选 uid。uid 可以是任意字符串（GUID、URL…），
+  不是 sha1 十六进制的由采集器经 utils.normalize_uid 统一哈希；stop_keys 里是
+  uid_key(normalize_uid(uid))，自定义解析器要比对时也按这个算
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from app import workers
+from app.utils import import_object
+
+
+@dataclass(frozen=True)
+class ParserSpec:
+    name: str
+    target: str              # "模块:函数"
+    cpu_heavy: bool = False  # True → 交给 workers 执行池
+    decode: str = "bytes"    # bytes：原始正文；json：先解码成对象
+
+
+PARSERS: Dict[str, ParserSpec] = {}
+
+
+def register_parser(name: str, target: str, cpu_heavy: bool = False, decode: str = "bytes") -> ParserSpec:
+    """注册（或覆盖）一个解析器；只记录路径，不导入模块。"""
+    if ":" not in target:
+        raise ValueError(f"parser target 需为 '模块:函数'，收到 {target!r}")
+    if decode not in ("bytes", "json"):
+        raise ValueError(f"未知 decode={decode!r}")
+    spec = ParserSpec(name, target, bool(cpu_heavy), decode)
+    PARSERS[name] = spec
+    return spec
+
+
+def get_parser(name: str) -> ParserSpec:
+    """按注册名或 "模块:函数" 取解析器规格；都不是则抛 KeyError。"""
+    spec = PARSERS.get(name)
+    if spec is not None:
+        return spec
+    if ":" in name:
+        return ParserSpec(name, name, cpu_heavy=True)
+    raise KeyError(f"未知解析器: {name}")
+
+
+_LOADED: Dict[str, Callable[..., List[Dict]]] = {}
+
+
+def load_parser(target: str) -> Callable[..., List[Dict]]:
+    fn = _LOADED.get(target)
+    if fn is None:
+        fn = _LOADED[target] = import_object(target)
+    return fn
+
+
+def _invoke(target: str, decode: str, payload: Any, source_id: str, options: Dict[str, Any]) -> List[Dict]:
+    """在当前线程/工作进程里执行解析（模块级函数，可被 pickle）。"""
+    if decode == "json":
+        import ujson
+        payload = ujson.loads(payload)
+    return load_parser(target)(payload, source_id, **options)
+
+
+async def run_parser(spec: ParserSpec, payload: Any, source_id: str, **options: Any) -> List[Dict]:
+    """按 cpu_heavy 决定就地执行还是交给执行池。"""
+    if spec.cpu_heavy:
+        size: Optional[int] = len(payload) if isinstance(payload, (bytes, str)) else None
+        return await workers.run_cpu(_invoke, spec.target, spec.decode, payload, source_id, options, size=size)
+    return _invoke(spec.target, spec.decode, payload, source_id, options)
+
+
+register_parser("rss_stream", "app.parsers.rss_stream:parse_rss_stream", cpu_heavy=True)
+register_parser("rss_default", "app.parsers.rss_default:parse_rss", cpu_heavy=True)
+register_parser("json_default", "app.parsers.json_default:parse_json", cpu_heavy=False, decode="json")
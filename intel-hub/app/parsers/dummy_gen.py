@@ -1,22 +1,216 @@
-# TODO: 本地dummy数据源生成器
-# TODO: 测试数据生成
-# TODO: 模拟真实数据结构
-# TODO: 随机内容生成
-# TODO: 时间序列数据
-# TODO: 多语言测试数据
+# -*- coding: utf-8 -*-
+"""
+app/parsers/dummy_gen.py
+本地合成数据源：用于对 collector → scorer → notifier 全链路压测。
+- 固定种子 + 源 id → 内容序列完全可复现
+- 速率（条/秒）+ 周期性突发（every_sec / duration_sec / multiplier）
+- 重复比例：同一标题换个链接再发一次（“同文不同链”，交给打分器的线程去重）
+- 语言比例（en / zh）、watchlist 代码命中率、关键词档位分布（tier1 / tier2 / negative / none）
+关键词与 watchlist 优先取 ops/keywords.yml、ops/universe.yml（与打分器同源），缺省用内置词表。
+"""
 
-import time
 import random
-import uuid
-from typing import List, Dict
+import time
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import yaml
+
+# 内置词表（ops/keywords.yml 为空时使用）
+_BUILTIN_KEYWORDS: Dict[str, Dict[str, List[str]]] = {
+    "tier1": {
+        "en": ["acquisition", "merger", "bankruptcy", "guidance", "contract", "approval"],
+        "zh": ["收购", "并购", "破产", "获批", "中标"],
+    },
+    "tier2": {
+        "en": ["partnership", "earnings", "buyback", "upgrade", "launch"],
+        "zh": ["合作", "财报", "回购", "发布"],
+    },
+    "negative": {
+        "en": ["rumor", "opinion", "preview"],
+        "zh": ["传闻", "观点"],
+    },
+}
+_BUILTIN_WATCHLIST = ["NVDA", "AMD", "AVGO", "SMCI", "INTC", "MRVL", "TSLA", "PLTR"]
+
+_SUBJECTS = {
+    "en": ["Chipmaker", "Cloud provider", "Automaker", "Regulator", "Startup", "Retailer", "Bank", "Utility"],
+    "zh": ["芯片厂商", "云服务商", "车企", "监管机构", "初创公司", "零售商", "银行", "电力公司"],
+}
+_FILLERS = {
+    "en": ["update for investors", "shares move in early trading", "analysts weigh the outlook",
+           "details emerge after market close", "company statement", "sector roundup"],
+    "zh": ["投资者关注", "盘前股价波动", "分析师解读前景", "收盘后披露细节", "公司声明", "行业速览"],
+}
+
+DEFAULTS: Dict[str, Any] = {
+    "rate_per_sec": 5.0,
+    "burst": {"every_sec": 0, "duration_sec": 5, "multiplier": 10.0},
+    "duplicate_ratio": 0.1,
+    "lang_mix": {"en": 0.7, "zh": 0.3},
+    "symbol_hit_rate": 0.3,
+    "tier_mix": {"tier1": 0.05, "tier2": 0.25, "negative": 0.05, "none": 0.65},
+    "seed": 42,
+}
+
+
+def _load_vocab(root: Optional[Path] = None) -> Tuple[Dict[str, Dict[str, List[str]]], List[str]]:
+    """从 ops/keywords.yml（tiers.tier1/tier2、negatives）和 ops/universe.yml（watchlist）读词表。"""
+    root = root or Path(__file__).resolve().parents[2] / "ops"
+    vocab = {tier: {lang: list(words) for lang, words in by_lang.items()} for tier, by_lang in _BUILTIN_KEYWORDS.items()}
+    watchlist = list(_BUILTIN_WATCHLIST)
+    try:
+        kw = yaml.safe_load((root / "keywords.yml").read_text(encoding="utf-8")) or {}
+        lists = {
+            "tier1": (kw.get("tiers") or {}).get("tier1") or [],
+            "tier2": (kw.get("tiers") or {}).get("tier2") or [],
+            "negative": kw.get("negatives") or [],
+        }
+        for tier, words in lists.items():
+            words = [w for w in words if isinstance(w, str) and w]
+            en = [w for w in words if w.isascii()]
+            zh = [w for w in words if not w.isascii()]
+            if en:
+                vocab[tier]["en"] = en
+            if zh:
+                vocab[tier]["zh"] = zh
+    except Exception:
+        pass
+    try:
+        uni = yaml.safe_load((root / "universe.yml").read_text(encoding="utf-8")) or {}
+        wl = [s for s in (uni.get("watchlist") or []) if isinstance(s, str) and s]
+        if wl:
+            watchlist = wl
+    except Exception:
+        pass
+    return vocab, watchlist
+
+
+def _cum(weights: Dict[str, float]) -> Tuple[List[str], List[float]]:
+    keys = [k for k, w in weights.items() if float(w) > 0]
+    cum, total = [], 0.0
+    for k in keys:
+        total += float(weights[k])
+        cum.append(total)
+    return keys, cum
+
+
+class DummyGenerator:
+    """
+    可复现的合成事件生成器。
+    events_between(t0_ms, t1_ms) 按速率（含突发倍数）给出这段时间内应产生的事件，小数部分累积到下一段。
+    """
+
+    def __init__(
+        self,
+        source_id: str,
+        profile: Optional[Dict[str, Any]] = None,
+        *,
+        vocab: Optional[Dict[str, Dict[str, List[str]]]] = None,
+        watchlist: Optional[Sequence[str]] = None,
+        start_ms: Optional[int] = None,
+    ):
+        p = {**DEFAULTS, **(profile or {})}
+        self.source_id = source_id
+        self.rate = max(0.0, float(p["rate_per_sec"]))
+        burst = {**DEFAULTS["burst"], **(p.get("burst") or {})}
+        self.burst_every_ms = int(float(burst["every_sec"]) * 1000)
+        self.burst_len_ms = int(float(burst["duration_sec"]) * 1000)
+        self.burst_mult = max(1.0, float(burst["multiplier"]))
+        self.dup_ratio = min(1.0, max(0.0, float(p["duplicate_ratio"])))
+        self.symbol_rate = min(1.0, max(0.0, float(p["symbol_hit_rate"])))
+        self._langs = _cum(p["lang_mix"])
+        self._tiers = _cum(p["tier_mix"])
+
+        if vocab is None or watchlist is None:
+            loaded_vocab, loaded_wl = _load_vocab()
+            vocab = vocab if vocab is not None else loaded_vocab
+            watchlist = watchlist if watchlist is not None else loaded_wl
+        self.vocab = vocab
+        self.watchlist = list(watchlist)
+
+        # 种子与源 id 组合，多个 dummy 源互不相同但各自可复现
+        self.rng = random.Random((int(p["seed"]) << 32) ^ zlib.crc32(source_id.encode("utf-8")))
+        self.start_ms = int(start_ms if start_ms is not None else time.time() * 1000)
+        self._carry = 0.0
+        self._seq = 0
+        self._recent: Deque[Tuple[str, Dict[str, Any]]] = deque(maxlen=1000)
+        self.generated = 0
+        self.duplicates = 0
+
+    # ---------- 速率 ----------
+
+    def multiplier_at(self, t_ms: int) -> float:
+        if self.burst_every_ms <= 0:
+            return 1.0
+        return self.burst_mult if (t_ms - self.start_ms) % self.burst_every_ms < self.burst_len_ms else 1.0
+
+    def events_between(self, t0_ms: int, t1_ms: int) -> List[Dict]:
+        if t1_ms <= t0_ms:
+            return []
+        mid = (t0_ms + t1_ms) // 2
+        expected = self.rate * self.multiplier_at(mid) * (t1_ms - t0_ms) / 1000.0 + self._carry
+        n = int(expected)
+        self._carry = expected - n
+        step = (t1_ms - t0_ms) / max(n, 1)
+        return [self.make_event(int(t0_ms + i * step)) for i in range(n)]
+
+    # ---------- 内容 ----------
+
+    def _pick(self, keys_cum: Tuple[List[str], List[float]]) -> str:
+        keys, cum = keys_cum
+        return self.rng.choices(keys, cum_weights=cum)[0] if keys else ""
+
+    def make_event(self, ts_ms: int) -> Dict:
+        rng = self.rng
+        self._seq += 1
+        self.generated += 1
+        link = f"https://dummy.local/{self.source_id}/{self._seq}"
+
+        if self._recent and rng.random() < self.dup_ratio:
+            # 同文不同链：标题与属性沿用，链接是新的
+            self.duplicates += 1
+            headline, attrs = self._recent[rng.randrange(len(self._recent))]
+            return self._event(headline, link, ts_ms, {**attrs, "dup": True})
+
+        lang = self._pick(self._langs) or "en"
+        tier = self._pick(self._tiers) or "none"
+        symbol = rng.choice(self.watchlist) if self.watchlist and rng.random() < self.symbol_rate else ""
+        words = (self.vocab.get(tier) or {}).get(lang) or (self.vocab.get(tier) or {}).get("en") or []
+        keyword = rng.choice(words) if tier != "none" and words else ""
+        subject = symbol or rng.choice(_SUBJECTS[lang] if lang in _SUBJECTS else _SUBJECTS["en"])
+        filler = rng.choice(_FILLERS[lang] if lang in _FILLERS else _FILLERS["en"])
+        if lang == "zh":
+            headline = f"{subject}{keyword}，{filler}（#{self._seq}）"
+        else:
+            headline = f"{subject} {keyword} {filler} #{self._seq}".replace("  ", " ")
+
+        attrs = {"lang": lang, "tier": tier, "symbol": symbol, "keyword": keyword}
+        self._recent.append((headline, attrs))
+        return self._event(headline, link, ts_ms, {**attrs, "dup": False})
+
+    def _event(self, headline: str, link: str, ts_ms: int, attrs: Dict[str, Any]) -> Dict:
+        return {
+            "headline": headline,
+            "link": link,
+            "ts_published": ts_ms,
+            "source_id": self.source_id,
+            "raw": {"generated": True, "seq": self._seq, **attrs},
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"generated": self.generated, "duplicates": self.duplicates, "rate_per_sec": self.rate}
+
+
+_GENERATORS: Dict[str, DummyGenerator] = {}
 
 
 def generate_events(source_id: str) -> List[Dict]:
     """
-    生成随机测试事件
-
-    每次返回1-2条随机事件，标题包含不同关键词组合，
-    用于测试评分和分类系统
+    生成随机测试事件（旧接口）：每次返回1-2条，
+    内容来自该源的 DummyGenerator（缺省配置），用于测试评分和分类系统
 
     参数:
         source_id: 数据源ID
@@ -24,73 +218,8 @@ def generate_events(source_id: str) -> List[Dict]:
     返回:
         事件dict列表
     """
-    events = []
+    gen = _GENERATORS.get(source_id)
+    if gen is None:
+        gen = _GENERATORS[source_id] = DummyGenerator(source_id)
     now_ms = int(time.time() * 1000)
-
-    # 关键词模板 - 中英文混合，覆盖不同主题和优先级
-    templates = [
-        # AI相关
-        "NVDA announces major AI upgrade breakthrough in GPU architecture",
-        "英伟达发布新一代AI芯片，性能提升50%",
-        "OpenAI partnership with Microsoft expands AI training capabilities",
-        "谷歌AI部门获得重大技术突破进展",
-
-        # 合同/投资
-        "AMD secures $2B contract for datacenter processors",
-        "英特尔获得政府芯片制造合同订单",
-        "Tesla receives major investment from institutional buyers",
-        "苹果公司宣布新的供应链投资计划",
-
-        # 加密货币/RWA
-        "BlackRock launches tokenized treasury product for institutional clients",
-        "Coinbase announces new custody services for RWA tokens",
-        "比特币ETF获得监管机构正式获批",
-        "以太坊链上国债代币化项目启动",
-
-        # 事故/负面
-        "Major datacenter outage affects cloud services globally",
-        "网络安全事故导致交易所暂停服务",
-        "Supply chain disruption incident impacts semiconductor production",
-        "监管机构对加密货币交易实施新禁令",
-
-        # 财报/业绩
-        "TSLA reports strong quarterly earnings, guidance raised",
-        "微软财报超预期，云服务收入大增",
-        "Meta announces share buyback program worth $10B",
-        "亚马逊管理层变更，新CEO上任",
-
-        # 量子计算
-        "IBM achieves quantum computing milestone with 1000-qubit processor",
-        "谷歌量子计算部门发布新量子芯片",
-        "Quantum breakthrough enables faster cryptographic processing",
-        "量子计算初创公司完成新一轮融资",
-
-        # 机器人/自动化
-        "Boston Dynamics robot demonstrates advanced automation capabilities",
-        "特斯拉机器人项目获得重大进展",
-        "Industrial automation sensor technology shows promising results",
-        "自动化执行器技术在制造业广泛应用"
-    ]
-
-    # 随机生成1-2个事件
-    num_events = random.randint(1, 2)
-
-    for i in range(num_events):
-        headline = random.choice(templates)
-        event_id = str(uuid.uuid4())
-
-        event = {
-            'headline': headline,
-            'link': f'https://example.com/news/{event_id}',
-            'ts_published': now_ms,
-            'source_id': source_id,
-            'raw': {
-                'generated': True,
-                'template_id': templates.index(headline),
-                'created_at': now_ms
-            }
-        }
-
-        events.append(event)
-
-    return events
\ No newline at end of file
+    return [gen.make_event(now_ms) for _ in range(gen.rng.randint(1, 2))]
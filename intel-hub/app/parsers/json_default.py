@@ -6,10 +6,10 @@
 # TODO: 数据类型转换
 
 import time
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Union
 
 
-def parse_json(obj: Union[Dict, List], source_id: str) -> List[Dict]:
+def parse_json(obj: Union[Dict, List], source_id: str, limit: Optional[int] = None, **_) -> List[Dict]:
     """
     JSON解析器模板 - 示例映射，需要根据具体API修改
 
@@ -33,6 +33,7 @@ def parse_json(obj: Union[Dict, List], source_id: str) -> List[Dict]:
     参数:
         obj: 解析后的JSON对象(dict或list)
         source_id: 数据源ID
+        limit: 最多返回条数（None 表示全部）
 
     返回:
         事件dict列表
@@ -54,6 +55,8 @@ def parse_json(obj: Union[Dict, List], source_id: str) -> List[Dict]:
             items = []
 
         for item in items:
+            if limit is not None and len(events) >= limit:
+                break
             if not isinstance(item, dict):
                 continue
 
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+app/parsers/json_mapped.py
+JSON API 的字段映射与增量数组解码（api 采集器使用）。
+- compile_path("data.items.0.href") → 取值函数；每个源只编译一次，运行时不再拆路径
+- compile_mapping(fields, ts_format, ...) → 把一个数组元素转成精简事件 dict 的提取函数
+- JsonArrayStream：按块喂入响应字节，沿 items_path 找到数组后逐个元素解码
+  （json.JSONDecoder.raw_decode），不需要先拿到整个正文，也不会同时持有整棵对象树；
+  不完整的对象/数组/字符串先跨块扫描到闭合处再解码，跨很多块的大元素也只多解一次
+- 元素解码用标准库 raw_decode 而不是 ujson：增量解析要从缓冲区中间的 pos 解出一个值并拿到结束位置，
+  ujson.loads 只能解整段文本（后面跟着逗号、下一个元素就报错），也不返回结束位置；
+  已知 Content-Length 的小响应仍由 api_source 整段交给 ujson
+"""
+
+import codecs
+import datetime
+import hashlib
+import json
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from app.utils import link_uid
+
+PathKey = Union[str, int]
+
+# 未配置 fields 时的缺省映射（与 json_default 的猜测顺序一致）
+DEFAULT_FIELDS: Dict[str, Any] = {
+    "headline": ["title", "headline", "subject"],
+    "link": ["url", "link", "href"],
+    "ts_published": ["timestamp", "time", "published_at"],
+}
+
+
+# -------------------- 路径 --------------------
+
+def compile_path(path: Union[str, Sequence[PathKey], None]) -> Tuple[PathKey, ...]:
+    """"data.items.0" → ("data", "items", 0)；空串/None 表示根。"""
+    if not path:
+        return ()
+    parts = path.split(".") if isinstance(path, str) else list(path)
+    return tuple(int(p) if isinstance(p, str) and p.isdigit() else p for p in parts)
+
+
+def compile_getter(path: Union[str, Sequence[PathKey]]) -> Callable[[Any], Any]:
+    keys = compile_path(path)
+    if len(keys) == 1 and isinstance(keys[0], str):
+        key = keys[0]
+
+        def get_one(obj: Any) -> Any:
+            return obj.get(key) if isinstance(obj, dict) else None
+        return get_one
+
+    def get(obj: Any) -> Any:
+        for k in keys:
+            try:
+                obj = obj[k]
+            except (KeyError, IndexError, TypeError):
+                return None
+        return obj
+    return get
+
+
+def _first_of(paths: Union[str, Sequence[str]]) -> Callable[[Any], Any]:
+    """单个路径或按顺序回退的路径列表 → 取第一个非空值。"""
+    if isinstance(paths, str):
+        return compile_getter(paths)
+    getters = tuple(compile_getter(p) for p in paths)
+
+    def get(obj: Any) -> Any:
+        for g in getters:
+            v = g(obj)
+            if v not in (None, ""):
+                return v
+        return None
+    return get
+
+
+# -------------------- 时间 --------------------
+
+def _iso_ms(v: Any) -> Optional[int]:
+    s = str(v).strip()
+    try:
+        dt = datetime.datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            dt = parsedate_to_datetime(s)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _auto_ms(v: Any) -> Optional[int]:
+    """数字（或纯数字串）按量级区分秒/毫秒；其它按 ISO 8601 / RFC 822。"""
+    if isinstance(v, str) and v.strip().replace(".", "", 1).isdigit():
+        v = float(v)
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return int(v) if v > 1e11 else int(v * 1000)
+    return _iso_ms(v)
+
+
+def compile_ts(fmt: Optional[str]) -> Callable[[Any], Optional[int]]:
+    """ts_format：auto（缺省）/ ms / s / iso / strptime 格式串（无时区按 UTC）。"""
+    fmt = (fmt or "auto").strip()
+    if fmt == "ms":
+        return lambda v: int(float(v))
+    if fmt == "s":
+        return lambda v: int(float(v) * 1000)
+    if fmt == "iso":
+        return _iso_ms
+    if fmt == "auto":
+        return _auto_ms
+
+    def parse(v: Any) -> Optional[int]:
+        dt = datetime.datetime.strptime(str(v).strip(), fmt)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=datetime.timezone.utc)
+        return int(dt.timestamp() * 1000)
+    return parse
+
+
+# -------------------- 字段映射 --------------------
+
+def compile_mapping(
+    fields: Optional[Dict[str, Any]],
+    source_id: str,
+    ts_format: Optional[str] = None,
+    link_prefix: str = "",
+) -> Callable[[Any], Optional[Dict]]:
+    """
+    编译 sources.yml 的 fields: 映射，返回 元素 → 精简事件 dict（缺标题/链接返回 None）。
+    fields 支持 headline / link / ts_published / id，值为点分路径或回退路径列表；
+    配置了 id 时 uid 取 sha1(source_id:id)，否则取规范化链接的 sha1。
+    """
+    fields = {**DEFAULT_FIELDS, **(fields or {})}
+    get_headline = _first_of(fields["headline"])
+    get_link = _first_of(fields["link"])
+    get_ts = _first_of(fields["ts_published"])
+    get_id = _first_of(fields["id"]) if fields.get("id") else None
+    to_ms = compile_ts(ts_format)
+
+    def extract(item: Any) -> Optional[Dict]:
+        headline = get_headline(item)
+        link = get_link(item)
+        if not headline or not link:
+            return None
+        link = str(link).strip()
+        if link_prefix and not link.startswith(("http://", "https://")):
+            link = link_prefix.rstrip("/") + "/" + link.lstrip("/")
+        ts = None
+        raw_ts = get_ts(item)
+        if raw_ts not in (None, ""):
+            try:
+                ts = to_ms(raw_ts)
+            except (TypeError, ValueError, OverflowError):
+                ts = None
+        if get_id is not None and get_id(item) not in (None, ""):
+            uid = hashlib.sha1(f"{source_id}:{get_id(item)}".encode("utf-8")).hexdigest()
+        else:
+            uid = link_uid(link)
+        return {
+            "headline": str(headline).strip(),
+            "link": link,
+            "ts_published": ts or int(time.time() * 1000),
+            "source_id": source_id,
+            "uid": uid,
+            "raw": item,
+        }
+    return extract
+
+
+# -------------------- 增量数组解码 --------------------
+
+_WS = re.compile(r"[ \t\r\n]*")
+_DELIMS = frozenset(",]}: \t\r\n")
+_STRUCT = re.compile(r'["\[\]{}]')   # 字符串外只关心引号与括号
+_STR_END = re.compile(r'["\\]')      # 字符串内只关心引号与转义
+_INCOMPLETE = object()
+
+
+class JsonArrayStream:
+    """
+    增量解码 JSON 文档里 path 处的数组：feed(块) 返回本块新解出的完整元素。
+    数组结束（或路径不存在）后 done=True，调用方可以直接断开连接。
+    已消费的缓冲区会定期丢弃，常驻内存约为“一个元素 + 一个网络块”。
+    """
+
+    __slots__ = ("_path", "_depth", "_state", "_index", "_dec", "_raw", "_buf", "_pos", "done",
+                 "_scan_from", "_scan_at", "_scan_depth", "_scan_in_str")
+
+    def __init__(self, path: Union[str, Sequence[PathKey], None] = ()):
+        self._path = compile_path(path)
+        self._depth = 0
+        self._state = "open"   # open / key / skip / index / items
+        self._index = 0
+        self._dec = codecs.getincrementaldecoder("utf-8-sig")()
+        self._raw = json.JSONDecoder().raw_decode
+        self._buf = ""
+        self._pos = 0
+        self.done = False
+        self._scan_from = -1   # 正在跨块扫描的值的起点（-1：没有）
+        self._scan_at = 0
+        self._scan_depth = 0
+        self._scan_in_str = False
+
+    def feed(self, data: bytes, final: bool = False) -> List[Any]:
+        if self.done:
+            return []
+        if self._pos > 65536:
+            self._buf = self._buf[self._pos:]
+            if self._scan_from >= 0:
+                self._scan_from -= self._pos
+                self._scan_at -= self._pos
+            self._pos = 0
+        self._buf += self._dec.decode(data, final)
+        out: List[Any] = []
+        self._advance(out, final)
+        if final and not self.done:
+            raise ValueError("JSON 提前结束")
+        return out
+
+    def close(self) -> List[Any]:
+        return self.feed(b"", final=True)
+
+    def _scan_end(self, pos: int) -> int:
+        """
+        从 pos 处的 { [ " 往后找这个值的结尾（闭合符之后一位），数据不够返回 -1。
+        深度、是否在字符串里、扫到哪儿都留在实例上，下一块从上次停下的地方接着扫，整体线性。
+        """
+        buf = self._buf
+        if self._scan_from != pos:
+            self._scan_from, self._scan_at, self._scan_depth, self._scan_in_str = pos, pos, 0, False
+        i, depth, in_str = self._scan_at, self._scan_depth, self._scan_in_str
+        n = len(buf)
+        while True:
+            if in_str:
+                m = _STR_END.search(buf, i)
+                if m is None:
+                    i = n
+                    break
+                if m.group() == "\\":
+                    if m.end() >= n:
+                        i = m.start()  # 转义符落在块尾：下一块从反斜杠重扫
+                        break
+                    i = m.end() + 1
+                    continue
+                i = m.end()
+                in_str = False
+                if depth == 0:
+                    self._scan_from = -1
+                    return i
+            else:
+                m = _STRUCT.search(buf, i)
+                if m is None:
+                    i = n
+                    break
+                i = m.end()
+                c = m.group()
+                if c == '"':
+                    in_str = True
+                elif c in "[{":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth <= 0:
+                        self._scan_from = -1
+                        return i
+        self._scan_at, self._scan_depth, self._scan_in_str = i, depth, in_str
+        return -1
+
+    def _value(self, pos: int, final: bool) -> Tuple[Any, int]:
+        """解码 pos 处的一个完整值；数据不够返回 _INCOMPLETE。"""
+        buf = self._buf
+        if buf[pos] in '{["':
+            if self._scan_from != pos:
+                # 多数元素整个落在已收到的数据里：先直接解；不完整才开始跨块扫描，之后只解这一次
+                try:
+                    return self._raw(buf, pos)
+                except json.JSONDecodeError:
+                    pass
+            if self._scan_end(pos) < 0:
+                if final:
+                    raise ValueError(f"JSON 不合法 @ {pos}")
+                return _INCOMPLETE, pos
+            try:
+                return self._raw(buf, pos)
+            except json.JSONDecodeError:
+                raise ValueError(f"JSON 不合法 @ {pos}") from None
+        try:
+            obj, end = self._raw(buf, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise ValueError(f"JSON 不合法 @ {pos}")
+            return _INCOMPLETE, pos
+        # 数字 / true / false / null 可能被块边界截断（"1500." 会先解成 1500），要看到分隔符才算完整
+        if not final and (end >= len(buf) or buf[end] not in _DELIMS):
+            return _INCOMPLETE, pos
+        return obj, end
+
+    def _advance(self, out: List[Any], final: bool) -> None:
+        buf = self._buf
+        pos = self._pos
+        path = self._path
+        while not self.done:
+            pos = _WS.match(buf, pos).end()
+            if pos >= len(buf):
+                break
+            ch = buf[pos]
+            st = self._state
+
+            if st == "items":
+                if ch == "]":
+                    self.done = True
+                elif ch == ",":
+                    pos += 1
+                else:
+                    obj, end = self._value(pos, final)
+                    if obj is _INCOMPLETE:
+                        break
+                    out.append(obj)
+                    pos = end
+
+            elif st == "open":
+                if self._depth == len(path):
+                    if ch != "[":
+                        self.done = True  # 路径上不是数组（null / 对象）：没有元素
+                        break
+                    self._state = "items"
+                elif isinstance(path[self._depth], str):
+                    if ch != "{":
+                        self.done = True
+                        break
+                    self._state = "key"
+                else:
+                    if ch != "[":
+                        self.done = True
+                        break
+                    self._state, self._index = "index", 0
+                pos += 1
+
+            elif st == "key":
+                if ch == "}":
+                    self.done = True  # 路径不存在
+                elif ch == ",":
+                    pos += 1
+                else:
+                    key, end = self._value(pos, final)
+                    if key is _INCOMPLETE:
+                        break
+                    colon = _WS.match(buf, end).end()
+                    if colon >= len(buf):
+                        break
+                    if buf[colon] != ":":
+                        raise ValueError(f"JSON 不合法 @ {colon}")
+                    pos = colon + 1
+                    if key == path[self._depth]:
+                        self._depth += 1
+                        self._state = "open"
+                    else:
+                        self._state = "skip"
+
+            elif st == "skip":
+                obj, end = self._value(pos, final)
+                if obj is _INCOMPLETE:
+                    break
+                pos = end
+                self._state = "key"
+
+            elif st == "index":
+                if ch == "]":
+                    self.done = True
+                elif ch == ",":
+                    pos += 1
+                elif self._index == path[self._depth]:
+                    self._depth += 1
+                    self._state = "open"
+                else:
+                    obj, end = self._value(pos, final)
+                    if obj is _INCOMPLETE:
+                        break
+                    pos = end
+                    self._index += 1
+        self._pos = pos
+
@@ -8,16 +8,22 @@
 import time
 import feedparser
 import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 
 
-def parse_rss(text: str, source_id: str) -> List[Dict]:
+def parse_rss(text: Union[str, bytes], source_id: str, limit: Optional[int] = None,
+              max_bytes: Optional[int] = None, **_) -> List[Dict]:
     """
     解析RSS/Atom内容，返回原始事件dict列表
 
+    返回值只含精简字段（可安全地从线程/进程池传回事件循环），
+    不携带 feedparser 的对象树。
+
     参数:
-        text: RSS/Atom XML文本
+        text: RSS/Atom XML文本；传 bytes 时由 feedparser 按 XML 声明自行解码
         source_id: 数据源ID
+        limit: 只处理前 N 个条目（None 表示全部）
+        max_bytes: 正文超过该大小直接跳过（feedparser 无法只解析前段）
 
     返回:
         事件dict列表，每个包含:
@@ -29,21 +35,28 @@ def parse_rss(text: str, source_id: str) -> List[Dict]:
     """
     events = []
 
+    if max_bytes is not None and len(text) > max_bytes:
+        print(f"[rss_parser] 正文 {len(text)} 字节超过上限 source_id={source_id}，跳过")
+        return events
+
     try:
         # 使用feedparser解析
         feed = feedparser.parse(text)
 
-        # 遍历所有条目
-        for entry in feed.get('entries', []):
+        # 遍历条目（可限制数量）
+        entries = feed.get('entries', [])
+        if limit is not None:
+            entries = entries[:limit]
+        for entry in entries:
             event = {}
 
-            # 提取标题
-            event['headline'] = entry.get('title', '').strip()
+            # 提取标题（无标题时退回摘要）
+            event['headline'] = (entry.get('title') or entry.get('summary') or '').strip()
             if not event['headline']:
                 continue
 
-            # 提取链接
-            event['link'] = entry.get('link', '').strip()
+            # 提取链接（没有 link 时退回 guid/id，很多 feed 的 guid 就是永久链接）
+            event['link'] = (entry.get('link') or entry.get('id') or '').strip()
             if not event['link']:
                 continue
 
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+app/parsers/rss_stream.py
+RSS 2.0 / RSS 1.0 (RDF) / Atom 的流式快速解析：
+- XMLPullParser 直接吃 bytes 分块（按 XML 声明解码，不先整体 decode 成 str）
+- 每个 item/entry 只取 title / link / guid(id) / pubDate(published, dc:date) / updated / 摘要
+- 取满 limit 条，或遇到 stop_keys 里已见过的条目（feed 按时间倒序，后面都是旧的）就停止读取
+- 正文超过 max_bytes 只读前 max_bytes，返回截断前已完整的条目
+- XML 不合法（HTML 实体、非 feed 根节点等）时退回 feedparser（rss_default.parse_rss）
+返回值与 parse_rss 相同的精简 dict，另带 uid（规范化链接的 sha1）。
+"""
+
+import datetime
+import time
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
+from typing import AbstractSet, Dict, List, Optional, Union
+
+from app.utils import link_uid, uid_key
+
+MAX_BODY_BYTES = 2 * 1024 * 1024
+_CHUNK = 16 * 1024
+
+_FEED_ROOTS = {"rss", "feed", "RDF"}
+_ITEM_TAGS = {"item", "entry"}
+_PUBLISHED_TAGS = {"pubDate", "published", "date", "issued"}
+_UPDATED_TAGS = {"updated", "modified"}
+_SUMMARY_TAGS = {"description", "summary"}
+
+
+class _NotAFeed(Exception):
+    pass
+
+
+def _local(tag: str) -> str:
+    """去掉命名空间：{http://www.w3.org/2005/Atom}entry → entry"""
+    return tag.rsplit("}", 1)[-1] if tag[:1] == "{" else tag
+
+
+def _text(el: ET.Element) -> str:
+    return "".join(el.itertext()).strip()
+
+
+def _ts_ms(value: Optional[str]) -> Optional[int]:
+    """RFC 822（RSS）或 ISO 8601（Atom / dc:date）→ UTC 毫秒；无时区按 UTC。"""
+    if not value:
+        return None
+    value = value.strip()
+    dt = None
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            dt = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _item(el: ET.Element, source_id: str) -> Optional[Dict]:
+    title = link = guid = published = updated = summary = None
+    for child in el:
+        name = _local(child.tag)
+        if name == "title":
+            title = _text(child)
+        elif name == "link":
+            href = child.get("href")
+            if href is None:
+                link = link or (child.text or "").strip()
+            elif not link and child.get("rel", "alternate") == "alternate":
+                link = href.strip()
+        elif name in ("guid", "id"):
+            guid = (child.text or "").strip()
+        elif name in _PUBLISHED_TAGS:
+            published = published or (child.text or "").strip()
+        elif name in _UPDATED_TAGS:
+            updated = (child.text or "").strip()
+        elif name in _SUMMARY_TAGS and summary is None:
+            summary = _text(child)
+
+    headline = title or summary or ""
+    link = link or guid or ""
+    if not headline or not link:
+        return None
+    ts = _ts_ms(published) or _ts_ms(updated) or int(time.time() * 1000)
+    return {
+        "headline": headline,
+        "link": link,
+        "ts_published": ts,
+        "source_id": source_id,
+        "uid": link_uid(link),
+        "raw": {
+            "title": title,
+            "link": link,
+            "published": published,
+            "updated": updated,
+            "summary": (summary or "")[:200],
+        },
+    }
+
+
+def _stream(body: Union[bytes, str], source_id: str, limit: Optional[int],
+            stop_keys: Optional[AbstractSet[int]], max_bytes: int) -> List[Dict]:
+    events: List[Dict] = []
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack: List[ET.Element] = []
+    view = memoryview(body) if isinstance(body, bytes) else body
+    end = min(len(body), max_bytes)
+
+    for off in range(0, end, _CHUNK):
+        parser.feed(view[off:min(off + _CHUNK, end)])
+        for ev, el in parser.read_events():
+            if ev == "start":
+                if not stack and _local(el.tag) not in _FEED_ROOTS:
+                    raise _NotAFeed(el.tag)
+                stack.append(el)
+                continue
+            stack.pop()
+            if _local(el.tag) not in _ITEM_TAGS:
+                continue
+            item = _item(el, source_id)
+            # 处理完即从父节点摘掉，长 feed 的树不会越积越大
+            if stack:
+                stack[-1].remove(el)
+            if item is None:
+                continue
+            if stop_keys and uid_key(item["uid"]) in stop_keys:
+                return events
+            events.append(item)
+            if limit is not None and len(events) >= limit:
+                return events
+
+    if len(body) > max_bytes:
+        print(f"[rss_stream] {source_id} 正文 {len(body)} 字节超过上限 {max_bytes}，只解析前段")
+        return events
+    parser.close()
+    return events
+
+
+def parse_rss_stream(
+    body: Union[bytes, str],
+    source_id: str,
+    limit: Optional[int] = 20,
+    stop_keys: Optional[AbstractSet[int]] = None,
+    max_bytes: int = MAX_BODY_BYTES,
+    **_,
+) -> List[Dict]:
+    """
+    流式解析 RSS/Atom 正文，返回事件dict列表（字段同 parse_rss，多一个 uid）。
+
+    参数:
+        body: 响应正文（bytes 优先）
+        source_id: 数据源ID
+        limit: 最多返回条数（None 表示不限）
+        stop_keys: 该源已见条目的 uid_key 集合；遇到即停止
+        max_bytes: 正文读取上限
+    """
+    try:
+        return _stream(body, source_id, limit, stop_keys, max_bytes)
+    except (ET.ParseError, _NotAFeed):
+        if len(body) > max_bytes:
+            print(f"[rss_stream] {source_id} 正文超限且 XML 不合法，跳过")
+            return []
+        # feedparser 只在退回时才导入
+        from app.parsers.rss_default import parse_rss
+        return parse_rss(body, source_id, limit)
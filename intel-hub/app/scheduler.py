@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+app/scheduler.py
+统一采集调度器：用一个协程替代“每个源一个常驻 Task”。
+- 每个优先级通道一个最小堆，按下次到期时间排序
+- 全局在途请求上限（max_inflight）
+- 按 host 的并发上限（per_host），超限的任务暂存在该 host 的等待堆里，不占全局名额
+- 优先级通道：critical / high / normal / bulk；低优先级通道最多只能用
+  (max_inflight - 预留名额)，保证关键源不会被大量普通源饿死
+任务本身只是一个 “poll() -> 下次间隔秒数” 的协程函数；返回 None 表示下线。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+# 优先级通道：数字越小越优先
+LANES: Dict[str, int] = {"critical": 0, "high": 1, "normal": 2, "bulk": 3}
+# 这两档可以使用预留名额
+_RESERVED_LANES = 1
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def lane_of(priority: Any) -> int:
+    """sources.yml 的 priority: 字段 → 通道编号；支持名字或 0-3 的数字，缺省 normal。"""
+    if priority is None or priority == "":
+        return LANES["normal"]
+    if isinstance(priority, (int, float)):
+        return min(max(int(priority), 0), len(LANES) - 1)
+    return LANES.get(str(priority).strip().lower(), LANES["normal"])
+
+
+class Job:
+    """调度单元：一个源。__slots__ 控制每个源的常驻内存。"""
+
+    __slots__ = ("name", "host", "lane", "poll", "due_ms", "seq")
+
+    def __init__(self, name: str, host: str, lane: int, poll: Callable[[], Awaitable[Optional[float]]]):
+        self.name = name
+        self.host = host
+        self.lane = lane
+        self.poll = poll
+        self.due_ms = 0
+        self.seq = 0
+
+
+class SourceScheduler:
+    def __init__(self, max_inflight: int = 64, per_host: int = 4, critical_reserve: float = 0.25):
+        self.max_inflight = max(1, int(max_inflight))
+        self.per_host = max(1, int(per_host))
+        # 低优先级通道可用的名额上限（至少留 1 个给 critical/high）
+        reserved = min(self.max_inflight - 1, math.ceil(self.max_inflight * float(critical_reserve)))
+        self._bulk_cap = self.max_inflight - max(0, reserved)
+
+        self._heaps: List[List[Tuple[int, int, Job]]] = [[] for _ in LANES]
+        self._host_wait: Dict[str, List[Tuple[int, int, int, Job]]] = {}
+        self._host_active: Dict[str, int] = {}
+        self._inflight = 0
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._running: set = set()
+
+        # 统计：调度延迟（实际开始 - 计划到期），保留最近一段样本
+        self._lag_ms: List[Deque[int]] = [deque(maxlen=20000) for _ in LANES]
+        self.dispatched = 0
+        self.errors = 0
+
+    # ---------- 对外接口 ----------
+
+    def add(self, job: Job, delay_sec: float = 0.0) -> None:
+        """加入（或重新加入）一个任务，delay_sec 秒后到期。"""
+        self._push(job, _now_ms() + int(delay_sec * 1000))
+        self._wake.set()
+
+    def __len__(self) -> int:
+        return sum(len(h) for h in self._heaps) + sum(len(w) for w in self._host_wait.values()) + self._inflight
+
+    def stats(self) -> Dict[str, Any]:
+        def pct(values: List[int], p: float) -> Optional[int]:
+            if not values:
+                return None
+            return values[min(len(values) - 1, int(p * len(values)))]
+
+        lags = sorted(x for lane in self._lag_ms for x in lane)
+        by_lane = {}
+        for name, lane in LANES.items():
+            vals = sorted(self._lag_ms[lane])
+            if vals:
+                by_lane[name] = {"n": len(vals), "p50": pct(vals, 0.50), "p99": pct(vals, 0.99)}
+
+        return {
+            "jobs": len(self),
+            "inflight": self._inflight,
+            "queued": [len(h) for h in self._heaps],
+            "parked": sum(len(w) for w in self._host_wait.values()),
+            "dispatched": self.dispatched,
+            "errors": self.errors,
+            "lag_ms_p50": pct(lags, 0.50),
+            "lag_ms_p99": pct(lags, 0.99),
+            "lag_ms_max": lags[-1] if lags else None,
+            "lag_ms_by_lane": by_lane,
+        }
+
+    async def run(self) -> None:
+        """调度主循环；取消时一并取消在途任务。"""
+        try:
+            while True:
+                now = _now_ms()
+                for lane, heap in enumerate(self._heaps):
+                    while heap and heap[0][0] <= now and self._has_capacity(lane):
+                        _, _, job = heapq.heappop(heap)
+                        self._dispatch(job, now)
+
+                # 只有“有名额的通道”的最早到期时间决定睡多久；没名额的等任务完成唤醒
+                next_due = None
+                for lane, heap in enumerate(self._heaps):
+                    if heap and self._has_capacity(lane):
+                        if next_due is None or heap[0][0] < next_due:
+                            next_due = heap[0][0]
+                timeout = None if next_due is None else max(0.0, (next_due - _now_ms()) / 1000.0)
+
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for t in list(self._running):
+                t.cancel()
+            if self._running:
+                await asyncio.gather(*self._running, return_exceptions=True)
+
+    # ---------- 内部 ----------
+
+    def _push(self, job: Job, due_ms: int) -> None:
+        job.due_ms = due_ms
+        job.seq = next(self._seq)
+        heapq.heappush(self._heaps[job.lane], (due_ms, job.seq, job))
+
+    def _has_capacity(self, lane: int) -> bool:
+        if lane <= _RESERVED_LANES:
+            return self._inflight < self.max_inflight
+        return self._inflight < self._bulk_cap
+
+    def _dispatch(self, job: Job, now: int) -> None:
+        active = self._host_active.get(job.host, 0)
+        if active >= self.per_host:
+            # 该 host 已满：挂到 host 等待堆（按通道、到期时间），不占全局名额
+            heapq.heappush(self._host_wait.setdefault(job.host, []), (job.lane, job.due_ms, job.seq, job))
+            return
+        self._host_active[job.host] = active + 1
+        self._inflight += 1
+        self.dispatched += 1
+        self._lag_ms[job.lane].append(max(0, now - job.due_ms))
+        t = asyncio.create_task(self._run_job(job))
+        self._running.add(t)
+        t.add_done_callback(self._running.discard)
+
+    async def _run_job(self, job: Job) -> None:
+        delay: Optional[float] = None
+        try:
+            delay = await job.poll()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errors += 1
+            print(f"[scheduler] {job.name} 异常: {e!r}")
+            delay = 60.0
+        finally:
+            self._inflight -= 1
+            left = self._host_active.get(job.host, 1) - 1
+            if left > 0:
+                self._host_active[job.host] = left
+            else:
+                self._host_active.pop(job.host, None)
+            # 放回一个等待中的同 host 任务（保持原到期时间，下一轮按通道名额派发）
+            waiting = self._host_wait.get(job.host)
+            if waiting:
+                _, due, _, parked = heapq.heappop(waiting)
+                if not waiting:
+                    self._host_wait.pop(job.host, None)
+                self._push(parked, due)
+            self._wake.set()
+
+        if delay is not None:
+            self._push(job, _now_ms() + int(max(0.0, delay) * 1000))
+            self._wake.set()
+
+
+class TokenBucket:
+    """
+    全局速率限制：每秒补充 rate 个令牌，最多攒 burst 个；acquire() 拿不到就睡到下一个令牌。
+    用于对同一外部服务（如 SEC EDGAR 10 次/秒）的所有请求共享一个上限。
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = max(0.001, float(rate))
+        self.burst = max(1.0, float(burst if burst is not None else rate))
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
@@ -7,272 +7,488 @@
 
 import asyncio
 import hashlib
+import os
 import time
 import yaml
 import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
 import aiosqlite
 
+from app.cluster import StoryIndex
+from app.matcher import KeywordHits, KeywordMatcher, SymbolMatcher, TopicMatcher
 from app.models import Event
-from app.storage import insert_event, exists_recent_thread
-from app.utils import compile_english_stem, now_ms, norm_text_for_match
+from app.storage import insert_event, insert_events, load_pushed_threads, load_recent_stories
+from app.threads import shared_thread_index
+from app.writer import StorageWriter
+from app.utils import now_ms
 
+# 评分器读取的配置文件（ops/ 下）
+CONFIG_FILES = ("config.yml", "keywords.yml", "topics.yml", "universe.yml")
 
-class ScorerConfig:
-    """评分器配置类，支持热加载"""
-
-    def __init__(self):
-        self.last_reload = 0
-        self.reload_interval = 30  # 30秒热加载一次
-
-        # 配置数据
-        self.config = {}
-        self.keywords = {}
-        self.topics = {}
-        self.universe = {}
-
-        # 编译后的正则表达式缓存
-        self.english_patterns = {}
+# 每批最多处理的事件数缺省值（main 的 DEFAULT_CFG 与 run_scorer 共用）
+BATCH_SIZE = 64
 
-        self._load_all_configs()
 
-    def _load_all_configs(self):
-        """加载所有配置文件"""
-        try:
-            root_path = Path(__file__).parent.parent / "ops"
-
-            # 加载config.yml
-            with open(root_path / "config.yml", 'r', encoding='utf-8') as f:
-                self.config = yaml.safe_load(f) or {}
-
-            # 加载keywords.yml
-            with open(root_path / "keywords.yml", 'r', encoding='utf-8') as f:
-                self.keywords = yaml.safe_load(f) or {}
+@dataclass(frozen=True)
+class ScorerSnapshot:
+    """
+    一版编译好的评分配置：四个 YAML 的内容 + 由它们编出的匹配器。
+    发布后只读；热加载时整体换成新对象，打分过程中拿到的一直是同一版。
+    """
 
-            # 加载topics.yml
-            with open(root_path / "topics.yml", 'r', encoding='utf-8') as f:
-                self.topics = yaml.safe_load(f) or {}
+    version: int = 0
+    config: Dict[str, Any] = field(default_factory=dict)
+    keywords: Dict[str, Any] = field(default_factory=dict)
+    topics: Dict[str, Any] = field(default_factory=dict)
+    universe: Dict[str, Any] = field(default_factory=dict)
+    keyword_matcher: KeywordMatcher = field(default_factory=KeywordMatcher)
+    symbol_matcher: SymbolMatcher = field(default_factory=SymbolMatcher)
+    topic_matcher: TopicMatcher = field(default_factory=TopicMatcher)
+    digest: str = ""  # 四个文件内容的 sha1，内容没变就不重建
+
+
+def _digest(texts: Dict[str, bytes]) -> str:
+    h = hashlib.sha1()
+    for name in CONFIG_FILES:
+        h.update(name.encode("utf-8") + b"\0" + texts[name] + b"\0")
+    return h.hexdigest()
+
+
+def build_snapshot(texts: Dict[str, bytes], version: int) -> ScorerSnapshot:
+    """解析四个 YAML 并编译匹配器；任何一个文件不合法都抛异常（调用方保留上一版）。"""
+    parsed: Dict[str, Dict[str, Any]] = {}
+    for name in CONFIG_FILES:
+        data = yaml.safe_load(texts[name]) or {}
+        if not isinstance(data, dict):
+            raise ValueError(f"{name} 顶层应为映射，实际是 {type(data).__name__}")
+        parsed[name] = data
+    keywords, topics, universe = parsed["keywords.yml"], parsed["topics.yml"], parsed["universe.yml"]
+    return ScorerSnapshot(
+        version=version,
+        config=parsed["config.yml"],
+        keywords=keywords,
+        topics=topics,
+        universe=universe,
+        keyword_matcher=KeywordMatcher.from_config(keywords),
+        symbol_matcher=SymbolMatcher.from_config(universe),
+        topic_matcher=TopicMatcher.from_config(topics),
+        digest=_digest(texts),
+    )
 
-            # 加载universe.yml
-            with open(root_path / "universe.yml", 'r', encoding='utf-8') as f:
-                self.universe = yaml.safe_load(f) or {}
 
-            # 编译英文关键词正则
-            self._compile_english_patterns()
+class ScorerConfig:
+    """
+    评分器配置，支持热加载：
+    - 每 reload_interval 秒 stat 一次四个文件，mtime/大小都没变就什么也不做
+    - 变了再读内容比哈希（只是 touch 不重建），内容真变了才解析、编译，得到新的 ScorerSnapshot
+    - run_scorer 里用 maybe_reload()：解析编译放到线程里，完成后在事件循环上整体替换 snapshot
+    - 新配置有错就打印并继续用上一版，直到文件再次变化
+    """
 
-            self.last_reload = time.time()
-            print("[scorer] 配置加载完成")
+    def __init__(self, root: Optional[Path] = None, reload_interval: float = 30):
+        self.root = Path(root) if root is not None else Path(__file__).parent.parent / "ops"
+        self.reload_interval = reload_interval  # 30秒检查一次
+        self.last_check = 0.0
+        self.snapshot = ScorerSnapshot()
+        self._stats: Optional[Tuple] = None  # 上次检查时各文件的 (mtime_ns, size)
+        self._task: Optional[asyncio.Task] = None
+
+        self.reload_if_needed(force=True)
+
+    # 旧代码按属性读取当前版本的内容
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self.snapshot.config
+
+    @property
+    def keywords(self) -> Dict[str, Any]:
+        return self.snapshot.keywords
+
+    @property
+    def topics(self) -> Dict[str, Any]:
+        return self.snapshot.topics
+
+    @property
+    def universe(self) -> Dict[str, Any]:
+        return self.snapshot.universe
+
+    def _stat(self) -> Tuple:
+        stats = []
+        for name in CONFIG_FILES:
+            try:
+                st = os.stat(self.root / name)
+                stats.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stats.append(None)
+        return tuple(stats)
+
+    def _changed(self, force: bool = False) -> Optional[Tuple]:
+        """到点且文件有变化时返回新的 stat 结果，否则 None。"""
+        now = time.time()
+        if not force and now - self.last_check < self.reload_interval:
+            return None
+        self.last_check = now
+        stats = self._stat()
+        if not force and stats == self._stats:
+            return None
+        return stats
+
+    def _build(self, version: int) -> Optional[ScorerSnapshot]:
+        """读文件；内容与当前版本相同返回 None，否则解析编译出新快照（可能抛异常）。"""
+        texts = {name: (self.root / name).read_bytes() for name in CONFIG_FILES}
+        if self.snapshot.digest and _digest(texts) == self.snapshot.digest:
+            return None
+        return build_snapshot(texts, version)
+
+    def _publish(self, stats: Tuple, snap: Optional[ScorerSnapshot], error: Optional[BaseException]) -> bool:
+        self._stats = stats  # 出错也记下，同样的坏文件不反复重试
+        if error is not None:
+            if self.snapshot.version:
+                print(f"[scorer] 配置加载失败，沿用 v{self.snapshot.version}: {error}")
+            else:
+                print(f"[scorer] 配置加载失败: {error}")
+            return False
+        if snap is None:
+            return False
+        self.snapshot = snap
+        print(f"[scorer] 配置加载完成 (v{snap.version})")
+        return True
 
+    def reload_if_needed(self, force: bool = False) -> bool:
+        """同步检查并重载（启动和测试用）；返回是否换了新版本。"""
+        stats = self._changed(force)
+        if stats is None:
+            return False
+        try:
+            snap = self._build(self.snapshot.version + 1)
         except Exception as e:
-            print(f"[scorer] 配置加载失败: {e}")
-
-    def _compile_english_patterns(self):
-        """编译英文关键词的正则表达式"""
-        self.english_patterns.clear()
-
-        # 编译tier1关键词
-        tier1 = self.keywords.get('tiers', {}).get('tier1', [])
-        for keyword in tier1:
-            if keyword.isascii() and keyword.islower():
-                self.english_patterns[keyword] = compile_english_stem(keyword)
-
-        # 编译tier2关键词
-        tier2 = self.keywords.get('tiers', {}).get('tier2', [])
-        for keyword in tier2:
-            if keyword.isascii() and keyword.islower():
-                self.english_patterns[keyword] = compile_english_stem(keyword)
-
-        # 编译负面关键词
-        negatives = self.keywords.get('negatives', [])
-        for keyword in negatives:
-            if keyword.isascii() and keyword.islower():
-                self.english_patterns[keyword] = compile_english_stem(keyword)
-
-    def should_reload(self) -> bool:
-        """检查是否需要重新加载配置"""
-        return time.time() - self.last_reload > self.reload_interval
-
-    def reload_if_needed(self):
-        """如果需要则重新加载配置"""
-        if self.should_reload():
-            self._load_all_configs()
+            return self._publish(stats, None, e)
+        return self._publish(stats, snap, None)
+
+    def maybe_reload(self) -> None:
+        """
+        事件循环里调用：只做 stat，需要重建时在线程里解析编译，不阻塞打分；
+        完成后由 _reload_in_thread 在事件循环上一次性替换 snapshot。
+        """
+        if self._task is not None and not self._task.done():
+            return
+        stats = self._changed()
+        if stats is not None:
+            self._task = asyncio.get_running_loop().create_task(self._reload_in_thread(stats))
+
+    async def _reload_in_thread(self, stats: Tuple) -> bool:
+        try:
+            snap = await asyncio.to_thread(self._build, self.snapshot.version + 1)
+        except Exception as e:
+            return self._publish(stats, None, e)
+        return self._publish(stats, snap, None)
 
 
 # 全局配置实例
 _scorer_config = ScorerConfig()
 
 
-def _check_blacklist(headline: str, source_id: str) -> bool:
+def _check_blacklist(headline: str, source_id: str, hits: Optional[KeywordHits] = None,
+                     snap: Optional[ScorerSnapshot] = None) -> bool:
     """
     检查黑名单
 
+    参数:
+        hits: 已经算好的关键词命中（省掉再扫一遍标题）
+        snap: 使用的配置版本（缺省为当前版本，下同）
+
     返回:
         True: 应该丢弃
         False: 可以继续处理
     """
+    snap = snap or _scorer_config.snapshot
+
     # 检查来源黑名单
-    source_blacklist = _scorer_config.keywords.get('source_blacklist', [])
+    source_blacklist = snap.keywords.get('source_blacklist', [])
     if source_id in source_blacklist:
         print(f"[scorer] 丢弃黑名单来源: {source_id}")
         return True
 
-    # 检查关键词黑名单
-    keyword_blacklist = _scorer_config.keywords.get('keyword_blacklist', [])
-    lower_text, _ = norm_text_for_match(headline)
-
-    for blackword in keyword_blacklist:
-        if isinstance(blackword, str):
-            if blackword.isascii():
-                # 英文黑名单词
-                if blackword.lower() in lower_text:
-                    print(f"[scorer] 丢弃含黑名单词: {blackword}")
-                    return True
-            else:
-                # 中文黑名单词
-                if blackword in headline:
-                    print(f"[scorer] 丢弃含黑名单词: {blackword}")
-                    return True
+    # 检查关键词黑名单（与关键词同一个匹配器，一遍扫描）
+    if hits is None:
+        hits = snap.keyword_matcher.match(headline)
+    if hits.blacklist:
+        print(f"[scorer] 丢弃含黑名单词: {hits.blacklist[0]}")
+        return True
 
     return False
 
 
-def _extract_symbols(headline: str) -> str:
+def _extract_symbols(headline: str, snap: Optional[ScorerSnapshot] = None) -> str:
     """
-    从标题中提取股票代码
+    从标题中提取股票代码（$NVDA、独立的大写代码、公司名别名），按 watchlist 顺序
 
     返回:
         分号分隔的股票代码字符串
     """
-    watchlist = _scorer_config.universe.get('watchlist', [])
-    found_symbols = []
-
-    for symbol in watchlist:
-        if isinstance(symbol, str) and symbol.upper() in headline.upper():
-            found_symbols.append(symbol.upper())
+    return ';'.join((snap or _scorer_config.snapshot).symbol_matcher.extract(headline))
 
-    return ';'.join(found_symbols)
 
-
-def _match_keywords(headline: str) -> Tuple[List[str], List[str], int, int, int]:
+def _match_keywords(headline: str, hits: Optional[KeywordHits] = None,
+                    snap: Optional[ScorerSnapshot] = None) -> Tuple[List[str], List[str], int, int, int]:
     """
     匹配关键词并计算命中次数
 
     返回:
         (tier1_keywords, tier2_keywords, tier1_hits, tier2_hits, negative_hits)
     """
-    lower_text, original_text = norm_text_for_match(headline)
-
-    tier1_keywords = []
-    tier2_keywords = []
-    tier1_hits = 0
-    tier2_hits = 0
-    negative_hits = 0
-
-    # 匹配tier1关键词
-    tier1_list = _scorer_config.keywords.get('tiers', {}).get('tier1', [])
-    for keyword in tier1_list:
-        if isinstance(keyword, str):
-            if keyword.isascii() and keyword.islower():
-                # 英文关键词，使用正则匹配
-                pattern = _scorer_config.english_patterns.get(keyword)
-                if pattern and pattern.search(lower_text):
-                    tier1_keywords.append(keyword)
-                    tier1_hits += 1
-            else:
-                # 中文关键词，直接子串匹配
-                if keyword in original_text:
-                    tier1_keywords.append(keyword)
-                    tier1_hits += 1
-
-    # 匹配tier2关键词
-    tier2_list = _scorer_config.keywords.get('tiers', {}).get('tier2', [])
-    for keyword in tier2_list:
-        if isinstance(keyword, str):
-            if keyword.isascii() and keyword.islower():
-                # 英文关键词，使用正则匹配
-                pattern = _scorer_config.english_patterns.get(keyword)
-                if pattern and pattern.search(lower_text):
-                    tier2_keywords.append(keyword)
-                    tier2_hits += 1
-            else:
-                # 中文关键词，直接子串匹配
-                if keyword in original_text:
-                    tier2_keywords.append(keyword)
-                    tier2_hits += 1
-
-    # 匹配负面关键词
-    negatives = _scorer_config.keywords.get('negatives', [])
-    for keyword in negatives:
-        if isinstance(keyword, str):
-            if keyword.isascii() and keyword.islower():
-                # 英文关键词，使用正则匹配
-                pattern = _scorer_config.english_patterns.get(keyword)
-                if pattern and pattern.search(lower_text):
-                    negative_hits += 1
-            else:
-                # 中文关键词，直接子串匹配
-                if keyword in original_text:
-                    negative_hits += 1
+    if hits is None:
+        hits = (snap or _scorer_config.snapshot).keyword_matcher.match(headline)
+    return hits.as_tuple()
 
-    return tier1_keywords, tier2_keywords, tier1_hits, tier2_hits, negative_hits
 
-
-def _match_topics(headline: str) -> List[str]:
+def _match_topics(headline: str, snap: Optional[ScorerSnapshot] = None) -> List[str]:
     """
-    匹配话题标签
+    匹配话题标签（英文不分大小写），按 topics.yml 中主题的顺序
 
     返回:
         匹配到的hashtag列表
     """
-    matched_hashtags = []
-    topics = _scorer_config.topics.get('topics', {})
-
-    for topic_name, topic_config in topics.items():
-        tags = topic_config.get('tags', [])
-        hashtag = topic_config.get('hashtag', '')
+    return (snap or _scorer_config.snapshot).topic_matcher.match(headline)
 
-        for tag in tags:
-            if isinstance(tag, str):
-                if tag in headline:
-                    if hashtag and hashtag not in matched_hashtags:
-                        matched_hashtags.append(hashtag)
-                    break
 
-    return matched_hashtags
+def _score_weights(snap: ScorerSnapshot) -> Tuple[Any, Any, Any, Any, Any]:
+    """keywords.yml 的 weights（含缺省值）：(基础分, tier1, tier2, negative, watchlist_bonus)"""
+    weights = snap.keywords.get('weights', {})
+    return (weights.get('source_rss_base', 20), weights.get('tier1', 50), weights.get('tier2', 25),
+            weights.get('negative', -30), weights.get('watchlist_bonus', 10))
 
 
 def _calculate_score(tier1_hits: int, tier2_hits: int, negative_hits: int,
-                    has_watchlist_symbol: bool) -> float:
+                    has_watchlist_symbol: bool, snap: Optional[ScorerSnapshot] = None) -> float:
     """
     计算事件评分
 
     返回:
         计算得出的分数
     """
-    weights = _scorer_config.keywords.get('weights', {})
+    base, w_tier1, w_tier2, w_negative, watchlist_bonus = _score_weights(snap or _scorer_config.snapshot)
 
-    score = weights.get('source_rss_base', 20)
-    score += tier1_hits * weights.get('tier1', 50)
-    score += tier2_hits * weights.get('tier2', 25)
-    score += negative_hits * weights.get('negative', -30)
+    score = base
+    score += tier1_hits * w_tier1
+    score += tier2_hits * w_tier2
+    score += negative_hits * w_negative
 
     if has_watchlist_symbol:
-        score += weights.get('watchlist_bonus', 10)
+        score += watchlist_bonus
 
     return float(score)
 
 
-def _create_event_from_raw(raw_event: Dict[str, Any]) -> Event:
+@dataclass(frozen=True)
+class HeadlineScore:
+    """一条标题在某版配置下的全部打分结果（只取决于标题文本和配置，可在转载的副本间共用）。"""
+
+    hits: KeywordHits
+    symbols: str = ""
+    categories: str = "general"
+    tags: str = ""
+    score: float = 0.0
+    primary_category: str = "general"
+
+
+def _normalize_headline(headline: str) -> str:
+    """合并空白（含换行、全角/不换行空格）并去掉首尾空白：同一条通稿在不同源的写法只差这些。"""
+    return " ".join(headline.split())
+
+
+def _score_headline(headline: str, snap: ScorerSnapshot, hits: Optional[KeywordHits] = None) -> HeadlineScore:
+    """对（规范化后的）标题做代码提取、关键词与话题匹配并算分。"""
+    if hits is None:
+        hits = snap.keyword_matcher.match(headline)
+    symbols = _extract_symbols(headline, snap)
+    tier1_keywords, tier2_keywords, tier1_hits, tier2_hits, negative_hits = _match_keywords(headline, hits, snap)
+    hashtags = _match_topics(headline, snap)
+    score = _calculate_score(tier1_hits, tier2_hits, negative_hits, bool(symbols), snap)
+
+    all_keywords = tier1_keywords + tier2_keywords
+    return HeadlineScore(
+        hits=hits,
+        symbols=symbols,
+        categories=';'.join(all_keywords) if all_keywords else 'general',
+        tags=';'.join(hashtags) if hashtags else '',
+        score=score,
+        primary_category=tier1_keywords[0] if tier1_keywords else (tier2_keywords[0] if tier2_keywords else 'general'),
+    )
+
+
+class ScoreCache:
+    """
+    标题打分结果的有界 LRU：键是规范化后的标题，只对一版配置有效。
+    传入的快照换了（热加载出新版本）就整体清空，不会拿旧配置的结果打新事件。
+    """
+
+    def __init__(self, maxsize: int = 50000):
+        self.maxsize = max(0, int(maxsize))  # 0 = 不缓存
+        self._entries: "OrderedDict[str, HeadlineScore]" = OrderedDict()
+        self._snap: Optional[ScorerSnapshot] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def resize(self, maxsize: int) -> None:
+        self.maxsize = max(0, int(maxsize))
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, headline: str, snap: ScorerSnapshot) -> HeadlineScore:
+        """命中直接返回；未命中打分后放入缓存（满了淘汰最久没用的）。"""
+        key = _normalize_headline(headline)
+        scored = self.lookup(key, snap)
+        if scored is None:
+            scored = _score_headline(key, snap)
+            self.put(key, scored)
+        return scored
+
+    def lookup(self, key: str, snap: ScorerSnapshot) -> Optional[HeadlineScore]:
+        """按规范化后的标题查缓存（计入命中/未命中）；未命中返回 None，由调用方打分后 put。"""
+        if snap is not self._snap:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._snap = snap
+        scored = self._entries.get(key)
+        if scored is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return scored
+
+    def put(self, key: str, scored: HeadlineScore) -> None:
+        if self.maxsize:
+            self._entries[key] = scored
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "version": self._snap.version if self._snap is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+# 全局打分缓存（run_scorer 按配置调整大小）
+_score_cache = ScoreCache()
+
+
+def score_cache_stats() -> Dict[str, Any]:
+    """打分缓存：条目数、命中率、因配置重载清空的次数。"""
+    return _score_cache.stats()
+
+
+# ---------- 评分进程池（scorer.processes > 0） ----------
+
+# 进程池里每个 worker 持有的快照（由 initializer 设置）
+_worker_snap: Optional[ScorerSnapshot] = None
+
+
+def _init_score_worker(snap: ScorerSnapshot) -> None:
+    global _worker_snap
+    _worker_snap = snap
+
+
+def _score_chunk(headlines: List[str]) -> List[HeadlineScore]:
+    """在 worker 进程里给一批（已规范化、去重的）标题打分。"""
+    return [_score_headline(h, _worker_snap) for h in headlines]
+
+
+class _ScorePool:
+    """
+    标题匹配的进程池：每版配置建一个池，initializer 把快照交给每个进程，之后任务只传标题。
+    热加载出新版本时换新池（旧池里在跑的任务照常完成）；比池更旧的批就地打分。
+    """
+
+    def __init__(self, processes: int = 0):
+        self.processes = max(0, int(processes))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._snap: Optional[ScorerSnapshot] = None
+
+    def executor(self, snap: ScorerSnapshot) -> Optional[ProcessPoolExecutor]:
+        if self.processes <= 0:
+            return None
+        if self._snap is None or snap.version > self._snap.version:
+            self.shutdown()
+            self._pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_score_worker,
+                                             initargs=(snap,))
+            self._snap = snap
+        return self._pool if snap is self._snap else None
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+async def _prescore(raw_events: List[Dict[str, Any]], snap: ScorerSnapshot,
+                    pool: _ScorePool) -> Dict[str, HeadlineScore]:
+    """
+    一批事件里的标题先查缓存，未命中的（去重后）一次交给进程池打分并写回缓存。
+    返回 规范化标题 → 打分结果，交给 _score_batch 直接使用。
+    """
+    out: Dict[str, HeadlineScore] = {}
+    missing: List[str] = []
+    pending = set()
+    for raw in raw_events:
+        key = _normalize_headline(raw.get('headline', '') or '')
+        if key in out or key in pending:
+            continue
+        scored = _score_cache.lookup(key, snap)
+        if scored is None:
+            pending.add(key)
+            missing.append(key)
+        else:
+            out[key] = scored
+    if missing:
+        executor = pool.executor(snap)
+        if executor is None:
+            results = [_score_headline(key, snap) for key in missing]
+        else:
+            results = await asyncio.get_running_loop().run_in_executor(executor, _score_chunk, missing)
+        for key, scored in zip(missing, results):
+            _score_cache.put(key, scored)
+            out[key] = scored
+    return out
+
+
+# 近重复报道索引（run_scorer 按配置重建并从库里预热）
+_story_index = StoryIndex()
+
+
+def story_index_stats() -> Dict[str, Any]:
+    """报道簇索引：窗口内报道数、LSH 桶数、归入已有簇的条数。"""
+    return _story_index.stats()
+
+
+def _create_event_from_raw(raw_event: Dict[str, Any], hits: Optional[KeywordHits] = None,
+                           snap: Optional[ScorerSnapshot] = None, scored: Optional[HeadlineScore] = None) -> Event:
     """
     将原始事件dict转换为Event对象
 
     参数:
         raw_event: 原始事件数据
+        hits: 已经算好的关键词命中（可选，须是对规范化标题的匹配结果）
+        scored: 已经算好（或从缓存取到）的标题打分结果（可选）
 
     返回:
         Event对象
     """
+    snap = snap or _scorer_config.snapshot
     headline = raw_event.get('headline', '')
     link = raw_event.get('link', '')
     source_id = raw_event.get('source_id', '')
@@ -281,33 +497,17 @@ def _create_event_from_raw(raw_event: Dict[str, Any]) -> Event:
     # 生成事件ID
     event_id = hashlib.sha1(f"{source_id}|{link}".encode()).hexdigest()
 
-    # 提取股票代码
-    symbols = _extract_symbols(headline)
-
-    # 匹配关键词
-    tier1_keywords, tier2_keywords, tier1_hits, tier2_hits, negative_hits = _match_keywords(headline)
-
-    # 匹配话题
-    hashtags = _match_topics(headline)
-
-    # 计算分数
-    has_watchlist_symbol = bool(symbols)
-    score = _calculate_score(tier1_hits, tier2_hits, negative_hits, has_watchlist_symbol)
-
-    # 构造categories
-    all_keywords = tier1_keywords + tier2_keywords
-    categories = ';'.join(all_keywords) if all_keywords else 'general'
-
-    # 构造tags
-    tags = ';'.join(hashtags) if hashtags else ''
+    # 代码、关键词、话题与分数只取决于标题
+    if scored is None:
+        scored = _score_headline(_normalize_headline(headline), snap, hits)
+    symbols = scored.symbols
 
     # 构造thread_key
     primary_symbol = symbols.split(';')[0] if symbols else source_id
-    primary_category = tier1_keywords[0] if tier1_keywords else (tier2_keywords[0] if tier2_keywords else 'general')
-    thread_key = f"{primary_symbol}|{primary_category}"
+    thread_key = f"{primary_symbol}|{scored.primary_category}"
 
     # 计算过期时间
-    retention_hours = _scorer_config.config.get('retention_hours', 48)
+    retention_hours = snap.config.get('retention_hours', 48)
     ts_detected = now_ms()
     expires_at = ts_detected + retention_hours * 3600 * 1000
 
@@ -320,98 +520,229 @@ def _create_event_from_raw(raw_event: Dict[str, Any]) -> Event:
         link=link,
         market="us",
         symbols=symbols,
-        categories=categories,
-        tags=tags,
-        score=score,
+        categories=scored.categories,
+        tags=scored.tags,
+        score=scored.score,
         pushed=0,
         expires_at_utc=expires_at,
         thread_key=thread_key
     )
 
 
-async def _should_notify(event: Event, db: aiosqlite.Connection) -> bool:
+async def _notify_batch(events: List[Event], db: aiosqlite.Connection, snap: ScorerSnapshot) -> List[Event]:
     """
-    判断是否应该推送通知
-
-    参数:
-        event: 事件对象
-        db: 数据库连接
+    判断一批事件里哪些该推送：过 important 阈值，且线程不在节流窗口内（查内存线程索引）；
+    同一批里先推送的线程对后面的同线程事件同样生效（只有 critical 能升级再推）。
 
     返回:
-        是否应该推送
-    """
-    # 检查分数阈值
-    important_threshold = _scorer_config.config.get('important_threshold', 70)
-    if event.score < important_threshold:
-        return False
-
-    # 检查去重节流
-    dedupe_minutes = _scorer_config.config.get('dedupe_minutes', 15)
-
-    # 检查是否存在最近的同主题事件
-    if await exists_recent_thread(db, event.thread_key, dedupe_minutes):
-        # 检查是否是更高分数的升级推送
-        critical_threshold = _scorer_config.config.get('critical_threshold', 85)
-        if event.score >= critical_threshold:
-            print(f"[scorer] 升级推送: {event.headline[:50]}... (score={event.score})")
-            return True
-        else:
-            print(f"[scorer] 节流跳过: {event.headline[:50]}... (score={event.score})")
-            return False
+        需要推送的事件（保持原顺序）
+    """
+    config = snap.config
+    important_threshold = config.get('important_threshold', 70)
+    candidates = [ev for ev in events if ev.score >= important_threshold]
+    if not candidates:
+        return []
+
+    dedupe_minutes = config.get('dedupe_minutes', 15)
+    critical_threshold = config.get('critical_threshold', 85)
+    threads = shared_thread_index()
+    recent = set()  # 本批已决定推送、notifier 还没来得及记下的线程
+
+    out: List[Event] = []
+    for ev in candidates:
+        if ev.thread_key and (ev.thread_key in recent or threads.is_recent(ev.thread_key, dedupe_minutes)):
+            if ev.score < critical_threshold:
+                print(f"[scorer] 节流跳过: {ev.headline[:50]}... (score={ev.score})")
+                continue
+            print(f"[scorer] 升级推送: {ev.headline[:50]}... (score={ev.score})")
+        if ev.thread_key:
+            recent.add(ev.thread_key)
+        out.append(ev)
+    return out
+
+
+async def _next_batch(q_in: asyncio.Queue, batch_size: int, batch_wait_ms: float) -> List[Dict[str, Any]]:
+    """等到第一条后，把队列里现成的取满 batch_size；不够就再等 batch_wait_ms 收一次尾。"""
+    batch = [await q_in.get()]
+    for attempt in range(2):
+        while len(batch) < batch_size:
+            try:
+                batch.append(q_in.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        if attempt or len(batch) >= batch_size or batch_wait_ms <= 0:
+            break
+        await asyncio.sleep(batch_wait_ms / 1000)
+    return batch
+
+
+async def _enqueue_batch(writer: StorageWriter, batch: List[Event]) -> List[Tuple[List[Event], asyncio.Future]]:
+    """整批一个 upsert 操作入队；有坏行时逐条入队，跳过坏行。返回 (事件, 提交 Future) 列表。"""
+    try:
+        return [(batch, await writer.upsert(batch))]
+    except Exception as e:
+        print(f"[scorer] 批量入库失败，逐条重试: {e}")
+    pending = []
+    for event in batch:
+        try:
+            pending.append(([event], await writer.upsert([event])))
+        except Exception as e2:
+            print(f"[scorer] 入库失败或重复: {event.headline[:50]}... ({e2})")
+    return pending
 
-    return True
 
+def _forget_stories(index: StoryIndex, events: List[Event]) -> None:
+    """没写进库的事件从报道簇索引里撤回。"""
+    for event in events:
+        index.discard(event.id, event.headline)
 
-async def run_scorer(q_in: asyncio.Queue, q_out: asyncio.Queue, db: aiosqlite.Connection) -> None:
-    """
-    从q_in读取原始事件dict -> 打分/标注/去重 -> 入库；若达到重要/特别重要阈值则放入q_out交给通知器
 
-    参数:
-        q_in: 输入队列，包含原始事件dict
-        q_out: 输出队列，用于通知器
-        db: 数据库连接
+async def _score_batch(raw_events: List[Dict[str, Any]], q_out: asyncio.Queue, db: aiosqlite.Connection,
+                       snap: ScorerSnapshot, prescored: Optional[Dict[str, HeadlineScore]] = None,
+                       writer: Optional[StorageWriter] = None) -> None:
     """
-    print("[scorer] 启动评分器")
+    一批原始事件：过滤/打分 → 一个事务写库 → 查线程索引做节流 → 推送。prescored 为进程池先算好的结果。
+    给了 writer 时入库交给单写者组提交，只有要推送的批才等提交完成。
+    """
+    retention_ms = snap.config.get('retention_hours', 48) * 3600 * 1000
+    now = now_ms()
+    events: Dict[str, Event] = {}  # 同一批里同 id 的以最后一条为准（与逐条 upsert 结果一致）
 
-    while True:
+    for raw_event in raw_events:
         try:
-            # 热加载配置
-            _scorer_config.reload_if_needed()
-
-            # 从队列获取原始事件
-            raw_event = await q_in.get()
-
             # 检查是否过期
-            retention_hours = _scorer_config.config.get('retention_hours', 48)
-            now = now_ms()
             ts_published = raw_event.get('ts_published', now)
-
-            if now - ts_published > retention_hours * 3600 * 1000:
+            if now - ts_published > retention_ms:
                 print(f"[scorer] 丢弃过期事件: {raw_event.get('headline', '')[:50]}...")
                 continue
 
-            # 检查黑名单
+            # 关键词与黑名单一次匹配，结果复用到打分；转载的同一标题直接取缓存
             headline = raw_event.get('headline', '')
-            source_id = raw_event.get('source_id', '')
-
-            if _check_blacklist(headline, source_id):
+            scored = prescored.get(_normalize_headline(headline)) if prescored else None
+            if scored is None:
+                scored = _score_cache.get(headline, snap)
+            if _check_blacklist(headline, raw_event.get('source_id', ''), scored.hits, snap):
                 continue
 
-            # 转换为Event对象
-            event = _create_event_from_raw(raw_event)
+            event = _create_event_from_raw(raw_event, snap=snap, scored=scored)
+            # 改写/转载的同一报道归到同一簇
+            event.cluster_id = _story_index.assign(event.id, event.headline, event.ts_detected_utc)
+        except Exception as e:
+            print(f"[scorer] 处理事件失败: {e}")
+            continue
+        events.pop(event.id, None)
+        events[event.id] = event
+
+    if not events:
+        return
+
+    batch = list(events.values())
+    pending: List[Tuple[List[Event], asyncio.Future]] = []
+    if writer is not None:
+        # 交给单写者组提交，不在这里等 commit；提交失败的事件撤回报道簇索引项
+        pending = await _enqueue_batch(writer, batch)
+        index = _story_index
+        for evs, fut in pending:
+            fut.add_done_callback(lambda f, evs=evs: (f.cancelled() or f.exception() is not None) and _forget_stories(index, evs))
+        batch = [event for evs, _ in pending for event in evs]
+    else:
+        # 入库：一次 executemany + 一次提交；整批失败时逐条重试，坏行不拖累整批
+        try:
+            await insert_events(db, batch)
+        except Exception as e:
+            print(f"[scorer] 批量入库失败，逐条重试: {e}")
+            stored = []
+            for event in batch:
+                try:
+                    await insert_event(db, event)
+                    stored.append(event)
+                except Exception as e2:
+                    print(f"[scorer] 入库失败或重复: {event.headline[:50]}... ({e2})")
+            batch = stored
+    if len(batch) < len(events):
+        # 没写进库的事件不能留在报道簇索引里，否则之后的转载会归到库里不存在的 cluster_id
+        accepted = {event.id for event in batch}
+        _forget_stories(_story_index, [event for event in events.values() if event.id not in accepted])
+
+    for event in batch:
+        print(f"[scorer] 入库: {event.headline[:50]}... (score={event.score})")
+
+    # 判断是否需要推送
+    to_push = await _notify_batch(batch, db, snap)
+    if to_push and pending:
+        # 推送前确认已提交：没落库的事件不推
+        durable = set()
+        for evs, fut in pending:
+            try:
+                await fut
+                durable.update(event.id for event in evs)
+            except Exception as e:
+                print(f"[scorer] 入库未成功，不推送 {len(evs)} 条: {e}")
+        to_push = [event for event in to_push if event.id in durable]
+    for event in to_push:
+        await q_out.put(event)
+        print(f"[scorer] 推送通知: {event.headline[:50]}...")
+
+
+async def run_scorer(q_in: asyncio.Queue, q_out: asyncio.Queue, db: aiosqlite.Connection,
+                     batch_size: int = BATCH_SIZE, batch_wait_ms: float = 0, cache_size: int = 50000,
+                     cluster_window_hours: float = 24, cluster_similarity: float = 0.6,
+                     workers: int = 1, processes: int = 0, writer: Optional[StorageWriter] = None) -> None:
+    """
+    从q_in读取原始事件dict -> 打分/标注/去重 -> 入库；若达到重要/特别重要阈值则放入q_out交给通知器
 
-            # 入库
-            success = await insert_event(db, event)
-            if not success:
-                print(f"[scorer] 入库失败或重复: {event.headline[:50]}...")
-                continue
+    参数:
+        q_in: 输入队列，包含原始事件dict
+        q_out: 输出队列，用于通知器
+        db: 数据库连接
+        batch_size: 每批最多处理的事件数（1 = 逐条）；一批只提交一次、只查一次节流
+        batch_wait_ms: 队列里不够一批时最多再等多久（毫秒）
+        cache_size: 标题打分缓存的条数上限（0 = 不缓存）
+        cluster_window_hours: 近重复报道聚类的回看窗口（小时）
+        cluster_similarity: 归为同一报道的 Jaccard 相似度下限
+        workers: 同时在处理的批数（>1 时一批等入库/推送时下一批已在打分；入库与推送仍按取批顺序）
+        processes: 标题匹配的进程池大小（0 = 在事件循环里算）
+        writer: 单写者（app.writer.StorageWriter）；None 时直接在 db 上写并逐批提交
+    """
+    global _story_index
+    batch_size = max(1, int(batch_size))
+    _score_cache.resize(cache_size)
+    workers, processes = max(1, int(workers)), max(0, int(processes))
+    print(f"[scorer] 启动评分器 batch_size={batch_size} batch_wait_ms={batch_wait_ms} cache_size={_score_cache.maxsize} "
+          f"workers={workers} processes={processes}")
+
+    # 报道簇索引：用窗口内已入库的事件预热，重启后同一报道仍归到原来的簇
+    _story_index = StoryIndex(cluster_window_hours, cluster_similarity)
+    try:
+        rows = await load_recent_stories(db, now_ms() - _story_index.window_ms, _story_index.max_stories)
+        if rows:
+            print(f"[scorer] 报道簇索引预热 {_story_index.load(rows)} 条")
+    except Exception as e:
+        print(f"[scorer] 报道簇索引预热失败: {e}")
+
+    # 已推送线程索引（与 notifier 共用）：从库里窗口内 pushed=1 的事件重建
+    threads = shared_thread_index()
+    try:
+        n = threads.load(await load_pushed_threads(db, now_ms() - threads.retention_ms))
+        if n:
+            print(f"[scorer] 线程索引预热 {n} 个线程")
+    except Exception as e:
+        print(f"[scorer] 线程索引预热失败: {e}")
+
+    if workers > 1 or processes > 0:
+        await _run_workers(q_in, q_out, db, batch_size, batch_wait_ms, workers, _ScorePool(processes), writer)
+        return
 
-            print(f"[scorer] 入库: {event.headline[:50]}... (score={event.score})")
+    while True:
+        try:
+            # 热加载配置：只 stat，有变化时后台线程重建，建好后整体替换
+            _scorer_config.maybe_reload()
 
-            # 判断是否需要推送
-            if await _should_notify(event, db):
-                await q_out.put(event)
-                print(f"[scorer] 推送通知: {event.headline[:50]}...")
+            # 从队列取一批原始事件
+            raw_events = await _next_batch(q_in, batch_size, batch_wait_ms)
+
+            # 这一批从头到尾用同一版配置
+            await _score_batch(raw_events, q_out, db, _scorer_config.snapshot, writer=writer)
 
         except asyncio.CancelledError:
             print("[scorer] 评分器已取消")
@@ -420,6 +751,54 @@ async def run_scorer(q_in: asyncio.Queue, q_out: asyncio.Queue, db: aiosqlite.Co
             print(f"[scorer] 处理事件失败: {e}")
 
 
+async def _run_workers(q_in: asyncio.Queue, q_out: asyncio.Queue, db: aiosqlite.Connection, batch_size: int,
+                       batch_wait_ms: float, workers: int, pool: _ScorePool,
+                       writer: Optional[StorageWriter] = None) -> None:
+    """
+    workers 个协程轮流从 q_in 取批（取批时编号），标题匹配在进程池里并行；
+    入库、聚类、节流和推送按编号依次进行（重排缓冲），所以同一 thread_key 的事件先后不变，
+    “升级推送”的判断与单协程时一致。
+    """
+    take_lock = asyncio.Lock()
+    turn = asyncio.Condition()
+    seq = {"next": 0, "done": 0}
+
+    async def worker() -> None:
+        while True:
+            async with take_lock:
+                _scorer_config.maybe_reload()
+                raw_events = await _next_batch(q_in, batch_size, batch_wait_ms)
+                my_seq = seq["next"]
+                seq["next"] += 1
+                snap = _scorer_config.snapshot
+            try:
+                prescored = await _prescore(raw_events, snap, pool)
+            except Exception as e:
+                print(f"[scorer] 进程池打分失败，就地打分: {e}")
+                prescored = None
+            async with turn:
+                await turn.wait_for(lambda: seq["done"] == my_seq)
+            try:
+                await _score_batch(raw_events, q_out, db, snap, prescored, writer)
+            except Exception as e:
+                print(f"[scorer] 处理事件失败: {e}")
+            finally:
+                async with turn:
+                    seq["done"] += 1
+                    turn.notify_all()
+
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    try:
+        await asyncio.gather(*tasks)
+    except asyncio.CancelledError:
+        print("[scorer] 评分器已取消")
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        pool.shutdown()
+
+
 def score_headline_for_test(headline: str) -> Tuple[str, str, float]:
     """
     用于tests/test_all.py：输入一句话，返回(categories_str, tags_str, score)
@@ -433,25 +812,5 @@ def score_headline_for_test(headline: str) -> Tuple[str, str, float]:
     # 确保配置已加载
     _scorer_config.reload_if_needed()
 
-    # 提取股票代码
-    symbols = _extract_symbols(headline)
-
-    # 匹配关键词
-    tier1_keywords, tier2_keywords, tier1_hits, tier2_hits, negative_hits = _match_keywords(headline)
-
-    # 匹配话题
-    hashtags = _match_topics(headline)
-
-    # 计算分数
-    has_watchlist_symbol = bool(symbols)
-    score = _calculate_score(tier1_hits, tier2_hits, negative_hits, has_watchlist_symbol)
-
-    # 构造categories
-    all_keywords = tier1_keywords + tier2_keywords
-    categories = ';'.join(all_keywords) if all_keywords else 'general'
-
-    # 构造tags
-    tags = ';'.join(hashtags) if hashtags else ''
-
-    return categories, tags, score
-
+    scored = _score_headline(_normalize_headline(headline), _scorer_config.snapshot)
+    return scored.categories, scored.tags, scored.score
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+app/seen.py
+采集器“已见条目”索引：按源分组、有界（每源最多 max_per_source 条）、带 TTL。
+- 每源一个定长环形缓冲：array('q') 存 uid_key(uid 前 63 位) 与最近一次见到的时间（UTC 毫秒），
+  每条只占 16 字节；查找用 array.index（C 层线性扫描，几十条内比 dict 更省也不慢）
+- 近似 LRU（second chance）：命中的条目若已落到较旧的一半，就移到环头，
+  feed 里还挂着的条目不会因为新条目进来而被挤掉
+- 新条目记为脏数据，由 flush() 批量写入 seen_items 表；启动时 load() 恢复，
+  重启后不会把每个源最近的条目再送一遍打分/入库
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from array import array
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from app.storage import delete_seen_before, load_seen, save_seen
+from app.utils import uid_key
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class _Ring:
+    """单个源的环形缓冲；pos 指向下一个写入位置（也就是最旧的那条）。"""
+
+    __slots__ = ("keys", "ts", "pos")
+
+    def __init__(self):
+        self.keys = array("q")
+        self.ts = array("q")
+        self.pos = 0
+
+    def find(self, key: int) -> int:
+        try:
+            return self.keys.index(key)
+        except ValueError:
+            return -1
+
+    def put(self, key: int, ts: int, cap: int) -> None:
+        if len(self.keys) < cap:
+            self.keys.append(key)
+            self.ts.append(ts)
+            return
+        self.keys[self.pos] = key
+        self.ts[self.pos] = ts
+        self.pos = (self.pos + 1) % cap
+
+    def promote(self, i: int, cap: int) -> None:
+        """把第 i 条移到环头（最新）；写满时与最旧那条交换位置，不产生重复。"""
+        key, ts = self.keys[i], self.ts[i]
+        if len(self.keys) < cap:
+            del self.keys[i]
+            del self.ts[i]
+            self.keys.append(key)
+            self.ts.append(ts)
+            return
+        self.keys[i], self.ts[i] = self.keys[self.pos], self.ts[self.pos]
+        self.keys[self.pos], self.ts[self.pos] = key, ts
+        self.pos = (self.pos + 1) % cap
+
+    def age_rank(self, i: int, cap: int) -> int:
+        """0 = 最新写入；环未写满时按下标算。"""
+        n = len(self.keys)
+        if n < cap:
+            return n - 1 - i
+        return (self.pos - 1 - i) % cap
+
+
+class SeenIndex:
+    def __init__(self, max_per_source: int = 50, ttl_hours: float = 48):
+        self.max_per_source = max(2, int(max_per_source))
+        self.ttl_ms = int(float(ttl_hours) * 3600 * 1000)
+        self._by_source: Dict[str, _Ring] = {}
+        self._dirty: Dict[Tuple[str, int], int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- 查询 / 记录 ----------
+
+    def check_and_add(self, source_id: str, uid: str, now_ms: Optional[int] = None) -> bool:
+        """
+        已见过返回 True；否则记录下来并返回 False。
+        命中时只有在记录的时间超过半个 TTL 才重新落库，避免常驻 feed 的条目每轮都写。
+        """
+        now = int(now_ms if now_ms is not None else _now_ms())
+        key = uid_key(uid)
+        cap = self.max_per_source
+        ring = self._by_source.get(source_id)
+        if ring is None:
+            ring = self._by_source[source_id] = _Ring()
+
+        i = ring.find(key)
+        if i >= 0 and now - ring.ts[i] <= self.ttl_ms:
+            self.hits += 1
+            ts = ring.ts[i]
+            if now - ts > self.ttl_ms // 2:
+                ts = ring.ts[i] = now
+                self._dirty[(source_id, key)] = now
+            if ring.age_rank(i, cap) >= cap // 2:
+                ring.promote(i, cap)
+            return True
+
+        self.misses += 1
+        if i >= 0:
+            ring.ts[i] = now  # 过期后再次出现：原地续期，按新条目处理
+        else:
+            ring.put(key, now, cap)
+        self._dirty[(source_id, key)] = now
+        return False
+
+    def keys_of(self, source_id: str, now_ms: Optional[int] = None) -> FrozenSet[int]:
+        """某个源 TTL 内的 uid_key 快照；交给流式解析器做“遇到已见条目即停止”。"""
+        ring = self._by_source.get(source_id)
+        if ring is None:
+            return frozenset()
+        cutoff = int(now_ms if now_ms is not None else _now_ms()) - self.ttl_ms
+        return frozenset(k for k, ts in zip(ring.keys, ring.ts) if ts >= cutoff)
+
+    def evict_expired(self, now_ms: Optional[int] = None) -> int:
+        """整源过期（最近一条都超过 TTL）时释放该源的缓冲，返回释放的源数。"""
+        cutoff = int(now_ms if now_ms is not None else _now_ms()) - self.ttl_ms
+        dead = [sid for sid, ring in self._by_source.items() if not ring.ts or max(ring.ts) < cutoff]
+        for sid in dead:
+            del self._by_source[sid]
+        return len(dead)
+
+    # ---------- 持久化 ----------
+
+    async def load(self, db: Any) -> int:
+        """启动时从 seen_items 恢复 TTL 内的记录（按时间升序写入，超出上限的旧记录自然被覆盖）。"""
+        cutoff = _now_ms() - self.ttl_ms
+        n = 0
+        for source_id, key, ts in await load_seen(db, cutoff):
+            ring = self._by_source.get(source_id)
+            if ring is None:
+                ring = self._by_source[source_id] = _Ring()
+            ring.put(key, ts, self.max_per_source)
+            n += 1
+        return n
+
+    async def flush(self, db: Any) -> int:
+        """把新增/刷新的记录批量写库，并删除库里过期的行。"""
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, {}
+        rows: List[Tuple[str, int, int]] = [(sid, key, ts) for (sid, key), ts in dirty.items()]
+        try:
+            await save_seen(db, rows)
+        except BaseException:
+            # 写库失败：放回待写，保存期间新标记的（时间更新）优先
+            self._dirty = {**dirty, **self._dirty}
+            raise
+        await delete_seen_before(db, _now_ms() - self.ttl_ms)
+        return len(rows)
+
+    # ---------- 统计 ----------
+
+    def stats(self) -> Dict[str, Any]:
+        """条目数与内存估算（源字典 + 每源两个 array）。"""
+        entries = sum(len(r.keys) for r in self._by_source.values())
+        approx = sys.getsizeof(self._by_source)
+        for r in self._by_source.values():
+            approx += sys.getsizeof(r) + sys.getsizeof(r.keys) + sys.getsizeof(r.ts)
+        return {
+            "sources": len(self._by_source),
+            "entries": entries,
+            "dirty": len(self._dirty),
+            "hits": self.hits,
+            "misses": self.misses,
+            "approx_bytes": approx,
+        }
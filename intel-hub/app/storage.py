@@ -2,24 +2,38 @@
 """
 app/storage.py
 SQLite（aiosqlite）持久化：
-- 初始化/建表
-- 事件写入（upsert）
+- 初始化/建表；自己提交的写者（采集器）另开连接 connect_db，不与单写者共用
+- 事件写入（upsert；单条或一批一个事务）
 - 标记已推送
-- 清理过期
-- 近期线程去重判断
+- 清理过期（运行时三类写操作经 app/writer.py 的单写者组提交，这里的函数也可直接调用）：
+  按 expires_at_utc 部分索引分段删除，每段一个事务；auto_vacuum=INCREMENTAL 的库再分批归还空闲页
+- 近期线程去重判断（运行时由内存 ThreadIndex 承担，这里供预热与排查）
 - 查询最近事件
+- 采集源状态（ETag/Last-Modified/正文哈希、学到的发布速率，重启后沿用）
+- 采集器已见条目索引（有界 + TTL，重启后不重复入队）
+- EDGAR 每个 CIK 的增量游标（最后处理的 accession 号 + 校验器）
+- 近重复报道簇（cluster_id）的预热查询
+- 多值字段（symbols / categories / tags）的倒排表：与事件同一事务维护，按值 + 时间走索引范围扫描
+- 标题/来源的 FTS5 trigram 全文索引（中英文子串都能走索引）与看板搜索 search_events
 完全对齐 app.models.Event 字段：
 id, ts_detected_utc, ts_published_utc, headline, source, link,
-market, symbols, categories, tags, score, pushed, expires_at_utc, thread_key
+market, symbols, categories, tags, score, pushed, expires_at_utc, thread_key, cluster_id
 """
 
 from __future__ import annotations
+import asyncio
+import itertools
+import json
+import operator
+import sqlite3
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 import aiosqlite
 
+from app.models import Event
+
 # --------- 小工具 ---------
 def _now_ms() -> int:
     return int(time.time() * 1000)
@@ -41,7 +55,8 @@ CREATE TABLE IF NOT EXISTS events (
     score            REAL DEFAULT 0.0,
     pushed           INTEGER DEFAULT 0,
     expires_at_utc   INTEGER,
-    thread_key       TEXT
+    thread_key       TEXT,
+    cluster_id       TEXT
 );
 """
 
@@ -51,10 +66,132 @@ CREATE INDEX IF NOT EXISTS idx_events_thread   ON events(thread_key);
 CREATE INDEX IF NOT EXISTS idx_events_score    ON events(score DESC);
 CREATE INDEX IF NOT EXISTS idx_events_thread_key ON events(thread_key);
 CREATE INDEX IF NOT EXISTS idx_events_link       ON events(link);
+CREATE INDEX IF NOT EXISTS idx_events_expires    ON events(expires_at_utc) WHERE expires_at_utc > 0;
+"""
+
+# --------- 采集源状态：条件请求校验器（每个 source 一行） ---------
+SCHEMA_SOURCE_STATE = """
+CREATE TABLE IF NOT EXISTS source_state (
+    source_id       TEXT PRIMARY KEY,
+    etag            TEXT,
+    last_modified   TEXT,
+    body_hash       TEXT,
+    ewma_gap_ms     REAL,
+    last_pub_ms     INTEGER,
+    updated_at_utc  INTEGER
+);
+"""
+
+# --------- 采集器已见条目（uid_key 为 uid 前 63 位；按 TTL 清理） ---------
+SCHEMA_SEEN = """
+CREATE TABLE IF NOT EXISTS seen_items (
+    source_id    TEXT NOT NULL,
+    uid_key      INTEGER NOT NULL,
+    ts_seen_utc  INTEGER NOT NULL,
+    PRIMARY KEY (source_id, uid_key)
+) WITHOUT ROWID;
 """
 
+SCHEMA_SEEN_IDX = "CREATE INDEX IF NOT EXISTS idx_seen_ts ON seen_items(ts_seen_utc);"
+
+# --------- EDGAR 游标：每个 CIK 最后处理到的 accession 号 + 条件请求校验器 ---------
+SCHEMA_EDGAR_CURSOR = """
+CREATE TABLE IF NOT EXISTS edgar_cursor (
+    cik             TEXT PRIMARY KEY,
+    last_accession  TEXT,
+    etag            TEXT,
+    last_modified   TEXT,
+    updated_at_utc  INTEGER
+);
+"""
+EDGAR_CURSOR_FIELDS = ("last_accession", "etag", "last_modified")
+
+# 多值字段（分号分隔）的倒排表：Event 字段 → (表, 值列)。每个值一行，带事件的发现时间，
+# (值, ts_detected_utc) 上的复合索引让“某代码 T 以来的事件”成为一次索引范围扫描。
+# 由写事件的同一事务维护（_write_side_rows：先删该 id 的旧行再插入）；事件被删时由触发器连带删除。
+# （upsert 上挂 AFTER UPDATE 触发器会让每行写入慢一倍，哪怕没有冲突，所以改写的情况放在 Python 侧处理）
+SIDE_TABLES = {
+    "symbols": ("event_symbols", "symbol"),
+    "categories": ("event_categories", "category"),
+    "tags": ("event_tags", "tag"),
+}
+SCHEMA_SIDE = "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    event_id        TEXT NOT NULL,
+    {col} TEXT NOT NULL,
+    ts_detected_utc INTEGER NOT NULL,
+    PRIMARY KEY (event_id, {col})
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_{table}_{col}_ts ON {table}({col}, ts_detected_utc);
+""" for table, col in SIDE_TABLES.values())
+_SIDE_DELETE = "".join(f"\n    DELETE FROM {table} WHERE event_id = OLD.id;" for table, _ in SIDE_TABLES.values())
+SCHEMA_SIDE += f"""
+CREATE TRIGGER IF NOT EXISTS trg_events_side_delete
+AFTER DELETE ON events
+BEGIN{_SIDE_DELETE}
+END;
+"""
+
+# 标题/来源全文索引：外部内容 FTS5 表（不另存一份文本），trigram 分词对中英文都按子串匹配，
+# 与原来 LIKE '%q%' 语义一致（不区分大小写）但能走索引。rowid 对应 events 的 rowid。
+# 同步方式同倒排表：写事件的同一事务里按 id 一条语句删旧、插新（_upsert_rows）；删事件由触发器处理。
+# （upsert 上的触发器会让 FTS5 每行刷一次待写缓冲，实测每秒只能写一万多行；一段一条语句则是批量建索引）
+# 注意：整库 VACUUM 可能重排 events 的 rowid，之后要 rebuild_search_index。
+SCHEMA_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+    headline, source, content='events', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS trg_events_fts_delete
+AFTER DELETE ON events
+BEGIN
+    INSERT INTO events_fts(events_fts, rowid, headline, source) VALUES('delete', OLD.rowid, OLD.headline, OLD.source);
+END;
+"""
+FTS_DELETE_SQL = """
+INSERT INTO events_fts(events_fts, rowid, headline, source)
+SELECT 'delete', rowid, headline, source FROM events WHERE id IN (SELECT value FROM json_each(?));
+"""
+FTS_INSERT_SQL = """
+INSERT INTO events_fts(rowid, headline, source)
+SELECT rowid, headline, source FROM events WHERE id IN (SELECT value FROM json_each(?));
+"""
+
+
+def _fts_available() -> bool:
+    """当前 SQLite 是否带 FTS5 与 trigram 分词（3.34+）；没有时搜索退回 LIKE。"""
+    try:
+        conn = sqlite3.connect(":memory:")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE t USING fts5(x, tokenize='trigram');")
+        finally:
+            conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+FTS_ENABLED = _fts_available()
+
+# 老库补列：{表: [(列名, 类型)]}；CREATE TABLE IF NOT EXISTS 不会给已存在的表加列
+SCHEMA_MIGRATIONS = {
+    "source_state": [("ewma_gap_ms", "REAL"), ("last_pub_ms", "INTEGER")],
+    "events": [("cluster_id", "TEXT")],
+}
+
+
+async def _ensure_columns(db: aiosqlite.Connection) -> None:
+    for table, cols in SCHEMA_MIGRATIONS.items():
+        async with db.execute(f"PRAGMA table_info({table});") as cur:
+            have = {row[1] async for row in cur}
+        for name, decl in cols:
+            if name not in have:
+                await db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl};")
+
 
 # --------- 初始化 ---------
+WAL_SIZE_LIMIT = 64 * 1024 * 1024
+
+
 async def init_db(db_path: Union[str, Path]) -> aiosqlite.Connection:
     """
     初始化数据库并返回连接。
@@ -63,24 +200,106 @@ async def init_db(db_path: Union[str, Path]) -> aiosqlite.Connection:
     p = Path(db_path)
     p.parent.mkdir(parents=True, exist_ok=True)
     db = await aiosqlite.connect(str(p))
-    # 性能相关 pragma
+    # 性能相关 pragma；auto_vacuum 只对还没建表的新库生效，且要在切 WAL 之前设（老库见 enable_incremental_vacuum）
+    await db.execute("PRAGMA auto_vacuum=INCREMENTAL;")
     await db.execute("PRAGMA journal_mode=WAL;")
     await db.execute("PRAGMA synchronous=NORMAL;")
+    # 大批删除后 WAL 会涨，checkpoint 之后截回这个大小
+    await db.execute(f"PRAGMA journal_size_limit={WAL_SIZE_LIMIT};")
     await db.execute(SCHEMA_EVENTS)
+    await db.execute(SCHEMA_SOURCE_STATE)
+    await db.execute(SCHEMA_SEEN)
+    await db.execute(SCHEMA_SEEN_IDX)
+    await db.execute(SCHEMA_EDGAR_CURSOR)
+    await _ensure_columns(db)
     for stmt in filter(None, SCHEMA_IDX.split(";")):
         s = stmt.strip()
         if s:
             await db.execute(s + ";")
     await db.commit()
+    # 倒排表（触发器体里有分号，整段 executescript）；老库第一次建表时从 events 回填
+    async with db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'event_symbols';") as cur:
+        fresh = await cur.fetchone() is None
+    await db.executescript(SCHEMA_SIDE)
+    if fresh:
+        async with db.execute(f"SELECT {', '.join(EVENT_COLUMNS)} FROM events;") as cur:
+            await _write_side_rows(db, [tuple(row) async for row in cur])
+        await db.commit()
+    if FTS_ENABLED:
+        async with db.execute("SELECT 1 FROM sqlite_master WHERE name = 'events_fts';") as cur:
+            fresh = await cur.fetchone() is None
+        await db.executescript(SCHEMA_FTS)
+        if fresh:
+            await rebuild_search_index(db)
+    else:
+        print("[storage] 当前 SQLite 不支持 FTS5 trigram，看板搜索退回 LIKE")
     return db
 
 
+async def connect_db(db_path: Union[str, Path]) -> aiosqlite.Connection:
+    """
+    给自己提交的写者（采集器的源状态 / 已见条目 / EDGAR 游标）另开一条连接：表已由 init_db 建好，
+    这里只设连接级 pragma。和 StorageWriter 共用一条连接时，一边的 commit/rollback 会带上另一边没写完的改动。
+    """
+    db = await aiosqlite.connect(str(db_path))
+    await db.execute("PRAGMA synchronous=NORMAL;")
+    await db.execute(f"PRAGMA journal_size_limit={WAL_SIZE_LIMIT};")
+    return db
+
+
+async def rebuild_search_index(db: aiosqlite.Connection) -> None:
+    """按 events 全量重建全文索引（老库第一次建索引、整库 VACUUM 之后用）。"""
+    await db.execute("INSERT INTO events_fts(events_fts) VALUES('rebuild');")
+    await db.commit()
+
+
 # --------- 写入 / 更新（幂等） ---------
-async def insert_event(db: aiosqlite.Connection, ev: Any) -> bool:
+# 与 UPSERT_EVENT_SQL 的占位符同序
+EVENT_COLUMNS = (
+    "id", "ts_detected_utc", "ts_published_utc", "headline", "source", "link",
+    "market", "symbols", "categories", "tags", "score", "pushed", "expires_at_utc", "thread_key", "cluster_id",
+)
+_event_attrs = operator.attrgetter(*EVENT_COLUMNS)
+
+UPSERT_EVENT_SQL = """
+INSERT INTO events(
+    id, ts_detected_utc, ts_published_utc, headline, source, link,
+    market, symbols, categories, tags, score, pushed, expires_at_utc, thread_key, cluster_id
+) VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+ON CONFLICT(id) DO UPDATE SET
+    ts_detected_utc  = excluded.ts_detected_utc,
+    ts_published_utc = excluded.ts_published_utc,
+    headline         = excluded.headline,
+    source           = excluded.source,
+    link             = excluded.link,
+    market           = excluded.market,
+    symbols          = excluded.symbols,
+    categories       = excluded.categories,
+    tags             = excluded.tags,
+    score            = excluded.score,
+    pushed           = MAX(events.pushed, excluded.pushed), -- 已推送不回退
+    expires_at_utc   = excluded.expires_at_utc,
+    thread_key       = excluded.thread_key,
+    cluster_id       = excluded.cluster_id
+"""
+
+
+def _event_row(ev: Any) -> tuple:
     """
-    幂等写入（ON CONFLICT DO UPDATE）。支持 dataclass 或 dict。
-    字段（必须）：与 app.models.Event 一致。
+    Event（dataclass）或 dict → UPSERT_EVENT_SQL 的参数元组。
+    快路径：app.models.Event 直接按 EVENT_COLUMNS 一次 attrgetter 取出元组，字段类型信任 dataclass 标注
+    （scorer 构造的事件就是这样）；缺 id、发现时间不是正整数时退回兼容路径，cluster_id 为空时补成 id。
     """
+    if type(ev) is Event:
+        row = _event_attrs(ev)
+        ts = row[1]
+        if row[0] and type(ts) is int and ts > 0:
+            return row if row[14] else row[:14] + (row[0],)
+    return _event_row_compat(ev)
+
+
+def _event_row_compat(ev: Any) -> tuple:
+    """兼容路径：任意带属性的对象或 dict，逐字段取值并做类型转换。"""
     # 兼容 dataclass / dict
     to_dict: Dict[str, Any]
     if hasattr(ev, "__dict__"):
@@ -108,53 +327,184 @@ async def insert_event(db: aiosqlite.Connection, ev: Any) -> bool:
     pushed           = int(g("pushed", 0) or 0)
     expires_at_utc   = int(g("expires_at_utc", 0) or 0)
     thread_key       = g("thread_key") or ""
+    cluster_id       = g("cluster_id") or id_
 
     if not id_:
         raise ValueError("insert_event: missing id")
     if ts_detected_utc <= 0:
         ts_detected_utc = _now_ms()
 
-    sql = """
-    INSERT INTO events(
-        id, ts_detected_utc, ts_published_utc, headline, source, link,
-        market, symbols, categories, tags, score, pushed, expires_at_utc, thread_key
-    ) VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-    ON CONFLICT(id) DO UPDATE SET
-        ts_detected_utc  = excluded.ts_detected_utc,
-        ts_published_utc = excluded.ts_published_utc,
-        headline         = excluded.headline,
-        source           = excluded.source,
-        link             = excluded.link,
-        market           = excluded.market,
-        symbols          = excluded.symbols,
-        categories       = excluded.categories,
-        tags             = excluded.tags,
-        score            = excluded.score,
-        pushed           = MAX(events.pushed, excluded.pushed), -- 已推送不回退
-        expires_at_utc   = excluded.expires_at_utc,
-        thread_key       = excluded.thread_key
-    """
-    await db.execute(sql, (
+    return (
         id_, ts_detected_utc, ts_published_utc, headline, source, link,
-        market, symbols, categories, tags, score, pushed, expires_at_utc, thread_key
-    ))
+        market, symbols, categories, tags, score, pushed, expires_at_utc, thread_key, cluster_id
+    )
+
+
+def _split_multi(value: Optional[str]) -> List[str]:
+    """"NVDA;AMD" → ["NVDA", "AMD"]（去空白、去空值、去重保序）。"""
+    if not value:
+        return []
+    return list(dict.fromkeys(v for v in (p.strip() for p in value.split(";")) if v))
+
+
+# 一条语句删一批 id 的旧行（id 列表以 JSON 数组传入），比逐 id executemany 少一半开销
+SIDE_DELETE_SQL = {
+    field: f"DELETE FROM {table} WHERE event_id IN (SELECT value FROM json_each(?));"
+    for field, (table, _) in SIDE_TABLES.items()
+}
+SIDE_INSERT_SQL = {
+    field: f"INSERT OR IGNORE INTO {table}(event_id, {col}, ts_detected_utc) VALUES(?,?,?);"
+    for field, (table, col) in SIDE_TABLES.items()
+}
+_SIDE_INDEX = {field: EVENT_COLUMNS.index(field) for field in SIDE_TABLES}
+
+
+def _side_rows(rows: Iterable[tuple], field: str) -> List[tuple]:
+    i = _SIDE_INDEX[field]
+    return [(row[0], v, row[1]) for row in rows for v in _split_multi(row[i])]
+
+
+async def _write_side_rows(db: aiosqlite.Connection, rows: List[tuple]) -> None:
+    """
+    在调用方的事务里写倒排表；rows 为 _event_row 的参数元组（含 upsert 改写的事件，先删旧行再插入）。
+    一批里同一 id 出现多次时（如写者合并了两次 upsert），以最后一行为准。
+    """
+    rows = list({row[0]: row for row in rows}.values())
+    if not rows:
+        return
+    ids = json.dumps([row[0] for row in rows])
+    for field in SIDE_TABLES:
+        await db.execute(SIDE_DELETE_SQL[field], (ids,))
+        side = _side_rows(rows, field)
+        if side:
+            await db.executemany(SIDE_INSERT_SQL[field], side)
+
+
+async def _upsert_rows(db: aiosqlite.Connection, rows: List[tuple]) -> None:
+    """在调用方的事务里 upsert 一段参数元组，并同步全文索引与倒排表（写者与 insert_event(s) 共用）。"""
+    if FTS_ENABLED:
+        ids = json.dumps([row[0] for row in rows])
+        await db.execute(FTS_DELETE_SQL, (ids,))  # 已存在的事件：按旧内容从索引里删掉
+        await db.executemany(UPSERT_EVENT_SQL, rows)
+        await db.execute(FTS_INSERT_SQL, (ids,))
+    else:
+        await db.executemany(UPSERT_EVENT_SQL, rows)
+    await _write_side_rows(db, rows)
+
+
+async def insert_event(db: aiosqlite.Connection, ev: Any) -> bool:
+    """
+    幂等写入（ON CONFLICT DO UPDATE）。支持 dataclass 或 dict。
+    字段（必须）：与 app.models.Event 一致。全文索引与倒排表在同一事务里更新。
+    """
+    row = _event_row(ev)
+    try:
+        await _upsert_rows(db, [row])
+    except Exception:
+        await db.rollback()
+        raise
     await db.commit()
     return True
 
 
+_INSERT_CHUNK = 1000
+
+
+async def insert_events(db: aiosqlite.Connection, events: Iterable[Any]) -> int:
+    """
+    批量幂等写入：一个事务、一次提交（group commit）。
+    events 可以是任意可迭代对象：按 _INSERT_CHUNK 行一段转成参数元组，交给 executemany 并同步索引，
+    不先把整批攒成列表，内存只跟段长有关。
+    任何一行不合法都会抛出并回滚，整批不写；返回写入条数。
+    """
+    n = 0
+    it = iter(events)
+    try:
+        while True:
+            rows = [_event_row(ev) for ev in itertools.islice(it, _INSERT_CHUNK)]
+            if not rows:
+                break
+            await _upsert_rows(db, rows)
+            n += len(rows)
+    except Exception:
+        await db.rollback()
+        raise
+    if n:
+        await db.commit()
+    return n
+
+
 # --------- 标记已推送 ---------
+MARK_PUSHED_SQL = "UPDATE events SET pushed=1 WHERE id=?;"
+
+
 async def mark_pushed(db: aiosqlite.Connection, event_id: str) -> None:
-    await db.execute("UPDATE events SET pushed=1 WHERE id=?;", (event_id,))
+    await db.execute(MARK_PUSHED_SQL, (event_id,))
     await db.commit()
 
 
 # --------- 清理过期 ---------
-async def delete_expired(db: aiosqlite.Connection, now_ms: int) -> None:
+# 一条语句删一段：沿 idx_events_expires 取最早过期的 chunk 行（倒排表/全文索引由删除触发器跟着删）
+DELETE_EXPIRED_SQL = """
+DELETE FROM events WHERE rowid IN (
+    SELECT rowid FROM events WHERE expires_at_utc > 0 AND expires_at_utc < ? ORDER BY expires_at_utc LIMIT ?
+);"""
+DELETE_EXPIRED_CHUNK = 2000
+DELETE_PAUSE_MS = 50   # 段与段之间歇一下，让入库的组提交插得进来
+VACUUM_PAGES = 1024    # 每步最多归还的空闲页（默认页大小 4KB 时 4MB）
+
+
+async def delete_expired(db: aiosqlite.Connection, now_ms: int, chunk: int = DELETE_EXPIRED_CHUNK,
+                         pause_ms: float = 0) -> int:
+    """
+    删除 expires_at_utc < now_ms 的事件，返回删除条数。
+    每段 chunk 行一个事务：单次占用写锁的时间和 WAL 增长都有上限，段与段之间歇 pause_ms 毫秒让出连接给别的写入。
+    """
+    chunk = max(1, int(chunk))
+    total = 0
+    while True:
+        async with db.execute(DELETE_EXPIRED_SQL, (now_ms, chunk)) as cur:
+            n = cur.rowcount
+        await db.commit()
+        total += n
+        if n < chunk:
+            return total
+        await asyncio.sleep(pause_ms / 1000)
+
+
+async def _pragma_int(db: aiosqlite.Connection, name: str) -> int:
+    async with db.execute(f"PRAGMA {name};") as cur:
+        return (await cur.fetchone())[0]
+
+
+async def incremental_vacuum(db: aiosqlite.Connection, pages: int = VACUUM_PAGES) -> int:
+    """
+    auto_vacuum=INCREMENTAL 的库：把删除留下的空闲页最多归还 pages 页（文件变小），返回归还页数；其他库返回 0。
+    归还要把文件末尾的页挪进空洞，耗时随 pages 线性增长；空闲页多时分几步调用。
+    注意 executescript 会先提交连接上未提交的事务。
     """
-    删除 expires_at_utc < now_ms 的事件。
+    if pages <= 0 or await _pragma_int(db, "auto_vacuum") != 2:
+        return 0
+    before = await _pragma_int(db, "freelist_count")
+    if before:
+        # 逐步执行的 pragma，每 step 只还一页；executescript 一次跑完
+        await db.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    return before - await _pragma_int(db, "freelist_count")
+
+
+async def enable_incremental_vacuum(db: aiosqlite.Connection) -> bool:
     """
-    await db.execute("DELETE FROM events WHERE expires_at_utc > 0 AND expires_at_utc < ?;", (now_ms,))
+    老库（auto_vacuum=NONE）转成 INCREMENTAL，返回是否做了转换。
+    要整库 VACUUM（重写整个文件，期间独占），之后 rowid 可能变了，顺带重建全文索引；停机维护时跑一次。
+    """
+    if await _pragma_int(db, "auto_vacuum") == 2:
+        return False
     await db.commit()
+    await db.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+    await db.execute("VACUUM;")
+    if FTS_ENABLED:
+        await rebuild_search_index(db)
+    return True
 
 
 # --------- 去重辅助：近期是否已有同线程并已推送 ---------
@@ -179,6 +529,133 @@ async def exists_recent_thread(
         row = await cur.fetchone()
     return row is not None
 
+# --------- 采集源状态（条件请求校验器） ---------
+SOURCE_STATE_FIELDS = ("etag", "last_modified", "body_hash", "ewma_gap_ms", "last_pub_ms")
+
+
+async def load_source_states(db: aiosqlite.Connection) -> Dict[str, Dict[str, Any]]:
+    """
+    读取全部采集源的状态：{source_id: {"etag":..., "last_modified":..., "body_hash":...,
+    "ewma_gap_ms":..., "last_pub_ms":...}}
+    采集器启动时调用一次，避免重启后对所有源冷启动全量拉取、重新学习发布速率。
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    sql = f"SELECT source_id, {', '.join(SOURCE_STATE_FIELDS)} FROM source_state;"
+    async with db.execute(sql) as cur:
+        async for row in cur:
+            out[row[0]] = dict(zip(SOURCE_STATE_FIELDS, row[1:]))
+    return out
+
+
+async def save_source_state(db: aiosqlite.Connection, source_id: str, state: Dict[str, Any]) -> None:
+    """
+    幂等保存单个源的状态；只在状态变化时由采集器调用，避免每轮轮询都写库。
+    """
+    if not source_id:
+        return
+    cols = ", ".join(SOURCE_STATE_FIELDS)
+    updates = ",\n        ".join(f"{c} = excluded.{c}" for c in SOURCE_STATE_FIELDS)
+    sql = f"""
+    INSERT INTO source_state(source_id, {cols}, updated_at_utc)
+    VALUES(?,{','.join('?' * len(SOURCE_STATE_FIELDS))},?)
+    ON CONFLICT(source_id) DO UPDATE SET
+        {updates},
+        updated_at_utc = excluded.updated_at_utc
+    """
+    await db.execute(sql, (source_id, *(state.get(c) for c in SOURCE_STATE_FIELDS), _now_ms()))
+    await db.commit()
+
+
+# --------- 采集器已见条目 ---------
+async def load_seen(db: aiosqlite.Connection, since_ms: int) -> List[tuple]:
+    """返回 [(source_id, uid_key, ts_seen_utc)]，按时间升序，只取 TTL 内的。"""
+    sql = """
+    SELECT source_id, uid_key, ts_seen_utc FROM seen_items
+     WHERE ts_seen_utc >= ?
+     ORDER BY ts_seen_utc ASC;
+    """
+    async with db.execute(sql, (int(since_ms),)) as cur:
+        return list(await cur.fetchall())
+
+
+async def save_seen(db: aiosqlite.Connection, rows: List[tuple]) -> None:
+    """批量 upsert [(source_id, uid_key, ts_seen_utc)]，一次提交。"""
+    if not rows:
+        return
+    await db.executemany(
+        """
+        INSERT INTO seen_items(source_id, uid_key, ts_seen_utc) VALUES(?,?,?)
+        ON CONFLICT(source_id, uid_key) DO UPDATE SET ts_seen_utc = excluded.ts_seen_utc
+        """,
+        rows,
+    )
+    await db.commit()
+
+
+async def delete_seen_before(db: aiosqlite.Connection, cutoff_ms: int) -> None:
+    await db.execute("DELETE FROM seen_items WHERE ts_seen_utc < ?;", (int(cutoff_ms),))
+    await db.commit()
+
+
+# --------- EDGAR 游标 ---------
+async def load_edgar_cursors(db: aiosqlite.Connection) -> Dict[str, Dict[str, Any]]:
+    """{cik: {"last_accession":..., "etag":..., "last_modified":...}}"""
+    out: Dict[str, Dict[str, Any]] = {}
+    sql = f"SELECT cik, {', '.join(EDGAR_CURSOR_FIELDS)} FROM edgar_cursor;"
+    async with db.execute(sql) as cur:
+        async for row in cur:
+            out[row[0]] = dict(zip(EDGAR_CURSOR_FIELDS, row[1:]))
+    return out
+
+
+async def save_edgar_cursors(db: aiosqlite.Connection, cursors: Dict[str, Dict[str, Any]]) -> None:
+    """批量保存一轮里变化过的 CIK 游标（一次提交）。"""
+    if not cursors:
+        return
+    now = _now_ms()
+    await db.executemany(
+        f"""
+        INSERT INTO edgar_cursor(cik, {', '.join(EDGAR_CURSOR_FIELDS)}, updated_at_utc)
+        VALUES(?,?,?,?,?)
+        ON CONFLICT(cik) DO UPDATE SET
+            last_accession = excluded.last_accession,
+            etag = excluded.etag,
+            last_modified = excluded.last_modified,
+            updated_at_utc = excluded.updated_at_utc
+        """,
+        [(cik, *(c.get(f) for f in EDGAR_CURSOR_FIELDS), now) for cik, c in cursors.items()],
+    )
+    await db.commit()
+
+
+# --------- 近重复报道簇：启动时预热 StoryIndex ---------
+async def load_recent_stories(db: aiosqlite.Connection, since_ms: int, limit: int = 200_000) -> List[tuple]:
+    """窗口内事件的 (id, headline, ts_detected_utc, cluster_id)，按发现时间升序（最多 limit 条，取最新的）。"""
+    sql = """
+    SELECT id, headline, ts_detected_utc, cluster_id FROM (
+        SELECT id, headline, ts_detected_utc, cluster_id FROM events
+         WHERE ts_detected_utc >= ?
+         ORDER BY ts_detected_utc DESC
+         LIMIT ?
+    ) ORDER BY ts_detected_utc;
+    """
+    async with db.execute(sql, (int(since_ms), int(limit))) as cur:
+        return [tuple(row) async for row in cur]
+
+
+# --------- 已推送线程：启动时预热 ThreadIndex ---------
+async def load_pushed_threads(db: aiosqlite.Connection, since_ms: int) -> List[tuple]:
+    """窗口内已推送线程的 (thread_key, score, ts_detected_utc)：每个线程取最近的一条。"""
+    # "+thread_key" 让规划器走发现时间索引只扫窗口内的行，而不是按 thread_key 索引扫全表
+    sql = """
+    SELECT thread_key, score, MAX(ts_detected_utc) FROM events
+     WHERE ts_detected_utc >= ? AND pushed = 1 AND +thread_key != ''
+     GROUP BY +thread_key;
+    """
+    async with db.execute(sql, (int(since_ms),)) as cur:
+        return [tuple(row) async for row in cur]
+
+
 # --------- 查询最近事件（给后端/前端/调试用） ---------
 async def get_recent_events(
     db: aiosqlite.Connection,
@@ -195,30 +672,173 @@ async def get_recent_events(
 
     sql = """
     SELECT id, ts_detected_utc, ts_published_utc, headline, source, link,
-           market, symbols, categories, tags, score, pushed, expires_at_utc, thread_key
+           market, symbols, categories, tags, score, pushed, expires_at_utc, thread_key,
+           COALESCE(NULLIF(cluster_id, ''), id)
       FROM events
      WHERE ts_detected_utc >= ?
        AND score >= ?
      ORDER BY ts_detected_utc DESC
      LIMIT ?;
     """
-    out: List[Dict[str, Any]] = []
     async with db.execute(sql, (int(since_ms), float(min_score), int(limit))) as cur:
-        async for row in cur:
-            out.append({
-                "id": row[0],
-                "ts_detected_utc": row[1],
-                "ts_published_utc": row[2],
-                "headline": row[3],
-                "source": row[4],
-                "link": row[5],
-                "market": row[6],
-                "symbols": row[7],
-                "categories": row[8],
-                "tags": row[9],
-                "score": row[10],
-                "pushed": row[11],
-                "expires_at_utc": row[12],
-                "thread_key": row[13],
-            })
-    return out
\ No newline at end of file
+        return [_event_dict(row) async for row in cur]
+
+
+def _event_dict(row: Any) -> Dict[str, Any]:
+    """按 EVENT_COLUMNS 顺序的一行 → dict（cluster_id 已在 SQL 里回退为 id）。"""
+    return dict(zip(EVENT_COLUMNS, row))
+
+
+# --------- 按代码 / 标签 / 分类查事件（倒排表上的索引范围扫描） ---------
+# SQL 也给 web 的同步 sqlite3 连接直接用
+def side_filter_sql(field: str, n_values: int = 1) -> str:
+    """WHERE 片段：事件的 field 含任一给定值、且发现时间 >= ?。参数为 n_values 个值 + since_ms。"""
+    table, col = SIDE_TABLES[field]
+    marks = ",".join("?" * n_values)
+    return f"id IN (SELECT event_id FROM {table} WHERE {col} IN ({marks}) AND ts_detected_utc >= ?)"
+
+
+def events_for_value_sql(field: str) -> str:
+    """某个值（如代码 NVDA）since_ms 以来的事件，最新在前。参数：(value, since_ms, limit)。"""
+    table, col = SIDE_TABLES[field]
+    cols = ", ".join(f"e.{c}" for c in EVENT_COLUMNS[:-1])
+    return f"""
+    SELECT {cols}, COALESCE(NULLIF(e.cluster_id, ''), e.id)
+      FROM {table} AS s JOIN events AS e ON e.id = s.event_id
+     WHERE s.{col} = ? AND s.ts_detected_utc >= ?
+     ORDER BY s.ts_detected_utc DESC
+     LIMIT ?;
+    """
+
+
+def top_values_sql(field: str) -> str:
+    """since_ms 以来出现次数最多的值。参数：(since_ms, limit)；列为 (值, count)。"""
+    table, col = SIDE_TABLES[field]
+    return f"""
+    SELECT {col}, COUNT(*) AS count FROM {table}
+     WHERE ts_detected_utc >= ?
+     GROUP BY {col}
+     ORDER BY count DESC, {col}
+     LIMIT ?;
+    """
+
+
+def _fts_phrase(q: str) -> str:
+    """用户输入 → FTS5 短语（整体按子串匹配，引号转义），不让 AND/OR/NEAR/* 等被当成语法。"""
+    return '"' + q.replace('"', '""') + '"'
+
+
+# 命中数到这个量级时，按时间/分数索引倒序扫、边扫边匹配更快（很快就凑够 limit 条）；
+# 少于它时由全文索引和倒排表给出命中行再排序（行数少，且不用扫整个窗口）
+SEARCH_BROAD_HITS = 5_000
+
+
+def search_probe_sql(query: str, since_ms: int) -> Tuple[str, List[Any]]:
+    """
+    估计 query 的命中数（封顶 SEARCH_BROAD_HITS），结果 >= SEARCH_BROAD_HITS 时用 broad=True 调 search_events_sql。
+    只数到封顶值就停，常见词也只要几毫秒。
+    """
+    q = (query or "").strip()
+    if not q:
+        return "SELECT 0;", []
+    if not (FTS_ENABLED and len(q) >= 3):
+        return "SELECT ?;", [SEARCH_BROAD_HITS]  # 用不上全文索引，只能扫
+    (sym_table, sym_col), (tag_table, tag_col) = SIDE_TABLES["symbols"], SIDE_TABLES["tags"]
+    cap = SEARCH_BROAD_HITS
+    sql = f"""
+    SELECT (SELECT COUNT(*) FROM (SELECT 1 FROM events_fts WHERE events_fts MATCH ? LIMIT ?))
+         + (SELECT COUNT(*) FROM (SELECT 1 FROM {sym_table} WHERE {sym_col} = ? AND ts_detected_utc >= ? LIMIT ?))
+         + (SELECT COUNT(*) FROM (SELECT 1 FROM {tag_table} WHERE {tag_col} IN (?, ?) AND ts_detected_utc >= ? LIMIT ?));
+    """
+    return sql, [_fts_phrase(q), cap, q.upper(), int(since_ms), cap, q, "#" + q.lstrip("#"), int(since_ms), cap]
+
+
+def search_events_sql(
+    query: str,
+    since_ms: int,
+    limit: int = 200,
+    *,
+    broad: bool = False,
+    min_score: Optional[float] = None,
+    unpushed_only: bool = False,
+    order_by_score: bool = False,
+) -> Tuple[str, List[Any]]:
+    """
+    看板搜索：返回 (sql, params)，列同 get_recent_events；web 的同步连接与 search_events 共用。
+    query 为空时只按时间窗口/分数/未推送过滤。非空时命中任一即可：
+    - 标题或来源含 query（子串、不区分大小写）
+    - 代码等于 query（转大写）、标签等于 query 或 #query
+    broad=False：命中行由 events_fts 与倒排表给出（query 不足 3 个字符——trigram 下限——或没有 FTS5 时标题/来源退回 LIKE）；
+    broad=True（常见词，见 search_probe_sql）：沿时间/分数索引扫，凑够 limit 条即停；标题/来源 LIKE，
+    代码/标签直接在分号串上按整词比对（LIKE 先粗筛，instr 再确认），不逐行查倒排表。
+    """
+    cols = ", ".join(EVENT_COLUMNS[:-1])
+    sql = f"SELECT {cols}, COALESCE(NULLIF(cluster_id, ''), id) AS cluster_id FROM events WHERE ts_detected_utc >= ?"
+    params: List[Any] = [int(since_ms)]
+    if unpushed_only:
+        sql += " AND IFNULL(pushed, 0) = 0"
+    if min_score is not None:
+        sql += " AND score >= ?"
+        params.append(float(min_score))
+    q = (query or "").strip()
+    if q:
+        tag_values = [q, "#" + q.lstrip("#")]
+        if broad:
+            like = f"%{q}%"
+            sql += (" AND (headline LIKE ? OR source LIKE ?"
+                    " OR (symbols LIKE ? AND instr(';' || symbols || ';', ?) > 0)"
+                    " OR (tags LIKE ? AND (instr(';' || tags || ';', ?) > 0 OR instr(';' || tags || ';', ?) > 0)))")
+            params += [like, like, like, f";{q.upper()};", like] + [f";{v};" for v in tag_values]
+        else:
+            if FTS_ENABLED and len(q) >= 3:
+                text = "rowid IN (SELECT rowid FROM events_fts WHERE events_fts MATCH ?)"
+                params.append(_fts_phrase(q))
+            else:
+                text = "headline LIKE ? OR source LIKE ?"
+                params += [f"%{q}%"] * 2
+            sql += f" AND ({text} OR {side_filter_sql('symbols')} OR {side_filter_sql('tags', 2)})"
+            params += [q.upper(), int(since_ms)] + tag_values + [int(since_ms)]
+    sql += " ORDER BY score DESC, ts_detected_utc DESC" if order_by_score else " ORDER BY ts_detected_utc DESC"
+    sql += " LIMIT ?;"
+    params.append(int(limit))
+    return sql, params
+
+
+async def search_events(db: aiosqlite.Connection, query: str, since_ms: int, limit: int = 200,
+                        **filters: Any) -> List[Dict[str, Any]]:
+    """
+    看板搜索（标题/来源全文 + 代码/标签精确）；先用 search_probe_sql 估计命中数再选执行方式。
+    filters 为 min_score / unpushed_only / order_by_score。
+    """
+    async with db.execute(*search_probe_sql(query, since_ms)) as cur:
+        broad = (await cur.fetchone())[0] >= SEARCH_BROAD_HITS
+    sql, params = search_events_sql(query, since_ms, limit, broad=broad, **filters)
+    async with db.execute(sql, params) as cur:
+        return [_event_dict(row) async for row in cur]
+
+
+async def events_for_value(
+    db: aiosqlite.Connection, field: str, value: str, since_ms: int, limit: int = 200
+) -> List[Dict[str, Any]]:
+    async with db.execute(events_for_value_sql(field), (value, int(since_ms), int(limit))) as cur:
+        return [_event_dict(row) async for row in cur]
+
+
+async def events_for_symbol(db: aiosqlite.Connection, symbol: str, since_ms: int,
+                            limit: int = 200) -> List[Dict[str, Any]]:
+    return await events_for_value(db, "symbols", symbol, since_ms, limit)
+
+
+async def events_for_tag(db: aiosqlite.Connection, tag: str, since_ms: int,
+                         limit: int = 200) -> List[Dict[str, Any]]:
+    return await events_for_value(db, "tags", tag, since_ms, limit)
+
+
+async def events_for_category(db: aiosqlite.Connection, category: str, since_ms: int,
+                              limit: int = 200) -> List[Dict[str, Any]]:
+    return await events_for_value(db, "categories", category, since_ms, limit)
+
+
+async def top_values(db: aiosqlite.Connection, field: str, since_ms: int, limit: int = 10) -> List[tuple]:
+    async with db.execute(top_values_sql(field), (int(since_ms), int(limit))) as cur:
+        return [tuple(row) async for row in cur]
\ No newline at end of file
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+app/threads.py
+已推送线程（thread_key）的内存索引：scorer 的节流和 notifier 的去重共用这一份。
+- thread_key → (最近一次推送的分数, 推送时间)；查一次字典即可，不再每条事件走一趟 SQL
+- 按分钟分桶过期：每次记录把 key 挂到当前时间桶，整桶过了保留期才逐个检查删除，
+  查找本身只比较时间戳，不扫描
+- 保留期取用到过的最大窗口（scorer 与 notifier 的 dedupe_minutes 可以不同）
+- 启动时 load() 用库里窗口内 pushed=1 的事件预热；之后由 notifier 推送成功时 mark()
+- notifier 的“同一报道只推一次”也记在这里，key 为 story_key(cluster_id)，和线程共用分桶过期
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def story_key(cluster_id: str) -> str:
+    """报道簇在索引里的 key：带前缀，不会和“代码|分类”形式的 thread_key 撞上。"""
+    return f"story:{cluster_id}" if cluster_id else ""
+
+
+class ThreadIndex:
+    def __init__(self, retention_minutes: float = 60, bucket_sec: int = 60):
+        self.retention_ms = int(float(retention_minutes) * 60 * 1000)
+        self.bucket_ms = max(1, int(bucket_sec)) * 1000
+        self._last: Dict[str, Tuple[float, int]] = {}
+        self._buckets: Deque[Tuple[int, List[str]]] = deque()  # (桶序号, 该分钟内记录过的 key)，按时间升序
+        self.lookups = 0
+        self.hits = 0
+
+    # ---------- 查询 / 记录 ----------
+
+    def last(self, thread_key: str, window_minutes: float, now_ms: Optional[int] = None) -> Optional[Tuple[float, int]]:
+        """窗口内最近一次推送的 (分数, 时间)；没有返回 None。"""
+        if not thread_key:
+            return None
+        window_ms = int(float(window_minutes) * 60 * 1000)
+        if window_ms > self.retention_ms:
+            self.retention_ms = window_ms  # 之后的记录按更长的窗口保留
+        now = int(now_ms if now_ms is not None else _now_ms())
+        self._expire(now)
+        self.lookups += 1
+        entry = self._last.get(thread_key)
+        if entry is None or now - entry[1] > window_ms:
+            return None
+        self.hits += 1
+        return entry
+
+    def is_recent(self, thread_key: str, window_minutes: float, now_ms: Optional[int] = None) -> bool:
+        return self.last(thread_key, window_minutes, now_ms) is not None
+
+    def mark(self, thread_key: str, score: float, ts_ms: Optional[int] = None) -> None:
+        """记一次推送（覆盖该线程之前的记录）。"""
+        if not thread_key:
+            return
+        ts = int(ts_ms if ts_ms is not None else _now_ms())
+        self._expire(ts)
+        self._last[thread_key] = (float(score or 0.0), ts)
+        b = ts // self.bucket_ms
+        if self._buckets and self._buckets[-1][0] >= b:
+            self._buckets[-1][1].append(thread_key)  # 时间回退（预热乱序等）时挂到最新的桶，只会晚一点过期
+        else:
+            self._buckets.append((b, [thread_key]))
+
+    def _expire(self, now_ms: int) -> None:
+        cutoff = now_ms - self.retention_ms
+        buckets, last = self._buckets, self._last
+        while buckets and (buckets[0][0] + 1) * self.bucket_ms <= cutoff:
+            for key in buckets.popleft()[1]:
+                entry = last.get(key)
+                if entry is not None and entry[1] < cutoff:  # 之后又推过的留着（挂在更新的桶里）
+                    del last[key]
+
+    # ---------- 预热 ----------
+
+    def load(self, rows: Iterable[Tuple[str, float, int]], now_ms: Optional[int] = None) -> int:
+        """用 (thread_key, score, ts_ms) 重建索引（清空原有记录）；返回保留期内的条数。"""
+        self._last.clear()
+        self._buckets.clear()
+        cutoff = int(now_ms if now_ms is not None else _now_ms()) - self.retention_ms
+        for thread_key, score, ts in sorted((r for r in rows if r[0] and int(r[2] or 0) >= cutoff),
+                                            key=lambda r: int(r[2])):
+            self.mark(thread_key, score, int(ts))
+        return len(self._last)
+
+    # ---------- 统计 ----------
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threads": len(self._last),
+            "buckets": len(self._buckets),
+            "retention_minutes": self.retention_ms / 60000,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "approx_bytes": sys.getsizeof(self._last) + sum(sys.getsizeof(b[1]) for b in self._buckets),
+        }
+
+
+# scorer 与 notifier 共用的一份（run_scorer 启动时从库里预热）
+_SHARED = ThreadIndex()
+
+
+def shared_thread_index() -> ThreadIndex:
+    return _SHARED
+
+
+def thread_index_stats() -> Dict[str, Any]:
+    """共享线程索引：线程数、时间桶数、保留期、查找/命中次数。"""
+    return _SHARED.stats()
@@ -6,9 +6,12 @@
 # TODO: 日志工具
 # TODO: 通用辅助函数
 
+import hashlib
+import importlib
 import re
 import time
-from typing import Tuple
+from typing import Any, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
 
 def compile_english_stem(stem: str) -> re.Pattern:
@@ -40,4 +43,51 @@ def norm_text_for_match(s: str) -> Tuple[str, str]:
     lower = s.lower()
     # 避免 ray-ban 命中 ban
     lower = lower.replace("ray-ban", "rayban")
-    return lower, s
\ No newline at end of file
+    return lower, s
+
+
+def normalize_link(url: Optional[str]) -> Optional[str]:
+    """
+    规范化链接：去掉 utm_*、ref/ref_src 等统计参数，去掉 fragment。
+    让“同文不同链”更容易被识别为同一条。
+    """
+    if not url:
+        return url
+    try:
+        u = urlparse(url)
+        qs = [
+            (k, v)
+            for (k, v) in parse_qsl(u.query, keep_blank_values=True)
+            if not k.lower().startswith("utm_") and k.lower() not in {"ref", "ref_src"}
+        ]
+        return urlunparse((u.scheme, u.netloc, u.path, u.params, urlencode(qs, doseq=True), ""))
+    except Exception:
+        return url
+
+
+def link_uid(link: str) -> str:
+    """条目的稳定 uid：规范化链接的 sha1 十六进制。"""
+    return hashlib.sha1((normalize_link(link) or "").encode("utf-8")).hexdigest()
+
+
+_SHA1_HEX = re.compile(r"[0-9a-f]{40}\Z")
+
+
+def normalize_uid(uid: Any) -> str:
+    """
+    解析器给的 uid → sha1 十六进制：已经是 40 位小写十六进制的原样返回，
+    GUID / URL / 其它字符串按 link_uid 的规则哈希（URL 形式的 uid 与由链接得到的 uid 一致）。
+    """
+    uid = str(uid)
+    return uid if _SHA1_HEX.match(uid) else link_uid(uid)
+
+
+def uid_key(uid: str) -> int:
+    """sha1 十六进制 uid → 63 位整数（SQLite INTEGER 有符号 64 位，省掉最高位）。其它形式先过 normalize_uid。"""
+    return int(uid[:16], 16) >> 1
+
+
+def import_object(target: str) -> Any:
+    """按 "模块:属性" 导入对象（解析器/采集器注册表的懒加载用）。"""
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr)
@@ -17,6 +17,12 @@ import streamlit.components.v1 as components
 ROOT = Path(__file__).resolve().parents[1]
 DB_PATH = ROOT / "intel.db"
 
+# streamlit run app/web.py 时项目根目录不在 sys.path 里
+import sys
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+from app.storage import SEARCH_BROAD_HITS, search_events_sql, search_probe_sql, top_values_sql
+
 st.set_page_config(page_title="Intel Hub - 实时看板", page_icon="🛰️", layout="wide")
 # --- 仅加载一次的前端脚本：保存/恢复滚动位置 ---
 components.html("""
@@ -204,75 +210,44 @@ def _connect() -> sqlite3.Connection:
     conn.row_factory = sqlite3.Row
     return conn
 
+def _search_sql(conn, query: str, since_ms: int, limit: int, **filters):
+    """搜索：标题/来源走全文索引，代码/标签走倒排表；常见词改为沿索引扫（见 app.storage.search_events_sql）。"""
+    broad = conn.execute(*search_probe_sql(query, since_ms)).fetchone()[0] >= SEARCH_BROAD_HITS
+    return search_events_sql(query, since_ms, limit, broad=broad, **filters)
+
 def _fetch_unpushed(conn, since_ms: int, query: str) -> pd.DataFrame:
-    sql = """
-    SELECT id, ts_detected_utc, ts_published_utc, headline, source, link,
-           market, symbols, categories, tags, score, pushed,
-           thread_key
-    FROM events
-    WHERE ts_detected_utc >= ? AND IFNULL(pushed,0)=0
-    """
-    params = [since_ms]
-    if query.strip():
-        like = f"%{query.strip()}%"
-        sql += " AND (headline LIKE ? OR source LIKE ? OR symbols LIKE ? OR tags LIKE ?)"
-        params += [like, like, like, like]
-    sql += " ORDER BY ts_detected_utc DESC LIMIT 200"
+    sql, params = _search_sql(conn, query, since_ms, 200, unpushed_only=True)
     return pd.read_sql_query(sql, conn, params=params)
 
 def _fetch_high(conn, since_ms: int, min_score: int, query: str, critical_only: bool) -> pd.DataFrame:
-    sql = """
-    SELECT id, ts_detected_utc, ts_published_utc, headline, source, link,
-           market, symbols, categories, tags, score, pushed,
-           thread_key
-    FROM events
-    WHERE ts_detected_utc >= ? AND score >= ?
-    """
-    params = [since_ms, min_score]
     if critical_only:
-        sql += " AND score >= 90"   # 你原来的“特别重要”逻辑
-    if query.strip():
-        like = f"%{query.strip()}%"
-        sql += " AND (headline LIKE ? OR source LIKE ? OR symbols LIKE ? OR tags LIKE ?)"
-        params += [like, like, like, like]
-    sql += " ORDER BY score DESC, ts_detected_utc DESC LIMIT 500"
+        min_score = max(min_score, 90)   # 你原来的“特别重要”逻辑
+    sql, params = _search_sql(conn, query, since_ms, 500, min_score=min_score, order_by_score=True)
     return pd.read_sql_query(sql, conn, params=params)
 
-def _top_count(df: pd.DataFrame, col: str, n: int = 10) -> pd.DataFrame:
-    if col not in df:
-        return pd.DataFrame(columns=[col, "count"])
-    s = df[col].astype(str).str.split(r"[;,|\s]+", regex=True).explode()
-    s = s[s.str.len() > 0]
-    return s.value_counts().reset_index().rename(columns={"index": col, 0: "count"}).head(n)
+def _top_count(conn, col: str, since_ms: int, n: int = 10) -> pd.DataFrame:
+    """热度榜：直接在倒排表上按值计数（col 为 "symbols" / "tags"）。"""
+    df = pd.read_sql_query(top_values_sql(col), conn, params=[since_ms, n])
+    return df.rename(columns={df.columns[0]: col})
 # --- 在查询出 df_recent（或 df_top）的地方，渲染之前插入： ---
 def _dedupe_latest(df: pd.DataFrame) -> pd.DataFrame:
     """
-    强制按归一化标题去重：
+    按报道簇去重（cluster_id 由 scorer 入库时分配，改写/转载的同一报道相同，特征太少的短标题按原样转载归簇）：
       - 不考虑来源(source)
-      - 每个标题保留分数最高、时间最新的一条
+      - 每个簇保留分数最高、时间最新的一条
     """
     if df is None or df.empty:
         return df
 
-    # 标题归一化：小写、去空格、去特殊字符、截断
-    norm = (
-        df.get("headline", "").fillna("")
-          .str.lower()
-          .str.replace(r"\s+", " ", regex=True)
-          .str.replace(r"[^\w\s]", "", regex=True)
-          .str.strip()
-          .str.slice(0, 160)
-    )
-
     # 排序：先分数高，再时间新
-    tmp = df.assign(_key=norm).sort_values(
+    tmp = df.sort_values(
         by=["score", "ts_detected_utc"],
         ascending=[False, False],
         kind="mergesort",
     )
 
-    # 去重：同一标题只留一条
-    out = tmp.drop_duplicates(subset="_key", keep="first").drop(columns=["_key"])
+    # 去重：同一簇只留一条（老数据没有 cluster_id，SQL 里已回退为事件 id）
+    out = tmp.drop_duplicates(subset="cluster_id", keep="first")
 
     # 最终输出按时间排序（最新在上）
     return out.sort_values(by="ts_detected_utc", ascending=False).reset_index(drop=True)
@@ -348,20 +323,18 @@ with right_main:
     st.subheader("🔥 热度榜")
     h1_since = _now_ms() - 1*3600*1000
     h24_since = _now_ms() - 24*3600*1000
-    df_1h = pd.read_sql_query("SELECT symbols,tags FROM events WHERE ts_detected_utc>=?", conn, params=[h1_since])
-    df_24h= pd.read_sql_query("SELECT symbols,tags FROM events WHERE ts_detected_utc>=?", conn, params=[h24_since])
 
     st.caption("过去 1 小时 Symbols")
-    st.dataframe(_top_count(df_1h, "symbols", 10), use_container_width=True, hide_index=True)
+    st.dataframe(_top_count(conn, "symbols", h1_since, 10), use_container_width=True, hide_index=True)
 
     st.caption("过去 1 小时 Tags")
-    st.dataframe(_top_count(df_1h, "tags", 10), use_container_width=True, hide_index=True)
+    st.dataframe(_top_count(conn, "tags", h1_since, 10), use_container_width=True, hide_index=True)
 
     st.caption("过去 24 小时 Symbols")
-    st.dataframe(_top_count(df_24h, "symbols", 10), use_container_width=True, hide_index=True)
+    st.dataframe(_top_count(conn, "symbols", h24_since, 10), use_container_width=True, hide_index=True)
 
     st.caption("过去 24 小时 Tags")
-    st.dataframe(_top_count(df_24h, "tags", 10), use_container_width=True, hide_index=True)
+    st.dataframe(_top_count(conn, "tags", h24_since, 10), use_container_width=True, hide_index=True)
 
 try:
     conn.close()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+app/workers.py
+CPU 密集任务（feed 解析等）的执行池，避免阻塞 asyncio 事件循环。
+三种模式（config.yml 的 collector.parse_mode）：
+- inline : 直接在事件循环里跑（原行为，最省开销）
+- thread : 线程池；GIL 每 5ms 切换一次，事件循环最多被卡一个切换周期
+- process: 进程池；彻底不占事件循环所在的解释器，跨进程只回传精简字段
+小于 inline_below_bytes 的输入直接在当前线程处理，池的调度开销比解析本身还大。
+执行池不可用（已关闭 / 工作进程崩溃）时退回 inline，采集不因此中断。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+MODES = ("inline", "thread", "process")
+
+_mode = "inline"
+_executor: Optional[Executor] = None
+_inline_below = 0
+
+
+def configure(mode: str = "thread", workers: Optional[int] = None, inline_below_bytes: int = 0) -> str:
+    """（重新）创建执行池，返回实际生效的模式。"""
+    global _mode, _executor, _inline_below
+    mode = (mode or "inline").strip().lower()
+    if mode not in MODES:
+        print(f"[workers] 未知 parse_mode={mode!r}，退回 inline")
+        mode = "inline"
+    shutdown()
+    n = int(workers) if workers else None
+    if mode == "thread":
+        _executor = ThreadPoolExecutor(max_workers=n or min(4, os.cpu_count() or 1), thread_name_prefix="parse")
+    elif mode == "process":
+        _executor = ProcessPoolExecutor(max_workers=n or (os.cpu_count() or 1))
+    _mode = mode
+    _inline_below = max(0, int(inline_below_bytes or 0))
+    return mode
+
+
+def mode() -> str:
+    return _mode
+
+
+async def run_cpu(fn: Callable[..., Any], *args: Any, size: Optional[int] = None) -> Any:
+    """
+    在执行池里跑 fn(*args)；process 模式下 fn 与参数必须可 pickle（模块级函数）。
+    size 为输入字节数，小于 inline_below_bytes 时就地执行。
+    """
+    executor = _executor
+    if executor is None or (size is not None and size < _inline_below):
+        return fn(*args)
+    loop = asyncio.get_running_loop()
+    try:
+        fut = loop.run_in_executor(executor, functools.partial(fn, *args))
+    except (RuntimeError, BrokenExecutor) as e:  # 池已关闭 / 已损坏，提交即失败
+        _fall_back(executor, e)
+        return fn(*args)
+    try:
+        return await fut
+    except BrokenExecutor as e:  # 工作进程被杀等：这一批就地重跑
+        _fall_back(executor, e)
+        return fn(*args)
+
+
+def _fall_back(executor: Executor, err: BaseException) -> None:
+    """执行池坏了就关掉退回 inline（期间若已 configure 出新池则不动）。"""
+    if executor is _executor:
+        print(f"[workers] 执行池不可用（{err!r}），退回 inline")
+        shutdown()
+
+
+def shutdown() -> None:
+    global _executor, _mode
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    _mode = "inline"
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+app/writer.py
+事件表的单写者：一个协程独占写连接，scorer 的入库、notifier 的 mark_pushed、housekeeper 的清理都交给它。
+- 写操作放进有界队列（满了 put 会等，突发时把压力传回上游，而不是无限堆内存）
+- 组提交：攒够 group_ops 个操作或等满 group_ms 毫秒就一次 commit，突发时 fsync 次数远少于事件数
+- 连续的同类操作合并成一次 executemany（upsert 行、mark_pushed 的 id）
+- 每个操作返回一个 Future，提交成功后 set_result；需要持久化保证的调用方（如推送前）await 它即可，
+  不关心的直接丢下，失败由写者打日志
+- 一组提交失败时回滚，再逐个操作单独提交，坏操作只让它自己的 Future 失败
+- 过期清理一次只删一段（DELETE_EXPIRED_CHUNK 行），housekeeper 逐段入队，段与段之间照常处理入库
+- 归还空闲页（incremental_vacuum）走 executescript，会先提交同组排在它前面的写
+- 写连接只给写者用：commit / rollback 作用于整条连接，采集器等自己提交的写者要另开连接（storage.connect_db）
+- 写协程意外退出后，还在队列里的操作 Future 以 RuntimeError 失败，新的写操作直接抛错，close() 不会卡住
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiosqlite
+
+from app.storage import (DELETE_EXPIRED_CHUNK, DELETE_EXPIRED_SQL, MARK_PUSHED_SQL, VACUUM_PAGES, _event_row,
+                         _upsert_rows, incremental_vacuum)
+
+_UPSERT, _PUSHED, _DELETE, _VACUUM = "upsert", "pushed", "delete", "vacuum"
+
+
+class StorageWriter:
+    def __init__(self, db: aiosqlite.Connection, queue_size: int = 10000, group_ops: int = 256,
+                 group_ms: float = 5):
+        self.db = db
+        self.group_ops = max(1, int(group_ops))
+        self.group_ms = max(0.0, float(group_ms))
+        self._q: asyncio.Queue = asyncio.Queue(maxsize=max(1, int(queue_size)))
+        self._task: Optional[asyncio.Task] = None
+        self.ops = 0
+        self.commits = 0
+        self.failed = 0
+        self.commit_ms_total = 0.0
+        self.commit_ms_max = 0.0
+
+    # ---------- 生命周期 ----------
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def close(self) -> None:
+        """等队列里已有的操作都提交完（写协程中途退出则不再等），再停掉写协程。"""
+        task = self._task
+        if task is not None:
+            if not task.done():
+                drained = asyncio.ensure_future(self._q.join())
+                await asyncio.wait({drained, task}, return_when=asyncio.FIRST_COMPLETED)
+                drained.cancel()
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._fail_pending(RuntimeError("StorageWriter 已关闭"))
+        self._task = None
+
+    # ---------- 写操作（入队，返回提交后完成的 Future） ----------
+
+    async def upsert(self, events: Iterable[Any]) -> "asyncio.Future[int]":
+        """幂等写入一批事件；行不合法在入队前就抛出（整批不入队）。Future 结果为写入条数。"""
+        rows = [_event_row(ev) for ev in events]
+        return await self._put(_UPSERT, rows)
+
+    async def mark_pushed(self, event_id: str) -> "asyncio.Future[int]":
+        return await self._put(_PUSHED, [(event_id,)])
+
+    async def delete_expired(self, now_ms: int, chunk: int = DELETE_EXPIRED_CHUNK) -> "asyncio.Future[int]":
+        """删一段最早过期的事件（至多 chunk 行）。Future 结果为删除条数，小于 chunk 说明删完了。"""
+        return await self._put(_DELETE, [(int(now_ms), max(1, int(chunk)))])
+
+    async def incremental_vacuum(self, pages: int = VACUUM_PAGES) -> "asyncio.Future[int]":
+        """归还至多 pages 个空闲页（见 storage.incremental_vacuum）。Future 结果为归还页数。"""
+        return await self._put(_VACUUM, [(int(pages),)])
+
+    async def _put(self, kind: str, rows: List[tuple]) -> "asyncio.Future[int]":
+        if self._task is not None and self._task.done():
+            raise RuntimeError("StorageWriter 写协程已停止")
+        fut = asyncio.get_running_loop().create_future()
+        await self._q.put((kind, rows, fut))
+        return fut
+
+    # ---------- 写协程 ----------
+
+    async def run(self) -> None:
+        print(f"[writer] started group_ops={self.group_ops} group_ms={self.group_ms}")
+        group: List[Tuple[str, List[tuple], asyncio.Future]] = []
+        try:
+            while True:
+                group = await self._next_group()
+                try:
+                    await self._commit(group)
+                finally:
+                    for _ in group:
+                        self._q.task_done()
+        except asyncio.CancelledError:
+            print("[writer] cancelled")
+            raise
+        except Exception as e:  # 回滚都失败（连接已关闭等）：写者没法继续，别让等着的调用方挂住
+            print(f"[writer] 写协程异常退出: {e!r}")
+            for op in group:
+                if not op[2].done():
+                    op[2].set_exception(e)
+                    op[2].exception()
+            self._fail_pending(e)
+            raise
+
+    async def _next_group(self) -> List[Tuple[str, List[tuple], asyncio.Future]]:
+        """等到第一个操作后，攒到 group_ops 个或 group_ms 毫秒为止。"""
+        group = [await self._q.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.group_ms / 1000
+        while len(group) < self.group_ops:
+            try:
+                group.append(self._q.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                group.append(await asyncio.wait_for(self._q.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return group
+
+    async def _apply(self, group: List[Tuple[str, List[tuple], asyncio.Future]]) -> List[int]:
+        """按顺序执行；连续的同类操作合成一次 executemany。返回每个操作影响的行数。"""
+        counts: List[int] = []
+        i = 0
+        while i < len(group):
+            kind = group[i][0]
+            j = i
+            rows: List[tuple] = []
+            while j < len(group) and group[j][0] == kind:
+                rows.extend(group[j][1])
+                j += 1
+            if kind == _UPSERT:
+                await _upsert_rows(self.db, rows)
+                counts.extend(len(op[1]) for op in group[i:j])
+            elif kind == _PUSHED:
+                await self.db.executemany(MARK_PUSHED_SQL, rows)
+                counts.extend(1 for _ in group[i:j])
+            elif kind == _DELETE:
+                for op in group[i:j]:
+                    async with self.db.execute(DELETE_EXPIRED_SQL, op[1][0]) as cur:
+                        counts.append(cur.rowcount)
+            else:
+                for op in group[i:j]:
+                    counts.append(await incremental_vacuum(self.db, op[1][0][0]))
+            i = j
+        return counts
+
+    async def _commit(self, group: List[Tuple[str, List[tuple], asyncio.Future]]) -> None:
+        t0 = time.perf_counter()
+        try:
+            counts = await self._apply(group)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            if len(group) == 1:
+                self._fail(group[0], e)
+            else:
+                # 整组失败：逐个单独提交，只让坏操作失败
+                print(f"[writer] 组提交失败，逐个重试: {e}")
+                for op in group:
+                    await self._commit([op])
+            return
+        dt = (time.perf_counter() - t0) * 1000
+        self.ops += len(group)
+        self.commits += 1
+        self.commit_ms_total += dt
+        self.commit_ms_max = max(self.commit_ms_max, dt)
+        for (_, _, fut), n in zip(group, counts):
+            if not fut.done():
+                fut.set_result(n)
+
+    def _fail_pending(self, e: BaseException) -> None:
+        """清空队列，还没执行的操作 Future 都以 e 失败。"""
+        while True:
+            try:
+                op = self._q.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            self._q.task_done()
+            fut = op[2]
+            if not fut.done():
+                fut.set_exception(e)
+                fut.exception()
+
+    def _fail(self, op: Tuple[str, List[tuple], asyncio.Future], e: Exception) -> None:
+        self.failed += 1
+        kind, rows, fut = op
+        print(f"[writer] {kind} 写入失败（{len(rows)} 行）: {e}")
+        if not fut.done():
+            fut.set_exception(e)
+            fut.exception()  # 调用方不等这个 Future 时也不报 “never retrieved”
+
+    # ---------- 统计 ----------
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._q.qsize(),
+            "ops": self.ops,
+            "commits": self.commits,
+            "ops_per_commit": self.ops / self.commits if self.commits else 0.0,
+            "failed": self.failed,
+            "commit_ms_avg": self.commit_ms_total / self.commits if self.commits else 0.0,
+            "commit_ms_max": self.commit_ms_max,
+        }
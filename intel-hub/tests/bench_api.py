@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+基准：type: api 采集器对本地替身接口的吞吐与峰值内存。
+替身返回 {"meta": ..., "items": [N 个元素]}，每个元素约 0.5 KB。
+三种读取方式：
+- json_default : parser: json_default（ujson 整段解码 + 逐条猜字段）
+- buffered     : fields 映射，ujson 整段解码
+- stream       : fields 映射，JsonArrayStream 边收边解
+吞吐不开 tracemalloc；内存单独一轮用 tracemalloc 测：
+transient = 峰值 - 轮询结束后仍驻留的（队列里的事件），即解码过程本身的额外占用。
+Usage:
+    python tests/bench_api.py --items 20000 --repeat 3
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app import collector
+from app.api_source import ApiSource
+from app.seen import SeenIndex
+
+
+def _body(n: int) -> bytes:
+    items = [
+        {
+            "uuid": f"0f8fad5b-d9cb-469f-a165-{i:012d}",
+            "title": f"Company {i % 500} reports quarterly results above consensus, raises outlook #{i}",
+            "url": f"https://api.example.com/news/{i}",
+            "published_at": f"2025-10-06T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}Z",
+            "tickers": ["NVDA", "AMD"][: 1 + i % 2],
+            "summary": "Revenue grew year over year driven by data-center demand; margins expanded. " * 3,
+            "meta": {"lang": "en", "score": i % 100 / 10.0, "tags": ["earnings", "guidance"]},
+        }
+        for i in range(n)
+    ]
+    return json.dumps({"meta": {"count": n, "next": None}, "items": items}).encode()
+
+
+async def _serve(body: bytes):
+    async def handle(reader, writer):
+        try:
+            while True:
+                await reader.readuntil(b"\r\n\r\n")
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+                             % len(body))
+                writer.write(body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+MODES = {
+    "json_default": {"parser": "json_default"},
+    "buffered": {"stream_above_bytes": 1 << 40},
+    "stream": {"stream_above_bytes": 0},
+}
+
+
+async def _poll_once(src: dict, keep: bool = False):
+    q: asyncio.Queue = asyncio.Queue()
+    source = ApiSource(src, q, seen=SeenIndex(max_per_source=8))
+    with contextlib.redirect_stdout(io.StringIO()):
+        await source.poll()
+    return q if keep else q.qsize()
+
+
+async def main(n_items: int, repeat: int):
+    body = _body(n_items)
+    server, port = await _serve(body)
+    base = {
+        "id": "bench_api", "type": "api", "url": f"http://127.0.0.1:{port}/news",
+        "items_path": "items", "max_items": n_items, "stop_at_seen": False,
+        "fields": {"headline": "title", "link": "url", "ts_published": "published_at", "id": "uuid"},
+        "ts_format": "iso",
+    }
+    print(f"items={n_items} body={len(body) / 1e6:.1f} MB repeat={repeat}")
+    for name, extra in MODES.items():
+        src = {**base, **extra}
+        if name == "json_default":
+            src.pop("fields")
+        await _poll_once(src)  # 预热连接
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            n = await _poll_once(src)
+        dt = (time.perf_counter() - t0) / repeat
+
+        tracemalloc.start()
+        q = await _poll_once(src, keep=True)
+        retained, peak = tracemalloc.get_traced_memory()
+        del q
+        tracemalloc.stop()
+        print(f"  {name:<13} items={n:<7} {dt * 1000:8.1f} ms/poll  {n / dt:>10,.0f} items/s  "
+              f"{len(body) / dt / 1e6:6.1f} MB/s  peak={peak / 1e6:6.1f} MB  transient={(peak - retained) / 1e6:6.1f} MB")
+
+    server.close()
+    await collector._ensure_client().aclose()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    asyncio.run(main(args.items, args.repeat))
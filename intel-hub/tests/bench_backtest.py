@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+基准：历史标题整批重打分。
+标题由 dummy 生成器产出（中英混排、按 tier_mix 含关键词与 watchlist 代码），评分配置用 dummy 内置词表。
+对比：
+- loop      : 逐条走 score_headline_for_test 的完整 Python 路径（代码、关键词、话题、分数、拼字符串）
+- batch     : score_headlines 单进程（只要计数，分数用 NumPy 一次算完）
+- batch xN  : score_headlines 分块给 N 个进程（--processes；单核机器上不会更快）
+- reweight  : 只换权重，calculate_scores 对已有计数重算
+并核对 batch 的分数与逐条路径一致。
+Usage:
+    python tests/bench_backtest.py --headlines 200000 --processes 2,4
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import yaml
+
+from app import scorer
+from app.backtest import calculate_scores, score_headlines
+from app.parsers.dummy_gen import DummyGenerator, _load_vocab
+from app.scorer import build_snapshot, score_headline_for_test
+
+
+def _snapshot(version: int, weights=None):
+    vocab, watchlist = _load_vocab()
+    words = lambda tier: vocab[tier]["en"] + vocab[tier]["zh"]  # noqa: E731
+    keywords = {"tiers": {"tier1": words("tier1"), "tier2": words("tier2")}, "negatives": words("negative")}
+    if weights:
+        keywords["weights"] = weights
+    return build_snapshot({
+        "config.yml": b"{}",
+        "keywords.yml": yaml.safe_dump(keywords, allow_unicode=True).encode(),
+        "topics.yml": b"{}",
+        "universe.yml": yaml.safe_dump({"watchlist": watchlist}).encode(),
+    }, version)
+
+
+def main(n: int, processes, chunk_size: int, seed: int):
+    gen = DummyGenerator("bench", {"seed": seed, "duplicate_ratio": 0}, start_ms=0)
+    headlines = [gen.make_event(0)["headline"] for _ in range(n)]
+    snap = _snapshot(1)
+    scorer._scorer_config.snapshot = snap
+    scorer._scorer_config.last_check = time.time() + 10**6  # 不让 score_headline_for_test 去读 ops/
+
+    sample = headlines[: min(n, 50_000)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        loop_scores = [score_headline_for_test(h)[2] for h in sample]
+        t_loop = (time.perf_counter() - t0) / len(sample)
+
+    t0 = time.perf_counter()
+    res = score_headlines(headlines, snap=snap)
+    t_batch = time.perf_counter() - t0
+    mismatches = sum(1 for a, b in zip(loop_scores, res["score"].tolist()) if a != b)
+
+    print(f"headlines={n} cpu={os.cpu_count()} chunk_size={chunk_size}")
+    print(f"{'mode':>12}{'total s':>10}{'µs/headline':>13}{'headlines/s':>13}")
+    print(f"{'loop':>12}{t_loop * n:>9.2f}*{t_loop * 1e6:>13.1f}{1 / t_loop:>13.0f}")
+    print(f"{'batch':>12}{t_batch:>10.2f}{t_batch / n * 1e6:>13.1f}{n / t_batch:>13.0f}")
+    for p in processes:
+        t0 = time.perf_counter()
+        pooled = score_headlines(headlines, snap=snap, processes=p, chunk_size=chunk_size)
+        dt = time.perf_counter() - t0
+        same = "" if (pooled == res).all() else "  !! 与单进程结果不一致"
+        print(f"{f'batch x{p}':>12}{dt:>10.2f}{dt / n * 1e6:>13.1f}{n / dt:>13.0f}{same}")
+
+    tuned = _snapshot(2, {"tier1": 80, "tier2": 20, "negative": -60, "watchlist_bonus": 15})
+    t0 = time.perf_counter()
+    calculate_scores(res["tier1_hits"], res["tier2_hits"], res["negative_hits"], res["watchlist"], tuned)
+    dt = time.perf_counter() - t0
+    print(f"{'reweight':>12}{dt:>10.4f}{dt / n * 1e6:>13.3f}{n / dt:>13.0f}")
+    if len(sample) < n:
+        print(f"* loop 只测了前 {len(sample)} 条，总耗时按比例估算")
+    print("分数与逐条路径一致" if not mismatches else f"!! {mismatches} 条分数与逐条路径不一致")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--headlines", type=int, default=200_000)
+    ap.add_argument("--processes", default="2", help="逗号分隔；空串表示不测进程池")
+    ap.add_argument("--chunk-size", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    main(args.headlines, [int(p) for p in args.processes.split(",") if p], args.chunk_size, args.seed)
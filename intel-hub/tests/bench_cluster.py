@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+基准：近重复报道聚类。
+窗口内先灌入 --sizes 条报道（约三成是前面某条的改写：删/换一两个词、加来源后缀），然后测：
+- index µs   : StoryIndex.assign 每条耗时（分词 + MinHash + LSH 查桶 + 核对候选）
+- pairwise µs: 与窗口内每条都算一次 Jaccard 的耗时（大窗口只抽几条估算）
+- cand       : 每条平均核对的候选数
+- recall     : 改写被归到原簇的比例
+- index MB   : 索引常驻内存（tracemalloc 统计的分配峰值）
+以及看板去重：原 pandas 正则归一化标题 vs 按 cluster_id drop_duplicates（行数同 --sizes）。
+Usage:
+    python tests/bench_cluster.py --sizes 10000,100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import pandas as pd
+
+from app.cluster import StoryIndex, jaccard, shingles
+
+_SUFFIX = ["", "", " - Reuters", " | Yahoo Finance", " (Bloomberg)", " -- Nasdaq"]
+
+
+def _stories(n: int, seed: int):
+    rng = random.Random(seed)
+    vocab = [f"{rng.choice('bcdfghklmnprst')}{rng.choice('aeiou')}{rng.choice('bcdfghklmnprst')}{i}"
+             for i in range(20000)]
+    out = []  # (event_id, headline, 原簇 id 或 "")
+    for i in range(n):
+        if out and rng.random() < 0.3:
+            src_id, src, _ = out[rng.randrange(max(0, len(out) - 5000), len(out))]
+            words = src.split(" | ")[0].split(" - ")[0].split()
+            words[rng.randrange(len(words))] = rng.choice(vocab)
+            if rng.random() < 0.5:
+                words.insert(rng.randrange(len(words)), rng.choice(["to", "the", "in", rng.choice(vocab)]))
+            out.append((f"e{i}", " ".join(words) + rng.choice(_SUFFIX), src_id))
+        else:
+            out.append((f"e{i}", " ".join(rng.choice(vocab) for _ in range(rng.randint(8, 14))), ""))
+    return out
+
+
+def main(sizes, seed: int):
+    print(f"{'stories':>9}{'index µs':>10}{'pairwise µs':>13}{'cand':>7}{'recall':>8}"
+          f"{'index MB':>10}{'regex dedupe':>14}{'cluster dedupe':>16}")
+    for n in sizes:
+        stories = _stories(n, seed)
+        idx = StoryIndex(max_stories=n + 1)
+        cluster_of = {}
+        t0 = time.perf_counter()
+        for ts, (eid, headline, _) in enumerate(stories):
+            cluster_of[eid] = idx.assign(eid, headline, ts)
+        t_index = (time.perf_counter() - t0) / n
+
+        tracemalloc.start()
+        probe = StoryIndex(max_stories=n + 1)
+        for ts, (eid, headline, _) in enumerate(stories):
+            probe.assign(eid, headline, ts)
+        mem_mb = tracemalloc.get_traced_memory()[0] / 2**20
+        tracemalloc.stop()
+        del probe
+
+        rewrites = [(eid, src) for eid, _, src in stories if src]
+        recall = sum(cluster_of[eid] == cluster_of[src] for eid, src in rewrites) / max(1, len(rewrites))
+
+        feats = [shingles(h) for _, h, _ in stories]
+        sample = feats[-20:]
+        t0 = time.perf_counter()
+        for f in sample:
+            max(jaccard(f, g) for g in feats)
+        t_pair = (time.perf_counter() - t0) / len(sample)
+
+        df = pd.DataFrame({"headline": [h for _, h, _ in stories], "score": 1.0,
+                           "ts_detected_utc": range(n), "cluster_id": [cluster_of[e] for e, _, _ in stories]})
+        t0 = time.perf_counter()
+        norm = (df["headline"].str.lower().str.replace(r"\s+", " ", regex=True)
+                .str.replace(r"[^\w\s]", "", regex=True).str.strip().str.slice(0, 160))
+        df.assign(_key=norm).drop_duplicates(subset="_key")
+        t_regex = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        df.drop_duplicates(subset="cluster_id")
+        t_cluster = time.perf_counter() - t0
+
+        print(f"{n:>9}{t_index * 1e6:>10.1f}{t_pair * 1e6:>13.0f}{idx.candidates / n:>7.2f}{recall:>8.1%}{mem_mb:>10.1f}"
+              f"{t_regex * 1000:>12.1f}ms{t_cluster * 1000:>14.1f}ms")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,100000")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    main([int(s) for s in args.sizes.split(",")], args.seed)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+基准：事件行绑定（Event → UPSERT_EVENT_SQL 参数元组）与批量入库。
+- 行绑定：兼容路径 _event_row_compat（拷 __dict__、逐字段取值转换）对比 Event 快路径 _event_row（attrgetter）
+  每行 CPU 纳秒，以及 tracemalloc 量到的单次调用临时分配峰值、整批留存字节
+- 入库：--events 条事件写入空库（含全文索引与倒排表），“先攒列表再 executemany”（原实现）对比 insert_events 分段写，
+  给出 rows/s 与 tracemalloc 峰值（含 aiosqlite 线程里的分配）
+Usage:
+    python tests/bench_event_rows.py --events 100000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.models import Event
+from app.storage import _event_row, _event_row_compat, _upsert_rows, init_db, insert_events
+
+
+def _events(n: int):
+    now = int(time.time() * 1000)
+    return [Event(id=f"e{i}", ts_detected_utc=now, ts_published_utc=now, headline=f"NVDA headline number {i}",
+                  source="bench", link=f"https://bench/{i}", market="us", symbols="NVDA", categories="general",
+                  tags="", score=50.0, pushed=0, expires_at_utc=now + 3600_000, thread_key="NVDA|general",
+                  cluster_id=f"e{i}")
+            for i in range(n)]
+
+
+def _bind(fn, events):
+    t0 = time.perf_counter()
+    for ev in events:
+        fn(ev)
+    ns = (time.perf_counter() - t0) / len(events) * 1e9
+
+    sample = events[:1000]
+    tracemalloc.start()
+    for ev in sample[:10]:  # 预热，不计首次调用的一次性分配
+        fn(ev)
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    for ev in sample:
+        fn(ev)
+    transient = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    rows = [fn(ev) for ev in events]
+    retained = (tracemalloc.get_traced_memory()[0] - base) / len(events)
+    tracemalloc.stop()
+    del rows
+    return ns, transient, retained
+
+
+async def _insert_list(db, events):
+    rows = [_event_row_compat(ev) for ev in events]
+    await _upsert_rows(db, rows)
+    await db.commit()
+
+
+async def _insert(mode: str, events):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = await init_db(os.path.join(tmp, "bench.db"))
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        if mode == "list":
+            await _insert_list(db, events)
+        else:
+            await insert_events(db, events)
+        elapsed = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+        await db.close()
+    return len(events) / elapsed, peak
+
+
+def main(n: int):
+    events = _events(n)
+    print(f"events={n}")
+    print(f"{'bind':>8}{'ns/row':>9}{'transient B':>13}{'retained B/row':>16}")
+    for name, fn in (("compat", _event_row_compat), ("fast", _event_row)):
+        ns, transient, retained = _bind(fn, events)
+        print(f"{name:>8}{ns:>9.0f}{transient:>13}{retained:>16.0f}")
+    print(f"{'insert':>8}{'rows/s':>9}{'peak KB':>13}")
+    for name in ("list", "stream"):
+        rate, peak = asyncio.run(_insert(name, events))
+        print(f"{name:>8}{rate:>9.0f}{peak / 1024:>13.0f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=100000)
+    args = ap.parse_args()
+    main(args.events)
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+基准：过期清理时的停顿。
+建一个 --events 条事件的库（含倒排表与全文索引；为了 1000 万行也能建得动，直接用 SQL 批量灌入再重建索引），
+每种清理方式各删一段互不重叠的 --expire 条过期事件，清理期间：
+- 入库：经 StorageWriter 按 --rate 条/秒逐条 upsert，记录从入队到提交完成的最大/p99 延迟（= 入库被挡住的时间）
+- 看板：另一条同步 sqlite3 连接（web 同款）反复查未推送流，记录最慢一次查询
+- WAL：清理期间 -wal 文件的峰值
+方式：
+- idle     : 不清理，只有入库（对照：自动 checkpoint 等本来就有的停顿）
+- old      : 原实现，一条 DELETE 全表扫（无 expires 索引）
+- one      : 沿 idx_events_expires 一条语句删完
+- chunk=N  : 每段 N 行一个写操作，段与段之间歇 --pause-ms 毫秒（run_housekeeper 的做法），其间入库照常提交
+最后给出 incremental_vacuum 每次归还 --vacuum-pages 页的耗时与文件大小变化。
+Usage:
+    python tests/bench_housekeeping.py --events 10000000 --db /tmp/hk_bench.db
+    python tests/bench_housekeeping.py --events 1000000 --chunks 500,2000,10000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app import writer as writer_mod
+from app.models import Event
+from app.storage import (DELETE_EXPIRED_SQL, DELETE_PAUSE_MS, FTS_ENABLED, VACUUM_PAGES, init_db,
+                         search_events_sql)
+from app.writer import StorageWriter
+
+HOUR_MS = 3600 * 1000
+WINDOW_MS = 48 * HOUR_MS
+SYMBOLS = ["NVDA", "AMD", "TSLA", "AAPL", "MSFT", "", "", ""]
+OLD_SQL = "DELETE FROM events NOT INDEXED WHERE expires_at_utc > 0 AND expires_at_utc < ? AND ? > 0;"
+
+FILL_SQL = """
+WITH RECURSIVE c(i) AS (SELECT ? UNION ALL SELECT i + 1 FROM c WHERE i < ?)
+INSERT INTO events
+SELECT 'e' || i, ? + i * ?, ? + i * ?, 'headline ' || i || ' about ' || (i % 997) || ' 行业速览',
+       'feed_' || (i % 20), 'https://bench/' || i, 'us', {symbol}, 'general', '', i % 120, i % 10 = 0,
+       ? + i * ? + ?, '', 'e' || i
+FROM c;
+"""
+
+
+def _build(path: str, n: int, t0: int, step: int) -> None:
+    db = asyncio.run(init_db(path))
+    asyncio.run(db.close())
+    conn = sqlite3.connect(path)
+    symbol = "CASE i % {k} {whens} END".format(
+        k=len(SYMBOLS), whens=" ".join(f"WHEN {j} THEN '{s}'" for j, s in enumerate(SYMBOLS)))
+    sql = FILL_SQL.format(symbol=symbol)
+    start = time.perf_counter()
+    for lo in range(0, n, 1_000_000):
+        hi = min(n, lo + 1_000_000) - 1
+        conn.execute(sql, (lo, hi, t0, step, t0, step, t0, step, WINDOW_MS))
+        conn.commit()
+        print(f"  events {hi + 1}/{n} ({time.perf_counter() - start:.0f}s)", flush=True)
+    conn.execute("INSERT INTO event_symbols SELECT id, symbols, ts_detected_utc FROM events WHERE symbols <> '';")
+    conn.execute("INSERT INTO event_categories SELECT id, categories, ts_detected_utc FROM events;")
+    conn.commit()
+    if FTS_ENABLED:
+        conn.execute("INSERT INTO events_fts(events_fts) VALUES('rebuild');")
+        conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+    conn.close()
+    print(f"  side tables + FTS done ({time.perf_counter() - start:.0f}s)", flush=True)
+
+
+class _Reader(threading.Thread):
+    """看板同款读连接：反复查未推送流，顺带采样 WAL 大小。"""
+
+    def __init__(self, path: str, since: int):
+        super().__init__(daemon=True)
+        self.path, self.since = path, since
+        self.stop = threading.Event()
+        self.max_ms = 0.0
+        self.wal_peak = 0
+
+    def run(self):
+        conn = sqlite3.connect(self.path)
+        sql, params = search_events_sql("", self.since, 200, unpushed_only=True)
+        while not self.stop.is_set():
+            t = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            self.max_ms = max(self.max_ms, (time.perf_counter() - t) * 1000)
+            with contextlib.suppress(OSError):
+                self.wal_peak = max(self.wal_peak, os.path.getsize(self.path + "-wal"))
+            time.sleep(0.02)
+        conn.close()
+
+
+def _pct(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def _run(db, w: StorageWriter, path: str, mode: str, cutoff: int, chunk: int, pause_ms: float, rate: float,
+               since: int):
+    lat = []
+    done = asyncio.Event()
+
+    async def produce():
+        i = 0
+        t0 = time.perf_counter()
+        while not done.is_set():
+            now = int(time.time() * 1000)
+            ev = Event(id=f"live-{mode}-{i}", ts_detected_utc=now, ts_published_utc=now, headline=f"live {i}",
+                       source="live", link="", market="us", symbols="NVDA", categories="general", tags="",
+                       score=50.0, pushed=0, expires_at_utc=now + WINDOW_MS, thread_key="")
+            t = time.perf_counter()
+            fut = await w.upsert([ev])
+            fut.add_done_callback(lambda _, t=t: lat.append((time.perf_counter() - t) * 1000))
+            i += 1
+            await asyncio.sleep(max(0.0, t0 + i / rate - time.perf_counter()))
+
+    reader = _Reader(path, since)
+    reader.start()
+    producer = asyncio.create_task(produce())
+    await asyncio.sleep(0.5)  # 先让入库跑起来
+    t0 = time.perf_counter()
+    deleted = 0
+    if mode == "idle":
+        await asyncio.sleep(1.0)
+    elif mode == "old":
+        writer_mod.DELETE_EXPIRED_SQL = OLD_SQL
+        try:
+            deleted = await (await w.delete_expired(cutoff, 1))
+        finally:
+            writer_mod.DELETE_EXPIRED_SQL = DELETE_EXPIRED_SQL
+    else:
+        while True:
+            n = await (await w.delete_expired(cutoff, chunk))
+            deleted += n
+            if n < chunk:
+                break
+            await asyncio.sleep(pause_ms / 1000)
+    elapsed = time.perf_counter() - t0
+    await asyncio.sleep(0.2)
+    done.set()
+    await producer
+    await w.close()
+    reader.stop.set()
+    reader.join()
+    w.start()
+    await db.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+    return deleted, elapsed, max(lat), _pct(lat, 0.99), reader.max_ms, reader.wal_peak
+
+
+async def _bench(path: str, t0: int, step: int, expire: int, chunks, pause_ms: float, rate: float,
+                 vacuum_pages: int):
+    db = await init_db(path)
+    w = StorageWriter(db, group_ms=5)
+    since = t0 + (len(chunks) + 2) * expire * step
+    modes = [("idle", 0), ("old", 0), ("one", 10 ** 12)] + [(f"chunk={c}", c) for c in chunks]
+    print(f"{'mode':>12}{'deleted':>9}{'total s':>9}{'ingest max ms':>15}{'p99 ms':>8}{'reader max ms':>15}"
+          f"{'WAL peak MB':>13}")
+    with contextlib.redirect_stdout(io.StringIO()) as quiet:
+        w.start()
+    for k, (mode, chunk) in enumerate(modes):
+        # 第 k 种清理方式删第 k 段：过期时间落在 [t0 + (k-1)*expire*step, t0 + k*expire*step) + 48h 的事件
+        cutoff = t0 + k * expire * step + WINDOW_MS
+        with contextlib.redirect_stdout(quiet):
+            deleted, elapsed, ing_max, ing_p99, rd_max, wal = await _run(db, w, path, mode, cutoff, chunk, pause_ms,
+                                                                         rate, since)
+        print(f"{mode:>12}{deleted:>9}{elapsed:>9.2f}{ing_max:>15.1f}{ing_p99:>8.1f}{rd_max:>15.1f}"
+              f"{wal / 1e6:>13.1f}", flush=True)
+
+    async with db.execute("PRAGMA freelist_count;") as cur:
+        free = (await cur.fetchone())[0]
+    size = os.path.getsize(path)
+    steps = []
+    with contextlib.redirect_stdout(quiet):
+        while True:
+            t = time.perf_counter()
+            freed = await (await w.incremental_vacuum(vacuum_pages))
+            steps.append((time.perf_counter() - t) * 1000)
+            if freed < vacuum_pages:
+                break
+        await w.close()
+    print(f"incremental_vacuum: freelist={free} pages, {len(steps)} steps of {vacuum_pages} pages, "
+          f"max {max(steps):.1f} ms/step, file {size / 1e6:.0f} MB -> {os.path.getsize(path) / 1e6:.0f} MB")
+    await db.close()
+
+
+def main(n: int, db_path: str, expire: int, chunks, pause_ms: float, rate: float, vacuum_pages: int):
+    expire = expire or n // 20
+    if (len(chunks) + 2) * expire > n:
+        raise SystemExit("--expire 太大：每种方式要删一段互不重叠的事件")
+    t0 = 1_700_000_000_000
+    step = max(1, WINDOW_MS // n)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = db_path or os.path.join(tmp, "hk.db")
+        if not os.path.exists(path):
+            print(f"building {n} events in {path} …", flush=True)
+            _build(path, n, t0, step)
+        conn = sqlite3.connect(path)
+        total = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        conn.close()
+        print(f"events={total} expire={expire}/mode pause={pause_ms:.0f}ms rate={rate:.0f}/s fts={FTS_ENABLED}")
+        asyncio.run(_bench(path, t0, step, expire, chunks, pause_ms, rate, vacuum_pages))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=1_000_000)
+    ap.add_argument("--db", default="", help="库文件路径；已存在则直接测（每次运行会删掉其中几段事件，重测请换新库）")
+    ap.add_argument("--expire", type=int, default=0, help="每种方式删除的条数（默认 events/20）")
+    ap.add_argument("--chunks", default="500,2000,10000")
+    ap.add_argument("--pause-ms", type=float, default=DELETE_PAUSE_MS, help="分段删除时段与段之间歇的毫秒数")
+    ap.add_argument("--rate", type=float, default=500, help="清理期间的入库速率（条/秒）")
+    ap.add_argument("--vacuum-pages", type=int, default=VACUUM_PAGES)
+    args = ap.parse_args()
+    main(args.events, args.db, args.expire, [int(c) for c in args.chunks.split(",")], args.pause_ms,
+         args.rate, args.vacuum_pages)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+基准：
+1) 关键词匹配，原逐词实现（NaiveKeywordMatcher）vs 编译型 KeywordMatcher。
+   关键词表按 --sizes 生成（约 70% 英文词根、10% 大写缩写、20% 中文），
+   分到 tier1 / tier2 / negatives / keyword_blacklist；标题为中英混排，约三成含命中。
+   输出：构建耗时、每条标题的匹配耗时（µs）与加速比，并核对两者结果一致。
+2) 代码提取，原逐个代码子串查找 vs SymbolMatcher（分词查表 + 别名自动机），universe 大小按 --tickers。
+3) 话题标签，原嵌套循环 vs TopicMatcher，主题数按 --topics（每个主题 3-8 个中英文 tag）。
+Usage:
+    python tests/bench_matcher.py --sizes 100,1000,10000 --tickers 100,1000,8000 --topics 10,100,2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.matcher import KeywordMatcher, NaiveKeywordMatcher, SymbolMatcher, TopicMatcher
+
+_SYLLABLES = ["ac", "qui", "si", "tion", "mer", "ger", "ban", "kr", "up", "cy", "re", "struc", "ture", "li",
+              "cen", "se", "gui", "dance", "pro", "duct", "la", "unch", "deal", "chip", "cloud", "ra", "te"]
+_CJK = "收购并购破产获批中标合作财报回购发布芯片传闻观点监管调查诉讼减持增持停牌复牌"
+_FILLER = ["shares", "rally", "after", "report", "market", "investors", "said", "on", "the", "in", "早盘", "公告", "称"]
+
+
+def _keywords(rng: random.Random, n: int) -> dict:
+    words = set()
+    while len(words) < n:
+        r = rng.random()
+        if r < 0.7:
+            words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+        elif r < 0.8:
+            words.add("".join(rng.choice("ABCDEFGHIKLMNOPRSTU") for _ in range(rng.randint(3, 5))))
+        else:
+            words.add("".join(rng.choice(_CJK) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    q = max(1, n // 10)
+    return {
+        "tiers": {"tier1": words[: 3 * q], "tier2": words[3 * q: 7 * q]},
+        "negatives": words[7 * q: 9 * q],
+        "keyword_blacklist": words[9 * q:],
+    }
+
+
+def _headlines(rng: random.Random, kw: dict, n: int):
+    pool = kw["tiers"]["tier1"] + kw["tiers"]["tier2"] + kw["negatives"]
+    out = []
+    for _ in range(n):
+        parts = [rng.choice(_FILLER) for _ in range(rng.randint(8, 16))]
+        if rng.random() < 0.3:
+            parts.insert(rng.randrange(len(parts)), rng.choice(pool) + rng.choice(["", "s", "ed", "ing"]))
+        out.append(" ".join(parts))
+    return out
+
+
+def _substring_symbols(watchlist, headline: str):
+    """原 scorer._extract_symbols：逐个代码在大写标题里找子串。"""
+    return [s.upper() for s in watchlist if s.upper() in headline.upper()]
+
+
+def _bench_symbols(sizes, n_headlines: int, seed: int):
+    print(f"\n{'tickers':>9}{'aliases':>9}{'build':>9}{'substring µs':>14}{'matcher µs':>12}{'speedup':>9}")
+    for n in sizes:
+        rng = random.Random(seed)
+        tickers = set()
+        while len(tickers) < n:
+            tickers.add("".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(2, 5))))
+        watchlist = sorted(tickers)
+        # 十分之一的代码配一个英文名、一个中文名
+        aliases = {t: [f"{t.title()}corp Holdings", "".join(rng.choice(_CJK) for _ in range(3))]
+                   for t in watchlist[::10]}
+        t0 = time.perf_counter()
+        matcher = SymbolMatcher(watchlist, aliases)
+        t_build = time.perf_counter() - t0
+
+        headlines = []
+        for _ in range(n_headlines):
+            parts = [rng.choice(_FILLER) for _ in range(rng.randint(8, 16))]
+            r = rng.random()
+            if r < 0.3:
+                parts.insert(rng.randrange(len(parts)), rng.choice(["", "$"]) + rng.choice(watchlist))
+            elif r < 0.4:
+                parts.insert(rng.randrange(len(parts)), rng.choice(rng.choice(list(aliases.values()))))
+            headlines.append(" ".join(parts))
+
+        sample = headlines[: max(50, n_headlines * 100 // max(n, 100))]
+        t_old = _time_per_call(lambda h: _substring_symbols(watchlist, h), sample)
+        t_new = _time_per_call(matcher.extract, headlines)
+        print(f"{n:>9}{len(aliases) * 2:>9}{t_build * 1000:>7.1f}ms{t_old * 1e6:>14.1f}{t_new * 1e6:>12.1f}"
+              f"{t_old / t_new:>8.1f}x")
+
+
+def _topics_loop(topics, headline: str):
+    """原 scorer._match_topics 的嵌套循环。"""
+    matched = []
+    for cfg in topics.values():
+        hashtag = cfg.get("hashtag", "")
+        for tag in cfg.get("tags", []):
+            if tag in headline:
+                if hashtag and hashtag not in matched:
+                    matched.append(hashtag)
+                break
+    return matched
+
+
+def _bench_topics(sizes, n_headlines: int, seed: int):
+    print(f"\n{'topics':>9}{'tags':>8}{'build':>9}{'loop µs':>10}{'matcher µs':>12}{'speedup':>9}")
+    for n in sizes:
+        rng = random.Random(seed)
+        topics = {}
+        for i in range(n):
+            tags = ["".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(2, 6))]
+            tags += ["".join(rng.choice(_CJK) for _ in range(rng.randint(2, 3))) for _ in range(rng.randint(1, 2))]
+            topics[f"topic{i}"] = {"tags": tags, "hashtag": f"#T{i}"}
+        t0 = time.perf_counter()
+        matcher = TopicMatcher(topics)
+        t_build = time.perf_counter() - t0
+
+        all_tags = [t for cfg in topics.values() for t in cfg["tags"]]
+        headlines = []
+        for _ in range(n_headlines):
+            parts = [rng.choice(_FILLER) for _ in range(rng.randint(8, 16))]
+            if rng.random() < 0.3:
+                parts.insert(rng.randrange(len(parts)), rng.choice(all_tags))
+            headlines.append(" ".join(parts))
+
+        t_old = _time_per_call(lambda h: _topics_loop(topics, h), headlines)
+        t_new = _time_per_call(matcher.match, headlines)
+        print(f"{n:>9}{len(all_tags):>8}{t_build * 1000:>7.1f}ms{t_old * 1e6:>10.1f}{t_new * 1e6:>12.1f}"
+              f"{t_old / t_new:>8.1f}x")
+
+
+def _time_per_call(fn, headlines) -> float:
+    t0 = time.perf_counter()
+    for h in headlines:
+        fn(h)
+    return (time.perf_counter() - t0) / len(headlines)
+
+
+def main(sizes, n_headlines: int, seed: int):
+    print(f"{'keywords':>9}{'build naive':>13}{'build AC':>11}{'naive µs':>11}{'AC µs':>9}{'speedup':>9}")
+    for n in sizes:
+        rng = random.Random(seed)
+        kw = _keywords(rng, n)
+        headlines = _headlines(rng, kw, n_headlines)
+
+        t0 = time.perf_counter()
+        naive = NaiveKeywordMatcher(kw)
+        t_naive_build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        fast = KeywordMatcher.from_config(kw)
+        t_fast_build = time.perf_counter() - t0
+
+        mismatches = sum(1 for h in headlines if naive.match(h) != fast.match(h))
+        sample = headlines[: max(50, n_headlines * 100 // max(n, 100))]  # 大表时逐词实现太慢，少测几条
+        t_naive = _time_per_call(naive.match, sample)
+        t_fast = _time_per_call(fast.match, headlines)
+        flag = "" if not mismatches else f"  !! {mismatches} 条结果不一致"
+        print(f"{n:>9}{t_naive_build * 1000:>11.1f}ms{t_fast_build * 1000:>9.1f}ms"
+              f"{t_naive * 1e6:>11.1f}{t_fast * 1e6:>9.1f}{t_naive / t_fast:>8.1f}x{flag}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="100,1000,10000")
+    ap.add_argument("--tickers", default="100,1000,8000")
+    ap.add_argument("--topics", default="10,100,2000")
+    ap.add_argument("--headlines", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    main([int(s) for s in args.sizes.split(",")], args.headlines, args.seed)
+    _bench_symbols([int(s) for s in args.tickers.split(",")], args.headlines, args.seed)
+    _bench_topics([int(s) for s in args.topics.split(",")], args.headlines, args.seed)
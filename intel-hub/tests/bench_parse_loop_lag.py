@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+基准：并发解析 N 个 feed 时事件循环的卡顿（loop lag）。
+一个 ticker 协程每 tick_ms 醒一次，记录实际醒来时间比预期晚了多少；
+同时把 N 份 RSS 正文交给 workers.run_cpu(parse_rss, ...) 并发解析。
+分别在 inline / thread / process 三种模式下跑一遍。
+Usage:
+    python tests/bench_parse_loop_lag.py --feeds 200 --items 100
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app import workers
+from app.parsers.rss_default import parse_rss
+
+
+def _feed(i: int, n_items: int) -> bytes:
+    items = "".join(
+        f"<item><title>Feed {i} headline {j} about NVDA earnings and guidance</title>"
+        f"<link>http://bench.local/{i}/{j}?utm_source=x</link>"
+        f"<description>{'Lorem ipsum dolor sit amet. ' * 8}</description>"
+        f"<pubDate>Mon, 06 Oct 2025 10:{j % 60:02d}:00 GMT</pubDate></item>"
+        for j in range(n_items)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>f{i}</title>{items}</channel></rss>'.encode()
+
+
+async def _ticker(tick_ms: float, lags: list, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        t0 = loop.time()
+        await asyncio.sleep(tick_ms / 1000)
+        lags.append((loop.time() - t0) * 1000 - tick_ms)
+
+
+async def _run(bodies, limit: int, tick_ms: float):
+    lags: list = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(_ticker(tick_ms, lags, stop))
+    await asyncio.sleep(0.05)
+    t0 = time.perf_counter()
+    results = await asyncio.gather(
+        *(workers.run_cpu(parse_rss, b, f"bench_{i}", limit, size=len(b)) for i, b in enumerate(bodies))
+    )
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await tick
+    return elapsed, sum(len(r) for r in results), sorted(lags)
+
+
+def main(n_feeds: int, n_items: int, limit: int, n_workers: int, tick_ms: float):
+    bodies = [_feed(i, n_items) for i in range(n_feeds)]
+    print(f"feeds={n_feeds} items/feed={n_items} limit={limit} body={len(bodies[0]) / 1024:.0f} KiB "
+          f"workers={n_workers or 'auto'} cpus={os.cpu_count()}")
+    for mode in ("inline", "thread", "process"):
+        workers.configure(mode, n_workers or None)
+        elapsed, n, lags = asyncio.run(_run(bodies, limit, tick_ms))
+        workers.shutdown()
+        p = lambda q: lags[min(len(lags) - 1, int(q * len(lags)))] if lags else 0.0
+        print(f"  {mode:<8} total={elapsed:6.2f}s items={n:<6} "
+              f"loop lag p50={p(0.5):7.1f}ms p99={p(0.99):7.1f}ms max={lags[-1] if lags else 0:7.1f}ms")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--feeds", type=int, default=200)
+    ap.add_argument("--items", type=int, default=100)
+    ap.add_argument("--limit", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=0)
+    ap.add_argument("--tick-ms", type=float, default=10.0)
+    args = ap.parse_args()
+    main(args.feeds, args.items, args.limit, args.workers, args.tick_ms)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+基准：feedparser（parse_rss）vs 流式解析（parse_rss_stream）。
+语料为 tests/fixtures/feeds/*.xml，外加一份把 rss2_news 扩到 --big-items 条的大 feed。
+每个 feed 测三种情况：
+- feedparser   : 完整对象树，取前 20 条
+- stream       : 流式，取满 20 条即停
+- stream+seen  : 流式，前 3 条之后都是已见条目（稳态轮询最常见的情况）
+Usage:
+    python tests/bench_rss_parsers.py --repeat 20
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+import warnings
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.parsers.rss_default import parse_rss
+from app.parsers.rss_stream import parse_rss_stream
+from app.utils import uid_key
+
+FEED_DIR = os.path.join(ROOT_DIR, "tests", "fixtures", "feeds")
+
+
+def _big_feed(n_items: int) -> bytes:
+    with open(os.path.join(FEED_DIR, "rss2_news.xml"), "rb") as f:
+        body = f.read()
+    items = re.findall(rb"<item>.*?</item>", body, re.S)
+    head, tail = body.split(items[0], 1)[0], body.rsplit(items[-1], 1)[1]
+    out = [items[i % len(items)].replace(b"story-", b"story-%d-" % i, 1) for i in range(n_items)]
+    return head + b"\n".join(out) + tail
+
+
+def _time(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main(repeat: int, big_items: int):
+    warnings.simplefilter("ignore")
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(FEED_DIR, "*.xml"))):
+        with open(path, "rb") as f:
+            corpus.append((os.path.basename(path), f.read()))
+    corpus.append((f"big_{big_items}_items", _big_feed(big_items)))
+
+    print(f"{'feed':<24}{'KiB':>8}{'feedparser':>12}{'stream':>10}{'stream+seen':>13}{'speedup':>9}")
+    total_fp = total_st = 0.0
+    for name, body in corpus:
+        items = parse_rss_stream(body, "b", limit=None)
+        stop = frozenset(uid_key(e["uid"]) for e in items[3:] if "uid" in e)
+        fp = _time(lambda: parse_rss(body, "b", 20), repeat)
+        st = _time(lambda: parse_rss_stream(body, "b", 20), repeat)
+        ss = _time(lambda: parse_rss_stream(body, "b", 20, stop), repeat)
+        total_fp += fp
+        total_st += ss
+        print(f"{name:<24}{len(body) / 1024:>8.1f}{fp:>10.2f}ms{st:>8.2f}ms{ss:>11.2f}ms{fp / ss:>8.1f}x")
+    print(f"{'total':<32}{total_fp:>10.2f}ms{'':>10}{total_st:>11.2f}ms{total_fp / total_st:>8.1f}x")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--big-items", type=int, default=500)
+    args = ap.parse_args()
+    main(args.repeat, args.big_items)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+基准：SourceScheduler 在上万个 RSS 源下的常驻内存与调度延迟。
+本地起一个极简 HTTP/1.1 服务（支持 ETag/304）作为替身，
+源分布在多个 127.0.x.y 地址上，模拟多 host。
+默认预置 ETag（相当于重启后从 source_state 恢复），轮询走 304 快路径，只测调度本身；
+--cold 则每个源首轮都完整下载并解析。
+Usage:
+    python tests/bench_scheduler.py --sources 10000 --hosts 100 --interval 60 --seconds 30
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app import collector
+from app.scheduler import Job, SourceScheduler, lane_of
+
+FEED = (
+    b'<?xml version="1.0"?><rss version="2.0"><channel><title>bench</title>'
+    + b"".join(
+        b"<item><title>Bench headline %d</title><link>http://bench.local/a/%d</link>"
+        b"<pubDate>Mon, 06 Oct 2025 10:00:00 GMT</pubDate></item>" % (i, i)
+        for i in range(20)
+    )
+    + b"</channel></rss>"
+)
+ETAG = b'"bench-v1"'
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, counters: dict):
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            counters["requests"] += 1
+            if b"if-none-match: " + ETAG in head.lower():
+                counters["304"] += 1
+                writer.write(b"HTTP/1.1 304 Not Modified\r\nETag: " + ETAG + b"\r\nContent-Length: 0\r\n\r\n")
+            else:
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/rss+xml\r\nETag: " + ETAG
+                    + b"\r\nContent-Length: " + str(len(FEED)).encode() + b"\r\n\r\n" + FEED
+                )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def _rss_bytes() -> int:
+    """当前进程常驻内存（Linux /proc；其它平台返回 0）。"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+
+async def main(n_sources: int, n_hosts: int, interval: float, seconds: float, max_inflight: int, per_host: int,
+               cold: bool = False):
+    counters = {"requests": 0, "304": 0}
+    server = await asyncio.start_server(lambda r, w: _handle(r, w, counters), "0.0.0.0", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    q: asyncio.Queue = asyncio.Queue()
+
+    async def drain():
+        while True:
+            await q.get()
+
+    drain_task = asyncio.create_task(drain())
+
+    rss0 = _rss_bytes()
+    tracemalloc.start()
+    base = tracemalloc.take_snapshot()
+
+    sched = SourceScheduler(max_inflight=max_inflight, per_host=per_host)
+    collector._ensure_client(max_connections=max_inflight)
+    for i in range(n_sources):
+        host = f"127.0.{1 + (i % n_hosts) // 250}.{1 + (i % n_hosts) % 250}:{port}"
+        src = {
+            "id": f"bench_{i}",
+            "url": f"http://{host}/feed/{i}",
+            "interval_sec": interval,
+            "min_interval_sec": interval,
+            "max_interval_sec": interval,
+            "priority": "critical" if i % 100 == 0 else "bulk",
+        }
+        state = {} if cold else {"etag": ETAG.decode()}
+        rss = collector._RssSource(src, q, state=state)
+        sched.add(Job(src["id"], host, lane_of(src["priority"]), rss.poll), collector._initial_delay(src["id"], interval, interval))
+
+    setup = tracemalloc.take_snapshot()
+    setup_bytes = sum(s.size_diff for s in setup.compare_to(base, "filename"))
+    # 运行阶段不开 tracemalloc（开销太大会扭曲调度延迟），稳态改看 RSS 增量
+    tracemalloc.stop()
+
+    t0 = time.time()
+    run_task = asyncio.create_task(sched.run())
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.sleep(seconds)
+    steady_bytes = _rss_bytes() - rss0
+
+    stats = sched.stats()
+    elapsed = time.time() - t0
+    run_task.cancel()
+    drain_task.cancel()
+    await asyncio.gather(run_task, drain_task, return_exceptions=True)
+    server.close()
+    await collector._ensure_client().aclose()
+
+    print(f"sources={n_sources} hosts={n_hosts} interval={interval}s run={elapsed:.1f}s "
+          f"max_inflight={max_inflight} per_host={per_host} cold={cold}")
+    print(f"memory/source after setup (tracemalloc): {setup_bytes / n_sources:,.0f} B")
+    print(f"memory/source steady state (RSS delta) : {steady_bytes / n_sources:,.0f} B")
+    print(f"requests={counters['requests']} ({counters['requests'] / elapsed:,.0f}/s) 304={counters['304']}")
+    print(f"dispatched={stats['dispatched']} errors={stats['errors']} "
+          f"lag p50={stats['lag_ms_p50']}ms p99={stats['lag_ms_p99']}ms max={stats['lag_ms_max']}ms")
+    for lane, v in stats["lag_ms_by_lane"].items():
+        print(f"  lane {lane:<8} n={v['n']:<6} lag p50={v['p50']}ms p99={v['p99']}ms")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sources", type=int, default=10000)
+    ap.add_argument("--hosts", type=int, default=100)
+    ap.add_argument("--interval", type=float, default=30.0)
+    ap.add_argument("--seconds", type=float, default=30.0)
+    ap.add_argument("--max-inflight", type=int, default=64)
+    ap.add_argument("--per-host", type=int, default=4)
+    ap.add_argument("--cold", action="store_true", help="不预置 ETag，首轮全量下载+解析")
+    args = ap.parse_args()
+    asyncio.run(main(args.sources, args.hosts, args.interval, args.seconds, args.max_inflight, args.per_host,
+                     args.cold))
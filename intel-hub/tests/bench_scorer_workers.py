@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+基准：run_scorer 并行模式的扩展性。
+dummy 生成器预先产出 --events 条事件（默认不含转载副本，缓存帮不上忙，每条都要完整匹配），
+一次性放进队列，测 run_scorer 清空队列的耗时；评分配置用 dummy 内置词表。
+对每个 --processes 值（0 = 在事件循环里匹配）测：
+- events/s    : 清空队列的吞吐
+- speedup     : 相对 processes=0
+- loop lag ms : 同一事件循环上一个 5ms 定时器的最大延迟（采集器、notifier 共用这个循环）
+进程数超过 CPU 核数时不会更快；单核机器上只能看到调度开销与事件循环延迟的变化。
+Usage:
+    python tests/bench_scorer_workers.py --events 20000 --processes 0,1,2,4,8
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import yaml
+
+from app import scorer
+from app.parsers.dummy_gen import DummyGenerator, _load_vocab
+from app.scorer import ScoreCache, build_snapshot, run_scorer
+from app.storage import init_db
+from app.utils import now_ms
+
+
+def _snapshot():
+    vocab, watchlist = _load_vocab()
+    words = lambda tier: vocab[tier]["en"] + vocab[tier]["zh"]  # noqa: E731
+    keywords = {"tiers": {"tier1": words("tier1"), "tier2": words("tier2")}, "negatives": words("negative")}
+    return build_snapshot({
+        "config.yml": b"{}",
+        "keywords.yml": yaml.safe_dump(keywords, allow_unicode=True).encode(),
+        "topics.yml": b"{}",
+        "universe.yml": yaml.safe_dump({"watchlist": watchlist}).encode(),
+    }, 1)
+
+
+async def _drain(raws, batch_size: int, workers: int, processes: int):
+    lag = 0.0
+    stop = False
+
+    async def ticker():
+        nonlocal lag
+        while not stop:
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - t0 - 0.005)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = await init_db(os.path.join(tmp, "bench.db"))
+        q_in: asyncio.Queue = asyncio.Queue()
+        q_out: asyncio.Queue = asyncio.Queue()
+        scorer._score_cache = ScoreCache()
+        with contextlib.redirect_stdout(io.StringIO()):
+            task = asyncio.create_task(run_scorer(q_in, q_out, db, batch_size=batch_size, cache_size=0,
+                                                  workers=workers, processes=processes))
+            await asyncio.sleep(0.5 if processes else 0.05)  # 预热（建池）不计时
+            tick = asyncio.create_task(ticker())
+            t0 = time.perf_counter()
+            for raw in raws:
+                q_in.put_nowait(raw)
+            while not q_in.empty():
+                await asyncio.sleep(0.005)
+            stored = 0
+            while stored < len(raws):  # 最后几批还在入库
+                async with db.execute("SELECT COUNT(*) FROM events") as cur:
+                    stored = (await cur.fetchone())[0]
+                await asyncio.sleep(0.005)
+            elapsed = time.perf_counter() - t0
+            stop = True
+            task.cancel()
+            await asyncio.gather(task, tick, return_exceptions=True)
+        await db.close()
+    return elapsed, lag
+
+
+def main(n: int, processes, batch_size: int, duplicate_ratio: float, seed: int):
+    scorer._scorer_config.snapshot = _snapshot()
+    scorer._scorer_config.last_check = time.time() + 10**6  # 不去读 ops/
+    gen = DummyGenerator("bench", {"seed": seed, "duplicate_ratio": duplicate_ratio}, start_ms=0)
+    now = now_ms()
+    raws = [gen.make_event(now) for _ in range(n)]
+    print(f"events={n} cpu={os.cpu_count()} batch_size={batch_size} duplicate_ratio={duplicate_ratio}")
+    print(f"{'processes':>10}{'workers':>9}{'events/s':>10}{'speedup':>9}{'loop lag ms':>13}")
+    base = None
+    for p in processes:
+        workers = max(1, 2 * p)  # 每个进程有一批在算，另一批在等入库
+        elapsed, lag = asyncio.run(_drain(raws, batch_size, workers, p))
+        rate = n / elapsed
+        base = base or rate
+        print(f"{p:>10}{workers:>9}{rate:>10.0f}{rate / base:>8.2f}x{lag * 1000:>13.1f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=20000)
+    ap.add_argument("--processes", default="0,1,2,4,8")
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--duplicate-ratio", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    main(args.events, [int(p) for p in args.processes.split(",")], args.batch_size, args.duplicate_ratio, args.seed)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+基准：看板搜索，原来的四个 LIKE '%q%' 对比 search_events_sql（FTS5 trigram + 倒排表）。
+用 dummy 生成器造 --events 条中英文事件（发现时间均匀铺在 48 小时窗口里），经 insert_events 写入
+（顺带给出带全文索引与倒排表时的写入速度），再用 web 同款的同步 sqlite3 连接对每个查询测：
+- stream : 未推送流（按时间倒序，LIMIT 200）
+- high   : 高分流（score >= 70，按分数倒序，LIMIT 500）
+每格为 --repeat 次的中位数毫秒与命中条数；新路径的耗时含 search_probe_sql 的命中数估计，plan 为选中的执行方式
+（index = 全文索引/倒排表给出命中行，scan = 常见词沿索引扫）。
+命中多的常见词 LIKE 能提前停，罕见词/无命中要扫完整个窗口。
+Usage:
+    python tests/bench_search.py --events 1000000
+    python tests/bench_search.py --events 1000000 --db /tmp/search_bench.db   # 复用已建好的库
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.models import Event
+from app.parsers.dummy_gen import DummyGenerator
+from app.storage import SEARCH_BROAD_HITS, init_db, insert_events, search_events_sql, search_probe_sql
+
+WINDOW_MS = 48 * 3600 * 1000
+QUERIES = ["sector roundup", "launch", "行业速览", "财报", "NVDA", "#12", "#123", "#777777", "zzzz"]
+
+LIKE_SQL = """
+SELECT id, ts_detected_utc, ts_published_utc, headline, source, link,
+       market, symbols, categories, tags, score, pushed,
+       thread_key, COALESCE(NULLIF(cluster_id, ''), id) AS cluster_id
+FROM events
+WHERE ts_detected_utc >= ? {filter}
+  AND (headline LIKE ? OR source LIKE ? OR symbols LIKE ? OR tags LIKE ?)
+ORDER BY {order} LIMIT {limit}
+"""
+
+
+def _events(n: int, now: int, seed: int):
+    gen = DummyGenerator("bench", {"seed": seed, "duplicate_ratio": 0.0}, start_ms=0)
+    rng = random.Random(seed)
+    sources = [f"feed_{i:02d}" for i in range(20)]
+    step = WINDOW_MS // n
+    for i in range(n):
+        raw = gen.make_event(now)
+        meta = raw["raw"]
+        ts = now - WINDOW_MS + i * step
+        yield Event(id=f"e{i}", ts_detected_utc=ts, ts_published_utc=ts, headline=raw["headline"],
+                    source=rng.choice(sources), link=raw["link"], market="us", symbols=meta["symbol"],
+                    categories=meta["tier"], tags=f"#{meta['keyword']}" if meta["keyword"] else "",
+                    score=float(rng.randrange(0, 120)), pushed=int(rng.random() < 0.1),
+                    expires_at_utc=ts + WINDOW_MS, thread_key="")
+
+
+async def _build(path: str, n: int, seed: int) -> float:
+    db = await init_db(path)
+    now = int(time.time() * 1000)
+    t0 = time.perf_counter()
+    await insert_events(db, _events(n, now, seed))
+    elapsed = time.perf_counter() - t0
+    await db.close()
+    return n / elapsed
+
+
+async def _migrate(path: str) -> None:
+    db = await init_db(path)
+    await db.close()
+
+
+def _time(conn, build, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        sql, params, plan = build()
+        rows = conn.execute(sql, params).fetchall()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000, len(rows), plan
+
+
+def _like(conn, kind: str, q: str, since: int):
+    like = f"%{q}%"
+    if kind == "stream":
+        sql = LIKE_SQL.format(filter="AND IFNULL(pushed,0)=0", order="ts_detected_utc DESC", limit=200)
+        return sql, [since, like, like, like, like], "like"
+    sql = LIKE_SQL.format(filter="AND score >= ?", order="score DESC, ts_detected_utc DESC", limit=500)
+    return sql, [since, 70, like, like, like, like], "like"
+
+
+def _search(conn, kind: str, q: str, since: int):
+    broad = conn.execute(*search_probe_sql(q, since)).fetchone()[0] >= SEARCH_BROAD_HITS
+    if kind == "stream":
+        sql, params = search_events_sql(q, since, 200, broad=broad, unpushed_only=True)
+    else:
+        sql, params = search_events_sql(q, since, 500, broad=broad, min_score=70, order_by_score=True)
+    return sql, params, "scan" if broad else "index"
+
+
+def main(n: int, db_path: str, repeat: int, seed: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = db_path or os.path.join(tmp, "search.db")
+        if not os.path.exists(path):
+            rate = asyncio.run(_build(path, n, seed))
+            print(f"built {n} events in {path} ({rate:.0f} rows/s with FTS + side tables)")
+        else:
+            asyncio.run(_migrate(path))  # 老库补建缺的表/索引
+        conn = sqlite3.connect(path)
+        total = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        since = int(time.time() * 1000) - WINDOW_MS
+        print(f"events={total} window=48h repeat={repeat}")
+        print(f"{'query':>16}{'kind':>8}{'LIKE ms':>10}{'hits':>6}{'new ms':>10}{'hits':>6}{'plan':>7}{'speedup':>9}")
+        for q in QUERIES:
+            for kind in ("stream", "high"):
+                like_ms, like_n, _ = _time(conn, lambda: _like(conn, kind, q, since), repeat)
+                new_ms, new_n, plan = _time(conn, lambda: _search(conn, kind, q, since), repeat)
+                print(f"{q:>16}{kind:>8}{like_ms:>10.1f}{like_n:>6}{new_ms:>10.1f}{new_n:>6}{plan:>7}"
+                      f"{like_ms / max(new_ms, 1e-3):>8.1f}x")
+        conn.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=1_000_000)
+    ap.add_argument("--db", default="", help="库文件路径；已存在则直接测查询")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    main(args.events, args.db, args.repeat, args.seed)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+基准：SeenIndex 稳态内存。
+模拟 N 个源，每轮每源 feed 顶部滑入 new_per_poll 条新条目（窗口 20 条），跑到稳态后用 tracemalloc 统计。
+Usage:
+    python tests/bench_seen.py --sources 10000 --polls 20 --max-per-source 50
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.seen import SeenIndex
+
+
+def main(n_sources: int, polls: int, max_per_source: int, new_per_poll: int, window: int):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+
+    seen = SeenIndex(max_per_source=max_per_source, ttl_hours=48)
+    now = int(time.time() * 1000)
+    t0 = time.perf_counter()
+    lookups = 0
+    for p in range(polls):
+        for s in range(n_sources):
+            sid = f"src_{s}"
+            top = p * new_per_poll + window
+            for i in range(top - window, top):
+                seen.check_and_add(sid, hashlib.sha1(f"{sid}/{i}".encode()).hexdigest(), now_ms=now + p * 60_000)
+                lookups += 1
+        seen._dirty.clear()  # 基准不落库，只看内存里的索引
+    elapsed = time.perf_counter() - t0
+
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    st = seen.stats()
+    print(f"sources={n_sources} polls={polls} max_per_source={max_per_source} window={window} new/poll={new_per_poll}")
+    print(f"entries={st['entries']:,}  hit rate={st['hits'] / max(1, lookups):.1%}")
+    print(f"steady-state memory: {used / 1e6:,.1f} MB total, {used / n_sources:,.0f} B/source, "
+          f"{used / max(1, st['entries']):,.0f} B/entry (stats() estimate {st['approx_bytes'] / 1e6:,.1f} MB)")
+    print(f"misses={st['misses']:,} (每源首轮 {window} 条 + 之后每轮 {new_per_poll} 条新条目 = "
+          f"{n_sources * (window + (polls - 1) * new_per_poll):,} 期望)")
+    print(f"check_and_add: {elapsed / lookups * 1e6:.2f} us/lookup (含 sha1)")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sources", type=int, default=10000)
+    ap.add_argument("--polls", type=int, default=20)
+    ap.add_argument("--max-per-source", type=int, default=50)
+    ap.add_argument("--new-per-poll", type=int, default=5)
+    ap.add_argument("--window", type=int, default=20)
+    args = ap.parse_args()
+    main(args.sources, args.polls, args.max_per_source, args.new_per_poll, args.window)
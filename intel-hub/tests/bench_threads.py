@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+基准：推送节流的线程去重查找。
+临时库里灌入 --events 条事件（均匀分布在最近 --hours 小时，--pushed 比例已推送，thread_key 取自
+--symbols 个代码 × 10 个分类），然后对随机 thread_key 比较：
+- exists_recent_thread : 原来每条过阈值事件一次 SQL（经 aiosqlite 工作线程）
+- ThreadIndex.is_recent: 内存索引一次字典查找
+以及启动预热（load_pushed_threads + load）的耗时与索引内存。
+Usage:
+    python tests/bench_threads.py --events 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.storage import exists_recent_thread, init_db, load_pushed_threads
+from app.threads import ThreadIndex
+from app.utils import now_ms
+
+_CATS = ["merger", "earnings", "guidance", "lawsuit", "recall", "contract", "fda", "buyback", "offering", "general"]
+
+
+def _fill(path: str, n: int, hours: float, pushed: float, n_symbols: int, seed: int) -> None:
+    rng = random.Random(seed)
+    now = now_ms()
+    span = int(hours * 3600 * 1000)
+    con = sqlite3.connect(path)
+    rows = ((f"e{i}", now - rng.randrange(span), f"headline {i}", "bench", f"S{rng.randrange(n_symbols)}|"
+             f"{rng.choice(_CATS)}", int(rng.random() < pushed)) for i in range(n))
+    con.executemany("INSERT INTO events (id, ts_detected_utc, headline, source, thread_key, pushed) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows)
+    con.commit()
+    con.close()
+
+
+async def _create(path: str) -> None:
+    db = await init_db(path)
+    await db.close()
+
+
+async def _bench(path: str, probes, window_minutes: int):
+    db = await init_db(path)
+    try:
+        t0 = time.perf_counter()
+        for key in probes:
+            await exists_recent_thread(db, key, window_minutes)
+        t_single = (time.perf_counter() - t0) / len(probes)
+
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        idx = ThreadIndex(retention_minutes=window_minutes)
+        rows = await load_pushed_threads(db, now_ms() - idx.retention_ms)
+        idx.load(rows)
+        t_warm = time.perf_counter() - t0
+        del rows
+        mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        t0 = time.perf_counter()
+        for _ in range(10):
+            for key in probes:
+                idx.is_recent(key, window_minutes)
+        t_index = (time.perf_counter() - t0) / (10 * len(probes))
+        return t_single, t_index, t_warm, mem, idx.stats()
+    finally:
+        await db.close()
+
+
+def main(n: int, hours: float, pushed: float, n_symbols: int, window_minutes: int, probes: int, seed: int):
+    rng = random.Random(seed + 1)
+    keys = [f"S{rng.randrange(n_symbols)}|{rng.choice(_CATS)}" for _ in range(probes)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "threads.db")
+        asyncio.run(_create(path))
+        t0 = time.perf_counter()
+        _fill(path, n, hours, pushed, n_symbols, seed)
+        print(f"events={n:,} over {hours}h pushed={pushed:.0%} keys={n_symbols * len(_CATS):,} "
+              f"window={window_minutes}min (fill {time.perf_counter() - t0:.1f}s)")
+        t_single, t_index, t_warm, mem, st = asyncio.run(_bench(path, keys, window_minutes))
+    print(f"{'exists_recent_thread':>24}{t_single * 1e6:>10.1f} µs/key")
+    print(f"{'ThreadIndex.is_recent':>24}{t_index * 1e6:>10.2f} µs/key ({t_single / t_index:,.0f}x)")
+    print(f"warm-up {t_warm * 1000:.0f} ms, {st['threads']:,} threads in window, index {mem / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=1_000_000)
+    ap.add_argument("--hours", type=float, default=48)
+    ap.add_argument("--pushed", type=float, default=0.05)
+    ap.add_argument("--symbols", type=int, default=5000)
+    ap.add_argument("--window-minutes", type=int, default=30)
+    ap.add_argument("--probes", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    main(args.events, args.hours, args.pushed, args.symbols, args.window_minutes, args.probes, args.seed)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+基准：事件表写入的组提交。
+WAL 模式下连续写 --events 条事件（每条一个 upsert 操作，模拟突发时逐条入库），对比：
+- direct      : 原来的 insert_event，每条一次 commit
+- group=N     : StorageWriter(group_ops=N, group_ms=--group-ms)，生产者同时还夹着 mark_pushed
+每行给出 writes/s、提交次数、平均/最大提交耗时，以及单个操作从入队到 Future 完成的 p50/p99 延迟。
+--synchronous 可对比 NORMAL（init_db 默认，WAL 下提交不 fsync）与 FULL（每次提交 fsync）。
+默认一次性灌入（突发，p50/p99 主要是排队时间）；--rate 按固定速率写，看平时的提交延迟。
+Usage:
+    python tests/bench_writer.py --events 20000 --groups 1,16,64,256,1024 --synchronous NORMAL,FULL
+    python tests/bench_writer.py --events 10000 --rate 2000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.models import Event
+from app.storage import init_db, insert_event
+from app.writer import StorageWriter
+
+
+def _events(n: int):
+    now = int(time.time() * 1000)
+    return [Event(id=f"e{i}", ts_detected_utc=now, ts_published_utc=now, headline=f"NVDA headline number {i}",
+                  source="bench", link=f"https://bench/{i}", market="us", symbols="NVDA", categories="general",
+                  tags="", score=50.0, pushed=0, expires_at_utc=now + 3600_000, thread_key="NVDA|general")
+            for i in range(n)]
+
+
+def _pct(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+async def _open(tmp: str, synchronous: str):
+    db = await init_db(os.path.join(tmp, f"bench_{time.perf_counter_ns()}.db"))
+    await db.execute(f"PRAGMA synchronous={synchronous};")
+    return db
+
+
+async def _pace(i: int, t0: float, rate: float) -> None:
+    if rate > 0 and i % 20 == 0:
+        delay = t0 + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def _direct(events, synchronous: str, rate: float):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = await _open(tmp, synchronous)
+        lat = []
+        t0 = time.perf_counter()
+        for i, ev in enumerate(events):
+            await _pace(i, t0, rate)
+            t = time.perf_counter()
+            await insert_event(db, ev)
+            lat.append(time.perf_counter() - t)
+        elapsed = time.perf_counter() - t0
+        await db.close()
+    return elapsed, len(events), sum(lat) / len(lat) * 1000, max(lat) * 1000, lat
+
+
+async def _grouped(events, synchronous: str, group_ops: int, group_ms: float, rate: float):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = await _open(tmp, synchronous)
+        w = StorageWriter(db, queue_size=10000, group_ops=group_ops, group_ms=group_ms)
+        lat = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            w.start()
+
+            def timed(fut, t):
+                fut.add_done_callback(lambda _: lat.append(time.perf_counter() - t))
+
+            t0 = time.perf_counter()
+            for i, ev in enumerate(events):
+                await _pace(i, t0, rate)
+                timed(await w.upsert([ev]), time.perf_counter())
+                if i % 10 == 9:  # 每 10 条有一条推送
+                    timed(await w.mark_pushed(ev.id), time.perf_counter())
+            await w.close()
+            elapsed = time.perf_counter() - t0
+        st = w.stats()
+        await db.close()
+    return elapsed, st["commits"], st["commit_ms_avg"], st["commit_ms_max"], lat
+
+
+def main(n: int, groups, group_ms: float, synchronous_modes, rate: float):
+    events = _events(n)
+    print(f"events={n} (+{n // 10} mark_pushed) journal=WAL group_ms={group_ms} "
+          f"rate={'burst' if rate <= 0 else f'{rate:.0f}/s'}")
+    print(f"{'sync':>7}{'mode':>12}{'writes/s':>10}{'commits':>9}{'commit ms':>11}{'max ms':>8}"
+          f"{'p50 ms':>8}{'p99 ms':>8}")
+    for sync in synchronous_modes:
+        runs = [("direct", asyncio.run(_direct(events, sync, rate)))]
+        for g in groups:
+            runs.append((f"group={g}", asyncio.run(_grouped(events, sync, g, group_ms, rate))))
+        for name, (elapsed, commits, avg_ms, max_ms, lat) in runs:
+            print(f"{sync:>7}{name:>12}{n / elapsed:>10.0f}{commits:>9}{avg_ms:>11.2f}{max_ms:>8.1f}"
+                  f"{_pct(lat, 0.5):>8.1f}{_pct(lat, 0.99):>8.1f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=20000)
+    ap.add_argument("--groups", default="1,16,64,256,1024")
+    ap.add_argument("--group-ms", type=float, default=5)
+    ap.add_argument("--synchronous", default="NORMAL,FULL")
+    ap.add_argument("--rate", type=float, default=0, help="每秒写入条数；0 = 一次性灌入")
+    args = ap.parse_args()
+    main(args.events, [int(g) for g in args.groups.split(",")], args.group_ms,
+         [s.strip().upper() for s in args.synchronous.split(",")], args.rate)
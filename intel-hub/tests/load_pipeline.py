@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+压测：dummy 源 → run_scorer →（通知队列计数），找打分链路的吞吐上限。
+按 --rates 逐档提高 dummy 源速率，每档跑 --seconds 秒，统计：
+- produced : dummy 源产出并入队的条数/秒
+- scored   : run_scorer 实际消费的条数/秒
+- backlog  : 该档结束时 q_raw 的积压；持续增长说明已超过上限
+- p50/p99  : 从进入 q_raw 到出现在通知队列的延迟（毫秒）；通知端像 notifier 一样记线程索引并 mark_pushed
+- cache    : 该档标题打分缓存的命中率（--cache-size 0 关闭缓存；命中率随 --duplicate-ratio 变化）
+--batch-sizes 可给多个值（如 1,64）逐一对比逐条与批量模式。
+ops/keywords.yml 没配 tiers 时，用 dummy 源的内置词表临时构建一版评分配置，保证 tier1 标题能触发推送。
+数据库用临时文件，不碰 intel.db；scorer 的日志被吞掉。
+Usage:
+    python tests/load_pipeline.py --rates 50,200,1000 --seconds 10 --batch-sizes 1,64
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import yaml
+
+from app import scorer
+from app.dummy_source import DummySource
+from app.parsers.dummy_gen import _load_vocab
+from app.scheduler import Job, SourceScheduler
+from app.scorer import build_snapshot, run_scorer
+from app.seen import SeenIndex
+from app.storage import init_db, mark_pushed
+from app.threads import shared_thread_index
+
+
+class _StampedQueue(asyncio.Queue):
+    """记录每条事件（按 link）入队的时刻。"""
+
+    def __init__(self):
+        super().__init__()
+        self.t_enq = {}
+
+    def put_nowait(self, item):
+        self.t_enq[item["link"]] = time.perf_counter()
+        super().put_nowait(item)
+
+
+def _ensure_scoring_config() -> None:
+    snap = scorer._scorer_config.snapshot
+    if (snap.keywords.get("tiers") or {}).get("tier1"):
+        return
+    vocab, watchlist = _load_vocab()
+    words = lambda tier: vocab[tier]["en"] + vocab[tier]["zh"]  # noqa: E731
+    texts = {
+        "config.yml": yaml.safe_dump(snap.config, allow_unicode=True).encode(),
+        "keywords.yml": yaml.safe_dump({"tiers": {"tier1": words("tier1"), "tier2": words("tier2")},
+                                        "negatives": words("negative")}, allow_unicode=True).encode(),
+        "topics.yml": yaml.safe_dump(snap.topics, allow_unicode=True).encode(),
+        "universe.yml": yaml.safe_dump({"watchlist": watchlist}).encode(),
+    }
+    scorer._scorer_config.snapshot = build_snapshot(texts, snap.version + 1)
+    print("scoring config: dummy 内置词表（ops/keywords.yml 未配置 tiers）")
+
+
+def _pct(values, q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+async def _step(db, rate: float, seconds: float, profile: dict, seed: int, batch_size: int, batch_wait_ms: float,
+                cache_size: int):
+    q_raw = _StampedQueue()
+    q_scored: asyncio.Queue = asyncio.Queue()
+    src = {"id": f"dummy_{int(rate)}", "type": "dummy", "interval_sec": 0.1, "rate_per_sec": rate,
+           "seed": seed, **profile}
+    source = DummySource(src, q_raw, seen=SeenIndex())
+    sched = SourceScheduler(max_inflight=4)
+    sched.add(Job(src["id"], "dummy", 0, source.poll))
+
+    latencies = []
+    before = scorer.score_cache_stats()
+
+    async def drain():
+        while True:
+            ev = await q_scored.get()
+            latencies.append(time.perf_counter() - q_raw.t_enq.pop(ev.link))
+            shared_thread_index().mark(ev.thread_key, ev.score)
+            await mark_pushed(db, ev.id)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        tasks = [asyncio.create_task(sched.run()),
+                 asyncio.create_task(run_scorer(q_raw, q_scored, db, batch_size, batch_wait_ms, cache_size)),
+                 asyncio.create_task(drain())]
+        t0 = time.perf_counter()
+        await asyncio.sleep(seconds)
+        elapsed = time.perf_counter() - t0
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    produced = source.gen.generated
+    backlog = q_raw.qsize()
+    after = scorer.score_cache_stats()
+    hits, misses = after["hits"] - before["hits"], after["misses"] - before["misses"]
+    return (produced / elapsed, (produced - backlog) / elapsed, backlog, len(latencies),
+            _pct(latencies, 0.5), _pct(latencies, 0.99), hits / max(1, hits + misses))
+
+
+async def main(rates, seconds: float, profile: dict, seed: int, batch_sizes, batch_wait_ms: float,
+               cache_size: int):
+    _ensure_scoring_config()
+    print(f"seconds/step={seconds} profile={profile or 'defaults'} batch_wait_ms={batch_wait_ms} "
+          f"cache_size={cache_size}")
+    print(f"{'batch':>6}{'target/s':>9}{'produced/s':>12}{'scored/s':>10}{'backlog':>9}{'notified':>10}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'cache':>7}")
+    for batch_size in batch_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = await init_db(os.path.join(tmp, "load.db"))
+            try:
+                for rate in rates:
+                    produced, scored, backlog, notified, p50, p99, hit_rate = await _step(
+                        db, rate, seconds, profile, seed, batch_size, batch_wait_ms, cache_size)
+                    flag = "  <- 超过上限" if backlog > max(10, produced * 0.5) else ""
+                    print(f"{batch_size:>6}{rate:>9.0f}{produced:>12.0f}{scored:>10.0f}{backlog:>9}{notified:>10}"
+                          f"{p50:>9.1f}{p99:>9.1f}{hit_rate:>7.0%}{flag}")
+            finally:
+                await db.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rates", default="50,200,1000")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--duplicate-ratio", type=float, default=None)
+    ap.add_argument("--symbol-hit-rate", type=float, default=None)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--batch-sizes", default="1,64")
+    ap.add_argument("--batch-wait-ms", type=float, default=0)
+    ap.add_argument("--cache-size", type=int, default=50000)
+    args = ap.parse_args()
+    prof = {}
+    if args.duplicate_ratio is not None:
+        prof["duplicate_ratio"] = args.duplicate_ratio
+    if args.symbol_hit_rate is not None:
+        prof["symbol_hit_rate"] = args.symbol_hit_rate
+    asyncio.run(main([float(r) for r in args.rates.split(",")], args.seconds, prof, args.seed,
+                     [int(b) for b in args.batch_sizes.split(",")], args.batch_wait_ms, args.cache_size))
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_api_source.py
+验证 type: api 采集器：
+1) JsonArrayStream 任意切块结果都与整段解码一致（含嵌套路径、下标、被跳过的兄弟字段）；
+   跨很多块的大元素 / 大兄弟字段只解码一次，转义符落在块尾也不出错
+2) compile_mapping：嵌套路径、回退列表、各种 ts_format、id 作 uid
+3) ApiSource 对本地替身接口：整段 / 增量两条路径结果一致，第二轮遇到已见条目即停
+用法：python tests/test_api_source.py  或  pytest tests/test_api_source.py
+"""
+import asyncio
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app import collector
+from app.api_source import ApiSource
+from app.parsers.json_mapped import JsonArrayStream, compile_mapping
+from app.seen import SeenIndex
+
+DOC = {
+    "meta": {"note": "brackets ] } [ { and \"quotes\" in strings", "n": [1, 2, {"x": None}]},
+    "count": 12345,
+    "data": {
+        "flag": True,
+        "items": [
+            {"title": f"Headline {i} — ünïcode", "links": [{"href": f"/a/{i}"}], "ts": 1759744800 + i, "uuid": f"u{i}"}
+            for i in range(30)
+        ] + [7, None, "x", 1.5e3],
+    },
+    "tail": [0],
+}
+
+
+def test_stream_any_chunking():
+    body = json.dumps(DOC, ensure_ascii=False, indent=1).encode("utf-8")
+    want = DOC["data"]["items"]
+    for size in (1, 2, 3, 7, 64, 1000, len(body)):
+        stream = JsonArrayStream("data.items")
+        got = []
+        for i in range(0, len(body), size):
+            got.extend(stream.feed(body[i:i + size]))
+        got.extend(stream.close())
+        assert got == want, size
+        assert stream.done
+
+
+def test_stream_paths():
+    body = json.dumps([[1], [{"a": [10, 20]}]]).encode()
+    stream = JsonArrayStream("1.0.a")
+    assert stream.feed(body) == [10, 20] and stream.done
+    assert JsonArrayStream("").feed(b"[1, 2 ,3]") == [1, 2, 3]
+    missing = JsonArrayStream("nope")
+    assert missing.feed(b'{"a": 1}') == [] and missing.done
+
+
+def test_stream_big_element_decoded_once():
+    big = {"title": "t", "body": "x\\\"]}" * 40_000, "tags": [[i, {"k": "]"}] for i in range(2000)]}
+    body = json.dumps({"skip": big, "items": [big, {"title": "small"}]}).encode()
+    calls = []
+    stream = JsonArrayStream("items")
+    raw = stream._raw
+    stream._raw = lambda buf, pos: calls.append(pos) or raw(buf, pos)
+    got = []
+    for i in range(0, len(body), 1024):          # 约 640 块
+        got.extend(stream.feed(body[i:i + 1024]))
+    got.extend(stream.close())
+    assert got == [big, {"title": "small"}]
+    assert len(calls) <= 8, len(calls)            # 每个值至多解两次，不随块数增长
+
+    for bad in (b'[{"a": 1]', b'[{"a": tru}]'):
+        try:
+            JsonArrayStream("").feed(bad)
+            raise AssertionError(bad)
+        except ValueError:
+            pass
+
+
+def test_mapping():
+    extract = compile_mapping(
+        {"headline": ["missing", "title"], "link": "links.0.href", "ts_published": "ts", "id": "uuid"},
+        "src", ts_format="s", link_prefix="https://ex.com",
+    )
+    ev = extract(DOC["data"]["items"][3])
+    assert ev["headline"].startswith("Headline 3") and ev["link"] == "https://ex.com/a/3"
+    assert ev["ts_published"] == (1759744800 + 3) * 1000
+    assert extract({"title": "no link"}) is None
+    assert extract(7) is None
+
+    iso = compile_mapping({"ts_published": "t"}, "src", ts_format="iso")
+    assert iso({"title": "a", "url": "u", "t": "2025-10-06T10:00:00Z"})["ts_published"] == 1759744800000
+    fmt = compile_mapping({"ts_published": "t"}, "src", ts_format="%Y-%m-%d %H:%M")
+    assert fmt({"title": "a", "url": "u", "t": "2025-10-06 10:00"})["ts_published"] == 1759744800000
+    auto = compile_mapping(None, "src")
+    assert auto({"title": "a", "url": "u", "timestamp": 1759744800000})["ts_published"] == 1759744800000
+
+
+async def _serve(body: bytes, chunked: bool):
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        if chunked:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nTransfer-Encoding: chunked\r\n\r\n")
+            for i in range(0, len(body), 500):
+                part = body[i:i + 500]
+                writer.write(b"%x\r\n%s\r\n" % (len(part), part))
+            writer.write(b"0\r\n\r\n")
+        else:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s"
+                         % (len(body), body))
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def _poll_both():
+    body = json.dumps(DOC).encode()
+    src = {"id": "api_t", "type": "api", "items_path": "data.items", "max_items": 100,
+           "fields": {"link": "links.0.href", "ts_published": "ts", "id": "uuid"},
+           "ts_format": "s", "link_prefix": "https://ex.com"}
+    results = []
+    for chunked in (False, True):
+        server, port = await _serve(body, chunked)
+        q: asyncio.Queue = asyncio.Queue()
+        seen = SeenIndex()
+        source = ApiSource({**src, "url": f"http://127.0.0.1:{port}/news"}, q, seen=seen)
+        await source.poll()
+        got = [q.get_nowait() for _ in range(q.qsize())]
+        # 第二轮：首条即已见 → 不再入队
+        await source.poll()
+        assert q.qsize() == 0
+        server.close()
+        results.append([(e["id"], e["headline"], e["link"], e["ts_published"]) for e in got])
+    await collector._ensure_client().aclose()
+    collector._CLIENT = None
+    return results
+
+
+def test_api_source_poll():
+    buffered, streamed = asyncio.run(_poll_both())
+    assert len(buffered) == 30
+    assert buffered == streamed
+
+
+if __name__ == "__main__":
+    test_stream_any_chunking()
+    test_stream_paths()
+    test_stream_big_element_decoded_once()
+    test_mapping()
+    test_api_source_poll()
+    print("OK ✅")
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_backtest.py
+验证 app/backtest.py 的批量打分与逐条打分一致：
+1) score_headlines 的计数、watchlist、分数与 _match_keywords / _extract_symbols / _calculate_score 逐条相同
+   （整数权重和小数权重各一套），缺失值按空标题处理
+2) 进程池分块的结果与单进程相同、顺序不乱
+3) 只换权重时 calculate_scores 重算的分数与新快照逐条打分一致
+4) 缺省快照时与 score_headline_for_test 的分数一致
+用法：python tests/test_backtest.py  或  pytest tests/test_backtest.py
+"""
+import os
+import random
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import numpy as np
+import yaml
+
+from app.backtest import calculate_scores, score_headlines
+from app.scorer import (_calculate_score, _extract_symbols, _match_keywords, build_snapshot,
+                        score_headline_for_test)
+
+KEYWORDS = {
+    "tiers": {"tier1": ["merger", "acquisition", "收购", "FDA"], "tier2": ["earnings", "guid", "partner", "合作"]},
+    "negatives": ["rumor", "传闻", "preview"],
+    "keyword_blacklist": ["sponsored"],
+}
+
+
+def _snap(weights=None, version=1):
+    kw = dict(KEYWORDS, weights=weights) if weights else KEYWORDS
+    return build_snapshot({
+        "config.yml": b"{}",
+        "keywords.yml": yaml.safe_dump(kw, allow_unicode=True).encode(),
+        "topics.yml": b"{}",
+        "universe.yml": yaml.safe_dump({"watchlist": ["NVDA", "AMD"], "aliases": {"NVDA": ["Nvidia", "英伟达"]}},
+                                       allow_unicode=True).encode(),
+    }, version=version)
+
+
+def _headlines(n, seed=5):
+    rng = random.Random(seed)
+    words = ["merger", "mergers", "acquisition", "收购", "FDA", "fda", "earnings", "guidance", "partnered", "合作",
+             "rumor", "传闻", "preview", "sponsored", "NVDA", "$amd", "Nvidia", "英伟达", "AMDOCS", "shares",
+             "rally", "the", "on", "公告", "ray-ban"]
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(0, 12))) for _ in range(n)]
+
+
+def _single(headline, snap):
+    _, _, t1, t2, neg = _match_keywords(headline, snap=snap)
+    has_symbol = bool(_extract_symbols(headline, snap))
+    return t1, t2, neg, has_symbol, _calculate_score(t1, t2, neg, has_symbol, snap)
+
+
+def test_matches_single_path():
+    headlines = _headlines(2000)
+    for weights in (None, {"source_rss_base": 12.5, "tier1": 33.3, "tier2": 7.1, "negative": -21.7,
+                           "watchlist_bonus": 4.2}):
+        snap = _snap(weights)
+        res = score_headlines(headlines, snap=snap)
+        assert res.shape == (len(headlines),)
+        for h, row in zip(headlines, res):
+            got = (int(row["tier1_hits"]), int(row["tier2_hits"]), int(row["negative_hits"]), bool(row["watchlist"]),
+                   float(row["score"]))
+            assert got == _single(h, snap), (h, got)
+            assert bool(row["blacklisted"]) == bool(snap.keyword_matcher.match(h).blacklist)
+
+    res = score_headlines(np.array([None, float("nan"), "NVDA merger"], dtype=object), snap=_snap())
+    assert res["score"].tolist() == [20.0, 20.0, 80.0]
+    assert score_headlines([], snap=_snap()).shape == (0,)
+
+
+def test_process_pool_same_as_inline():
+    headlines = _headlines(3000, seed=9)
+    snap = _snap()
+    inline = score_headlines(headlines, snap=snap)
+    pooled = score_headlines(headlines, snap=snap, processes=2, chunk_size=700)
+    assert np.array_equal(inline, pooled)
+
+
+def test_reweight_without_rescanning():
+    headlines = _headlines(500, seed=11)
+    res = score_headlines(headlines, snap=_snap())
+    tuned = _snap({"tier1": 80, "negative": -50}, version=2)
+    scores = calculate_scores(res["tier1_hits"], res["tier2_hits"], res["negative_hits"], res["watchlist"], tuned)
+    assert scores.tolist() == [_single(h, tuned)[4] for h in headlines]
+
+
+def test_default_snapshot_matches_score_headline_for_test():
+    headlines = _headlines(200, seed=13)
+    res = score_headlines(headlines)
+    assert res["score"].tolist() == [score_headline_for_test(h)[2] for h in headlines]
+
+
+if __name__ == "__main__":
+    test_matches_single_path()
+    test_process_pool_same_as_inline()
+    test_reweight_without_rescanning()
+    test_default_snapshot_matches_score_headline_for_test()
+    print("OK ✅")
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_cadence.py
+验证 app/cadence.py 的 AdaptiveCadence：
+1) EWMA 发布间隔：首个间隔直接采用，之后按 alpha 平滑；乱序/回填（不比 last_pub_ms 新）的条目不参与
+2) 有新条目：间隔至少减半，且不超过“平均发布间隔的一半”；不低于 min_interval_sec
+3) 无新条目：按 backoff 指数退避，封顶 max_interval_sec；adaptive: false 时恒为 interval_sec
+4) 持久化：state() 经 source_state 表存取后 from_source 恢复同样的估计与起步间隔
+用法：python tests/test_cadence.py  或  pytest tests/test_cadence.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.cadence import AdaptiveCadence
+from app.storage import init_db, load_source_states, save_source_state
+
+MIN = 60_000
+T0 = 1_759_744_800_000
+
+
+def test_ewma_gap():
+    c = AdaptiveCadence(600, alpha=0.5)
+    c.observe([T0])
+    assert c.ewma_gap_ms is None and c.last_pub_ms == T0          # 只有一个点，还没有间隔
+    c.observe([T0 + 10 * MIN])
+    assert c.ewma_gap_ms == 10 * MIN                               # 首个间隔直接采用
+    c.observe([T0 + 14 * MIN, T0 + 12 * MIN])                      # 同一轮乱序给出，按时间排序
+    assert c.ewma_gap_ms == 0.5 * (2 * MIN) + 0.5 * (0.5 * (2 * MIN) + 0.5 * 10 * MIN)
+    gap = c.ewma_gap_ms
+    c.observe([T0 + 5 * MIN, T0 + 14 * MIN])                       # 回填 / 重复：不动估计，当作无新条目
+    assert c.ewma_gap_ms == gap and c.last_pub_ms == T0 + 14 * MIN and c.new_items == 4
+    assert c.rate_per_hour == 3600_000 / gap
+
+
+def test_speed_up_on_new_items():
+    c = AdaptiveCadence(600, min_sec=30, max_sec=3600)
+    assert c.next_interval() == 600
+    c.observe([T0])
+    assert c.next_interval() == 300                                # 还不知道速率：减半
+    c.observe([T0 + 30 * MIN])
+    assert c.next_interval() == 150                                # 目标 15 分钟，但至少减半
+    c.observe([T0 + 31 * MIN])
+    assert c.next_interval() == 75                                 # 减半更快
+    for i in range(2, 10):
+        c.observe([T0 + 31 * MIN + i * 1000])
+    assert c.next_interval() == 30                                 # 不低于 min
+
+
+def test_backoff_on_quiet_polls():
+    c = AdaptiveCadence(100, min_sec=10, max_sec=400, backoff=2.0)
+    intervals = []
+    for _ in range(4):
+        c.observe([])
+        intervals.append(c.next_interval())
+    assert intervals == [200, 400, 400, 400] and c.polls == 4 and c.new_items == 0
+
+    fixed = AdaptiveCadence(100, enabled=False)
+    fixed.observe([])
+    fixed.observe([T0, T0 + MIN])
+    assert fixed.next_interval() == 100 and fixed.ewma_gap_ms == MIN   # 关闭自适应也照样学速率
+
+
+def test_defaults_and_swapped_bounds():
+    c = AdaptiveCadence(120)
+    assert (c.min_sec, c.max_sec) == (30, 1200)
+    assert (AdaptiveCadence(120, min_sec=500, max_sec=50).min_sec, AdaptiveCadence(120, 500, 50).max_sec) == (50, 500)
+
+
+def test_state_round_trip():
+    c = AdaptiveCadence.from_source({"interval_sec": 600, "min_interval_sec": 20})
+    c.observe([T0])
+    c.observe([T0 + 4 * MIN])
+    c.observe([T0 + 8 * MIN])
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            db = await init_db(os.path.join(tmp, "c.db"))
+            try:
+                await save_source_state(db, "feed", {"etag": '"x"', **c.state()})
+                return await load_source_states(db)
+            finally:
+                await db.close()
+
+    state = asyncio.run(run())["feed"]
+    assert state["etag"] == '"x"' and state["last_pub_ms"] == T0 + 8 * MIN
+    restored = AdaptiveCadence.from_source({"interval_sec": 600, "min_interval_sec": 20}, state)
+    assert restored.ewma_gap_ms == c.ewma_gap_ms and abs(c.ewma_gap_ms - 4 * MIN) < 1e-6
+    assert restored.next_interval() == 120                         # 直接从学到的目标（平均间隔一半）起步
+    restored.observe([T0 + 8 * MIN])                               # 重启后再见到旧条目：不算新
+    assert restored.new_items == 0 and restored.next_interval() == 180
+
+
+if __name__ == "__main__":
+    test_ewma_gap()
+    test_speed_up_on_new_items()
+    test_backoff_on_quiet_polls()
+    test_defaults_and_swapped_bounds()
+    test_state_round_trip()
+    print("OK ✅")
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_cluster.py
+验证 app/cluster.py 的近重复报道聚类（StoryIndex）与 cluster_id 的落库、推送去重：
+1) 改写 / 加后缀 / 中文转载归到同一簇，不同报道不合并；特征太少的短标题只按原样转载归簇
+2) 窗口与条数上限：过期的报道不再参与匹配
+3) 随机改写的召回率接近两两比较，且 LSH 找到的都真的达到阈值
+4) 老库自动补 cluster_id 列；run_scorer 给改写分配同一 cluster_id，重启后预热仍归到原簇
+5) Notifier 对同一簇只推一次（分数更高才再推）；记录在 ThreadIndex 里，随时间桶一起过期
+6) 没写进库的事件从索引撤回（直接写库 / 经 writer 两条路径），之后的转载不会归到库里不存在的 cluster_id
+用法：python tests/test_cluster.py  或  pytest tests/test_cluster.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import yaml
+
+from app import scorer
+from app.cluster import StoryIndex, jaccard, shingles
+from app.models import Event
+from app.notifier import Notifier
+from app.scorer import build_snapshot, run_scorer
+from app.storage import get_recent_events, init_db
+from app.threads import ThreadIndex, story_key
+from app.utils import now_ms
+from app.writer import StorageWriter
+
+
+def test_rewordings_share_cluster():
+    idx = StoryIndex()
+    stories = [
+        ("a1", "Nvidia to buy Arm for $40 billion"),
+        ("b1", "Apple unveils new iPhone with AI features"),
+        ("a2", "Nvidia agrees to buy Arm in $40 billion deal - Reuters"),
+        ("c1", "英伟达宣布收购Arm公司，交易额400亿美元"),
+        ("b2", "UPDATE 1-Apple unveils new iPhone with AI features"),
+        ("c2", "英伟达宣布收购Arm公司 交易额达400亿美元"),
+        ("d1", "Fed holds rates steady"),
+        ("e1", "NVDA surges"),
+        ("e2", "nvda SURGES!"),     # 短标题原样转载
+        ("e3", "NVDA slumps"),      # 短标题不做相似匹配
+        ("f1", ""),
+        ("f2", ""),
+    ]
+    got = {eid: idx.assign(eid, h, 1000 + i) for i, (eid, h) in enumerate(stories)}
+    assert got == {"a1": "a1", "b1": "b1", "a2": "a1", "c1": "c1", "b2": "b1", "c2": "c1",
+                   "d1": "d1", "e1": "e1", "e2": "e1", "e3": "e3", "f1": "f1", "f2": "f2"}, got
+    assert idx.assign("a2", "Nvidia agrees to buy Arm in $40 billion deal", 2000) == "a1"  # 同一事件再来
+    assert idx.stats()["joined"] == 4
+
+    # 撤回：新建的索引项删掉，并入已有簇的事件没有索引项可撤
+    assert idx.discard("a1", "Nvidia to buy Arm for $40 billion") and not idx.discard("e2", "nvda SURGES!")
+    assert idx.assign("a3", "Nvidia to buy Arm for $40 billion", 3000) == "a1"   # 经 LSH 仍找到 a2 所在的簇
+    assert idx.discard("e1", "NVDA surges") and idx.assign("e4", "NVDA surges", 3000) == "e4"
+    assert jaccard(shingles("The Fed holds rates"), shingles("fed HOLDS rates!")) == 1.0
+
+
+def test_window_expiry():
+    idx = StoryIndex(window_hours=1, max_stories=3)
+    h = "Tesla recalls 2 million vehicles over autopilot"
+    assert idx.assign("t1", h, 0) == "t1"
+    assert idx.assign("t2", h, 3240_000) == "t1"
+    assert idx.assign("t3", h, 5400_000) == "t1"  # t1 已过期，经窗口内的 t2 仍归到原簇
+    assert idx.assign("t5", h, 9000_001) == "t5"  # 整个簇都过期了
+    for i in range(5):
+        idx.assign(f"x{i}", f"unrelated story number {i} about widgets", 9000_002)
+    assert idx.stats()["stories"] == 3
+    assert idx.assign("t4", h, 9000_003) == "t4"  # t5 被条数上限挤掉了
+
+
+def test_lsh_recall_vs_pairwise():
+    rng = random.Random(4)
+    vocab = [f"w{i}" for i in range(3000)]
+    bases = [[rng.choice(vocab) for _ in range(rng.randint(8, 14))] for _ in range(400)]
+    idx = StoryIndex()
+    for i, words in enumerate(bases):
+        idx.assign(f"s{i}", " ".join(words), i)
+    found = missed = 0
+    for i, words in enumerate(bases):
+        w = list(words)
+        w.pop(rng.randrange(len(w)))                 # 删一个词
+        w.insert(rng.randrange(len(w)), rng.choice(vocab))  # 加一个词
+        h = " ".join(w)
+        feats = shingles(h)
+        best = max(range(len(bases)), key=lambda j: jaccard(feats, shingles(" ".join(bases[j]))))
+        if jaccard(feats, shingles(" ".join(bases[best]))) < idx.similarity:
+            continue
+        story = idx.lookup(feats, idx._keys(feats))
+        if story is None:
+            missed += 1
+        else:
+            found += 1
+            assert jaccard(feats, story.feats) >= idx.similarity
+    assert found > 200 and missed <= 0.05 * (found + missed), (found, missed)
+
+
+SNAP = build_snapshot({
+    "config.yml": b"important_threshold: 70\n",
+    "keywords.yml": yaml.safe_dump({"tiers": {"tier1": ["buy"]}}).encode(),
+    "topics.yml": b"{}",
+    "universe.yml": b"watchlist: [NVDA]\n",
+}, version=1)
+
+
+async def _score(db, raws):
+    q_in: asyncio.Queue = asyncio.Queue()
+    q_out: asyncio.Queue = asyncio.Queue()
+    for raw in raws:
+        q_in.put_nowait(raw)
+    old_snap, old_index = scorer._scorer_config.snapshot, scorer._story_index
+    scorer._scorer_config.snapshot = SNAP
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            task = asyncio.create_task(run_scorer(q_in, q_out, db, batch_size=8))
+            while not q_in.empty():
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    finally:
+        scorer._scorer_config.snapshot, scorer._story_index = old_snap, old_index
+    return {r["source"]: r["cluster_id"] for r in await get_recent_events(db)}
+
+
+def test_storage_and_scorer_roundtrip():
+    now = now_ms()
+
+    def raw(src, headline):
+        return {"headline": headline, "link": f"https://{src}/x", "source_id": src, "ts_published": now}
+
+    async def run(path):
+        # 老库：events 表没有 cluster_id 列
+        con = sqlite3.connect(path)
+        con.execute("CREATE TABLE events (id TEXT PRIMARY KEY, ts_detected_utc INTEGER NOT NULL, "
+                    "ts_published_utc INTEGER, headline TEXT NOT NULL, source TEXT NOT NULL, link TEXT, market TEXT, "
+                    "symbols TEXT, categories TEXT, tags TEXT, score REAL DEFAULT 0.0, pushed INTEGER DEFAULT 0, "
+                    "expires_at_utc INTEGER, thread_key TEXT)")
+        con.commit()
+        con.close()
+
+        db = await init_db(path)
+        try:
+            first = await _score(db, [raw("reuters", "NVDA to buy Arm for $40 billion in chip deal"),
+                                      raw("yahoo", "Apple unveils new iPhone with satellite texting"),
+                                      raw("nasdaq", "NVDA agrees to buy Arm for $40 billion in chip deal")])
+        finally:
+            await db.close()
+        db = await init_db(path)  # 重启：索引从库里预热
+        try:
+            second = await _score(db, [raw("mirror", "Nvidia's NVDA to buy Arm for $40 billion chip deal")])
+        finally:
+            await db.close()
+        return first, second
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first, second = asyncio.run(run(os.path.join(tmp, "old.db")))
+    assert first["reuters"] == first["nasdaq"] != first["yahoo"], first
+    assert second["mirror"] == first["reuters"], second
+
+
+def test_notifier_suppresses_same_story():
+    def ev(i, cluster_id, score, thread_key):
+        now = now_ms()
+        return Event(id=f"n{i}", ts_detected_utc=now, ts_published_utc=now, headline=f"h{i}", source="s",
+                     link="", market="us", symbols="", categories="", tags="", score=score, pushed=0,
+                     expires_at_utc=now, thread_key=thread_key, cluster_id=cluster_id)
+
+    threads = ThreadIndex(retention_minutes=30)
+
+    async def run():
+        n = Notifier({"notifier": {"translate_to_zh": False, "dedupe_minutes": 30}}, threads=threads)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return [await n.push(ev(0, "c1", 80, "A|x")),
+                    await n.push(ev(1, "c1", 80, "B|y")),   # 同一报道换了代码/分类，thread_key 不同
+                    await n.push(ev(2, "c2", 80, "A|x")),
+                    await n.push(ev(3, "c1", 95, "C|z"))]   # 分数更高，再推
+
+    assert asyncio.run(run()) == [True, False, True, True]
+    assert threads.last(story_key("c1"), 30)[0] == 95 and threads.stats()["threads"] == 4
+    later = now_ms() + 32 * 60 * 1000                        # 窗口 + 一个时间桶之后整桶过期
+    assert threads.last(story_key("c1"), 30, later) is None and threads.stats()["threads"] == 0
+
+
+def test_failed_write_leaves_no_cluster():
+    now = now_ms()
+    headline = "NVDA to buy Arm for $40 billion in chip deal"
+
+    def raw(src):
+        return {"headline": headline, "link": f"https://{src}/x", "source_id": src, "ts_published": now}
+
+    async def run(path, use_writer):
+        db = await init_db(path)
+        await db.execute("CREATE TRIGGER no_bad BEFORE INSERT ON events WHEN NEW.source = 'bad' "
+                         "BEGIN SELECT RAISE(ABORT, 'bad row'); END;")
+        old = scorer._story_index
+        scorer._story_index = StoryIndex()
+        w = StorageWriter(db, group_ms=0) if use_writer else None
+        q_out: asyncio.Queue = asyncio.Queue()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                if w is not None:
+                    w.start()
+                await scorer._score_batch([raw("bad")], q_out, db, SNAP, writer=w)
+                if w is not None:
+                    await (await w.mark_pushed("barrier"))   # 坏操作已提交失败
+                    await asyncio.sleep(0)
+                await scorer._score_batch([raw("good")], q_out, db, SNAP, writer=w)
+                if w is not None:
+                    await w.close()
+            return {r["source"]: (r["id"], r["cluster_id"]) for r in await get_recent_events(db)}
+        finally:
+            scorer._story_index = old
+            await db.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for use_writer in (False, True):
+            rows = asyncio.run(run(os.path.join(tmp, f"w{use_writer}.db"), use_writer))
+            assert list(rows) == ["good"] and rows["good"][0] == rows["good"][1], (use_writer, rows)
+
+
+if __name__ == "__main__":
+    test_rewordings_share_cluster()
+    test_window_expiry()
+    test_lsh_recall_vs_pairwise()
+    test_storage_and_scorer_roundtrip()
+    test_notifier_suppresses_same_story()
+    test_failed_write_leaves_no_cluster()
+    print("OK ✅")
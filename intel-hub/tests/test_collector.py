@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_collector.py
+验证 RSS 采集器的条件请求（app/collector.py _RssSource / _fetch_if_changed）：
+1) 第一轮 200：解析入队，ETag/Last-Modified/正文哈希写进 state 并落到 source_state
+2) 带 If-None-Match 的 304：不解析；服务器忽略校验器、正文不变：按哈希跳过，也不解析
+3) 解析失败：新校验器不记下，下一轮不带校验器重新拉取，条目照常入队
+4) type: api 同样在读完之后才记下校验器
+5) _PolledSource 是抽象基类：漏写 poll() 的子类实例化即报错
+6) 自定义解析器给的 uid 是 GUID / URL 时统一哈希成 sha1，入队、已见判断、stop_keys 都照常工作
+用法：python tests/test_collector.py  或  pytest tests/test_collector.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import httpx
+
+from app import collector
+from app.api_source import ApiSource
+from app.collector import _PolledSource, _RssSource
+from app.seen import SeenIndex
+from app.storage import init_db, load_source_states
+from app.utils import link_uid, normalize_uid, uid_key
+
+FEED = open(os.path.join(ROOT_DIR, "tests", "fixtures", "feeds", "rss2_news.xml"), "rb").read()
+API_BODY = b'[{"title": "a", "url": "https://ex.com/a"}, {"title": "b", "url": "https://ex.com/b"}]'
+
+
+class _Server:
+    """按顺序回放响应，记下每次请求带的校验器。"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.seen_headers = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.seen_headers.append((request.headers.get("If-None-Match"), request.headers.get("If-Modified-Since")))
+        status, headers, body = self.responses.pop(0)
+        return httpx.Response(status, headers=headers, content=body)
+
+
+def _run(server, body_fn):
+    async def run():
+        old = collector._CLIENT
+        collector._CLIENT = httpx.AsyncClient(transport=httpx.MockTransport(server))
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return await body_fn()
+        finally:
+            await collector._CLIENT.aclose()
+            collector._CLIENT = old
+    return asyncio.run(run())
+
+
+def _drain(q: asyncio.Queue) -> int:
+    n = 0
+    while not q.empty():
+        q.get_nowait()
+        n += 1
+    return n
+
+
+def test_conditional_get_and_state():
+    v1 = {"ETag": '"v1"', "Last-Modified": "Mon, 06 Oct 2025 10:00:00 GMT"}
+    server = _Server((200, v1, FEED), (304, {}, b""), (200, {}, FEED))
+    calls = []
+    orig = collector.run_parser
+
+    async def counting(*args, **kw):
+        calls.append(1)
+        return await orig(*args, **kw)
+
+    async def body():
+        with tempfile.TemporaryDirectory() as tmp:
+            db = await init_db(os.path.join(tmp, "c.db"))
+            q: asyncio.Queue = asyncio.Queue()
+            src = _RssSource({"id": "feed", "url": "https://feed.example/rss"}, q, db, seen=SeenIndex())
+            collector.run_parser = counting
+            try:
+                await src.poll()
+                first = _drain(q)
+                saved = (await load_source_states(db))["feed"]
+                await src.poll()                 # 304
+                await src.poll()                 # 200，正文不变
+                rest = _drain(q)
+            finally:
+                collector.run_parser = orig
+                await db.close()
+            return first, saved, rest, dict(src.state)
+
+    first, saved, rest, state = _run(server, body)
+    assert first > 0 and rest == 0 and len(calls) == 1
+    assert saved["etag"] == '"v1"' and saved["last_modified"] == v1["Last-Modified"] and saved["body_hash"]
+    assert server.seen_headers == [(None, None), ('"v1"', v1["Last-Modified"]), ('"v1"', v1["Last-Modified"])]
+    # 第三轮服务器没给校验器：哈希不变，记下空校验器
+    assert state["etag"] is None and state["body_hash"] == saved["body_hash"]
+
+
+def test_parse_failure_keeps_old_validators():
+    server = _Server((200, {"ETag": '"v1"'}, FEED), (200, {"ETag": '"v1"'}, FEED))
+    orig = collector.run_parser
+    failures = [RuntimeError("parser crashed")]
+
+    async def flaky(*args, **kw):
+        if failures:
+            raise failures.pop()
+        return await orig(*args, **kw)
+
+    async def body():
+        q: asyncio.Queue = asyncio.Queue()
+        src = _RssSource({"id": "feed", "url": "https://feed.example/rss"}, q, seen=SeenIndex())
+        collector.run_parser = flaky
+        try:
+            await src.poll()
+            after_fail = (dict(src.state), _drain(q))
+            await src.poll()
+        finally:
+            collector.run_parser = orig
+        return after_fail, _drain(q), src.state["etag"]
+
+    (state, n_fail), n_ok, etag = _run(server, body)
+    assert n_fail == 0 and not state.get("etag") and not state.get("body_hash")
+    assert server.seen_headers[1] == (None, None)        # 没带校验器，不会被 304 挡掉
+    assert n_ok > 0 and etag == '"v1"'
+
+
+def test_api_source_records_validators_after_read():
+    server = _Server((200, {"ETag": '"a1"'}, API_BODY), (200, {"ETag": '"a1"'}, API_BODY))
+    orig = ApiSource._read
+    failures = [RuntimeError("read failed")]
+
+    async def flaky(self, resp):
+        if failures:
+            raise failures.pop()
+        return await orig(self, resp)
+
+    async def body():
+        q: asyncio.Queue = asyncio.Queue()
+        src = ApiSource({"id": "api", "url": "https://api.example/items"}, q, seen=SeenIndex())
+        ApiSource._read = flaky
+        try:
+            await src.poll()
+            etag_after_fail = src.state.get("etag")
+            await src.poll()
+        finally:
+            ApiSource._read = orig
+        return etag_after_fail, _drain(q), src.state["etag"]
+
+    assert _run(server, body) == (None, 2, '"a1"')
+    assert server.seen_headers[1] == (None, None)
+
+
+def test_source_without_poll_fails_at_creation():
+    class NoPoll(_PolledSource):
+        __slots__ = ()
+
+    try:
+        NoPoll({"id": "x"}, asyncio.Queue(), seen=SeenIndex())
+        raise AssertionError("应当在实例化时抛 TypeError")
+    except TypeError as e:
+        assert "poll" in str(e)
+
+
+def test_non_sha1_uids_are_normalized():
+    async def body():
+        q: asyncio.Queue = asyncio.Queue()
+        seen = SeenIndex()
+        src = _RssSource({"id": "custom", "url": "https://feed.example/rss"}, q, seen=seen)
+        item = {"headline": "h", "link": "https://ex.com/a", "ts_published": 1, "raw": {}}
+        got = [await src._emit({**item, "uid": uid})
+               for uid in ("urn:uuid:6f1c-42", "urn:uuid:6f1c-42", "https://ex.com/a?utm_source=x", "A" * 40)]
+        return got, [q.get_nowait()["id"] for _ in range(q.qsize())], seen.keys_of("custom")
+
+    got, ids, keys = asyncio.run(body())
+    assert got == [1, None, 1, 1]                                    # 同一 GUID 第二次算已见
+    assert all(len(i) == 40 and int(i, 16) >= 0 for i in ids)
+    assert ids[1] == link_uid("https://ex.com/a")                    # URL 形式的 uid 与链接 uid 一致
+    assert uid_key(normalize_uid("urn:uuid:6f1c-42")) in keys
+    assert normalize_uid(ids[0]) == ids[0]
+
+
+if __name__ == "__main__":
+    test_conditional_get_and_state()
+    test_parse_failure_keeps_old_validators()
+    test_api_source_records_validators_after_read()
+    test_source_without_poll_fails_at_creation()
+    test_non_sha1_uids_are_normalized()
+    print("OK ✅")
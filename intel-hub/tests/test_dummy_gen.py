@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_dummy_gen.py
+验证 app/parsers/dummy_gen.py：
+1) 同种子同源 id → 完全相同的事件序列；不同源 id 序列不同
+2) 速率与突发：按时间窗给出的条数符合 rate × multiplier
+3) 重复比例 / watchlist 命中率 / 档位分布大致符合配置
+4) 旧接口 generate_events 仍返回 1-2 条
+5) DummySource 的合成条目不进共享已见索引，不会被 flush 到 seen_items
+用法：python tests/test_dummy_gen.py  或  pytest tests/test_dummy_gen.py
+"""
+import asyncio
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.dummy_source import DummySource
+from app.parsers.dummy_gen import DummyGenerator, generate_events
+from app.seen import SeenIndex
+
+VOCAB = {"tier1": {"en": ["merger"], "zh": ["并购"]}, "tier2": {"en": ["earnings"], "zh": ["财报"]},
+         "negative": {"en": ["rumor"], "zh": ["传闻"]}}
+WATCHLIST = ["NVDA", "AMD"]
+
+
+def _gen(source_id="d", **profile):
+    return DummyGenerator(source_id, profile, vocab=VOCAB, watchlist=WATCHLIST, start_ms=0)
+
+
+def test_deterministic():
+    a = [e["headline"] for e in _gen().events_between(0, 10_000)]
+    b = [e["headline"] for e in _gen().events_between(0, 10_000)]
+    c = [e["headline"] for e in _gen("other").events_between(0, 10_000)]
+    assert a == b and a != c
+
+
+def test_rate_and_burst():
+    g = _gen(rate_per_sec=10, burst={"every_sec": 10, "duration_sec": 2, "multiplier": 5})
+    assert len(g.events_between(0, 1000)) == 50        # 突发窗口内
+    assert len(g.events_between(5000, 6000)) == 10     # 平常
+    g = _gen(rate_per_sec=2.5)
+    assert sum(len(g.events_between(t, t + 100)) for t in range(0, 10_000, 100)) == 25  # 小数累积不丢
+
+
+def test_mix():
+    g = _gen(rate_per_sec=1000, duplicate_ratio=0.2, symbol_hit_rate=0.5,
+             tier_mix={"tier1": 0.1, "tier2": 0.0, "negative": 0.0, "none": 0.9}, lang_mix={"en": 1})
+    events = g.events_between(0, 10_000)
+    n = len(events)
+    fresh = [e for e in events if not e["raw"]["dup"]]
+    assert abs(g.duplicates / n - 0.2) < 0.03
+    assert abs(sum(1 for e in fresh if e["raw"]["symbol"]) / len(fresh) - 0.5) < 0.03
+    assert abs(sum(1 for e in fresh if e["raw"]["tier"] == "tier1") / len(fresh) - 0.1) < 0.02
+    assert all("merger" in e["headline"] for e in fresh if e["raw"]["tier"] == "tier1")
+    assert len({e["link"] for e in events}) == n  # 重复只重复标题，链接各不相同
+
+
+def test_legacy_generate_events():
+    events = generate_events("legacy")
+    assert 1 <= len(events) <= 2
+    assert all(e["headline"] and e["link"] and e["source_id"] == "legacy" for e in events)
+
+
+def test_dummy_source_keeps_out_of_shared_seen():
+    async def body():
+        shared = SeenIndex(max_per_source=20)
+        q: asyncio.Queue = asyncio.Queue()
+        src = DummySource({"id": "dummy_load", "type": "dummy", "rate_per_sec": 50, "seed": 1}, q, seen=shared)
+        src.last_ms -= 2000
+        await src.poll()
+        return q.qsize(), shared.stats(), src.seen.stats(), src.seen.max_per_source
+
+    emitted, shared, own, cap = asyncio.run(body())
+    assert emitted > 0
+    assert shared["entries"] == 0 and shared["dirty"] == 0
+    assert own["entries"] == cap == 20
+
+
+if __name__ == "__main__":
+    test_deterministic()
+    test_rate_and_burst()
+    test_mix()
+    test_legacy_generate_events()
+    test_dummy_source_keeps_out_of_shared_seen()
+    print("OK ✅")
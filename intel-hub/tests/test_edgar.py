@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_edgar.py
+验证 type: edgar_submissions 采集器（app/edgar_source.py），对本地回放服务（tests/fixtures/edgar/ 的录制 JSON）：
+1) parse_submissions：游标之后的增量、表单 / 8-K item 过滤、首次见到时的 backfill；
+   积压超过 max_new 时按页往新的方向翻、游标逐轮推进不丢申报；游标掉出窗口时打日志
+2) 首轮只建游标不发事件；回放切到新版本后只发游标之后、且符合过滤的新申报
+3) 游标持久化到 edgar_cursor：换一个实例（模拟重启）后带 If-None-Match 请求，命中 304，不重发
+4) TokenBucket 按速率放行
+用法：python tests/test_edgar.py  或  pytest tests/test_edgar.py
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app import collector
+from app.edgar_source import EdgarSource, parse_submissions
+from app.scheduler import TokenBucket
+from app.seen import SeenIndex
+from app.storage import init_db, load_edgar_cursors
+
+FIXTURES = os.path.join(ROOT_DIR, "tests", "fixtures", "edgar")
+NVDA, AMD = "0001045810", "0000002488"
+
+
+def _fixture(cik: str, version: int) -> bytes:
+    with open(os.path.join(FIXTURES, f"CIK{cik}.v{version}.json"), "rb") as f:
+        return f.read()
+
+
+class _Replay:
+    """极简 HTTP/1.1 回放服务：/CIK##########.json → 当前版本的录制文件，ETag = 版本号。"""
+
+    def __init__(self):
+        self.version = 1
+        self.hits = []  # (cik, status)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}/submissions/"
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+                path = head.split(" ", 2)[1]
+                headers = {k.strip().lower(): v.strip() for k, _, v in
+                           (line.partition(":") for line in head.split("\r\n")[1:] if line)}
+                cik = path.rsplit("/CIK", 1)[-1].split(".")[0]
+                etag = f'"v{self.version}"'
+                if headers.get("if-none-match") == etag:
+                    self.hits.append((cik, 304))
+                    writer.write(b"HTTP/1.1 304 Not Modified\r\nETag: %s\r\nContent-Length: 0\r\n\r\n" % etag.encode())
+                else:
+                    body = _fixture(cik, self.version)
+                    self.hits.append((cik, 200))
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nETag: %s\r\n"
+                                 b"Content-Length: %d\r\n\r\n" % (etag.encode(), len(body)) + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def test_parse_submissions():
+    body = _fixture(NVDA, 2)
+    forms = frozenset(["8-K"])
+    # 无游标、无 backfill：只返回最新 accession
+    newest, events, caught_up = parse_submissions(body, NVDA, "NVDA", None, forms, frozenset(), None, "sec")
+    assert newest == "0001045810-25-000231" and events == [] and caught_up
+    # 游标在 v1 的最新一条：只剩新增的 8-K（Form 4 被表单过滤掉）
+    newest, events, caught_up = parse_submissions(body, NVDA, "NVDA", "0001045810-25-000210", forms, frozenset(), None, "sec")
+    assert [e["raw"]["accession"] for e in events] == ["0001045810-25-000231"]
+    assert newest == "0001045810-25-000231" and caught_up
+    e = events[0]
+    assert e["headline"] == "NVDA 8-K: Entry into a Material Definitive Agreement"
+    assert e["link"] == "https://www.sec.gov/Archives/edgar/data/1045810/000104581025000231/nvda-20251006.htm"
+    assert e["raw"]["items"] == ["1.01", "9.01"] and e["uid"]
+    # 首次见到 + backfill：只补发 since_ms 之后的
+    since = 1759190400000  # 2025-09-30T00:00:00Z
+    _, events, _ = parse_submissions(_fixture(AMD, 2), AMD, "", None, forms, frozenset(), since, "sec")
+    assert [e["raw"]["accession"] for e in events] == ["0000002488-25-000166", "0000002488-25-000163"]
+    assert events[0]["headline"].startswith("AMD 8-K: Departure")
+    # item 过滤
+    _, events, _ = parse_submissions(_fixture(AMD, 2), AMD, "AMD", None, forms, frozenset(["5.02"]), since, "sec")
+    assert [e["raw"]["accession"] for e in events] == ["0000002488-25-000166"]
+
+
+def _backlog(n: int) -> bytes:
+    """n 条 8-K，按时间倒序，accession 从 n-1 递减到 0。"""
+    accs = [f"0001045810-25-{i:06d}" for i in range(n - 1, -1, -1)]
+    return json.dumps({"name": "NVIDIA CORP", "filings": {"recent": {
+        "accessionNumber": accs, "form": ["8-K"] * n, "items": ["8.01"] * n,
+        "primaryDocument": ["doc.htm"] * n, "acceptanceDateTime": ["2025-10-06T16:05:00.000Z"] * n,
+        "filingDate": ["2025-10-06"] * n}}}).encode("utf-8")
+
+
+def test_parse_submissions_backlog():
+    body, forms = _backlog(130), frozenset(["8-K"])
+    acc = lambda i: f"0001045810-25-{i:06d}"  # noqa: E731
+    cursor, rounds = acc(9), []
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        while True:
+            cursor, events, caught_up = parse_submissions(body, NVDA, "NVDA", cursor, forms, frozenset(), None, "sec")
+            rounds.append([e["raw"]["accession"] for e in events])
+            if caught_up:
+                break
+    # 游标之后 120 条：三轮 50 / 50 / 20，从紧挨游标的开始，一条不丢、不重
+    assert [len(r) for r in rounds] == [50, 50, 20] and cursor == acc(129)
+    assert sorted(sum(rounds, [])) == [acc(i) for i in range(10, 130)]
+    assert rounds[0][-1] == acc(10) and rounds[0][0] == acc(59)
+    assert "积压 120 条" in out.getvalue()
+
+    # 游标不在窗口内：打日志，从窗口最早的一条开始翻
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        cursor, events, caught_up = parse_submissions(body, NVDA, "NVDA", "0001045810-24-000001", forms,
+                                                      frozenset(), None, "sec")
+    assert "不在 recent 窗口" in out.getvalue()
+    assert cursor == acc(49) and len(events) == 50 and not caught_up
+
+
+async def _poll(source, times=1):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(times):
+            await source.poll()
+
+
+async def _run_replay():
+    replay = _Replay()
+    base = await replay.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = await init_db(os.path.join(tmp, "edgar.db"))
+        try:
+            src = {"id": "sec", "type": "edgar_submissions", "url": base, "ciks": {"NVDA": 1045810, "AMD": "2488"},
+                   "items": ["1.01", "5.02"], "batch_size": 1, "rate_limit_per_sec": 100, "interval_sec": 10}
+            q: asyncio.Queue = asyncio.Queue()
+            source = EdgarSource(src, q, db, seen=SeenIndex())
+
+            # 首轮：batch_size=1，两轮覆盖两个 CIK；只建游标
+            await _poll(source, 2)
+            assert q.qsize() == 0
+            cursors = await load_edgar_cursors(db)
+            assert cursors[NVDA]["last_accession"] == "0001045810-25-000210"
+            assert cursors[AMD]["last_accession"] == "0000002488-25-000150"
+
+            # 新版本：只发游标之后且命中 item 过滤的
+            replay.version = 2
+            await _poll(source, 2)
+            got = sorted(q.get_nowait()["headline"] for _ in range(q.qsize()))
+            assert got == ["AMD 8-K: Departure or Appointment of Directors or Officers",
+                           "NVDA 8-K: Entry into a Material Definitive Agreement"], got
+
+            # 重启：新实例从 edgar_cursor 读游标，条件请求全部 304
+            replay.hits.clear()
+            q2: asyncio.Queue = asyncio.Queue()
+            restarted = EdgarSource(src, q2, db, seen=SeenIndex())
+            await _poll(restarted, 2)
+            assert q2.qsize() == 0
+            assert sorted(replay.hits) == [(AMD, 304), (NVDA, 304)]
+            assert restarted.stats()["not_modified"] == 2
+        finally:
+            await db.close()
+            replay.server.close()
+            await collector._ensure_client().aclose()
+            collector._CLIENT = None
+
+
+def test_replay_incremental():
+    asyncio.run(_run_replay())
+
+
+def test_token_bucket():
+    async def run():
+        bucket = TokenBucket(rate=20, burst=1)
+        t0 = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+        return time.monotonic() - t0
+
+    elapsed = asyncio.run(run())
+    assert 0.2 <= elapsed < 0.6, elapsed  # 首个立即放行，其余 5 个各等 50ms
+
+
+if __name__ == "__main__":
+    test_parse_submissions()
+    test_parse_submissions_backlog()
+    test_replay_incremental()
+    test_token_bucket()
+    print("OK ✅")
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_event_index.py
+验证 symbols / categories / tags 倒排表（app/storage.py）：
+1) insert_events / insert_event / StorageWriter 写事件时同一事务写倒排表；按代码查精确匹配，不误中子串
+2) upsert 改了多值字段时旧值被替换；mark_pushed 不动倒排表；过期清理连带删掉
+3) “某代码 T 以来的事件”走 (symbol, ts_detected_utc) 索引；热度榜计数
+4) 老库（没有倒排表）第一次 init_db 时从 events 回填
+用法：python tests/test_event_index.py  或  pytest tests/test_event_index.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.models import Event
+from app.storage import (delete_expired, events_for_category, events_for_symbol, events_for_tag,
+                         events_for_value_sql, init_db, insert_event, insert_events, mark_pushed, top_values)
+from app.utils import now_ms
+from app.writer import StorageWriter
+
+MIN = 60_000
+
+
+def _event(i, symbols="", tags="", categories="", ts=None, expires=None):
+    ts = ts or now_ms()
+    return Event(id=f"e{i}", ts_detected_utc=ts, ts_published_utc=ts, headline=f"h{i}", source="s",
+                 link=f"https://x/{i}", market="us", symbols=symbols, categories=categories, tags=tags,
+                 score=50.0, pushed=0, expires_at_utc=expires or ts + 3600_000, thread_key=f"t{i}")
+
+
+def _with_db(fn):
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "idx.db")
+            db = await init_db(path)
+            try:
+                return await fn(db, path)
+            finally:
+                await db.close()
+    return asyncio.run(run())
+
+
+def _ids(rows):
+    return [r["id"] for r in rows]
+
+
+def test_side_tables_follow_events():
+    async def body(db, path):
+        now = now_ms()
+        await insert_events(db, (
+            _event(1, "NVDA;AMD", "#AI;#Semis", "ma;earnings", ts=now - 3 * MIN),
+            _event(2, "AMDX", "#AI", "general", ts=now - 2 * MIN),
+            _event(3, " NVDA ; ;NVDA", ts=now - MIN, expires=now - 1),  # 空白、空值、重复
+        ))
+        await insert_event(db, {"id": "e4", "ts_detected_utc": now, "headline": "h4", "source": "s",
+                                "symbols": "AMD", "tags": "#AI"})
+        assert _ids(await events_for_symbol(db, "NVDA", 0)) == ["e3", "e1"]
+        assert _ids(await events_for_symbol(db, "AMD", 0)) == ["e4", "e1"]       # 不误中 AMDX
+        assert _ids(await events_for_symbol(db, "AMD", now - 90_000)) == ["e4"]
+        assert _ids(await events_for_tag(db, "#AI", 0)) == ["e4", "e2", "e1"]
+        assert _ids(await events_for_category(db, "earnings", 0)) == ["e1"]
+        assert (await events_for_symbol(db, "NVDA", 0))[1]["symbols"] == "NVDA;AMD"
+
+        await insert_events(db, [_event(1, "TSLA", ts=now - 3 * MIN)])          # upsert 换了代码
+        await mark_pushed(db, "e2")
+        await delete_expired(db, now)                                             # e3 过期
+        assert _ids(await events_for_symbol(db, "NVDA", 0)) == []
+        assert _ids(await events_for_symbol(db, "TSLA", 0)) == ["e1"]
+        assert _ids(await events_for_symbol(db, "AMDX", 0)) == ["e2"]
+        assert await top_values(db, "tags", 0) == [("#AI", 2)]
+        assert await top_values(db, "symbols", now - 90_000) == [("AMD", 1)]
+
+        other = sqlite3.connect(path)
+        plan = " ".join(r[-1] for r in other.execute("EXPLAIN QUERY PLAN " + events_for_value_sql("symbols"),
+                                                     ("NVDA", 0, 10)))
+        other.close()
+        return plan
+
+    plan = _with_db(body)
+    assert "idx_event_symbols_symbol_ts (symbol=? AND ts_detected_utc>?)" in plan, plan
+
+
+def test_writer_maintains_side_tables():
+    async def body(db, path):
+        w = StorageWriter(db, group_ms=20)
+        with contextlib.redirect_stdout(io.StringIO()):
+            w.start()
+            await w.upsert([_event(1, "NVDA"), _event(2, "AMD;NVDA")])
+            await (await w.upsert([_event(2, "AMD")]))
+            after_upsert = _ids(await events_for_symbol(db, "NVDA", 0))
+            await (await w.delete_expired(now_ms() + 7200_000))
+            await w.close()
+        return after_upsert, _ids(await events_for_symbol(db, "AMD", 0))
+
+    assert _with_db(body) == (["e1"], [])
+
+
+def test_backfill_old_database():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "old.db")
+            db = await init_db(path)
+            await insert_events(db, [_event(1, "NVDA;AMD", "#AI"), _event(2, "AMD")])
+            await db.executescript("DROP TABLE event_symbols; DROP TABLE event_tags; DROP TABLE event_categories;")
+            await db.close()
+            db = await init_db(path)
+            try:
+                return _ids(await events_for_symbol(db, "AMD", 0)), await top_values(db, "tags", 0)
+            finally:
+                await db.close()
+
+    ids, tags = asyncio.run(run())
+    assert sorted(ids) == ["e1", "e2"] and tags == [("#AI", 1)]
+
+
+if __name__ == "__main__":
+    test_side_tables_follow_events()
+    test_writer_maintains_side_tables()
+    test_backfill_old_database()
+    print("OK ✅")
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_housekeeping.py
+验证过期清理（app/storage.py delete_expired / incremental_vacuum，app/writer.py，app/main.py run_housekeeper）：
+1) 分段删除：只删 expires_at_utc < now 的行（0 / NULL 不删），按段提交，返回总条数；倒排表、全文索引跟着删；
+   取段走 idx_events_expires
+2) 单写者一次只删一段，段与段之间的入库照常提交；run_housekeeper 逐段删完再归还空闲页
+3) 新库 auto_vacuum=INCREMENTAL，incremental_vacuum 按页数上限归还空闲页；老库返回 0，
+   enable_incremental_vacuum 转换后全文索引仍一致
+用法：python tests/test_housekeeping.py  或  pytest tests/test_housekeeping.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app import storage
+from app.main import run_housekeeper
+from app.models import Event
+from app.storage import (DELETE_EXPIRED_SQL, delete_expired, enable_incremental_vacuum, events_for_symbol,
+                         incremental_vacuum, init_db, insert_events, search_events)
+from app.utils import now_ms
+from app.writer import StorageWriter
+
+
+def _event(i, expires, headline=None):
+    ts = now_ms()
+    return Event(id=f"e{i}", ts_detected_utc=ts, ts_published_utc=ts, headline=headline or f"headline {i} " + "x" * 400,
+                 source="s", link=f"https://x/{i}", market="us", symbols="NVDA", categories="", tags="",
+                 score=50.0, pushed=0, expires_at_utc=expires, thread_key=f"t{i}")
+
+
+def _with_db(fn):
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "hk.db")
+            db = await init_db(path)
+            try:
+                return await fn(db, path)
+            finally:
+                await db.close()
+    return asyncio.run(run())
+
+
+async def _count(db, sql="SELECT COUNT(*) FROM events"):
+    async with db.execute(sql) as cur:
+        return (await cur.fetchone())[0]
+
+
+def _ids(rows):
+    return [r["id"] for r in rows]
+
+
+def test_chunked_delete():
+    async def body(db, path):
+        now = now_ms()
+        await insert_events(db, [_event(i, now - 1000 + i) for i in range(20)]
+                            + [_event(20, 0), _event(21, now + 3600_000)])
+        await db.execute("UPDATE events SET expires_at_utc = NULL WHERE id = 'e20';")
+        await db.commit()
+        commits = []
+        db.commit, orig = (lambda: commits.append(1) or orig()), db.commit
+        try:
+            deleted = await delete_expired(db, now - 990, chunk=4)   # e0..e9 过期
+        finally:
+            db.commit = orig
+        left = await _count(db)
+        deleted += await delete_expired(db, now + 1)
+        await db.execute("INSERT INTO events_fts(events_fts, rank) VALUES('integrity-check', 1);")
+        other = sqlite3.connect(path)
+        plan = " ".join(r[-1] for r in other.execute("EXPLAIN QUERY PLAN " + DELETE_EXPIRED_SQL, (now, 10)))
+        other.close()
+        return (deleted, left, len(commits), await _count(db), await _count(db, "SELECT COUNT(*) FROM event_symbols"),
+                _ids(await search_events(db, "headline", 0)), plan)
+
+    deleted, left, commits, total, side, found, plan = _with_db(body)
+    assert deleted == 20 and left == 12 and commits == 3        # 4 + 4 + 2，每段一次提交
+    assert total == 2 and side == 2 and sorted(found) == ["e20", "e21"]
+    assert "idx_events_expires" in plan, plan
+
+
+def test_writer_deletes_chunk_by_chunk():
+    async def body(db, path):
+        now = now_ms()
+        await insert_events(db, [_event(i, now - 1000) for i in range(10)])
+        w = StorageWriter(db, group_ms=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            w.start()
+            first = await (await w.delete_expired(now, chunk=4))
+            await (await w.upsert([_event(100, now + 3600_000)]))     # 段间入库照常提交
+            mid = await _count(db)
+            hk = asyncio.create_task(run_housekeeper(db, every_sec=3600, writer=w, chunk=4, pause_ms=0,
+                                                     vacuum_pages=8))
+            while await _count(db) > 1:
+                await asyncio.sleep(0.01)
+            hk.cancel()
+            await asyncio.gather(hk, return_exceptions=True)
+            st = w.stats()
+            await w.close()
+        return first, mid, _ids(await events_for_symbol(db, "NVDA", 0)), st["ops"]
+
+    first, mid, left, ops = _with_db(body)
+    assert first == 4 and mid == 7 and left == ["e100"]
+    assert ops >= 5    # 1 段 + upsert + 剩下 6 行至少两段 + 归还空闲页
+
+
+def test_incremental_vacuum():
+    async def body(db, path):
+        now = now_ms()
+        await insert_events(db, [_event(i, now - 1000) for i in range(300)])
+        await delete_expired(db, now)
+        mode = await _count(db, "PRAGMA auto_vacuum")
+        free = await _count(db, "PRAGMA freelist_count")
+        freed = await incremental_vacuum(db, 5)
+        rest = await incremental_vacuum(db, 100_000)
+        return mode, free, freed, rest, await _count(db, "PRAGMA freelist_count")
+
+    mode, free, freed, rest, after = _with_db(body)
+    assert mode == 2 and free > 5 and freed == 5 and rest == free - 5 and after == 0
+
+
+def test_convert_old_database():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "old.db")
+            conn = sqlite3.connect(path)          # 老库：auto_vacuum=NONE 时建的表
+            conn.execute("PRAGMA auto_vacuum=NONE;")
+            conn.execute(storage.SCHEMA_EVENTS)
+            conn.close()
+            db = await init_db(path)
+            try:
+                now = now_ms()
+                await insert_events(db, [_event(i, now - 1000 if i % 2 else now + 3600_000, f"tesla {i}")
+                                         for i in range(200)])
+                await delete_expired(db, now)
+                before = await incremental_vacuum(db)
+                converted = await enable_incremental_vacuum(db)
+                again = await enable_incremental_vacuum(db)
+                await db.execute("INSERT INTO events_fts(events_fts, rank) VALUES('integrity-check', 1);")
+                hits = len(await search_events(db, "tesla", 0, 1000))
+                return before, converted, again, await _count(db, "PRAGMA auto_vacuum"), hits
+            finally:
+                await db.close()
+
+    assert asyncio.run(run()) == (0, True, False, 2, 100)
+
+
+if __name__ == "__main__":
+    test_chunked_delete()
+    test_writer_deletes_chunk_by_chunk()
+    test_incremental_vacuum()
+    test_convert_old_database()
+    print("OK ✅")
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_matcher.py
+验证 app/matcher.py：
+1) Automaton：重叠、嵌套的命中全部报出
+2) KeywordMatcher 与 NaiveKeywordMatcher（原逐词实现）在手写边界用例上完全一致：
+   词形后缀、\\b 边界、ray-ban、中英混排、大写缩写、标点关键词、重复配置、黑名单
+3) 随机关键词表 × 随机标题的等价性
+4) SymbolMatcher：现金标签、大写独立词、词边界、cashtag_only、别名（英文 / 中文 / 多词）、点号代码、
+   连字符连写（AMD-backed 按段判断大小写）
+5) TopicMatcher：与原嵌套循环（换成不分大小写）结果一致，含共享 hashtag 的主题顺序
+用法：python tests/test_matcher.py  或  pytest tests/test_matcher.py
+"""
+import os
+import random
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.matcher import Automaton, KeywordMatcher, NaiveKeywordMatcher, SymbolMatcher, TopicMatcher
+
+KEYWORDS = {
+    "tiers": {
+        "tier1": ["merger", "acquisition", "ban", "rate cut", "s&p", "FDA", "收购", "merger", "ai", "5g"],
+        "tier2": ["earnings", "guid", "approv", "partner", "合作", "price target", "rate"],
+    },
+    "negatives": ["rumor", "opinion", "传闻", "preview"],
+    "keyword_blacklist": ["Sponsored", "广告", "casino", "ban"],
+}
+
+HEADLINES = [
+    "NVDA announces merger with Arm; mergers and acquisitions surge",
+    "Ray-Ban maker EssilorLuxottica beats estimates",
+    "EU bans TikTok on staff phones",
+    "Fed rate cuts priced in as rates fall",
+    "Banana republic? banner year for banks",
+    "S&P 500 hits record; s&p futures rise",
+    "FDA approves new drug; fda approval pending",
+    "公司宣布收购计划，双方达成合作",
+    "中文ai芯片 vs AI chips: ai-driven rally",
+    "5G rollout: 5gs and 5ging",
+    "Guidance raised; guided higher; guiding",
+    "Partnered with MSFT, partnership expands",
+    "Analyst opinions: price targets raised",
+    "Rumored deal — rumoring, rumors, rumor_mill",
+    "Sponsored: casinos are back",
+    "市场传闻称将有广告新规",
+    "earnings_preview and preview_earnings",
+    "",
+]
+
+
+def test_automaton_overlaps():
+    ac = Automaton(["he", "she", "his", "hers", "e"])
+    got = sorted((ac.patterns[i], end) for i, end in ac.scan("ushers"))
+    assert got == [("e", 4), ("he", 4), ("hers", 6), ("she", 4)], got
+
+
+def test_edge_cases_equal():
+    fast, slow = KeywordMatcher.from_config(KEYWORDS), NaiveKeywordMatcher(KEYWORDS)
+    for h in HEADLINES:
+        assert fast.match(h) == slow.match(h), h
+
+    hits = fast.match("NVDA announces merger with Arm; mergers and acquisitions surge")
+    assert hits.tier1 == ["merger", "acquisition", "merger"]  # 重复配置重复计数
+    assert fast.match("Ray-Ban maker EssilorLuxottica beats estimates").tier1 == []
+    assert fast.match("EU bans TikTok on staff phones").blacklist == ["ban"]
+
+
+def test_empty_and_odd_entries():
+    kw = {"tiers": {"tier1": ["", None, 3, "x"]}, "negatives": [], "keyword_blacklist": [""]}
+    fast, slow = KeywordMatcher.from_config(kw), NaiveKeywordMatcher(kw)
+    for h in ["", "x", "a x b", "xx"]:
+        assert fast.match(h) == slow.match(h), h
+    assert KeywordMatcher.from_config({}).match("anything").tier1 == []
+
+
+def _random_words(rng, n):
+    letters = "abcdefghijklmnoprstu"
+    cjk = "收购合作财报回购发布芯片传闻观点监管获批"
+    words = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.6:
+            words.append("".join(rng.choice(letters) for _ in range(rng.randint(2, 7))))
+        elif r < 0.7:
+            words.append("".join(rng.choice(letters) for _ in range(3)) + " " + "".join(rng.choice(letters) for _ in range(3)))
+        elif r < 0.8:
+            words.append("".join(rng.choice(letters.upper()) for _ in range(rng.randint(2, 4))))
+        else:
+            words.append("".join(rng.choice(cjk) for _ in range(rng.randint(1, 3))))
+    return words
+
+
+def _random_headline(rng, words):
+    parts = []
+    for _ in range(rng.randint(3, 14)):
+        r = rng.random()
+        if r < 0.4:
+            w = rng.choice(words)
+            w = w.upper() if rng.random() < 0.2 else w
+            parts.append(w + rng.choice(["", "", "s", "es", "ed", "ing", "er", "_x"]))
+        else:
+            parts.append("".join(rng.choice("abcdefghijklmnoprstu收购财报") for _ in range(rng.randint(1, 8))))
+        parts.append(rng.choice([" ", " ", ", ", "-", "", "：", "(", ") "]))
+    if rng.random() < 0.1:
+        parts.append(" ray-ban")
+    return "".join(parts)
+
+
+def test_random_equivalence():
+    rng = random.Random(7)
+    for _ in range(20):
+        words = _random_words(rng, rng.randint(5, 80))
+        kw = {
+            "tiers": {"tier1": rng.sample(words, len(words) // 4), "tier2": rng.sample(words, len(words) // 4)},
+            "negatives": rng.sample(words, len(words) // 8),
+            "keyword_blacklist": rng.sample(words, len(words) // 10),
+        }
+        fast, slow = KeywordMatcher.from_config(kw), NaiveKeywordMatcher(kw)
+        for _ in range(200):
+            h = _random_headline(rng, words)
+            assert fast.match(h) == slow.match(h), (h, kw)
+
+
+UNIVERSE = {
+    "watchlist": ["NVDA", "AMD", "OPEN", "A", "ON", "BRK.B", "TSLA", "amzn"],
+    "aliases": {"NVDA": ["Nvidia", "英伟达"], "AMD": "Advanced Micro Devices", "META": ["Facebook", "脸书"]},
+    "cashtag_only": ["ON"],
+}
+
+
+def test_symbols():
+    m = SymbolMatcher.from_config(UNIVERSE)
+    cases = {
+        "Nvidia and AMD rally": ["NVDA", "AMD"],
+        "英伟达NVDA盘前涨3%": ["NVDA"],
+        "$nvda $a $on hit highs": ["NVDA", "A", "ON"],
+        "ON Semiconductor and A shares": [],                   # 单字母 / cashtag_only 不认裸词
+        "Reopened: open interest climbs, OPENAI news": [],     # 子串、小写都不算
+        "AMDOCS beats; NVDAX is not a ticker": [],
+        "Advanced Micro Devices, Facebook parent and 脸书": ["AMD", "META"],
+        "BRK.B and NVDA-AMD pair trade": ["NVDA", "AMD", "BRK.B"],
+        "Amzn vs AMZN; U.S. TSLA.": ["TSLA", "AMZN"],
+        "NVIDIA's results, nvidiaX": ["NVDA"],
+        "AMD-backed startup raises funds": ["AMD"],            # 连写里的大写段单独认
+        "Pro-NVDA funds; TSLA-linked notes; non-AMD chips": ["NVDA", "AMD", "TSLA"],
+        "Amd-backed, nvda-linked, amd.com": [],                # 小写 / 首字母大写的段仍不算
+    }
+    for headline, want in cases.items():
+        assert m.extract(headline) == want, (headline, m.extract(headline))
+    assert SymbolMatcher.from_config({}).extract("NVDA $AMD Nvidia") == []
+
+
+def _topics_loop(topics, headline):
+    """原 scorer._match_topics 的嵌套循环，英文改为不分大小写。"""
+    matched = []
+    for cfg in topics.values():
+        hashtag = cfg.get("hashtag", "")
+        for tag in cfg.get("tags", []):
+            if isinstance(tag, str) and tag.lower() in headline.lower():
+                if hashtag and hashtag not in matched:
+                    matched.append(hashtag)
+                break
+    return matched
+
+
+def test_topics():
+    topics = {
+        "ai": {"tags": ["AI", "人工智能", "LLM"], "hashtag": "#AI"},
+        "chips": {"tags": ["semiconductor", "芯片", "GPU"], "hashtag": "#Chips"},
+        "notag": {"tags": ["earnings"]},
+        "gpu": {"tags": ["gpu", "accelerator"], "hashtag": "#AI"},  # 与 ai 共用 hashtag
+        "ev": {"tags": ["EV", "电动车", 42], "hashtag": "#EV"},
+    }
+    m = TopicMatcher.from_config({"topics": topics})
+    assert m.match("英伟达发布新款GPU芯片") == ["#Chips", "#AI"]  # 按主题顺序：chips 在 gpu 之前
+    assert m.match("Semiconductor stocks; llm demand") == ["#AI", "#Chips"]
+    assert m.match("电动车 sales; earnings beat") == ["#EV"]
+    assert m.match("nothing here") == [] and TopicMatcher.from_config({}).match("AI") == []
+
+    rng = random.Random(3)
+    words = _random_words(rng, 200)
+    for _ in range(10):
+        topics = {f"t{i}": {"tags": rng.sample(words, rng.randint(1, 5)), "hashtag": f"#h{rng.randrange(30)}"}
+                  for i in range(rng.randint(1, 60))}
+        m = TopicMatcher(topics)
+        for _ in range(200):
+            h = _random_headline(rng, words)
+            assert m.match(h) == _topics_loop(topics, h), h
+
+
+if __name__ == "__main__":
+    test_automaton_overlaps()
+    test_edge_cases_equal()
+    test_empty_and_odd_entries()
+    test_random_equivalence()
+    test_symbols()
+    test_topics()
+    print("OK ✅")
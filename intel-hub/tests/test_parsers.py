@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_parsers.py
+验证 app/parsers 注册表与采集器类型注册表：
+1) 导入 collector 不会连带导入 feedparser（懒加载）
+2) 注册名 / "模块:函数" 都能取到解析器；未知名字抛 KeyError
+3) run_parser：bytes 解析器、json 解析器（先解码）都能跑通
+4) 采集器类型按注册名或 "模块:类" 解析
+用法：python tests/test_parsers.py  或  pytest tests/test_parsers.py
+"""
+import asyncio
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.collector import _RssSource, _collector_class
+from app.parsers import get_parser, run_parser
+
+
+def test_lazy_import():
+    code = "import sys, app.collector; print('feedparser' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_lookup():
+    assert get_parser("rss_stream").cpu_heavy
+    assert get_parser("json_default").decode == "json"
+    custom = get_parser("app.parsers.rss_default:parse_rss")
+    assert custom.cpu_heavy and custom.target == "app.parsers.rss_default:parse_rss"
+    try:
+        get_parser("no_such_parser")
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("未知解析器应抛 KeyError")
+
+
+async def _run():
+    with open(os.path.join(ROOT_DIR, "tests", "fixtures", "feeds", "rss1_rdf.xml"), "rb") as f:
+        body = f.read()
+    items = await run_parser(get_parser("rss_stream"), body, "s", limit=5, stop_keys=None)
+    assert len(items) == 5 and items[0]["uid"]
+
+    payload = b'{"items": [{"title": "A", "url": "http://x/a", "timestamp": 1}, {"title": "B", "url": "http://x/b"}]}'
+    items = await run_parser(get_parser("json_default"), payload, "s", limit=1, stop_keys=None)
+    assert [e["headline"] for e in items] == ["A"]
+
+
+def test_run_parser():
+    asyncio.run(_run())
+
+
+def test_collector_types():
+    assert _collector_class("rss") is _RssSource
+    assert _collector_class("app.collector:_RssSource") is _RssSource
+    assert _collector_class("api_not_registered") is None
+
+
+if __name__ == "__main__":
+    test_lazy_import()
+    test_lookup()
+    test_run_parser()
+    test_collector_types()
+    print("OK ✅")
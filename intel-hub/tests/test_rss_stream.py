@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_rss_stream.py
+验证 app/parsers/rss_stream.py：
+1) 与 feedparser（parse_rss）在 tests/fixtures/feeds 全部样本上结果一致
+2) 遇到已见条目即停止；limit 生效
+3) 超过 max_bytes 只返回截断前的完整条目
+4) 不合法 XML 退回 feedparser
+用法：python tests/test_rss_stream.py  或  pytest tests/test_rss_stream.py
+"""
+import glob
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.parsers.rss_default import parse_rss
+from app.parsers.rss_stream import parse_rss_stream
+from app.utils import uid_key
+
+FEEDS = sorted(glob.glob(os.path.join(ROOT_DIR, "tests", "fixtures", "feeds", "*.xml")))
+
+
+def _read(name: str) -> bytes:
+    with open(os.path.join(ROOT_DIR, "tests", "fixtures", "feeds", name), "rb") as f:
+        return f.read()
+
+
+def test_matches_feedparser():
+    assert FEEDS
+    for path in FEEDS:
+        with open(path, "rb") as f:
+            body = f.read()
+        ref = parse_rss(body, "s")
+        got = parse_rss_stream(body, "s", limit=None)
+        assert len(got) == len(ref), path
+        for a, b in zip(ref, got):
+            assert (a["headline"], a["link"], a["ts_published"]) == (b["headline"], b["link"], b["ts_published"]), path
+
+
+def test_stop_at_seen_and_limit():
+    body = _read("rss2_news.xml")
+    full = parse_rss_stream(body, "s", limit=None)
+    stop = frozenset({uid_key(full[5]["uid"])})
+    assert [e["uid"] for e in parse_rss_stream(body, "s", limit=None, stop_keys=stop)] == [e["uid"] for e in full[:5]]
+    assert len(parse_rss_stream(body, "s", limit=3)) == 3
+
+
+def test_max_bytes():
+    body = _read("rss2_news.xml")
+    got = parse_rss_stream(body, "s", limit=None, max_bytes=len(body) // 2)
+    assert 0 < len(got) < len(parse_rss_stream(body, "s", limit=None))
+
+
+def test_malformed_falls_back():
+    got = parse_rss_stream(_read("malformed_entities.xml"), "s", limit=None)
+    assert len(got) == 10
+    assert "—" in got[0]["headline"]
+    assert parse_rss_stream(b"<html><body>not a feed</body></html>", "s") == []
+
+
+if __name__ == "__main__":
+    test_matches_feedparser()
+    test_stop_at_seen_and_limit()
+    test_max_bytes()
+    test_malformed_falls_back()
+    print("OK ✅")
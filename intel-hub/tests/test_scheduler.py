@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_scheduler.py
+验证 app/scheduler.py 的 SourceScheduler（任务的 poll 由测试手动放行，结果与时序无关）：
+1) 通道优先：同时到期时按 critical → high → normal → bulk 派发；同通道按到期先后
+2) per_host：同一 host 最多 per_host 个在途，其余挂在 host 等待堆里、不占全局名额；完成一个放回一个
+3) 预留名额：normal/bulk 最多用到 max_inflight - 预留，critical/high 仍能立即派发
+4) poll 返回间隔则按间隔重新排期，返回 None 下线，抛异常计入 errors 并按 60 秒重排
+用法：python tests/test_scheduler.py  或  pytest tests/test_scheduler.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.scheduler import LANES, Job, SourceScheduler, lane_of
+
+
+class _Jobs:
+    """每个任务的 poll 记下开始顺序，然后等测试 release(name) 才结束。"""
+
+    def __init__(self):
+        self.started = []
+        self._gates = {}
+        self._results = {}
+
+    def job(self, name, host="h", priority="normal", result=None):
+        gate = asyncio.Event()
+        self._gates[name] = gate
+        self._results[name] = result
+
+        async def poll():
+            self.started.append(name)
+            await gate.wait()
+            gate.clear()
+            outcome = self._results[name]
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return Job(name, host, lane_of(priority), poll)
+
+    def release(self, *names):
+        for name in names:
+            self._gates[name].set()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def _run(body):
+    async def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return await body()
+    return asyncio.run(run())
+
+
+async def _start(sched, jobs):
+    for job in jobs:
+        sched.add(job)
+    task = asyncio.create_task(sched.run())
+    await _settle()
+    return task
+
+
+async def _stop(task):
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+def test_lane_of():
+    assert [lane_of(p) for p in ("critical", " HIGH ", None, "", "bulk", "nope", 0, 7, -1)] == [0, 1, 2, 2, 3, 2, 0, 3, 0]
+    assert list(LANES) == ["critical", "high", "normal", "bulk"]
+
+
+def test_lane_priority():
+    async def body():
+        j = _Jobs()
+        sched = SourceScheduler(max_inflight=1, per_host=10, critical_reserve=0)
+        jobs = [j.job("bulk", "a", "bulk"), j.job("normal1", "b"), j.job("normal2", "c"),
+                j.job("high", "d", "high"), j.job("critical", "e", "critical")]
+        task = await _start(sched, jobs)
+        for name in ("critical", "high", "normal1", "normal2", "bulk"):
+            assert j.started[-1] == name and sched.stats()["inflight"] == 1
+            j.release(name)
+            await _settle()
+        await _stop(task)
+        return j.started, sched.stats()
+
+    started, st = _run(body)
+    assert started == ["critical", "high", "normal1", "normal2", "bulk"]
+    assert st["dispatched"] == 5 and st["jobs"] == 0               # 全部返回 None：下线
+
+
+def test_per_host_limit():
+    async def body():
+        j = _Jobs()
+        sched = SourceScheduler(max_inflight=10, per_host=2)
+        a = [j.job(f"a{i}", "a.example") for i in range(5)]
+        task = await _start(sched, a + [j.job("b0", "b.example")])
+        first = (sorted(j.started), sched.stats()["inflight"], sched.stats()["parked"])
+        j.release("a0")
+        await _settle()
+        second = (sorted(j.started), sched.stats()["inflight"], sched.stats()["parked"])
+        await _stop(task)
+        return first, second
+
+    first, second = _run(body)
+    assert first == (["a0", "a1", "b0"], 3, 3)                     # 挂起的 3 个不占全局名额
+    assert second == (["a0", "a1", "a2", "b0"], 3, 2)              # 完成一个，同 host 放回一个
+
+
+def test_reserved_slots():
+    async def body():
+        j = _Jobs()
+        sched = SourceScheduler(max_inflight=4, per_host=10, critical_reserve=0.25)
+        task = await _start(sched, [j.job(f"n{i}", f"h{i}") for i in range(6)]
+                            + [j.job(f"b{i}", f"x{i}", "bulk") for i in range(2)])
+        low = (len(j.started), sched.stats()["queued"])
+        sched.add(j.job("c0", "c", "critical"))
+        await _settle()
+        crit = (j.started[-1], sched.stats()["inflight"])
+        sched.add(j.job("h0", "d", "high"))
+        await _settle()
+        full = (j.started[-1], sched.stats()["queued"][1])         # 全满：high 也要等
+        j.release("n0")
+        await _settle()
+        after = j.started[-1]                                      # 空出的名额先给 high
+        await _stop(task)
+        return low, crit, full, after
+
+    low, crit, full, after = _run(body)
+    assert low == (3, [0, 0, 3, 2])                                # 4 个名额预留 1 个，低优先级只能用 3
+    assert crit == ("c0", 4)
+    assert full == ("c0", 1) and after == "h0"
+
+
+def test_reschedule_and_errors():
+    async def body():
+        j = _Jobs()
+        sched = SourceScheduler(max_inflight=4)
+        again = j.job("again", "a", result=0.0)
+        broken = j.job("broken", "b", result=RuntimeError("boom"))
+        task = await _start(sched, [again, broken])
+        j.release("again", "broken")
+        await _settle()
+        st = sched.stats()
+        due_in = broken.due_ms - again.due_ms
+        await _stop(task)
+        return j.started, st, due_in
+
+    started, st, due_in = _run(body)
+    assert started == ["again", "broken", "again"]                 # 0 秒后再次到期，立即重跑
+    assert st["errors"] == 1 and st["jobs"] == 2 and 59_000 <= due_in <= 60_000
+
+
+if __name__ == "__main__":
+    test_lane_of()
+    test_lane_priority()
+    test_per_host_limit()
+    test_reserved_slots()
+    test_reschedule_and_errors()
+    print("OK ✅")
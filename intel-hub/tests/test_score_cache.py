@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_score_cache.py
+验证 app/scorer.py 的标题打分缓存（ScoreCache）：
+1) 转载副本（只差空白）共用一条缓存，结果与不走缓存的 _create_event_from_raw 相同
+2) 有界 LRU：满了淘汰最久没用的，命中会续命；maxsize=0 不缓存
+3) 换了配置快照就整体失效，不会拿旧版本的结果打分
+4) run_scorer 里同一标题的多个来源只打一次分，stats 的命中率随之变化
+用法：python tests/test_score_cache.py  或  pytest tests/test_score_cache.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import yaml
+
+from app import scorer
+from app.scorer import ScoreCache, _create_event_from_raw, build_snapshot, run_scorer
+from app.storage import get_recent_events, init_db
+from app.utils import now_ms
+
+
+def _snap(tier1, version=1):
+    return build_snapshot({
+        "config.yml": b"important_threshold: 70\n",
+        "keywords.yml": yaml.safe_dump({"tiers": {"tier1": tier1, "tier2": ["earnings"]},
+                                        "keyword_blacklist": ["sponsored"]}).encode(),
+        "topics.yml": b"topics:\n  ma: {tags: [merger], hashtag: '#MA'}\n",
+        "universe.yml": b"watchlist: [NVDA, AMD]\n",
+    }, version=version)
+
+
+SNAP = _snap(["merger"])
+
+
+def test_copies_share_entry_and_match_uncached():
+    cache = ScoreCache(maxsize=10)
+    a = cache.get("NVDA merger talks", SNAP)
+    b = cache.get("  NVDA merger \n talks ", SNAP)
+    assert b is a and cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    raw = {"headline": "NVDA merger talks", "link": "https://x/1", "source_id": "reuters"}
+    plain = _create_event_from_raw(raw, snap=SNAP)
+    cached = _create_event_from_raw(raw, snap=SNAP, scored=a)
+    for field in ("symbols", "categories", "tags", "score", "thread_key"):
+        assert getattr(plain, field) == getattr(cached, field), field
+    assert (plain.symbols, plain.categories, plain.tags, plain.thread_key) == ("NVDA", "merger", "#MA", "NVDA|merger")
+    assert cache.get("sponsored merger", SNAP).hits.blacklist == ["sponsored"]
+
+
+def test_lru_eviction():
+    cache = ScoreCache(maxsize=2)
+    cache.get("a merger", SNAP)
+    cache.get("b merger", SNAP)
+    cache.get("a merger", SNAP)   # a 续命
+    cache.get("c merger", SNAP)   # 淘汰 b
+    cache.get("a merger", SNAP)
+    cache.get("b merger", SNAP)
+    st = cache.stats()
+    assert (st["entries"], st["hits"], st["misses"]) == (2, 2, 4), st
+
+    off = ScoreCache(maxsize=0)
+    off.get("a merger", SNAP)
+    off.get("a merger", SNAP)
+    assert off.stats()["entries"] == 0 and off.stats()["hits"] == 0
+
+    cache.resize(1)
+    assert cache.stats()["entries"] == 1
+
+
+def test_invalidated_on_new_snapshot():
+    cache = ScoreCache()
+    assert cache.get("AMD acquisition", SNAP).score == cache.get("AMD acquisition", SNAP).score
+    v2 = _snap(["acquisition"], version=2)
+    assert cache.get("AMD acquisition", v2).categories == "acquisition"
+    st = cache.stats()
+    assert (st["version"], st["entries"], st["invalidations"], st["hits"]) == (2, 1, 1, 1), st
+    assert cache.get("AMD acquisition", SNAP).categories == "general"  # 退回旧版同样不串
+
+
+def test_run_scorer_scores_copies_once():
+    now = now_ms()
+    raws = [{"headline": f"AMD merger closes{' ' * (i % 2)}", "link": f"https://{src}/1", "source_id": src,
+             "ts_published": now} for i, src in enumerate(["reuters", "yahoo", "nasdaq", "mirror"])]
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            db = await init_db(os.path.join(tmp, "cache.db"))
+            q_in: asyncio.Queue = asyncio.Queue()
+            q_out: asyncio.Queue = asyncio.Queue()
+            for raw in raws:
+                q_in.put_nowait(raw)
+            old_snap, old_cache = scorer._scorer_config.snapshot, scorer._score_cache
+            scorer._scorer_config.snapshot, scorer._score_cache = SNAP, ScoreCache()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    task = asyncio.create_task(run_scorer(q_in, q_out, db, batch_size=2, cache_size=100))
+                    while not q_in.empty():
+                        await asyncio.sleep(0.01)
+                    await asyncio.sleep(0.05)
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                stats = scorer.score_cache_stats()
+            finally:
+                scorer._scorer_config.snapshot, scorer._score_cache = old_snap, old_cache
+            rows = await get_recent_events(db)
+            await db.close()
+            return stats, rows
+
+    stats, rows = asyncio.run(run())
+    assert (stats["misses"], stats["hits"], stats["hit_rate"]) == (1, 3, 0.75), stats
+    assert len(rows) == 4 and {r["score"] for r in rows} == {80.0}, rows
+
+
+if __name__ == "__main__":
+    test_copies_share_entry_and_match_uncached()
+    test_lru_eviction()
+    test_invalidated_on_new_snapshot()
+    test_run_scorer_scores_copies_once()
+    print("OK ✅")
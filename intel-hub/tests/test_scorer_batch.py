@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_scorer_batch.py
+验证批量打分（run_scorer batch_size > 1）与批量存储：
+1) insert_events 一个事务写一批，幂等 upsert，已推送不回退；坏行让整批不写
+   Event 的快路径与 dict 兼容路径给出相同的参数元组；生成器输入边迭代边写入
+2) run_scorer 批量模式：同一批里同线程只推第一条（critical 可升级）、同 id 的事件只写一行；
+   库里已推送过的线程，逐条与批量模式都会节流
+用法：python tests/test_scorer_batch.py  或  pytest tests/test_scorer_batch.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import yaml
+
+from app import scorer
+from app.models import Event
+from app.scorer import build_snapshot, run_scorer
+from app.storage import _event_row, _event_row_compat, get_recent_events, init_db, insert_events, mark_pushed
+from app.utils import now_ms
+
+SNAPSHOT = build_snapshot({
+    "config.yml": b"important_threshold: 70\ncritical_threshold: 120\ndedupe_minutes: 15\n",
+    "keywords.yml": yaml.safe_dump({"tiers": {"tier1": ["merger", "bankruptcy"], "tier2": ["earnings"]}}).encode(),
+    "topics.yml": b"{}",
+    "universe.yml": b"watchlist: [NVDA, AMD]\n",
+}, version=1)
+
+
+def _event(i: int, thread_key: str = "", pushed: int = 0) -> Event:
+    now = now_ms()
+    return Event(id=f"e{i}", ts_detected_utc=now, ts_published_utc=now, headline=f"h{i}", source="s",
+                 link=f"https://x/{i}", market="us", symbols="", categories="general", tags="", score=10.0,
+                 pushed=pushed, expires_at_utc=now + 3600_000, thread_key=thread_key or f"t{i}")
+
+
+async def _with_db(fn):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = await init_db(os.path.join(tmp, "batch.db"))
+        try:
+            return await fn(db)
+        finally:
+            await db.close()
+
+
+def test_insert_events():
+    async def run(db):
+        assert await insert_events(db, [_event(i) for i in range(5)]) == 5
+        await mark_pushed(db, "e1")
+        assert await insert_events(db, [_event(1), _event(2, pushed=1)]) == 2  # upsert，已推送不回退
+        rows = {r["id"]: r for r in await get_recent_events(db)}
+        assert len(rows) == 5 and rows["e1"]["pushed"] == 1 and rows["e2"]["pushed"] == 1
+
+        try:
+            await insert_events(db, [_event(10), {"headline": "no id"}])
+            raise AssertionError("应当抛出")
+        except ValueError:
+            pass
+        assert "e10" not in {r["id"] for r in await get_recent_events(db)}
+
+    asyncio.run(_with_db(run))
+
+
+async def _run_scorer(db, raws, batch_size):
+    q_in: asyncio.Queue = asyncio.Queue()
+    q_out: asyncio.Queue = asyncio.Queue()
+    for raw in raws:
+        q_in.put_nowait(raw)
+    old = scorer._scorer_config.snapshot
+    scorer._scorer_config.snapshot = SNAPSHOT
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            task = asyncio.create_task(run_scorer(q_in, q_out, db, batch_size=batch_size))
+            while not q_in.empty():
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    finally:
+        scorer._scorer_config.snapshot = old
+    return [q_out.get_nowait().headline for _ in range(q_out.qsize())]
+
+
+def test_event_row_fast_path():
+    ev = _event(1)
+    assert _event_row(ev) == _event_row_compat(ev) == _event_row_compat(dict(ev.__dict__))
+    assert _event_row(ev)[-1] == "e1"                       # cluster_id 为空时补成 id
+    ev.cluster_id = "e0"
+    assert _event_row(ev) == _event_row_compat(ev) and _event_row(ev)[-1] == "e0"
+    ev.ts_detected_utc = 0                                  # 不合规的行走兼容路径
+    assert _event_row(ev)[1] > 0
+
+    async def run(db):
+        assert await insert_events(db, (_event(i) for i in range(300))) == 300
+        assert await insert_events(db, iter(())) == 0
+        return len(await get_recent_events(db, limit=1000))
+
+    assert asyncio.run(_with_db(run)) == 300
+
+
+def test_batch_dedupe():
+    now = now_ms()
+    raws = [
+        {"headline": "NVDA merger talks", "link": "https://x/1", "source_id": "s", "ts_published": now},
+        {"headline": "NVDA merger confirmed", "link": "https://x/2", "source_id": "s", "ts_published": now},
+        {"headline": "AMD merger rumor", "link": "https://x/3", "source_id": "s", "ts_published": now},
+        {"headline": "AMD merger and bankruptcy", "link": "https://x/4", "source_id": "s", "ts_published": now},  # critical 升级
+        {"headline": "AMD earnings", "link": "https://x/5", "source_id": "s", "ts_published": now},  # 不过阈值
+        {"headline": "NVDA merger confirmed again", "link": "https://x/2", "source_id": "s", "ts_published": now},  # 同 id
+        {"headline": "old news merger", "link": "https://x/6", "source_id": "s", "ts_published": 0},  # 过期
+    ]
+
+    async def run(batch_size):
+        async def inner(db):
+            pushed = await _run_scorer(db, raws, batch_size)
+            return pushed, len(await get_recent_events(db))
+        return await _with_db(inner)
+
+    batched = asyncio.run(run(64))
+    # 逐条模式下通知端还没来得及 mark_pushed，同线程会重复推；批量模式在批内就节流掉
+    assert batched == (["NVDA merger talks", "AMD merger rumor", "AMD merger and bankruptcy"], 5), batched
+
+    async def with_history(db):
+        # 库里已经推送过 NVDA|merger：两种模式都应节流
+        ev = _event(99, thread_key="NVDA|merger", pushed=1)
+        await insert_events(db, [ev])
+        one = await _run_scorer(db, raws[:1], 1)
+        many = await _run_scorer(db, raws[:1], 64)
+        return one, many
+
+    assert asyncio.run(_with_db(with_history)) == ([], [])
+
+
+if __name__ == "__main__":
+    test_insert_events()
+    test_event_row_fast_path()
+    test_batch_dedupe()
+    print("OK ✅")
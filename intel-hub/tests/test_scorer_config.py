@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_scorer_config.py
+验证 app/scorer.py 的配置热加载（ScorerConfig / ScorerSnapshot），用临时目录里的四个 YAML：
+1) 文件没变不重建；只 touch（内容相同）也不重建
+2) 内容变了生成新版本，旧快照保持不变（打分中途拿到的那一版不会被改）
+3) 配置写坏时沿用上一版，且同样的坏文件不反复重试；修好后恢复
+4) maybe_reload 在线程里构建，完成后才整体替换 snapshot
+用法：python tests/test_scorer_config.py  或  pytest tests/test_scorer_config.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.scorer import ScorerConfig, _create_event_from_raw
+
+FILES = {
+    "config.yml": "retention_hours: 48\nimportant_threshold: 70\n",
+    "keywords.yml": "tiers:\n  tier1: [merger]\n  tier2: [earnings]\nnegatives: [rumor]\n",
+    "topics.yml": "topics:\n  ai: {tags: [AI], hashtag: '#AI'}\n",
+    "universe.yml": "watchlist: [NVDA]\n",
+}
+
+
+def _write(root: Path, name: str, text: str, bump: int = 0) -> None:
+    path = root / name
+    path.write_text(text, encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump))  # 保证 mtime 变化（文件系统时间粒度可能很粗）
+
+
+def _make(root: Path) -> ScorerConfig:
+    for name, text in FILES.items():
+        _write(root, name, text)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ScorerConfig(root, reload_interval=0)
+
+
+def _reload(cfg: ScorerConfig) -> bool:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return cfg.reload_if_needed()
+
+
+def test_change_detection_and_immutability():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        cfg = _make(root)
+        v1 = cfg.snapshot
+        assert v1.version == 1 and v1.keyword_matcher.match("NVDA merger").tier1 == ["merger"]
+
+        assert not _reload(cfg) and cfg.snapshot is v1                 # 没变
+        _write(root, "keywords.yml", FILES["keywords.yml"], bump=10**9)
+        assert not _reload(cfg) and cfg.snapshot is v1                 # 只 touch
+
+        _write(root, "keywords.yml", "tiers:\n  tier1: [acquisition]\n", bump=2 * 10**9)
+        assert _reload(cfg)
+        v2 = cfg.snapshot
+        assert v2.version == 2 and v2.keyword_matcher.match("acquisition").tier1 == ["acquisition"]
+        # 旧快照原样保留：拿着 v1 的打分结果不受影响
+        assert v1.keyword_matcher.match("merger").tier1 == ["merger"]
+        assert _create_event_from_raw({"headline": "NVDA merger", "link": "x"}, snap=v1).categories == "merger"
+        assert cfg.keywords is v2.keywords
+
+
+def test_bad_config_keeps_last_good():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        cfg = _make(root)
+        good = cfg.snapshot
+
+        _write(root, "topics.yml", "topics: [unclosed\n", bump=10**9)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            assert not cfg.reload_if_needed()
+            assert not cfg.reload_if_needed()  # 同样的坏文件不再重试
+        assert cfg.snapshot is good
+        assert out.getvalue().count("配置加载失败") == 1
+
+        _write(root, "universe.yml", "- not a mapping\n", bump=2 * 10**9)
+        assert not _reload(cfg) and cfg.snapshot is good
+
+        _write(root, "topics.yml", FILES["topics.yml"], bump=3 * 10**9)
+        _write(root, "universe.yml", "watchlist: [AMD]\n", bump=3 * 10**9)
+        assert _reload(cfg) and cfg.snapshot.version == 2
+        assert cfg.snapshot.symbol_matcher.extract("AMD NVDA") == ["AMD"]
+
+
+def test_async_reload_swaps_after_build():
+    async def run(root: Path):
+        cfg = _make(root)
+        v1 = cfg.snapshot
+        _write(root, "universe.yml", "watchlist: [AMD]\n", bump=10**9)
+        with contextlib.redirect_stdout(io.StringIO()):
+            cfg.maybe_reload()
+            assert cfg.snapshot is v1  # 构建在线程里，调用方立即返回
+            await cfg._task
+        assert cfg.snapshot.version == 2 and cfg.snapshot.symbol_matcher.extract("AMD") == ["AMD"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(Path(tmp)))
+
+
+if __name__ == "__main__":
+    test_change_detection_and_immutability()
+    test_bad_config_keeps_last_good()
+    test_async_reload_swaps_after_build()
+    print("OK ✅")
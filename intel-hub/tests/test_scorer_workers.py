@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_scorer_workers.py
+验证 run_scorer 的并行模式（workers > 1 / processes > 0）：
+1) 进程池 + 多协程的推送顺序、入库结果与单协程完全一致
+2) 各批打分完成的先后被打乱时，入库与推送仍按取批顺序（重排缓冲），同线程的升级推送判断不变
+3) _ScorePool 按配置版本换池，比池更旧的批就地打分
+用法：python tests/test_scorer_workers.py  或  pytest tests/test_scorer_workers.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import yaml
+
+from app import scorer
+from app.scorer import ScoreCache, _ScorePool, _score_chunk, build_snapshot, run_scorer
+from app.storage import get_recent_events, init_db
+from app.utils import now_ms
+
+
+def _snap(version=1, tier1=("merger", "bankruptcy")):
+    return build_snapshot({
+        "config.yml": b"important_threshold: 70\ncritical_threshold: 100\ndedupe_minutes: 15\n",
+        "keywords.yml": yaml.safe_dump({"tiers": {"tier1": list(tier1), "tier2": ["earnings", "guidance"]},
+                                        "negatives": ["denies"]}).encode(),
+        "topics.yml": b"topics:\n  ma: {tags: [merger], hashtag: '#MA'}\n",
+        "universe.yml": b"watchlist: [NVDA, AMD, TSLA]\n",
+    }, version=version)
+
+
+SNAP = _snap()
+
+
+def _raws(n=120, seed=3):
+    rng = random.Random(seed)
+    now = now_ms()
+    words = ["merger", "bankruptcy", "earnings", "guidance", "denies", "talks", "update", "deal"]
+    out = []
+    for i in range(n):
+        sym = rng.choice(["NVDA", "AMD", "TSLA", "Some company"])
+        headline = f"{sym} {' '.join(rng.sample(words, rng.randint(1, 3)))} #{rng.randrange(40)}"
+        out.append({"headline": headline, "link": f"https://x/{i}", "source_id": rng.choice("abc"),
+                    "ts_published": now})
+    return out
+
+
+async def _run(raws, **kwargs):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = await init_db(os.path.join(tmp, "w.db"))
+        q_in: asyncio.Queue = asyncio.Queue()
+        q_out: asyncio.Queue = asyncio.Queue()
+        for raw in raws:
+            q_in.put_nowait(raw)
+        old = scorer._scorer_config.snapshot, scorer._score_cache
+        scorer._scorer_config.snapshot, scorer._score_cache = SNAP, ScoreCache()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                task = asyncio.create_task(run_scorer(q_in, q_out, db, batch_size=8, **kwargs))
+                while not q_in.empty():
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0.3)
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        finally:
+            scorer._scorer_config.snapshot, scorer._score_cache = old
+        rows = await get_recent_events(db, limit=10_000)
+        await db.close()
+    pushed = [q_out.get_nowait().link for _ in range(q_out.qsize())]
+    stored = sorted((r["id"], r["score"], r["categories"], r["tags"], r["thread_key"], r["cluster_id"]) for r in rows)
+    return pushed, stored
+
+
+def test_parallel_matches_sequential():
+    raws = _raws()
+    seq = asyncio.run(_run(raws))
+    assert len(seq[0]) > 10 and len(seq[1]) > 50
+    assert asyncio.run(_run(raws, workers=4, processes=2)) == seq
+    assert asyncio.run(_run(raws, workers=3)) == seq
+
+
+def test_reorder_buffer_keeps_batch_order():
+    raws = _raws(80, seed=5)
+    expected = asyncio.run(_run(raws))
+    real = scorer._prescore
+    rng = random.Random(1)
+
+    async def jittery(raw_events, snap, pool):
+        await asyncio.sleep(rng.random() * 0.02)  # 后取的批可能先打完分
+        return await real(raw_events, snap, pool)
+
+    scorer._prescore = jittery
+    try:
+        got = asyncio.run(_run(raws, workers=6))
+    finally:
+        scorer._prescore = real
+    assert got == expected
+
+
+def test_score_pool_follows_snapshot_version():
+    pool = _ScorePool(processes=1)
+    try:
+        v1, v2 = SNAP, _snap(version=2, tier1=("guidance",))
+        ex1 = pool.executor(v1)
+        assert ex1 is not None and pool.executor(v1) is ex1
+        assert ex1.submit(_score_chunk, ["NVDA guidance"]).result()[0].score == 55.0
+        ex2 = pool.executor(v2)
+        assert ex2 is not ex1 and ex2.submit(_score_chunk, ["NVDA guidance"]).result()[0].score == 105.0
+        assert pool.executor(v1) is None  # 旧版本的批就地打分
+    finally:
+        pool.shutdown()
+    assert _ScorePool(processes=0).executor(SNAP) is None
+
+
+if __name__ == "__main__":
+    test_parallel_matches_sequential()
+    test_reorder_buffer_keeps_batch_order()
+    test_score_pool_follows_snapshot_version()
+    print("OK ✅")
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_search.py
+验证标题/来源全文索引（events_fts，FTS5 trigram）与 search_events：
+1) 中英文子串、不区分大小写，结果与原来的 LIKE '%q%' 一致（索引命中与沿索引扫两种执行方式都是）；
+   不足 3 个字符退回 LIKE；代码/标签走倒排表；命中数估计按 SEARCH_BROAD_HITS 封顶
+2) upsert 改标题、过期清理、写者合并同 id 的多次 upsert 后，索引与 events 一致（integrity-check）
+3) 用户输入里的引号、AND/OR、* 不会被当成 FTS5 语法
+4) 老库第一次 init_db 时重建索引
+用法：python tests/test_search.py  或  pytest tests/test_search.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app import storage
+from app.models import Event
+from app.storage import (delete_expired, init_db, insert_event, insert_events, mark_pushed, search_events,
+                         search_events_sql, search_probe_sql)
+from app.utils import now_ms
+from app.writer import StorageWriter
+
+
+def _event(i, headline, source="s", symbols="", tags="", ts=None, expires=None, score=50.0):
+    ts = ts or now_ms()
+    return Event(id=f"e{i}", ts_detected_utc=ts, ts_published_utc=ts, headline=headline, source=source,
+                 link=f"https://x/{i}", market="us", symbols=symbols, categories="", tags=tags, score=score,
+                 pushed=0, expires_at_utc=expires or ts + 3600_000, thread_key=f"t{i}")
+
+
+def _with_db(fn):
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "s.db")
+            db = await init_db(path)
+            try:
+                return await fn(db, path)
+            finally:
+                await db.close()
+    return asyncio.run(run())
+
+
+async def _ids(db, q, **kw):
+    return [r["id"] for r in await search_events(db, q, 0, 100, **kw)]
+
+
+async def _integrity(db):
+    # 外部内容表：rank=1 时对照 events 逐行核对
+    await db.execute("INSERT INTO events_fts(events_fts, rank) VALUES('integrity-check', 1);")
+
+
+def test_search_matches():
+    async def body(db, path):
+        now = now_ms()
+        await insert_events(db, [
+            _event(1, "NVIDIA beats earnings estimates", "reuters", "NVDA", "#AI", ts=now - 3000),
+            _event(2, "英伟达财报超预期，股价盘后大涨", "cls_telegraph", "NVDA", ts=now - 2000, score=90.0),
+            _event(3, "Quarterly report filed", "sec", "AMDX", ts=now - 1000),
+            _event(4, 'He said "AND" OR maybe NEAR* (not)', "blog", ts=now),
+        ])
+        await mark_pushed(db, "e1")
+        return {
+            "nvidia": await _ids(db, "nvidia"),
+            "earn": await _ids(db, "  EARN "),
+            "cjk": await _ids(db, "财报超预期"),
+            "cjk2": await _ids(db, "大涨"),                 # 2 个字符：退回 LIKE
+            "source": await _ids(db, "telegraph"),
+            "symbol": await _ids(db, "nvda"),             # 代码精确匹配（转大写）
+            "amd": await _ids(db, "AMD"),                 # 代码不误中 AMDX
+            "tag": await _ids(db, "#AI"),
+            "syntax": await _ids(db, '"AND" OR'),
+            "star": await _ids(db, "NEAR*"),
+            "unpushed": await _ids(db, "nvidia", unpushed_only=True),
+            "score": await _ids(db, "", min_score=80, order_by_score=True),
+            "empty": await _ids(db, ""),
+        }
+
+    r = _with_db(body)
+    assert r["nvidia"] == ["e1"] and r["earn"] == ["e1"]
+    assert r["cjk"] == ["e2"] and r["cjk2"] == ["e2"] and r["source"] == ["e2"]
+    assert r["symbol"] == ["e2", "e1"] and r["amd"] == [] and r["tag"] == ["e1"]
+    assert r["syntax"] == ["e4"] and r["star"] == ["e4"]
+    assert r["unpushed"] == [] and r["score"] == ["e2"] and r["empty"] == ["e4", "e3", "e2", "e1"]
+
+
+def test_same_results_as_like():
+    rng = random.Random(7)
+    words = ["nvidia", "earnings", "merger", "guidance", "英伟达", "财报", "并购", "Beats", "misses", "SEC"]
+    queries = ["nvidia", "merg", "ger gui", "英伟达", "并购 ", "beats", "财报并", "s mi", "xyz"]
+
+    async def body(db, path):
+        await insert_events(db, [_event(i, " ".join(rng.sample(words, 3)), source=rng.choice(["a", "b"]))
+                                 for i in range(400)])
+        out = []
+        for q in queries:
+            like = f"%{q.strip()}%"
+            async with db.execute("SELECT id FROM events WHERE headline LIKE ? OR source LIKE ?", (like, like)) as cur:
+                expected = sorted([row[0] async for row in cur])
+            for broad in (False, True):
+                async with db.execute(*search_events_sql(q, 0, 1000, broad=broad)) as cur:
+                    out.append((q, broad, sorted([row[0] async for row in cur]), expected))
+        old = storage.SEARCH_BROAD_HITS
+        storage.SEARCH_BROAD_HITS = 50
+        try:
+            async with db.execute(*search_probe_sql("nvidia", 0)) as cur:
+                probe = (await cur.fetchone())[0]
+            async with db.execute(*search_probe_sql("xyz", 0)) as cur:
+                probe += (await cur.fetchone())[0]
+            common = sorted(r["id"] for r in await search_events(db, "nvidia", 0, 1000))
+        finally:
+            storage.SEARCH_BROAD_HITS = old
+        return out, probe, common
+
+    out, probe, common = _with_db(body)
+    for q, broad, got, expected in out:
+        assert got == expected, (q, broad)
+    assert probe == 50 and common == out[0][3]
+
+
+def test_index_follows_writes():
+    async def body(db, path):
+        now = now_ms()
+        await insert_events(db, [_event(1, "old headline apple"), _event(2, "expiring pear", expires=now - 1)])
+        await insert_event(db, _event(1, "new headline banana"))
+        await delete_expired(db, now)
+        w = StorageWriter(db, group_ms=20)
+        with contextlib.redirect_stdout(io.StringIO()):
+            w.start()
+            await w.upsert([_event(3, "first cherry")])
+            await (await w.upsert([_event(3, "second durian"), _event(4, "plum")]))
+            await w.close()
+        await _integrity(db)
+        return [await _ids(db, q) for q in ("apple", "banana", "pear", "cherry", "durian", "plum")]
+
+    assert _with_db(body) == [[], ["e1"], [], [], ["e3"], ["e4"]]
+
+
+def test_rebuild_for_old_database():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "old.db")
+            db = await init_db(path)
+            await insert_events(db, [_event(1, "tesla deliveries"), _event(2, "特斯拉交付")])
+            await db.executescript("DROP TRIGGER trg_events_fts_delete; DROP TABLE events_fts;")
+            await db.close()
+            db = await init_db(path)
+            try:
+                await _integrity(db)
+                return await _ids(db, "deliver"), await _ids(db, "特斯拉")
+            finally:
+                await db.close()
+
+    assert asyncio.run(run()) == (["e1"], ["e2"])
+
+
+if __name__ == "__main__":
+    assert storage.FTS_ENABLED, "当前 SQLite 不支持 FTS5 trigram"
+    test_search_matches()
+    test_same_results_as_like()
+    test_index_follows_writes()
+    test_rebuild_for_old_database()
+    print("OK ✅")
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_seen.py
+验证 app/seen.py：
+1) 有界：每源超过 max_per_source 时淘汰最旧
+2) TTL：过期条目视为未见
+3) flush -> 新索引 load 后仍能识别已见 uid（模拟重启）
+4) flush 写库失败：待写记录保留（含保存期间新标记的），下次 flush 补写
+用法：python tests/test_seen.py  或  pytest tests/test_seen.py
+"""
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app import seen as seen_mod
+from app.seen import SeenIndex
+from app.storage import init_db
+
+
+def _uid(s: str) -> str:
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+
+
+def test_bounded_lru():
+    seen = SeenIndex(max_per_source=3, ttl_hours=1)
+    for i in range(5):
+        assert not seen.check_and_add("src", _uid(f"a{i}"), now_ms=1_000 + i)
+    assert seen.stats()["entries"] == 3
+    assert not seen.check_and_add("src", _uid("a0"), now_ms=2_000)   # 已被挤掉
+    assert seen.check_and_add("src", _uid("a4"), now_ms=2_000)
+    assert not seen.check_and_add("other", _uid("a4"), now_ms=2_000)  # 按源隔离
+
+
+def test_feed_window_stays_seen():
+    # feed 顶部 20 条一直挂着、每轮滑入 5 条新的：挂着的条目永远不应被当成新条目
+    seen = SeenIndex(max_per_source=30, ttl_hours=48)
+    misses = 0
+    for p in range(50):
+        for i in range(p * 5, p * 5 + 20):
+            misses += not seen.check_and_add("feed", _uid(f"i{i}"), now_ms=1_000 + p)
+    assert misses == 20 + 49 * 5
+    assert seen.stats()["entries"] == 30
+
+
+def test_ttl():
+    seen = SeenIndex(max_per_source=10, ttl_hours=1)
+    t0 = 10_000_000
+    assert not seen.check_and_add("src", _uid("x"), now_ms=t0)
+    assert seen.check_and_add("src", _uid("x"), now_ms=t0 + 1000)
+    assert not seen.check_and_add("src", _uid("x"), now_ms=t0 + 3600_000 + 5000)
+    assert seen.evict_expired(now_ms=t0 + 3 * 3600_000) == 1
+
+
+async def _restart_roundtrip():
+    with tempfile.TemporaryDirectory() as d:
+        db = await init_db(os.path.join(d, "seen.db"))
+        try:
+            a = SeenIndex(max_per_source=50, ttl_hours=48)
+            uids = [_uid(f"http://x/{i}") for i in range(20)]
+            for u in uids:
+                a.check_and_add("feed", u)
+            assert await a.flush(db) == 20
+
+            b = SeenIndex(max_per_source=50, ttl_hours=48)
+            assert await b.load(db) == 20
+            assert all(b.check_and_add("feed", u) for u in uids)
+            assert not b.check_and_add("feed", _uid("http://x/new"))
+        finally:
+            await db.close()
+
+
+def test_restart_roundtrip():
+    asyncio.run(_restart_roundtrip())
+
+
+async def _flush_failure_keeps_dirty():
+    with tempfile.TemporaryDirectory() as d:
+        db = await init_db(os.path.join(d, "seen.db"))
+        orig = seen_mod.save_seen
+        a = SeenIndex(max_per_source=50, ttl_hours=48)
+
+        async def failing(db, rows):
+            a.check_and_add("feed", _uid("http://x/during"))      # 保存期间又来一条
+            raise RuntimeError("disk I/O error")
+
+        try:
+            for i in range(5):
+                a.check_and_add("feed", _uid(f"http://x/{i}"))
+            seen_mod.save_seen = failing
+            try:
+                await a.flush(db)
+                raise AssertionError("flush 应当把异常抛出去")
+            except RuntimeError:
+                pass
+            finally:
+                seen_mod.save_seen = orig
+            assert a.stats()["dirty"] == 6
+            assert await a.flush(db) == 6 and a.stats()["dirty"] == 0
+
+            b = SeenIndex(max_per_source=50, ttl_hours=48)
+            assert await b.load(db) == 6
+        finally:
+            await db.close()
+
+
+def test_flush_failure_keeps_dirty():
+    asyncio.run(_flush_failure_keeps_dirty())
+
+
+if __name__ == "__main__":
+    test_bounded_lru()
+    test_feed_window_stays_seen()
+    test_ttl()
+    test_restart_roundtrip()
+    test_flush_failure_keeps_dirty()
+    print("OK ✅")
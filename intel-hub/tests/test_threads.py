@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_threads.py
+验证 app/threads.py 的已推送线程索引（ThreadIndex）：
+1) 窗口内查得到最近一次推送，分数覆盖；按时间桶过期后内存释放，之后又推过的线程不误删
+2) 保留期随用到的最大窗口变长；load() 重建索引，只留保留期内的
+3) load_pushed_threads 每个线程取最近一条已推送的；run_scorer 启动时据此预热
+4) notifier 推送成功记下的线程，正在运行的 scorer 立即据此节流；notifier 自身去重读同一份
+用法：python tests/test_threads.py  或  pytest tests/test_threads.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import yaml
+
+from app import scorer
+from app.models import Event
+from app.notifier import Notifier
+from app.scorer import build_snapshot, run_scorer
+from app.storage import init_db, insert_events, load_pushed_threads
+from app.threads import ThreadIndex, shared_thread_index
+from app.utils import now_ms
+
+MIN = 60_000
+
+SNAPSHOT = build_snapshot({
+    "config.yml": b"important_threshold: 70\ncritical_threshold: 120\ndedupe_minutes: 15\n",
+    "keywords.yml": yaml.safe_dump({"tiers": {"tier1": ["merger"]}}).encode(),
+    "topics.yml": b"{}",
+    "universe.yml": b"watchlist: [NVDA, AMD]\n",
+}, version=1)
+
+
+def _event(i, thread_key, score=80.0, pushed=0, ts=None):
+    ts = ts if ts is not None else now_ms()
+    return Event(id=f"e{i}", ts_detected_utc=ts, ts_published_utc=ts, headline=f"h{i}", source="s",
+                 link=f"https://x/{i}", market="us", symbols="", categories="", tags="", score=score,
+                 pushed=pushed, expires_at_utc=ts + 3600_000, thread_key=thread_key)
+
+
+def test_window_and_bucket_expiry():
+    idx = ThreadIndex(retention_minutes=30)
+    idx.mark("NVDA|merger", 80, ts_ms=0)
+    idx.mark("AMD|merger", 75, ts_ms=5 * MIN)
+    assert idx.last("NVDA|merger", 15, now_ms=10 * MIN) == (80.0, 0)
+    assert not idx.is_recent("NVDA|merger", 15, now_ms=16 * MIN)   # 超出调用方窗口
+    assert not idx.is_recent("", 15, now_ms=0)
+    idx.mark("NVDA|merger", 90, ts_ms=20 * MIN)                    # 覆盖：新分数、新时间
+    assert idx.last("NVDA|merger", 15, now_ms=21 * MIN) == (90.0, 20 * MIN)
+
+    assert idx.stats()["threads"] == 2
+    idx.mark("TSLA|recall", 70, ts_ms=34 * MIN)                     # 0 分钟的桶过期；NVDA 20 分钟时又推过，保留
+    assert idx.stats()["threads"] == 3
+    idx.mark("TSLA|recall", 70, ts_ms=45 * MIN)                     # 5 分钟的桶过期：AMD 被删
+    assert idx.stats()["threads"] == 2 and not idx.is_recent("AMD|merger", 60, now_ms=45 * MIN)
+    assert idx.last("NVDA|merger", 30, now_ms=45 * MIN) == (90.0, 20 * MIN)
+    assert idx.stats()["buckets"] == 3
+
+
+def test_retention_grows_and_load():
+    idx = ThreadIndex(retention_minutes=10)
+    assert not idx.is_recent("A|x", 45, now_ms=0)
+    assert idx.stats()["retention_minutes"] == 45
+    idx.mark("A|x", 80, ts_ms=0)
+    assert idx.is_recent("A|x", 45, now_ms=40 * MIN)
+
+    n = idx.load([("B|y", 70, 100 * MIN), ("C|z", 75, 30 * MIN), ("", 99, 100 * MIN), ("B|y", 60, 90 * MIN)],
+                 now_ms=100 * MIN)
+    assert n == 1 and idx.last("B|y", 45, now_ms=100 * MIN) == (70.0, 100 * MIN)  # 按时间重放，最新的胜出
+    assert not idx.is_recent("A|x", 45, now_ms=100 * MIN)                          # 旧记录清空
+
+
+def test_load_pushed_threads_and_warmup():
+    async def run(path):
+        db = await init_db(path)
+        try:
+            now = now_ms()
+            await insert_events(db, [_event(1, "NVDA|merger", 80, 1, now - 5 * MIN),
+                                     _event(2, "NVDA|merger", 95, 1, now - MIN),
+                                     _event(3, "AMD|merger", 90, 0, now),          # 没推送过
+                                     _event(4, "TSLA|recall", 85, 1, now - 3 * 60 * MIN),  # 窗口外
+                                     _event(5, "", 85, 1, now)])
+            rows = await load_pushed_threads(db, now - 60 * MIN)
+            pushed = await _run_scorer(db, [])   # 只为触发启动预热
+            return rows, pushed, shared_thread_index().last("NVDA|merger", 15)
+        finally:
+            await db.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows, pushed, last = asyncio.run(run(os.path.join(tmp, "t.db")))
+    assert [(k, s) for k, s, _ in rows] == [("NVDA|merger", 95.0)], rows
+    assert pushed == [] and last is not None and last[0] == 95.0
+
+
+async def _run_scorer(db, raws, during=None):
+    q_in: asyncio.Queue = asyncio.Queue()
+    q_out: asyncio.Queue = asyncio.Queue()
+    old = scorer._scorer_config.snapshot
+    scorer._scorer_config.snapshot = SNAPSHOT
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            task = asyncio.create_task(run_scorer(q_in, q_out, db, batch_size=8))
+            await asyncio.sleep(0.05)  # 等启动预热完成
+            for batch in raws:
+                if during is not None:
+                    await during(q_out)
+                for raw in batch:
+                    q_in.put_nowait(raw)
+                while not q_in.empty():
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0.05)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    finally:
+        scorer._scorer_config.snapshot = old
+    return [q_out.get_nowait().headline for _ in range(q_out.qsize())]
+
+
+def test_notifier_and_scorer_share_index():
+    now = now_ms()
+
+    def raw(i, headline):
+        return {"headline": headline, "link": f"https://x/{i}", "source_id": "s", "ts_published": now}
+
+    notifier = Notifier({"notifier": {"translate_to_zh": False, "dedupe_minutes": 30}})
+    delivered = []
+
+    async def deliver(q_out):
+        # 像 run_notifier_loop 一样把 scorer 的输出交给 notifier
+        while not q_out.empty():
+            ev = q_out.get_nowait()
+            if await notifier.push(ev):
+                delivered.append(ev.headline)
+
+    async def run(path):
+        db = await init_db(path)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                await _run_scorer(db, [[raw(1, "NVDA merger talks")],
+                                       [raw(2, "NVDA merger confirmed"), raw(3, "AMD merger rumor")],
+                                       []], during=deliver)
+        finally:
+            await db.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "t.db")))
+    # 第二批时 NVDA|merger 已由 notifier 记下，scorer 直接节流，不再进通知队列
+    assert delivered == ["NVDA merger talks", "AMD merger rumor"], delivered
+    assert notifier._is_duplicated(_event(9, "AMD|merger", 80))
+    assert not notifier._is_duplicated(_event(9, "AMD|merger", 99))
+
+
+if __name__ == "__main__":
+    test_window_and_bucket_expiry()
+    test_retention_grows_and_load()
+    test_load_pushed_threads_and_warmup()
+    test_notifier_and_scorer_share_index()
+    print("OK ✅")
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_workers.py
+验证 app/workers.py 的解析执行池：
+1) inline / thread / process 三种模式跑同一个解析器，结果完全一致；确实在池里（别的线程 / 进程）执行
+2) 小于 inline_below_bytes 的输入就地执行；未知模式退回 inline
+3) 执行池不可用时 run_cpu 退回 inline：池被关掉（提交即失败）、工作进程崩溃（BrokenProcessPool）
+用法：python tests/test_workers.py  或  pytest tests/test_workers.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import threading
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app import workers
+from app.parsers import get_parser, run_parser
+
+FEED = open(os.path.join(ROOT_DIR, "tests", "fixtures", "feeds", "rss2_news.xml"), "rb").read()
+
+
+def _die_in_child(parent_pid):
+    """在工作进程里直接退出（模拟被 OOM 杀掉），在主进程里正常返回。"""
+    if os.getpid() != parent_pid:
+        os._exit(1)
+    return "inline"
+
+
+def _run(mode, body, inline_below=0):
+    async def run():
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            workers.configure(mode, 2, inline_below)
+            try:
+                return await body(), out.getvalue()
+            finally:
+                workers.shutdown()
+    return asyncio.run(run())
+
+
+def test_modes_same_result():
+    spec = get_parser("rss_stream")
+    assert spec.cpu_heavy
+
+    async def body():
+        items = await run_parser(spec, FEED, "feed", limit=50)
+        return items, workers.mode(), await workers.run_cpu(threading.get_ident), await workers.run_cpu(os.getpid)
+
+    results = {mode: _run(mode, body)[0] for mode in workers.MODES}
+    inline, thread, process = (results[m] for m in workers.MODES)
+    assert inline[0] and inline[0] == thread[0] == process[0]
+    assert [r[1] for r in (inline, thread, process)] == list(workers.MODES)
+    assert inline[2] == threading.get_ident() and thread[2] != threading.get_ident()
+    assert thread[3] == os.getpid() and process[3] != os.getpid()
+
+
+def test_inline_below_and_unknown_mode():
+    async def body():
+        return await workers.run_cpu(os.getpid, size=100), await workers.run_cpu(os.getpid, size=10_000)
+
+    (small, big), _ = _run("process", body, inline_below=4096)
+    assert small == os.getpid() and big != os.getpid()
+
+    async def unknown():
+        return workers.mode()
+
+    assert _run("gpu", unknown) == ("inline", "[workers] 未知 parse_mode='gpu'，退回 inline\n")
+
+
+def test_fallback_when_pool_shut_down():
+    async def body():
+        workers._executor.shutdown(wait=True)           # 池在别处被关掉，句柄还在
+        return await workers.run_cpu(threading.get_ident), workers.mode(), workers._executor
+
+    (ident, mode, executor), out = _run("thread", body)
+    assert ident == threading.get_ident() and mode == "inline" and executor is None
+    assert "退回 inline" in out
+
+
+def test_fallback_when_worker_dies():
+    async def body():
+        first = await workers.run_cpu(_die_in_child, os.getpid())
+        return first, workers.mode(), await workers.run_cpu(os.getpid)
+
+    (first, mode, pid), out = _run("process", body)
+    assert first == "inline" and mode == "inline" and pid == os.getpid()
+    assert "BrokenProcessPool" in out
+
+
+if __name__ == "__main__":
+    test_modes_same_result()
+    test_inline_below_and_unknown_mode()
+    test_fallback_when_pool_shut_down()
+    test_fallback_when_worker_dies()
+    print("OK ✅")
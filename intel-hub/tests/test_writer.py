@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_writer.py
+验证 app/writer.py 的单写者（StorageWriter）：
+1) 突发写入按组提交：提交次数远少于操作数；Future 完成时另一条连接已能读到
+2) 操作按入队顺序执行：upsert → mark_pushed → 再 upsert 不会把 pushed 改回 0；delete_expired 返回删除行数
+3) 组里有坏操作时只有它的 Future 失败，其余照常提交
+4) 队列有界：满了 put 会等；close() 前已入队的都会提交
+5) run_scorer 经 writer 入库，推送前等提交完成
+6) 写协程意外退出（连接被关）：排队中的 Future 失败，新写操作直接抛错，close() 不会卡住
+7) 采集器走 connect_db 的独立连接：写者组提交失败回滚时，采集器同时写的源状态 / 已见条目不受影响
+用法：python tests/test_writer.py  或  pytest tests/test_writer.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import yaml
+
+from app import scorer
+from app.models import Event
+from app.scorer import build_snapshot, run_scorer
+from app.storage import connect_db, get_recent_events, init_db, load_seen, load_source_states, save_seen, save_source_state
+from app.utils import now_ms
+from app.writer import StorageWriter
+
+
+def _event(i, expires=None, pushed=0, eid=None):
+    now = now_ms()
+    return Event(id=eid or f"e{i}", ts_detected_utc=now, ts_published_utc=now, headline=f"h{i}", source="s",
+                 link=f"https://x/{i}", market="us", symbols="", categories="", tags="", score=50.0,
+                 pushed=pushed, expires_at_utc=expires if expires is not None else now + 3600_000,
+                 thread_key=f"t{i}")
+
+
+def _with_db(fn):
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "w.db")
+            db = await init_db(path)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return await fn(db, path)
+            finally:
+                await db.close()
+    return asyncio.run(run())
+
+
+def test_group_commit_and_durability():
+    async def body(db, path):
+        w = StorageWriter(db, group_ops=64, group_ms=20)
+        w.start()
+        futs = [await w.upsert([_event(i)]) for i in range(500)]
+        assert await asyncio.gather(*futs) == [1] * 500
+        other = sqlite3.connect(path)  # 另一条连接：Future 完成即已提交
+        n = other.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        other.close()
+        await w.close()
+        return n, w.stats()
+
+    n, st = _with_db(body)
+    assert n == 500 and st["ops"] == 500 and st["failed"] == 0
+    assert st["commits"] <= 500 // 64 + 2, st
+
+
+def test_ops_keep_order():
+    async def body(db, path):
+        w = StorageWriter(db, group_ms=50)
+        w.start()
+        await w.upsert([_event(1), _event(2, expires=1)])
+        await w.mark_pushed("e1")
+        await w.upsert([_event(1)])               # pushed=0 的重复写入不回退
+        deleted = await (await w.delete_expired(now_ms()))
+        await w.close()
+        rows = {r["id"]: r for r in await get_recent_events(db)}
+        return deleted, rows, w.stats()
+
+    deleted, rows, st = _with_db(body)
+    assert deleted == 1 and list(rows) == ["e1"] and rows["e1"]["pushed"] == 1
+    assert st["commits"] == 1, st
+
+
+def test_bad_op_fails_alone():
+    async def body(db, path):
+        await db.execute("CREATE TRIGGER no_bad BEFORE INSERT ON events WHEN NEW.id = 'bad' "
+                         "BEGIN SELECT RAISE(ABORT, 'bad row'); END;")
+        w = StorageWriter(db, group_ms=50)
+        w.start()
+        good1 = await w.upsert([_event(1)])
+        bad = await w.upsert([_event(2, eid="bad"), _event(3)])
+        good2 = await w.mark_pushed("e1")
+        results = await asyncio.gather(good1, bad, good2, return_exceptions=True)
+        await w.close()
+        return results, sorted(r["id"] for r in await get_recent_events(db)), w.stats()
+
+    (r1, r2, r3), ids, st = _with_db(body)
+    assert r1 == 1 and isinstance(r2, sqlite3.IntegrityError) and r3 == 1
+    assert ids == ["e1"] and st["failed"] == 1
+
+
+def test_bounded_queue_and_close_flushes():
+    async def body(db, path):
+        w = StorageWriter(db, queue_size=2)
+        await w.upsert([_event(1)])
+        await w.upsert([_event(2)])
+        blocked = asyncio.create_task(w.upsert([_event(3)]))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()   # 写协程没启动，队列满了
+        w.start()
+        await blocked
+        await w.close()
+        return len(await get_recent_events(db))
+
+    assert _with_db(body) == 3
+
+
+def test_run_scorer_through_writer():
+    snap = build_snapshot({
+        "config.yml": b"important_threshold: 70\n",
+        "keywords.yml": yaml.safe_dump({"tiers": {"tier1": ["merger"]}}).encode(),
+        "topics.yml": b"{}",
+        "universe.yml": b"watchlist: [NVDA]\n",
+    }, version=1)
+
+    async def body(db, path):
+        now = now_ms()
+        w = StorageWriter(db, group_ms=5)
+        w.start()
+        q_in: asyncio.Queue = asyncio.Queue()
+        q_out: asyncio.Queue = asyncio.Queue()
+        for i, h in enumerate(["NVDA merger talks", "Weather is fine", "AMD merger"]):
+            q_in.put_nowait({"headline": h, "link": f"https://x/{i}", "source_id": "s", "ts_published": now})
+        old = scorer._scorer_config.snapshot
+        scorer._scorer_config.snapshot = snap
+        try:
+            task = asyncio.create_task(run_scorer(q_in, q_out, db, batch_size=8, writer=w))
+            ev = await asyncio.wait_for(q_out.get(), 5)
+            other = sqlite3.connect(path)  # 推送出来时已经落库
+            stored = other.execute("SELECT COUNT(*) FROM events WHERE id = ?", (ev.id,)).fetchone()[0]
+            other.close()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        finally:
+            scorer._scorer_config.snapshot = old
+        await w.close()
+        return ev.headline, stored, len(await get_recent_events(db))
+
+    assert _with_db(body) == ("NVDA merger talks", 1, 3)
+
+
+def test_close_does_not_hang_when_writer_died():
+    async def body(db, path):
+        wdb = await connect_db(path)
+        w = StorageWriter(wdb, group_ms=0)
+        w.start()
+        assert await (await w.upsert([_event(1)])) == 1
+        await wdb.close()                                 # 连接没了：执行、回滚都失败，写协程退出
+        futs = [await w.upsert([_event(i)]) for i in range(2, 5)]
+        results = await asyncio.gather(*futs, return_exceptions=True)
+        try:
+            await w.upsert([_event(9)])
+            late = None
+        except RuntimeError as e:
+            late = e
+        await asyncio.wait_for(w.close(), 2)
+        return results, late
+
+    results, late = _with_db(body)
+    assert len(results) == 3 and all(isinstance(r, Exception) for r in results)
+    assert isinstance(late, RuntimeError)
+
+
+def test_collector_connection_survives_writer_rollback():
+    async def body(db, path):
+        await db.execute("CREATE TRIGGER no_bad BEFORE INSERT ON events WHEN NEW.id LIKE 'bad%' "
+                         "BEGIN SELECT RAISE(ABORT, 'bad row'); END;")
+        cdb = await connect_db(path)
+        w = StorageWriter(db, group_ms=2)
+        w.start()
+
+        async def collect():
+            for i in range(30):
+                await save_source_state(cdb, f"src{i}", {"etag": f'"{i}"'})
+                await save_seen(cdb, [(f"src{i}", i, now_ms())])
+                await asyncio.sleep(0)
+
+        async def score():
+            futs = []
+            for i in range(30):
+                futs.append(await w.upsert([_event(i)]))
+                futs.append(await w.upsert([_event(i, eid=f"bad{i}")]))
+                await asyncio.sleep(0)
+            return await asyncio.gather(*futs, return_exceptions=True)
+
+        try:
+            _, results = await asyncio.gather(collect(), score())
+            await w.close()
+            async with cdb.execute("PRAGMA synchronous") as cur:
+                sync = (await cur.fetchone())[0]
+        finally:
+            await cdb.close()
+        return (results, len(await load_source_states(db)), len(await load_seen(db, 0)),
+                len(await get_recent_events(db, limit=1000)), sync)
+
+    results, states, seen, events, sync = _with_db(body)
+    assert sum(isinstance(r, Exception) for r in results) == 30
+    assert (states, seen, events, sync) == (30, 30, 30, 1)
+
+
+if __name__ == "__main__":
+    test_group_commit_and_durability()
+    test_ops_keep_order()
+    test_bad_op_fails_alone()
+    test_bounded_queue_and_close_flushes()
+    test_run_scorer_through_writer()
+    test_close_does_not_hang_when_writer_died()
+    test_collector_connection_survives_writer_rollback()
+    print("OK ✅")